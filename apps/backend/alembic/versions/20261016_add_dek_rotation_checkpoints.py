@@ -0,0 +1,55 @@
+"""add dek_rotation_checkpoints table
+
+Revision ID: 20261016_add_dek_rotation_checkpoints
+Revises: 20261016_add_monthly_rollups
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_add_dek_rotation_checkpoints"
+down_revision: Union[str, Sequence[str], None] = "20261016_add_monthly_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create dek_rotation_checkpoints (one row per committed rotation range)."""
+    op.create_table(
+        "dek_rotation_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("target_label", sa.String(32), nullable=False),
+        sa.Column("source_label", sa.String(32), nullable=False),
+        sa.Column("range_start", sa.Integer(), nullable=False),
+        sa.Column("range_end", sa.Integer(), nullable=False),
+        sa.Column("scanned", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "completed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.UniqueConstraint(
+            "target_label", "range_start", name="uq_dek_rotation_checkpoint_range"
+        ),
+    )
+    op.create_index(
+        "ix_dek_rotation_checkpoints_target_label",
+        "dek_rotation_checkpoints",
+        ["target_label"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_dek_rotation_checkpoints_target_label",
+        table_name="dek_rotation_checkpoints",
+    )
+    op.drop_table("dek_rotation_checkpoints")
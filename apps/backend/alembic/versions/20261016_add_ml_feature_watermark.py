@@ -0,0 +1,48 @@
+"""add ml_feature_watermarks and index transactions.updated_at
+
+Supports the incremental ml_features builder (app.ml.feature_sync), which
+reads transactions changed past a stored (updated_at, id) watermark.
+
+Revision ID: 20261016_add_ml_feature_watermark
+Revises: 20261016_add_txn_text_search
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_add_ml_feature_watermark"
+down_revision: Union[str, Sequence[str], None] = "20261016_add_txn_text_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the watermark table and the updated_at index.
+
+    No backfill: the first `python -m app.ml.feature_build --incremental` run
+    starts from an empty watermark and processes every transaction once.
+    """
+    op.create_table(
+        "ml_feature_watermarks",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("last_updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_txn_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "rows_processed", sa.BigInteger(), nullable=False, server_default="0"
+        ),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_transactions_updated_at", "transactions", ["updated_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_updated_at", table_name="transactions")
+    op.drop_table("ml_feature_watermarks")
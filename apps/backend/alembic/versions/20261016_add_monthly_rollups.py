@@ -0,0 +1,116 @@
+"""add monthly_rollups table
+
+Revision ID: 20261016_add_monthly_rollups
+Revises: 5558c97ee45b
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_add_monthly_rollups"
+down_revision: Union[str, Sequence[str], None] = "5558c97ee45b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of charts_data.income_case / spend_case at this revision
+_CAT = "LOWER(COALESCE(category, ''))"
+_MERC = "LOWER(COALESCE(merchant, ''))"
+_DESC = "LOWER(COALESCE(description, ''))"
+_RAWCAT = "LOWER(COALESCE(raw_category, ''))"
+_TRANSFER = " OR ".join(
+    f"{c} LIKE '%transfer%'" for c in (_CAT, _RAWCAT, _MERC, _DESC)
+)
+_INCOME_KW = " OR ".join(
+    [
+        f"{_MERC} LIKE '%{k}%'"
+        for k in (
+            "employer",
+            "payroll",
+            "salary",
+            "paycheck",
+            "payout",
+            "reimbursement",
+            "refund",
+        )
+    ]
+    + [f"{_DESC} LIKE '%{k}%'" for k in ("reimbursement", "refund")]
+)
+_IS_INCOME = f"NOT ({_TRANSFER}) AND ({_CAT} = 'income' OR {_INCOME_KW})"
+_IS_SPEND = f"NOT ({_TRANSFER}) AND NOT ({_INCOME_KW}) AND {_CAT} <> 'income'"
+_GROUP = "user_id, month, pending, category, merchant, merchant_canonical"
+
+_BACKFILL = f"""
+INSERT INTO monthly_rollups (
+    {_GROUP}, txn_count, income, spend, income_net, spend_net,
+    inflow, outflow, outflow_count, sample_description
+)
+SELECT
+    {_GROUP},
+    COUNT(*),
+    COALESCE(SUM(CASE WHEN {_IS_INCOME} THEN ABS(amount) ELSE 0.0 END), 0.0),
+    COALESCE(SUM(CASE WHEN {_IS_SPEND} THEN ABS(amount) ELSE 0.0 END), 0.0),
+    COALESCE(SUM(CASE WHEN {_IS_INCOME} THEN amount ELSE 0.0 END), 0.0),
+    COALESCE(SUM(CASE WHEN {_IS_SPEND} THEN amount ELSE 0.0 END), 0.0),
+    COALESCE(SUM(CASE WHEN amount >= 0 THEN amount ELSE 0.0 END), 0.0),
+    COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0.0 END), 0.0),
+    COALESCE(SUM(CASE WHEN amount < 0 THEN 1 ELSE 0 END), 0),
+    MAX(description)
+FROM transactions
+WHERE month IS NOT NULL
+GROUP BY {_GROUP}
+"""
+
+
+def upgrade() -> None:
+    """Create monthly_rollups and backfill it from existing transactions.
+
+    The table is maintained incrementally by app.services.monthly_rollups; the
+    backfill here is equivalent to `python -m app.cli rollups-rebuild` at this
+    revision (the income/spend heuristics are frozen in _BACKFILL).
+    """
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("month", sa.String(7), nullable=False),
+        sa.Column("pending", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("category", sa.String(128), nullable=True),
+        sa.Column("merchant", sa.String(256), nullable=True),
+        sa.Column("merchant_canonical", sa.String(256), nullable=True),
+        sa.Column("txn_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("income", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("spend", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("income_net", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("spend_net", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("inflow", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("outflow", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("outflow_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sample_description", sa.Text(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_monthly_rollups_user_month", "monthly_rollups", ["user_id", "month"]
+    )
+    op.execute(_BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_monthly_rollups_user_month", table_name="monthly_rollups")
+    op.drop_table("monthly_rollups")
@@ -0,0 +1,90 @@
+"""add trigram text search indexes on transactions
+
+Postgres: pg_trgm GIN indexes on merchant, merchant_canonical, description and
+category so the ILIKE '%term%' filters used by NL queries, transaction search
+and exports are index scans. SQLite: FTS5 trigram table transactions_fts plus
+sync triggers. The DDL is inlined so the migration stays fixed if
+app.services.txn_search changes later.
+
+Revision ID: 20261016_add_txn_text_search
+Revises: 20261016_add_dek_rotation_checkpoints
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_add_txn_text_search"
+down_revision: Union[str, Sequence[str], None] = "20261016_add_dek_rotation_checkpoints"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of app.services.txn_search's schema at this revision
+_COLS = ("merchant", "merchant_canonical", "description", "category")
+_FTS = "transactions_fts"
+_cols = ", ".join(_COLS)
+_new = ", ".join(f"new.{c}" for c in _COLS)
+_old = ", ".join(f"old.{c}" for c in _COLS)
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {_FTS} USING fts5("
+    f"{_cols}, content='transactions', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {_FTS}_ai AFTER INSERT ON transactions BEGIN "
+    f"INSERT INTO {_FTS}(rowid, {_cols}) VALUES (new.id, {_new}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {_FTS}_ad AFTER DELETE ON transactions BEGIN "
+    f"INSERT INTO {_FTS}({_FTS}, rowid, {_cols}) "
+    f"VALUES ('delete', old.id, {_old}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {_FTS}_au AFTER UPDATE OF {_cols} "
+    f"ON transactions BEGIN "
+    f"INSERT INTO {_FTS}({_FTS}, rowid, {_cols}) "
+    f"VALUES ('delete', old.id, {_old}); "
+    f"INSERT INTO {_FTS}(rowid, {_cols}) VALUES (new.id, {_new}); END",
+)
+SQLITE_DROP = (
+    f"DROP TRIGGER IF EXISTS {_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {_FTS}_au",
+    f"DROP TABLE IF EXISTS {_FTS}",
+)
+PG_INDEXES = {f"ix_transactions_{c}_trgm": c for c in _COLS}
+
+
+def upgrade() -> None:
+    """Create the search indexes and populate them from existing rows.
+
+    Equivalent to `python -m app.cli txn-search-rebuild` on an existing index.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # CONCURRENTLY requires running outside the migration transaction
+        with op.get_context().autocommit_block():
+            for name, column in PG_INDEXES.items():
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON transactions USING GIN ({column} gin_trgm_ops)"
+                )
+    elif bind.dialect.name == "sqlite":
+        # Search falls back to ILIKE when SQLite lacks FTS5 trigram (< 3.34)
+        try:
+            for stmt in SQLITE_DDL:
+                bind.exec_driver_sql(stmt)
+            bind.exec_driver_sql(f"INSERT INTO {_FTS}({_FTS}) VALUES ('rebuild')")
+        except Exception:
+            for stmt in SQLITE_DROP:
+                bind.exec_driver_sql(stmt)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for name in PG_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+    elif bind.dialect.name == "sqlite":
+        for stmt in SQLITE_DROP:
+            bind.exec_driver_sql(stmt)
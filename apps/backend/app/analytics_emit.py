@@ -34,8 +34,9 @@ def emit_fallback(props: Dict[str, Any]) -> None:
         pass
     if ANALYTICS_DB:
         try:
-            from app.services.analytics_sink import store_event
+            from app.services import analytics_sink
 
-            store_event(record)
+            if not analytics_sink.enqueue(record):
+                analytics_sink.store_event(record)
         except Exception:
             pass
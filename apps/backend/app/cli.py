@@ -395,6 +395,24 @@ def cmd_txn_show_latest(args):
     )
 
 
+def cmd_rollups_rebuild(args):
+    from app.services import monthly_rollups
+
+    db: Session = next(get_db())
+    rows = monthly_rollups.rebuild(db, user_id=args.user_id)
+    db.commit()
+    print({"rollup_rows": rows, "user_id": args.user_id})
+
+
+def cmd_txn_search_rebuild(args):
+    from app.services import txn_search
+
+    db: Session = next(get_db())
+    status = txn_search.rebuild(db)
+    db.commit()
+    print({"txn_search": status})
+
+
 def cmd_kek_rewrap(args):
     """
     Rotate KEK (re-wrap only): leaves data encrypted with same DEK,
@@ -790,6 +808,18 @@ def main():
 
     sub.add_parser("txn-show-latest").set_defaults(fn=cmd_txn_show_latest)
 
+    rr = sub.add_parser(
+        "rollups-rebuild",
+        help="Recompute monthly_rollups from transactions (all users or one)",
+    )
+    rr.add_argument("--user-id", type=int, help="Only rebuild this user's rollups")
+    rr.set_defaults(fn=cmd_rollups_rebuild)
+
+    sub.add_parser(
+        "txn-search-rebuild",
+        help="Rebuild the transaction text search index (FTS5 / pg_trgm)",
+    ).set_defaults(fn=cmd_txn_search_rebuild)
+
     r = sub.add_parser("kek-rewrap")
     r.add_argument("--new-kek-b64", required=True)
     r.set_defaults(fn=cmd_kek_rewrap)
@@ -855,12 +885,20 @@ def main():
         "--max-batches",
         type=int,
         default=0,
-        help="0=one batch; N=run N batches then stop",
+        help="0=all pending batches; N=run N batches then stop (rerun resumes)",
     )
     r1.add_argument("--dry-run", action="store_true")
+    r1.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent batches (default DEK_ROTATION_WORKERS; SQLite runs serially)",
+    )
     r1.set_defaults(
         fn=lambda a: print(
-            run_rotation(a.new_label, a.batch_size, a.max_batches, a.dry_run)
+            run_rotation(
+                a.new_label, a.batch_size, a.max_batches, a.dry_run, a.workers
+            )
         )
     )
 
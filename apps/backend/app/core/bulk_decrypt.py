@@ -0,0 +1,231 @@
+"""Decrypt encrypted transaction columns in bulk.
+
+``load_plaintext`` (by id) and ``decrypt_transactions`` (rows already
+loaded) serve exports and listings. Cells are decrypted with the shared per-DEK cipher from
+``get_aead_for_label``. Large sets are split across a thread pool, and inside
+a ``plaintext_memo()`` block repeated reads of the same ciphertext return the
+memoized plaintext.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.crypto_state import get_aead_for_label
+
+TXN_AAD = b"txn:v1"
+# Logical field -> (nonce column, ciphertext column) on Transaction
+TXN_ENC_FIELDS: dict[str, tuple[str, str]] = {
+    "description": ("description_nonce", "description_enc"),
+    "merchant_raw": ("merchant_raw_nonce", "merchant_raw_enc"),
+    "note": ("note_nonce", "note_enc"),
+}
+
+# Below this many cells a thread pool costs more than it saves
+BULK_DECRYPT_THRESHOLD = int(os.getenv("BULK_DECRYPT_THRESHOLD", "20000"))
+BULK_DECRYPT_WORKERS = int(
+    os.getenv("BULK_DECRYPT_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PLAINTEXT_MEMO_SIZE = int(os.getenv("PLAINTEXT_MEMO_SIZE", "4096"))
+
+Cell = tuple[Optional[str], Any, Any]  # (enc_label, nonce, ciphertext)
+
+
+class PlaintextMemo:
+    """Bounded LRU of (label, nonce, ciphertext) -> plaintext."""
+
+    def __init__(self, max_entries: int = PLAINTEXT_MEMO_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._data: OrderedDict[tuple[str, bytes, bytes], str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: tuple[str, bytes, bytes]) -> Optional[str]:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple[str, bytes, bytes], value: str) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+_memo: ContextVar[Optional[PlaintextMemo]] = ContextVar("plaintext_memo", default=None)
+
+
+@contextmanager
+def plaintext_memo(max_entries: Optional[int] = None) -> Iterator[PlaintextMemo]:
+    """Memoize decrypted plaintext for the duration of the block.
+
+    Scope it to one request or job; the memo holds plaintext in memory and is
+    dropped on exit. Nested blocks reuse the outer memo.
+    """
+    current = _memo.get()
+    if current is not None:
+        yield current
+        return
+    memo = PlaintextMemo(max_entries or PLAINTEXT_MEMO_SIZE)
+    token = _memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _memo.reset(token)
+
+
+def _as_bytes(v: Any) -> bytes:
+    # Postgres drivers hand bytea back as memoryview, which is unhashable
+    return v if isinstance(v, bytes) else bytes(v)
+
+
+def decrypt_text(
+    label: Optional[str], nonce: Any, ct: Any, aad: bytes = TXN_AAD
+) -> Optional[str]:
+    """Decrypt one cell; ``None`` when either part is empty."""
+    if not ct or not nonce:
+        return None
+    label = label or "active"
+    memo = _memo.get()
+    if memo is None:
+        return get_aead_for_label(label).decrypt(nonce, ct, aad).decode("utf-8")
+    key = (label, _as_bytes(nonce), _as_bytes(ct))
+    pt = memo.get(key)
+    if pt is None:
+        pt = get_aead_for_label(label).decrypt(nonce, ct, aad).decode("utf-8")
+        memo.put(key, pt)
+    return pt
+
+
+def _decrypt_chunk(chunk: Sequence[tuple], aad: bytes) -> list[str]:
+    return [aead.decrypt(n, c, aad).decode("utf-8") for _, _, aead, n, c in chunk]
+
+
+def decrypt_many(
+    cells: Iterable[Cell],
+    *,
+    aad: bytes = TXN_AAD,
+    workers: Optional[int] = None,
+    threshold: Optional[int] = None,
+) -> list[Optional[str]]:
+    """Decrypt ``(enc_label, nonce, ciphertext)`` cells, preserving order.
+
+    DEKs are resolved once per label on the calling thread. With at least
+    ``threshold`` cells left after the memo, decryption is split across
+    ``workers`` threads. Any authentication failure propagates, as with the
+    per-row properties.
+    """
+    workers = BULK_DECRYPT_WORKERS if workers is None else workers
+    threshold = BULK_DECRYPT_THRESHOLD if threshold is None else threshold
+    cells = cells if isinstance(cells, list) else list(cells)
+    memo = _memo.get()
+    aeads: dict[Optional[str], Any] = {}
+    parallel = workers > 1 and len(cells) >= max(threshold, workers)
+
+    if memo is None and not parallel:
+        out: list[Optional[str]] = []
+        append = out.append
+        for label, nonce, ct in cells:
+            if not ct or not nonce:
+                append(None)
+                continue
+            aead = aeads.get(label)
+            if aead is None:
+                aead = aeads[label] = get_aead_for_label(label or "active")
+            append(aead.decrypt(nonce, ct, aad).decode("utf-8"))
+        return out
+
+    out = [None] * len(cells)
+    todo: list[tuple] = []
+    for i, (label, nonce, ct) in enumerate(cells):
+        if not ct or not nonce:
+            continue
+        label = label or "active"
+        if memo is not None:
+            nonce, ct = _as_bytes(nonce), _as_bytes(ct)
+            hit = memo.get((label, nonce, ct))
+            if hit is not None:
+                out[i] = hit
+                continue
+        aead = aeads.get(label)
+        if aead is None:
+            aead = aeads[label] = get_aead_for_label(label)
+        todo.append((i, label, aead, nonce, ct))
+
+    if workers > 1 and len(todo) >= max(threshold, workers):
+        size = -(-len(todo) // workers)
+        chunks = [todo[j : j + size] for j in range(0, len(todo), size)]
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_decrypt_chunk, chunks, [aad] * len(chunks)))
+        plain = [pt for part in parts for pt in part]
+    else:
+        plain = _decrypt_chunk(todo, aad)
+
+    for (i, label, _, nonce, ct), pt in zip(todo, plain):
+        out[i] = pt
+        if memo is not None:
+            memo.put((label, nonce, ct), pt)
+    return out
+
+
+def decrypt_transactions(
+    rows: Sequence[Any],
+    fields: Sequence[str] = tuple(TXN_ENC_FIELDS),
+    **kwargs: Any,
+) -> list[dict[str, Optional[str]]]:
+    """Plaintext ``{field: value}`` per row for Transaction objects or rows
+    that carry the ``*_enc``/``*_nonce`` columns and ``enc_label``."""
+    cols = [c for f in fields for c in TXN_ENC_FIELDS[f]]
+    get = attrgetter("enc_label", *cols)
+    cells: list[Cell] = []
+    for r in rows:
+        v = get(r)
+        cells.extend((v[0], v[k], v[k + 1]) for k in range(1, len(v), 2))
+    flat = decrypt_many(cells, **kwargs)
+    width = len(fields)
+    return [
+        dict(zip(fields, flat[k * width : (k + 1) * width])) for k in range(len(rows))
+    ]
+
+
+def load_plaintext(
+    db: Session,
+    ids: Iterable[int],
+    fields: Sequence[str] = tuple(TXN_ENC_FIELDS),
+    chunk: int = 1000,
+    **kwargs: Any,
+) -> dict[int, dict[str, Optional[str]]]:
+    """Decrypt ``fields`` for transaction ids without loading ORM objects."""
+    from app.orm_models import Transaction
+
+    ids = list(ids)
+    cols = [getattr(Transaction, c) for f in fields for c in TXN_ENC_FIELDS[f]]
+    rows = []
+    for i in range(0, len(ids), chunk):
+        rows.extend(
+            db.execute(
+                select(Transaction.id, Transaction.enc_label, *cols).where(
+                    Transaction.id.in_(ids[i : i + chunk])
+                )
+            ).all()
+        )
+    return {
+        r.id: plain
+        for r, plain in zip(rows, decrypt_transactions(rows, fields, **kwargs))
+    }
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from typing import Optional
-from app.services.crypto import EnvelopeCrypto
+from app.services.crypto import EnvelopeCrypto, aead_for
 import os
 import base64
 import time
+from contextlib import contextmanager
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
@@ -29,10 +30,23 @@ _dek: Optional[bytes] = None
 
 # New: per-label DEK cache and dynamic write label cache
 _deks: dict[str, bytes] = {}
+_aeads: dict[str, AESGCM] = {}
 _write_label_cache = {"label": None, "ts": 0.0}
 _WRITE_LABEL_TTL = float(os.getenv("WRITE_LABEL_TTL_SEC", "3"))
 
 
+@contextmanager
+def _session():
+    # Close the session as soon as the lookup is done instead of leaving the
+    # connection checked out until the generator is garbage-collected.
+    gen = get_db()
+    db: Session = next(gen)
+    try:
+        yield db
+    finally:
+        gen.close()
+
+
 def _kek_b64() -> str:
     return (
         os.getenv("MASTER_KEK_B64") or os.getenv("ENCRYPTION_MASTER_KEY_BASE64") or ""
@@ -108,13 +122,13 @@ def get_dek_for_label(label: str) -> bytes:
     """Return (and cache) DEK for a label by unwrapping from encryption_keys."""
     if label in _deks:
         return _deks[label]
-    db: Session = next(get_db())
-    row = db.execute(
-        text(
-            "SELECT dek_wrapped, dek_wrap_nonce FROM encryption_keys WHERE label=:l ORDER BY created_at DESC LIMIT 1"
-        ),
-        {"l": label},
-    ).first()
+    with _session() as db:
+        row = db.execute(
+            text(
+                "SELECT dek_wrapped, dek_wrap_nonce FROM encryption_keys WHERE label=:l ORDER BY created_at DESC LIMIT 1"
+            ),
+            {"l": label},
+        ).first()
     if not row:
         raise RuntimeError(f"DEK not found for label {label!r}")
     dek = _unwrap_for_row(None, row.dek_wrap_nonce, row.dek_wrapped)
@@ -122,13 +136,24 @@ def get_dek_for_label(label: str) -> bytes:
     return dek
 
 
+def get_aead_for_label(label: str) -> AESGCM:
+    """Return the shared AESGCM instance for a label's DEK."""
+    aead = _aeads.get(label)
+    if aead is None:
+        aead = _aeads[label] = aead_for(get_dek_for_label(label))
+    return aead
+
+
 def purge_dek_cache(*labels: str) -> None:
-    """Drop cached DEKs for provided labels (or all if none given)."""
+    """Drop cached DEKs (and their ciphers) for provided labels (or all if none given)."""
+    aead_for.cache_clear()
     if labels:
         for label in labels:
             _deks.pop(label, None)
+            _aeads.pop(label, None)
         return
     _deks.clear()
+    _aeads.clear()
 
 
 def get_write_label() -> str:
@@ -139,10 +164,10 @@ def get_write_label() -> str:
         and now - _write_label_cache["ts"] < _WRITE_LABEL_TTL
     ):
         return _write_label_cache["label"]
-    db: Session = next(get_db())
-    row = db.execute(
-        text("SELECT write_label FROM encryption_settings WHERE id=1")
-    ).first()
+    with _session() as db:
+        row = db.execute(
+            text("SELECT write_label FROM encryption_settings WHERE id=1")
+        ).first()
     label = row.write_label if row and row.write_label else "active"
     _write_label_cache.update(label=label, ts=now)
     return label
@@ -151,27 +176,27 @@ def get_write_label() -> str:
 def set_write_label(new_label: str) -> None:
     """Set write label globally and warm DEK cache for the label."""
     purge_dek_cache(new_label)
-    db: Session = next(get_db())
-    # DB-agnostic upsert: try update first, then insert if no row
-    res = db.execute(
-        text("UPDATE encryption_settings SET write_label=:l WHERE id=1"),
-        {"l": new_label},
-    )
-    if getattr(res, "rowcount", 0) == 0:
-        try:
-            db.execute(
-                text(
-                    "INSERT INTO encryption_settings (id, write_label) VALUES (1, :l)"
-                ),
-                {"l": new_label},
-            )
-        except Exception:
-            # If raced, fallback to update
-            db.execute(
-                text("UPDATE encryption_settings SET write_label=:l WHERE id=1"),
-                {"l": new_label},
-            )
-    db.commit()
+    with _session() as db:
+        # DB-agnostic upsert: try update first, then insert if no row
+        res = db.execute(
+            text("UPDATE encryption_settings SET write_label=:l WHERE id=1"),
+            {"l": new_label},
+        )
+        if getattr(res, "rowcount", 0) == 0:
+            try:
+                db.execute(
+                    text(
+                        "INSERT INTO encryption_settings (id, write_label) VALUES (1, :l)"
+                    ),
+                    {"l": new_label},
+                )
+            except Exception:
+                # If raced, fallback to update
+                db.execute(
+                    text("UPDATE encryption_settings SET write_label=:l WHERE id=1"),
+                    {"l": new_label},
+                )
+        db.commit()
     _write_label_cache.update(label=new_label, ts=time.monotonic())
     try:
         _ = get_dek_for_label(new_label)
@@ -8,8 +8,7 @@ from .db import Base, engine
 from sqlalchemy import inspect
 from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response, PlainTextResponse
+from starlette.responses import Response
 from starlette.middleware.sessions import SessionMiddleware
 
 # Proxy headers middleware location differs across versions; try Starlette then fallback to Uvicorn
@@ -124,8 +123,7 @@ from app.services.crypto import EnvelopeCrypto
 from app.core.crypto_state import set_crypto, set_active_label
 from app.db import SessionLocal
 from app.core.crypto_state import load_and_cache_active_dek
-from app.middleware.request_logging import RequestLogMiddleware
-from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.asgi_stack import BodyLimitMiddleware, RequestStackMiddleware
 from datetime import datetime, timezone
 
 try:  # Prefer ultra-fast orjson if present
@@ -135,26 +133,11 @@ except Exception:  # pragma: no cover - fallback
 
 logger = logging.getLogger(__name__)
 
-_LLM_PATH_MIDDLEWARE_ATTACHED = (
-    False  # guard to avoid duplicate registration under reloads
-)
 
 # Global upload size limit (fail-fast at ASGI level)
 MAX_UPLOAD_MB = 5
-
-
-class LimitBodySizeMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Only guard ingest (cheap path check)
-        if request.url.path.startswith("/ingest"):
-            cl = request.headers.get("content-length")
-            try:
-                size = int(cl) if cl else None
-            except ValueError:
-                size = None
-            if size is not None and size > MAX_UPLOAD_MB * 1024 * 1024:
-                return PlainTextResponse("Request Entity Too Large", status_code=413)
-        return await call_next(request)
+# Set when APP_ENV=prod below; enables RequestStackMiddleware's JSON log lines
+_LOG_REQUESTS = False
 
 
 # Sanitize and log DB connection origin (dev aid only; omits password)
@@ -303,29 +286,8 @@ if settings.APP_ENV == "prod" or settings.ENV == "prod":
             "These settings are ignored in prod for security. Please remove them from production config."
         )
 
-# Attach LLM path injection middleware (after final app instantiation)
-from fastapi import Request as _FastRequest
-
-if not _LLM_PATH_MIDDLEWARE_ATTACHED:  # pragma: no cover - simple guard
-
-    @app.middleware("http")
-    async def _ensure_llm_path_header(
-        request: _FastRequest, call_next
-    ):  # pragma: no cover - exercised via tests
-        if not hasattr(request.state, "llm_path"):
-            request.state.llm_path = "unknown"
-        response = await call_next(request)
-        if "X-LLM-Path" not in response.headers:
-            response.headers["X-LLM-Path"] = getattr(
-                request.state, "llm_path", "unknown"
-            )
-        return response
-
-    _LLM_PATH_MIDDLEWARE_ATTACHED = True
-
 # Fail fast immediately if DB misconfigured (after app exists)
 require_db_or_exit()
-app.add_middleware(RequestIdMiddleware)  # must precede others for rid context
 
 # === OAuth Session Middleware ===
 # Session middleware for OAuth state management
@@ -387,8 +349,8 @@ try:
         from app.logging import configure_json_logging
 
         configure_json_logging("INFO")
-        # Request logging middleware (prod only)
-        app.add_middleware(RequestLogMiddleware)
+        # Per-request JSON log lines from RequestStackMiddleware (prod only)
+        _LOG_REQUESTS = True
         # Trust proxy headers from configured CIDRs/IP (prod only)
         cidrs_env = os.environ.get("TRUSTED_PROXY_CIDRS", "").strip()
         ips_env = os.environ.get("TRUSTED_PROXY_IP", "").strip()
@@ -458,7 +420,8 @@ def _create_tables_dev():
 # CORS allowlist from settings (defaults include 5173/5174 on localhost + 127.0.0.1)
 ALLOW_ORIGINS = app_config.ALLOW_ORIGINS
 
-app.add_middleware(LimitBodySizeMiddleware)
+# Inside CORS so a 413 still carries Access-Control-Allow-Origin
+app.add_middleware(BodyLimitMiddleware, max_body_bytes=MAX_UPLOAD_MB * 1024 * 1024)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOW_ORIGINS,  # Keep tight in prod via env
@@ -493,23 +456,13 @@ def get_config_snapshot():
     }
 
 
-class SecurityHeaders(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        resp: Response = await call_next(request)
-        resp.headers.setdefault("X-Content-Type-Options", "nosniff")
-        resp.headers.setdefault("X-Frame-Options", "DENY")
-        resp.headers.setdefault("Referrer-Policy", "strict-origin-when-cross-origin")
-        resp.headers.setdefault(
-            "Permissions-Policy", "geolocation=(), microphone=(), camera=()"
-        )
-        # Prefer HSTS at the TLS proxy; set here for completeness
-        resp.headers.setdefault(
-            "Strict-Transport-Security", "max-age=63072000; includeSubDomains; preload"
-        )
-        return resp
-
-
-app.add_middleware(SecurityHeaders)
+# Request id, logging, security headers, X-LLM-Path and per-route latency
+# metrics in one pure-ASGI layer (outermost of our stack).
+app.add_middleware(
+    RequestStackMiddleware,
+    router=app.router,
+    log_requests=_LOG_REQUESTS,
+)
 
 # Optional: Prometheus metrics (disable if not needed)
 _metrics_attached = False
@@ -814,6 +767,14 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass  # Metrics are optional
 
+    # Open shared keep-alive pools for outbound provider traffic
+    try:
+        from app.services import http_clients
+
+        http_clients.startup()
+    except Exception:
+        logger.warning("http_clients: startup failed", exc_info=True)
+
     # Start analytics retention loop in prod if enabled
     try:
         if os.environ.get("APP_ENV", os.environ.get("ENV", "dev")).lower() == "prod":
@@ -837,6 +798,18 @@ async def lifespan(app: FastAPI):
             interval = int(os.environ.get("HELP_CACHE_CLEANUP_INTERVAL_S", "1800"))
             t2 = asyncio.create_task(help_cache_cleanup_loop(interval))
             app.state._bg_tasks.append(t2)
+        # Buffered analytics event writer (only when the DB sink is enabled)
+        if os.environ.get("ANALYTICS_DB", "0") in ("1", "true", "True"):
+            from app.services.analytics_sink import batch_writer_loop
+
+            t3 = asyncio.create_task(batch_writer_loop())
+            app.state._bg_tasks.append(t3)
+        # Incremental ml_features builder (watermark-driven; opt-in)
+        if os.environ.get("ML_FEATURES_SYNC", "0") in ("1", "true", "True"):
+            from app.ml.feature_sync import feature_sync_loop
+
+            t4 = asyncio.create_task(feature_sync_loop())
+            app.state._bg_tasks.append(t4)
     except Exception:
         pass
     try:
@@ -847,10 +820,24 @@ async def lifespan(app: FastAPI):
             await _shutdown_save_state()
         except Exception:
             pass
+        # Persist feedback still queued in resident online learners
+        try:
+            from app.services.ml_online import flush_all
+
+            await asyncio.to_thread(flush_all)
+        except Exception:
+            pass
         for t in getattr(app.state, "_bg_tasks", []):
             t.cancel()
         if getattr(app.state, "_bg_tasks", []):
             await asyncio.gather(*app.state._bg_tasks, return_exceptions=True)
+        # Release pooled provider connections (LLM / embeddings / fetch)
+        try:
+            from app.services import http_clients
+
+            await http_clients.aclose_all()
+        except Exception:
+            pass
         # Dispose SQLAlchemy engine to close pooled connections (prevent ResourceWarnings).
         # Skip disposal for in-memory SQLite during test runs to avoid dropping ephemeral schema mid-suite.
         try:  # pragma: no cover - lifecycle cleanup
@@ -0,0 +1,212 @@
+"""Pure-ASGI request middleware stack.
+
+Replaces the ``BaseHTTPMiddleware`` chain (request id, request logging,
+security headers, X-LLM-Path) with one ASGI callable. It
+wraps ``send`` instead of buffering the response through a task/stream pair,
+so streaming endpoints (``/agent/stream``, report exports) pass through
+untouched and each request pays for one middleware hop instead of five.
+
+Per-route latency is recorded in ``http_route_latency_seconds{method,route,
+status}`` and concurrency in ``http_route_in_flight{method,route}``, where
+``route`` is the templated path (``/txns/{txn_id}``), not the raw URL, to keep
+label cardinality bounded. Paths that match no route share ``route="unmatched"``.
+
+The ingest body limit is a separate ``BodyLimitMiddleware`` registered inside
+CORS, so its 413 still carries the CORS headers browsers need to read it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import PlainTextResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.request_ctx import request_id as rid_ctx
+
+try:  # pragma: no cover - optional dependency
+    from prometheus_client import Gauge, Histogram  # type: ignore
+
+    _LATENCY = Histogram(
+        "http_route_latency_seconds",
+        "Request latency by templated route (until the last body chunk is sent)",
+        ["method", "route", "status"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    )
+    _IN_FLIGHT = Gauge(
+        "http_route_in_flight",
+        "Requests currently being processed by templated route",
+        ["method", "route"],
+    )
+except Exception:  # pragma: no cover - no prometheus
+    _LATENCY = None
+    _IN_FLIGHT = None
+
+log = logging.getLogger("req")
+
+SECURITY_HEADERS: Tuple[Tuple[str, str], ...] = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+    # Prefer HSTS at the TLS proxy; set here for completeness
+    ("Strict-Transport-Security", "max-age=63072000; includeSubDomains; preload"),
+)
+
+_UNMATCHED = "unmatched"
+_ROUTE_CACHE_MAX = 4096
+
+
+class RequestStackMiddleware:
+    """Request id, logging, security headers and route metrics.
+
+    ``router`` is the application's router, used to resolve the templated
+    route before dispatch. ``log_requests`` enables the per-request JSON log
+    line (prod).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        router: Any = None,
+        log_requests: bool = False,
+    ) -> None:
+        self.app = app
+        self.router = router
+        self.log_requests = log_requests
+        self._routes: Dict[Tuple[str, str], str] = {}
+
+    def _route_template(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        cached = self._routes.get(key)
+        if cached is not None:
+            return cached
+        template = None
+        partial = None
+        for route in getattr(self.router, "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = getattr(route, "path", None) or _UNMATCHED
+                break
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, "path", None)
+        if template is None:
+            # Not cached: routes may still be registered (tests) and 404
+            # scans would otherwise fill the cache with junk paths.
+            return partial or _UNMATCHED
+        if len(self._routes) >= _ROUTE_CACHE_MAX:
+            self._routes.clear()
+        self._routes[key] = template
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        headers = Headers(scope=scope)
+        rid = headers.get("x-request-id") or str(uuid.uuid4())
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = 500
+        # Shared with request.state so handlers can set llm_path for the header
+        scope.setdefault("state", {})
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                out = MutableHeaders(scope=message)
+                out["X-Request-ID"] = rid
+                for name, value in SECURITY_HEADERS:
+                    if name not in out:
+                        out[name] = value
+                if "X-LLM-Path" not in out:
+                    state = scope.get("state") or {}
+                    out["X-LLM-Path"] = str(state.get("llm_path", "unknown"))
+            await send(message)
+
+        if _IN_FLIGHT is not None:
+            _IN_FLIGHT.labels(method, route).inc()
+        token = rid_ctx.set(rid)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            try:
+                rid_ctx.reset(token)
+            except Exception:
+                pass
+            elapsed = time.perf_counter() - t0
+            if _IN_FLIGHT is not None:
+                _IN_FLIGHT.labels(method, route).dec()
+            if _LATENCY is not None:
+                _LATENCY.labels(method, route, str(status)).observe(elapsed)
+            if self.log_requests:
+                self._log(scope, headers, rid, route, status, elapsed)
+
+    def _log(
+        self,
+        scope: Scope,
+        headers: Headers,
+        rid: str,
+        route: str,
+        status: int,
+        elapsed: float,
+    ) -> None:
+        # scope["client"] is read after the app ran so proxy-header rewrites apply
+        client = scope.get("client")
+        payload = {
+            "rid": rid,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status,
+            "duration_ms": int(elapsed * 1000),
+            "client_ip": client[0] if client else "unknown",
+        }
+        xff = headers.get("x-forwarded-for")
+        xrp = headers.get("x-real-ip")
+        if xff:
+            payload["xff"] = xff
+        if xrp:
+            payload["x_real_ip"] = xrp
+        log.info(json.dumps(payload, ensure_ascii=False))
+
+
+class BodyLimitMiddleware:
+    """Reject requests to ``prefix`` whose declared Content-Length exceeds
+    ``max_body_bytes`` with 413.
+
+    Register it before ``CORSMiddleware`` (i.e. inside it) so the rejection is
+    readable cross-origin.
+    """
+
+    def __init__(
+        self, app: ASGIApp, max_body_bytes: int, prefix: str = "/ingest"
+    ) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self._too_large(scope):
+            response = PlainTextResponse("Request Entity Too Large", status_code=413)
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    def _too_large(self, scope: Scope) -> bool:
+        if not scope["path"].startswith(self.prefix):
+            return False
+        try:
+            size = int(Headers(scope=scope).get("content-length") or "")
+        except ValueError:
+            return False
+        return size > self.max_body_bytes
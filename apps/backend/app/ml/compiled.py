@@ -0,0 +1,309 @@
+"""Compiled (pandas-free) inference for SuggestModel.
+
+``SuggestModel.predict_one`` used to build a one-row DataFrame, run the
+sklearn ColumnTransformer and call every class's IsotonicRegression
+separately; for a single transaction that overhead dwarfs the classifier.
+
+``compile_tables()`` lowers a fitted ``Pipeline([prep, clf])`` + calibrators
+into plain lookup tables at training time:
+
+- text: HashingVectorizer params (token regex, n_features, norm) so tokens are
+  hashed with murmurhash3 straight into column indices,
+- categorical: one ``{value: column}`` dict per OneHotEncoder column,
+- numeric passthrough: ``(column name, column index)`` pairs,
+- calibration: every class's isotonic breakpoints concatenated into one
+  array (segments shifted apart), so one ``np.interp`` calibrates all classes.
+
+``CompiledModel`` builds the CSR feature matrix directly from row dicts and
+feeds it to the original classifier (the LightGBM trees are not lowered).
+Pipelines using anything outside this subset raise ``NotImplementedError``
+and keep the sklearn path.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+# Bump when the table layout changes; older tables are recompiled on load
+TABLES_VERSION = 1
+
+
+class _Missing:
+    """Hashable key for missing categories (NaN != NaN breaks dict lookup)."""
+
+    def __reduce__(self):
+        return "_MISSING"
+
+
+_MISSING = _Missing()
+
+
+def _cat_key(value: Any) -> Any:
+    # OneHotEncoder treats None and NaN alike as the missing category
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _MISSING
+    return value
+
+
+def _lower_text(vec: Any, column: str, offset: int) -> Dict[str, Any]:
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    if type(vec) is not HashingVectorizer:
+        raise NotImplementedError(f"text transformer {type(vec).__name__}")
+    if (
+        vec.analyzer != "word"
+        or vec.tokenizer is not None
+        or vec.preprocessor is not None
+        or vec.stop_words is not None
+        or vec.strip_accents is not None
+        or vec.input != "content"
+    ):
+        raise NotImplementedError("HashingVectorizer options beyond word tokens")
+    return {
+        "column": column,
+        "offset": offset,
+        "n_features": int(vec.n_features),
+        "token_pattern": vec.token_pattern,
+        "lowercase": bool(vec.lowercase),
+        "ngram_range": tuple(vec.ngram_range),
+        "alternate_sign": bool(vec.alternate_sign),
+        "binary": bool(vec.binary),
+        "norm": vec.norm,
+    }
+
+
+def _lower_onehot(enc: Any, columns: Sequence[str], offset: int) -> List[Any]:
+    from sklearn.preprocessing import OneHotEncoder
+
+    if type(enc) is not OneHotEncoder:
+        raise NotImplementedError(f"categorical transformer {type(enc).__name__}")
+    if (
+        enc.drop is not None
+        or enc.min_frequency is not None
+        or enc.max_categories is not None
+        or enc.handle_unknown != "ignore"
+    ):
+        raise NotImplementedError("OneHotEncoder drop/infrequent/unknown options")
+    out = []
+    for col, cats in zip(columns, enc.categories_):
+        lookup = {}
+        for j, cat in enumerate(cats.tolist()):
+            lookup[_cat_key(cat)] = offset + j
+        out.append((col, lookup))
+        offset += len(cats)
+    return out
+
+
+def _lower_calibrators(
+    classes: Sequence[str], calibrators: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, np.ndarray]]:
+    if not calibrators:
+        return None
+    xs, ys, lo, hi = [], [], [], []
+    for cls in classes:
+        iso = calibrators.get(cls)
+        if iso is None:
+            x, y = np.array([0.0, 1.0]), np.array([0.0, 1.0])  # identity
+        else:
+            if iso.out_of_bounds != "clip":
+                raise NotImplementedError("isotonic out_of_bounds != 'clip'")
+            x = np.asarray(iso.X_thresholds_, dtype=float)
+            y = np.asarray(iso.y_thresholds_, dtype=float)
+        xs.append(x)
+        ys.append(y)
+        lo.append(x[0])
+        hi.append(x[-1])
+    # Shift class i's segment by i * stride so segments never overlap; a
+    # clipped query for class i then interpolates only within its own segment.
+    stride = float(max(hi) - min(lo)) + 1.0
+    shift = np.arange(len(classes), dtype=float) * stride
+    return {
+        "x": np.concatenate([x + s for x, s in zip(xs, shift)]),
+        "y": np.concatenate(ys),
+        "lo": np.asarray(lo, dtype=float),
+        "hi": np.asarray(hi, dtype=float),
+        "shift": shift,
+    }
+
+
+def _is_passthrough(trans: Any) -> bool:
+    # Fitted ColumnTransformers (sklearn >= 1.x) store "passthrough" as an
+    # identity FunctionTransformer
+    from sklearn.preprocessing import FunctionTransformer
+
+    return (
+        isinstance(trans, FunctionTransformer)
+        and trans.func is None
+        and trans.inverse_func is None
+    )
+
+
+def compile_tables(
+    pipeline: Any,
+    classes: Sequence[str],
+    calibrators: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Lower a fitted ``Pipeline([prep, clf])`` to plain lookup tables.
+
+    Raises:
+        NotImplementedError: if the pipeline uses unsupported transformers
+    """
+    from sklearn.compose import ColumnTransformer
+
+    steps = getattr(pipeline, "steps", None)
+    if not steps or len(steps) != 2:
+        raise NotImplementedError("expected Pipeline([preprocessor, classifier])")
+    pre = steps[0][1]
+    if not isinstance(pre, ColumnTransformer):
+        raise NotImplementedError(f"preprocessor {type(pre).__name__}")
+
+    text: List[Dict[str, Any]] = []
+    cats: List[Any] = []
+    nums: List[Any] = []
+    offset = 0
+    for name, trans, cols in pre.transformers_:
+        if trans == "drop":
+            continue
+        if name == "remainder":
+            if len(cols):
+                raise NotImplementedError("remainder columns")
+            continue
+        if trans == "passthrough" or _is_passthrough(trans):
+            for col in cols:
+                nums.append((col, offset))
+                offset += 1
+        elif isinstance(cols, str):
+            spec = _lower_text(trans, cols, offset)
+            text.append(spec)
+            offset += spec["n_features"]
+        else:
+            lowered = _lower_onehot(trans, list(cols), offset)
+            cats.extend(lowered)
+            offset += sum(len(lookup) for _, lookup in lowered)
+
+    n_in = getattr(steps[1][1], "n_features_in_", offset)
+    if n_in != offset:
+        raise NotImplementedError(f"lowered width {offset} != classifier {n_in}")
+    return {
+        "version": TABLES_VERSION,
+        "classes": list(classes),
+        "width": offset,
+        "text": text,
+        "cats": cats,
+        "nums": nums,
+        "calibration": _lower_calibrators(classes, calibrators),
+    }
+
+
+class CompiledModel:
+    """Lowered preprocessor + calibration around the fitted classifier."""
+
+    def __init__(self, tables: Dict[str, Any], clf: Any):
+        if tables.get("version") != TABLES_VERSION:
+            raise NotImplementedError("stale compiled tables")
+        self.tables = tables
+        self.clf = clf
+        self.width = int(tables["width"])
+        self.text = [
+            dict(spec, regex=re.compile(spec["token_pattern"]))
+            for spec in tables["text"]
+        ]
+        self.cats = tables["cats"]
+        self.nums = tables["nums"]
+        self.calibration = tables["calibration"]
+        from sklearn.utils import murmurhash3_32
+
+        self._hash = murmurhash3_32
+
+    # --- features --------------------------------------------------------------
+
+    def _tokens(self, spec: Dict[str, Any], doc: str) -> List[str]:
+        if spec["lowercase"]:
+            doc = doc.lower()
+        words = spec["regex"].findall(doc)
+        lo, hi = spec["ngram_range"]
+        if (lo, hi) == (1, 1):
+            return words
+        out = list(words) if lo == 1 else []
+        for n in range(max(lo, 2), hi + 1):
+            out.extend(" ".join(words[i : i + n]) for i in range(len(words) - n + 1))
+        return out
+
+    def _hashed(self, spec: Dict[str, Any], doc: Any) -> Dict[int, float]:
+        acc: Dict[int, float] = {}
+        if doc is None or (isinstance(doc, float) and math.isnan(doc)):
+            return acc
+        n_features = spec["n_features"]
+        for tok in self._tokens(spec, str(doc)):
+            h = self._hash(tok, seed=0)
+            if h == -2147483648:  # abs() overflows in sklearn's int32 hasher
+                idx = (2147483647 - (n_features - 1)) % n_features
+            else:
+                idx = abs(h) % n_features
+            acc[idx] = acc.get(idx, 0.0) + (
+                -1.0 if spec["alternate_sign"] and h < 0 else 1.0
+            )
+        acc = {k: v for k, v in acc.items() if v != 0.0}
+        if spec["binary"]:
+            acc = dict.fromkeys(acc, 1.0)
+        norm = spec["norm"]
+        if norm and acc:
+            if norm == "l2":
+                scale = math.sqrt(sum(v * v for v in acc.values()))
+            elif norm == "l1":
+                scale = sum(abs(v) for v in acc.values())
+            else:
+                scale = max(abs(v) for v in acc.values())
+            if scale:
+                acc = {k: v / scale for k, v in acc.items()}
+        return acc
+
+    def transform(self, rows: Sequence[Dict[str, Any]]) -> sparse.csr_matrix:
+        """Row dicts -> CSR matrix laid out like the ColumnTransformer output."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for row in rows:
+            for spec in self.text:
+                hashed = self._hashed(spec, row.get(spec["column"]))
+                off = spec["offset"]
+                for idx in sorted(hashed):
+                    indices.append(off + idx)
+                    data.append(hashed[idx])
+            for col, lookup in self.cats:
+                j = lookup.get(_cat_key(row.get(col)))
+                if j is not None:
+                    indices.append(j)
+                    data.append(1.0)
+            for col, j in self.nums:
+                v = row.get(col)
+                v = float("nan") if v is None else float(v)
+                if v != 0.0:
+                    indices.append(j)
+                    data.append(v)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=float), indices, indptr),
+            shape=(len(rows), self.width),
+        )
+
+    # --- prediction ------------------------------------------------------------
+
+    def calibrate(self, proba: np.ndarray) -> np.ndarray:
+        """Isotonic calibration for all classes in one ``np.interp`` call."""
+        cal = self.calibration
+        if cal is None:
+            return proba
+        q = np.clip(proba, cal["lo"], cal["hi"]) + cal["shift"]
+        out = np.interp(q.ravel(), cal["x"], cal["y"]).reshape(proba.shape)
+        return out / out.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Calibrated, renormalized class probabilities (N x C)."""
+        proba = np.asarray(self.clf.predict_proba(self.transform(rows)), dtype=float)
+        return self.calibrate(proba)
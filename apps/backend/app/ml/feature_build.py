@@ -12,18 +12,25 @@ Usage:
 
     # Rebuild all features (slow!)
     python -m app.ml.feature_build --all
+
+    # Only transactions changed since the last run (see app.ml.feature_sync)
+    python -m app.ml.feature_build --incremental
+
+    # Keep syncing every 60s
+    python -m app.ml.feature_build --incremental --watch 60
 """
 
 import argparse
 import re
+import time
 from datetime import datetime, timedelta, date
 from typing import Optional
 import logging
 
-from sqlalchemy import select, and_
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import delete, insert, select, and_
+from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db import SessionLocal
 from app.orm_models import Transaction
 from app.ml.models import MLFeature
 from app.ml.config import P2P_PATTERNS
@@ -173,6 +180,70 @@ def extract_features(txn: Transaction) -> dict:
     }
 
 
+# Only the columns extract_features() reads (no ORM hydration)
+FEATURE_SOURCE_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.amount,
+    Transaction.merchant,
+    Transaction.merchant_canonical,
+    Transaction.description,
+)
+
+_FEATURE_FIELDS = (
+    "ts_month",
+    "amount",
+    "abs_amount",
+    "merchant",
+    "mcc",
+    "channel",
+    "hour_of_day",
+    "dow",
+    "is_weekend",
+    "is_subscription",
+    "norm_desc",
+    "tokens",
+    "feat_p2p_flag",
+    "feat_p2p_large_outflow",
+)
+
+
+def upsert_features(db: Session, rows: list[dict]) -> int:
+    """Insert or replace ml_features rows keyed by txn_id (Postgres and SQLite).
+
+    Rows are sent as one executemany, so the statement stays under the
+    driver's bound-parameter limit regardless of batch size. Caller commits.
+    """
+    if not rows:
+        return 0
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(MLFeature)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["txn_id"],
+            set_={f: getattr(stmt.excluded, f) for f in _FEATURE_FIELDS},
+        )
+        db.execute(stmt, rows)
+    else:
+        db.execute(
+            delete(MLFeature).where(MLFeature.txn_id.in_([r["txn_id"] for r in rows]))
+        )
+        db.execute(insert(MLFeature), rows)
+    return len(rows)
+
+
+def stream_rows(db: Session, stmt, batch_size: int):
+    """Yield lists of result rows, ``batch_size`` at a time (server-side cursor)."""
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield rows
+
+
 def build_features(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -200,11 +271,11 @@ def build_features(
 
     logger.info(f"Building features for {start_date} to {end_date}")
 
-    db = next(get_db())
-    try:
-        # Query transactions in date range
+    # Rows stream from one session while batches commit on another, so a
+    # commit never closes the server-side cursor.
+    with SessionLocal() as db, SessionLocal() as writer:
         stmt = (
-            select(Transaction)
+            select(*FEATURE_SOURCE_COLUMNS)
             .where(
                 and_(
                     Transaction.date >= start_date,
@@ -216,73 +287,14 @@ def build_features(
         )
 
         count = 0
-        batch = []
-
-        for txn in db.execute(stmt).scalars():
-            features = extract_features(txn)
-            batch.append(features)
-
-            if len(batch) >= batch_size:
-                # Bulk upsert
-                stmt = insert(MLFeature).values(batch)
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=["txn_id"],
-                    set_=dict(
-                        ts_month=stmt.excluded.ts_month,
-                        amount=stmt.excluded.amount,
-                        abs_amount=stmt.excluded.abs_amount,
-                        merchant=stmt.excluded.merchant,
-                        mcc=stmt.excluded.mcc,
-                        channel=stmt.excluded.channel,
-                        hour_of_day=stmt.excluded.hour_of_day,
-                        dow=stmt.excluded.dow,
-                        is_weekend=stmt.excluded.is_weekend,
-                        is_subscription=stmt.excluded.is_subscription,
-                        norm_desc=stmt.excluded.norm_desc,
-                        tokens=stmt.excluded.tokens,
-                        feat_p2p_flag=stmt.excluded.feat_p2p_flag,
-                        feat_p2p_large_outflow=stmt.excluded.feat_p2p_large_outflow,
-                    ),
-                )
-                db.execute(stmt)
-                db.commit()
-
-                count += len(batch)
-                logger.info(f"Processed {count} transactions")
-                batch = []
-
-        # Process remaining batch
-        if batch:
-            stmt = insert(MLFeature).values(batch)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["txn_id"],
-                set_=dict(
-                    ts_month=stmt.excluded.ts_month,
-                    amount=stmt.excluded.amount,
-                    abs_amount=stmt.excluded.abs_amount,
-                    merchant=stmt.excluded.merchant,
-                    mcc=stmt.excluded.mcc,
-                    channel=stmt.excluded.channel,
-                    hour_of_day=stmt.excluded.hour_of_day,
-                    dow=stmt.excluded.dow,
-                    is_weekend=stmt.excluded.is_weekend,
-                    is_subscription=stmt.excluded.is_subscription,
-                    norm_desc=stmt.excluded.norm_desc,
-                    tokens=stmt.excluded.tokens,
-                    feat_p2p_flag=stmt.excluded.feat_p2p_flag,
-                    feat_p2p_large_outflow=stmt.excluded.feat_p2p_large_outflow,
-                ),
-            )
-            db.execute(stmt)
-            db.commit()
-            count += len(batch)
+        for rows in stream_rows(db, stmt, batch_size):
+            count += upsert_features(writer, [extract_features(r) for r in rows])
+            writer.commit()
+            logger.info(f"Processed {count} transactions")
 
         logger.info(f"✅ Built {count} feature vectors")
         return count
 
-    finally:
-        db.close()
-
 
 def main():
     """CLI entrypoint."""
@@ -308,6 +320,17 @@ def main():
         action="store_true",
         help="Process all transactions (ignores date filters)",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only transactions changed since the last run (watermark)",
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        help="With --incremental: keep syncing at this interval",
+    )
     parser.add_argument(
         "--batch-size",
         type=int,
@@ -316,6 +339,18 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.watch is not None and not args.incremental:
+        parser.error("--watch requires --incremental")
+
+    if args.incremental:
+        from app.ml import feature_sync
+
+        while True:
+            result = feature_sync.sync_features(batch_size=args.batch_size)
+            print(result)
+            if not args.watch:
+                return
+            time.sleep(args.watch)
 
     start_date = None
     end_date = None
@@ -0,0 +1,254 @@
+"""Incremental ml_features builder driven by a change watermark.
+
+``feature_build.build_features`` re-extracts a whole date window. This module
+keeps ``ml_features`` current instead by only touching transactions whose
+``(updated_at, id)`` is past the watermark stored in ``ml_feature_watermarks``:
+
+* rows are streamed with a column-only select (``yield_per``) ordered by
+  ``(updated_at, id)`` (served by ``ix_transactions_updated_at`` on Postgres),
+* each batch is upserted (Postgres / SQLite ``ON CONFLICT``) and the
+  watermark advanced in the same commit, so an interrupted run resumes where
+  it stopped; soft-deleted transactions drop their feature rows,
+* only rows with ``updated_at <= now() - ML_FEATURES_SETTLE_S`` are read, and
+  each pass re-scans the ``ML_FEATURES_OVERLAP_S`` before the watermark
+  (upserts are idempotent). ``updated_at`` is the writer's transaction start
+  time on Postgres, so a long transaction (e.g. a large buffered CSV ingest)
+  commits rows already behind the watermark; they are picked up as long as it
+  commits within settle + overlap seconds of starting.
+
+``feature_sync_loop()`` runs ``sync_features()`` every
+``ML_FEATURES_SYNC_INTERVAL_S`` seconds; ``app.main`` starts it when
+``ML_FEATURES_SYNC=1``. Lag and throughput are exported as Prometheus metrics
+(when available) and via ``stats()``.
+
+Rows with a NULL ``updated_at``, changes made by raw SQL that bypasses the
+``onupdate`` and transactions that commit later than settle + overlap are only
+picked up by a full ``build_features`` backfill.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, case, delete, false, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app import db as app_db
+from app.ml.feature_build import (
+    FEATURE_SOURCE_COLUMNS,
+    extract_features,
+    stream_rows,
+    upsert_features,
+)
+from app.ml.models import MLFeature, MLFeatureWatermark
+from app.orm_models import Transaction
+
+# Optional Prometheus metrics (safe if library absent)
+try:  # pragma: no cover - optional dependency
+    from prometheus_client import Counter, Gauge  # type: ignore
+
+    _METRICS = {
+        "runs": Counter("ml_features_sync_runs_total", "Incremental feature syncs"),
+        "upserted": Counter(
+            "ml_features_sync_upserted_total", "Feature rows recomputed by sync"
+        ),
+        "deleted": Counter(
+            "ml_features_sync_deleted_total",
+            "Feature rows removed for soft-deleted transactions",
+        ),
+        "lag": Gauge(
+            "ml_features_lag_seconds",
+            "Age of the oldest transaction change picked up by the last sync",
+        ),
+        "last_sync": Gauge(
+            "ml_features_last_sync_timestamp", "Unix time of the last completed sync"
+        ),
+    }
+except Exception:  # pragma: no cover - no prometheus
+    _METRICS = None
+
+log = logging.getLogger(__name__)
+
+WATERMARK = "ml_features"
+BATCH_SIZE = int(os.getenv("ML_FEATURES_BATCH_SIZE", "1000"))
+SETTLE_S = float(os.getenv("ML_FEATURES_SETTLE_S", "5"))
+OVERLAP_S = float(os.getenv("ML_FEATURES_OVERLAP_S", "600"))
+INTERVAL_S = float(os.getenv("ML_FEATURES_SYNC_INTERVAL_S", "60"))
+
+_stats: Dict[str, Any] = {
+    "runs": 0,
+    "upserted": 0,
+    "deleted": 0,
+    "lag_seconds": 0.0,
+    "last_run_ms": 0.0,
+    "last_sync_ts": None,
+}
+
+
+def stats() -> Dict[str, Any]:
+    return dict(_stats)
+
+
+def _observe(result: Dict[str, Any]) -> None:
+    _stats["runs"] += 1
+    _stats["upserted"] += result["upserted"]
+    _stats["deleted"] += result["deleted"]
+    _stats["lag_seconds"] = result["lag_seconds"]
+    _stats["last_run_ms"] = result["ms"]
+    _stats["last_sync_ts"] = time.time()
+    if _METRICS:
+        _METRICS["runs"].inc()
+        _METRICS["upserted"].inc(result["upserted"])
+        _METRICS["deleted"].inc(result["deleted"])
+        _METRICS["lag"].set(result["lag_seconds"])
+        _METRICS["last_sync"].set(_stats["last_sync_ts"])
+
+
+def _ts_key(dialect: str):
+    """Comparable form of ``updated_at`` and of timestamps bound against it.
+
+    SQLite stores timestamps as text: ``CURRENT_TIMESTAMP`` (server default /
+    onupdate) writes ``'YYYY-MM-DD HH:MM:SS'`` while SQLAlchemy binds
+    ``'YYYY-MM-DD HH:MM:SS.ffffff'``, so equal instants compare unequal as
+    strings. There both sides are normalized with ``strftime`` (milliseconds;
+    ordering uses the same key, so ties are still broken by id).
+    """
+    col_type = Transaction.updated_at.type
+    if dialect != "sqlite":
+        return Transaction.updated_at, lambda v: literal(v, col_type)
+    fmt = "%Y-%m-%d %H:%M:%f"
+    return (
+        func.strftime(fmt, Transaction.updated_at),
+        lambda v: func.strftime(fmt, literal(v, col_type)),
+    )
+
+
+def _changed_since(
+    wm: MLFeatureWatermark, cutoff: Any, dialect: str, overlap_s: float = 0.0
+):
+    """Rows to (re)extract, ordered by ``(updated_at, id)``.
+
+    ``is_new`` marks rows past the watermark; the others fall in the
+    ``overlap_s`` re-scan window behind it.
+    """
+    key, bound = _ts_key(dialect)
+    conds = [Transaction.updated_at.isnot(None), key <= bound(cutoff)]
+    is_new = literal(True)
+    if wm.last_updated_at is not None:
+        past = or_(
+            key > bound(wm.last_updated_at),
+            and_(
+                key == bound(wm.last_updated_at),
+                Transaction.id > wm.last_txn_id,
+            ),
+        )
+        if overlap_s > 0:
+            since = wm.last_updated_at - timedelta(seconds=overlap_s)
+            conds.append(key >= bound(since))
+            is_new = case((past, True), else_=false())
+        else:
+            conds.append(past)
+    stmt = select(
+        *FEATURE_SOURCE_COLUMNS,
+        Transaction.updated_at,
+        Transaction.deleted_at,
+        is_new.label("is_new"),
+    )
+    return stmt.where(*conds).order_by(key, Transaction.id)
+
+
+def sync_features(
+    session_factory: Optional[Callable[[], Session]] = None,
+    batch_size: Optional[int] = None,
+    settle_s: Optional[float] = None,
+    overlap_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Recompute features for transactions changed since the watermark.
+
+    Returns ``{"upserted", "deleted", "rescanned", "lag_seconds", "watermark",
+    "ms"}``; ``upserted`` / ``deleted`` count rows past the watermark only.
+    """
+    session_factory = session_factory or app_db.SessionLocal
+    batch_size = batch_size or BATCH_SIZE
+    settle = SETTLE_S if settle_s is None else settle_s
+    overlap = OVERLAP_S if overlap_s is None else overlap_s
+    t0 = time.perf_counter()
+    upserted = deleted = rescanned = 0
+    lag = 0.0
+    seen = False
+
+    # Stream on one session, write + advance the watermark on another, so
+    # per-batch commits never close the server-side cursor.
+    with session_factory() as db, session_factory() as writer:
+        wm = writer.get(MLFeatureWatermark, WATERMARK)
+        if wm is None:
+            wm = MLFeatureWatermark(name=WATERMARK, last_txn_id=0, rows_processed=0)
+            writer.add(wm)
+        now = db.execute(select(func.now())).scalar_one()
+        cutoff = now - timedelta(seconds=settle)
+
+        dialect = db.get_bind().dialect.name
+        stmt = _changed_since(wm, cutoff, dialect, overlap)
+        for rows in stream_rows(db, stmt, batch_size):
+            new = [r for r in rows if r.is_new]
+            if new and not seen:
+                # Oldest pending change: how stale the feature store was
+                lag = max(0.0, (now - new[0].updated_at).total_seconds())
+                seen = True
+            live = [r for r in rows if r.deleted_at is None]
+            gone = [r.id for r in rows if r.deleted_at is not None]
+            upsert_features(writer, [extract_features(r) for r in live])
+            if gone:
+                writer.execute(delete(MLFeature).where(MLFeature.txn_id.in_(gone)))
+            new_gone = sum(1 for r in new if r.deleted_at is not None)
+            deleted += new_gone
+            upserted += len(new) - new_gone
+            rescanned += len(rows) - len(new)
+            if new:
+                # Rows are ordered, so the new ones are the batch's tail
+                wm.last_updated_at = new[-1].updated_at
+                wm.last_txn_id = new[-1].id
+                wm.rows_processed = (wm.rows_processed or 0) + len(new)
+            writer.commit()
+
+        wm.synced_at = now
+        writer.commit()
+        result = {
+            "upserted": upserted,
+            "deleted": deleted,
+            "rescanned": rescanned,
+            "lag_seconds": round(lag, 3),
+            "watermark": {
+                "updated_at": (
+                    wm.last_updated_at.isoformat() if wm.last_updated_at else None
+                ),
+                "txn_id": wm.last_txn_id,
+            },
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
+    _observe(result)
+    if upserted or deleted:
+        log.info(
+            "ml_features sync: upserted=%s deleted=%s lag_s=%.1f",
+            upserted,
+            deleted,
+            lag,
+        )
+    return result
+
+
+async def feature_sync_loop(interval_s: float = INTERVAL_S) -> None:
+    """Run ``sync_features`` every ``interval_s`` seconds until cancelled."""
+    while True:  # pragma: no cover (loop timing not unit tested)
+        try:
+            await asyncio.to_thread(sync_features)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("ml_features sync failed: %s", e)
+        await asyncio.sleep(interval_s)
@@ -1,15 +1,33 @@
 """Model wrapper for inference.
 
 Wraps sklearn Pipeline + class labels + calibrators for single-row prediction with calibrated probabilities.
+When a compiled form is available (see ``app.ml.compiled``) predictions skip
+pandas and the sklearn preprocessor entirely.
 """
 from __future__ import annotations
-from typing import Dict, Any, Optional
+import io
+import logging
+from typing import Dict, Any, List, Optional
 import joblib
 import json
 import numpy as np
 from sklearn.pipeline import Pipeline
 from sklearn.isotonic import IsotonicRegression
 
+from .compiled import CompiledModel, compile_tables
+
+log = logging.getLogger(__name__)
+
+
+def _dumps(obj: Any) -> bytes:
+    buf = io.BytesIO()
+    joblib.dump(obj, buf)
+    return buf.getvalue()
+
+
+def _loads(data: bytes) -> Any:
+    return joblib.load(io.BytesIO(data))
+
 
 class SuggestModel:
     """Wrapper for trained suggestion model with optional calibration."""
@@ -18,7 +36,8 @@ class SuggestModel:
         self, 
         pipeline: Pipeline, 
         classes_: list[str],
-        calibrators: Optional[Dict[str, IsotonicRegression]] = None
+        calibrators: Optional[Dict[str, IsotonicRegression]] = None,
+        compiled: Optional[CompiledModel] = None,
     ):
         """Initialize model with sklearn pipeline, class labels, and optional calibrators.
         
@@ -26,10 +45,23 @@ class SuggestModel:
             pipeline: Trained sklearn Pipeline (preprocessor + classifier)
             classes_: Ordered list of class labels
             calibrators: Optional dict of class → IsotonicRegression calibrator
+            compiled: Optional CompiledModel used instead of the sklearn path
         """
         self.pipeline = pipeline
         self.classes_ = classes_
         self.calibrators = calibrators
+        self.compiled = compiled
+
+    def _format(self, proba: np.ndarray) -> List[Dict[str, Any]]:
+        best = proba.argmax(axis=1)
+        return [
+            {
+                "label": self.classes_[idx],
+                "confidence": float(p[idx]),
+                "probs": {cls: float(v) for cls, v in zip(self.classes_, p)},
+            }
+            for idx, p in zip(best.tolist(), proba)
+        ]
 
     def predict_one(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """Predict category for a single transaction with calibrated probabilities.
@@ -43,6 +75,9 @@ class SuggestModel:
                 - confidence: Calibrated probability of predicted class
                 - probs: Dict of all calibrated class probabilities
         """
+        if self.compiled is not None:
+            return self._format(self.compiled.predict_proba([row]))[0]
+        
         import pandas as pd
         
         X = pd.DataFrame([row])
@@ -68,6 +103,60 @@ class SuggestModel:
             "probs": {cls: float(p) for cls, p in zip(self.classes_, proba)}
         }
 
+    def predict_many(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Predict categories for many transactions with one predict_proba call.
+        
+        Args:
+            rows: List of feature dicts (same keys as predict_one)
+            
+        Returns:
+            List of predict_one-shaped dicts, in input order
+        """
+        if not rows:
+            return []
+        if self.compiled is not None:
+            return self._format(self.compiled.predict_proba(rows))
+        
+        import pandas as pd
+        
+        X = pd.DataFrame(rows)
+        proba = np.asarray(self.pipeline.predict_proba(X), dtype=float)
+        
+        # Apply calibration column-wise (one isotonic call per class)
+        if self.calibrators:
+            calibrated = proba.copy()
+            for i, cls in enumerate(self.classes_):
+                if cls in self.calibrators:
+                    calibrated[:, i] = self.calibrators[cls].predict(proba[:, i])
+            
+            # Renormalize each row to sum=1
+            proba = calibrated / calibrated.sum(axis=1, keepdims=True)
+        
+        return self._format(proba)
+
+
+def compile_model(
+    pipeline: Pipeline,
+    classes: list[str],
+    calibrators: Optional[Dict[str, IsotonicRegression]] = None,
+    tables: Optional[Dict[str, Any]] = None,
+) -> Optional[CompiledModel]:
+    """Build the compiled inference form, or None if the pipeline can't be lowered.
+    
+    Args:
+        pipeline: Trained sklearn Pipeline (its classifier is reused as-is)
+        classes: List of class labels
+        calibrators: Optional dict of class → IsotonicRegression calibrator
+        tables: Precompiled lookup tables (compiled.joblib); lowered here if None
+    """
+    try:
+        if tables is None:
+            tables = compile_tables(pipeline, classes, calibrators)
+        return CompiledModel(tables, pipeline.steps[-1][1])
+    except NotImplementedError as e:
+        log.info("compiled inference unavailable, using sklearn path: %s", e)
+        return None
+
 
 def serialize(
     pipeline: Pipeline, 
@@ -82,15 +171,21 @@ def serialize(
         calibrators: Optional dict of class → IsotonicRegression calibrator
         
     Returns:
-        Dict of filename → binary data
+        Dict of filename → binary data (compiled.joblib holds the lowered
+        preprocessor/calibration tables when the pipeline supports it)
     """
     files = {
-        "pipeline.joblib": joblib.dumps(pipeline),
+        "pipeline.joblib": _dumps(pipeline),
         "classes.json": json.dumps(classes).encode("utf-8"),
     }
     
     if calibrators:
-        files["calibrator.pkl"] = joblib.dumps(calibrators)
+        files["calibrator.pkl"] = _dumps(calibrators)
+    
+    try:
+        files["compiled.joblib"] = _dumps(compile_tables(pipeline, classes, calibrators))
+    except NotImplementedError as e:
+        log.info("skipping compiled.joblib: %s", e)
     
     return files
 
@@ -99,23 +194,31 @@ def load_from_dir(dir_path: str) -> SuggestModel:
     """Load model from filesystem directory.
     
     Args:
-        dir_path: Path to directory with pipeline.joblib, classes.json, and optional calibrator.pkl
+        dir_path: Path to directory with pipeline.joblib, classes.json, and optional
+            calibrator.pkl / compiled.joblib
         
     Returns:
         SuggestModel instance ready for inference
     """
     import pathlib
-    import json
-    import joblib
     
     p = pathlib.Path(dir_path)
-    pipeline = joblib.loads((p / "pipeline.joblib").read_bytes())
+    pipeline = _loads((p / "pipeline.joblib").read_bytes())
     classes = json.loads((p / "classes.json").read_text())
     
     # Load calibrators if available
     calibrators = None
     calibrator_path = p / "calibrator.pkl"
     if calibrator_path.exists():
-        calibrators = joblib.loads(calibrator_path.read_bytes())
+        calibrators = _loads(calibrator_path.read_bytes())
+    
+    # Artifacts from before compiled.joblib (or stale tables) are lowered here
+    tables = None
+    compiled_path = p / "compiled.joblib"
+    if compiled_path.exists():
+        tables = _loads(compiled_path.read_bytes())
+    compiled = compile_model(pipeline, classes, calibrators, tables=tables)
+    if compiled is None and tables is not None:
+        compiled = compile_model(pipeline, classes, calibrators)
     
-    return SuggestModel(pipeline, classes, calibrators)
+    return SuggestModel(pipeline, classes, calibrators, compiled=compiled)
@@ -8,6 +8,8 @@ from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional
 from sqlalchemy import (
+    BigInteger,
+    DateTime,
     Integer,
     Text,
     TIMESTAMP,
@@ -98,6 +100,26 @@ class MLFeature(Base):
     # transaction = relationship("Transaction", back_populates="features")
 
 
+class MLFeatureWatermark(Base):
+    """Progress of the incremental ml_features builder (app.ml.feature_sync).
+
+    Transactions with (updated_at, id) up to this point have current feature
+    rows; the next run only reads rows changed after it.
+    """
+
+    __tablename__ = "ml_feature_watermarks"
+
+    name: Mapped[str] = mapped_column(Text, primary_key=True)
+    last_updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_txn_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_processed: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    synced_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
 class MLTrainingRun(Base):
     """Audit log for ML training runs.
 
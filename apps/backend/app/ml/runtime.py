@@ -1,12 +1,13 @@
 """Runtime model serving.
 
 Loads the 'latest' deployed model from registry and caches it in memory.
-Provides predict_row() for single-transaction inference.
+Provides predict_row() for single-transaction inference and predict_rows()
+for batches.
 """
 from __future__ import annotations
 import os
 from functools import lru_cache
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
 from .model import load_from_dir, SuggestModel
 from . import registry
@@ -64,6 +65,40 @@ def predict_row(row: dict) -> Dict[str, Any]:
     return out
 
 
+def predict_rows(rows: List[dict]) -> List[Dict[str, Any]]:
+    """Predict categories for a batch of transactions.
+    
+    Uses the model's predict_many() (one predict_proba call for the whole
+    batch) when available, falling back to predict_one() per row.
+    
+    Args:
+        rows: List of feature dicts (same keys as predict_row)
+            
+    Returns:
+        List of predict_row-shaped dicts, in input order
+    """
+    model, meta = _load_latest()
+    
+    if not model:
+        return [{"available": False, "reason": "no_model"} for _ in rows]
+    
+    if hasattr(model, "predict_many"):
+        outs = model.predict_many(rows)
+    else:
+        outs = [model.predict_one(row) for row in rows]
+    
+    model_meta = {
+        "run_id": meta.get("run_id"),
+        "val_f1_macro": meta.get("val_f1_macro"),
+        "class_count": meta.get("class_count"),
+    }
+    for out in outs:
+        out["available"] = True
+        out["model_meta"] = dict(model_meta)
+    
+    return outs
+
+
 def reload_model_cache() -> Tuple[Optional[SuggestModel], Optional[Dict[str, Any]]]:
     """Clear and reload model cache.
     
@@ -17,23 +17,8 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym, validates
 from sqlalchemy.ext.hybrid import hybrid_property
-from app.core.crypto_state import get_dek_for_label, get_write_label
-
-# Guard cryptography import so hermetic tests (no compiled wheels) still load ORM.
-try:  # allow hermetic tests without cryptography
-    from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # type: ignore
-except Exception:  # pragma: no cover
-
-    class AESGCM:  # minimal encrypt/decrypt passthrough (NOT secure – test only)
-        def __init__(self, key: bytes):
-            self._k = key
-
-        def encrypt(self, nonce: bytes, data: bytes, aad):  # noqa: D401
-            return data  # no-op
-
-        def decrypt(self, nonce: bytes, data: bytes, aad):
-            return data  # no-op
-
+from app.core.bulk_decrypt import decrypt_text
+from app.core.crypto_state import get_aead_for_label, get_write_label
 
 import os
 from typing import Optional
@@ -72,8 +57,12 @@ class Transaction(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    # Indexed: drives the incremental ml_features watermark (app.ml.feature_sync)
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        index=True,
     )
     # NEW: SQL-side canonical merchant (indexed)
     merchant_canonical: Mapped[str | None] = mapped_column(
@@ -104,10 +93,9 @@ class Transaction(Base):
     def description_text(self) -> str | None:
         if not self.description_enc or not self.description_nonce:
             return None
-        label = self.enc_label or "active"
-        dek = get_dek_for_label(label)
-        pt = AESGCM(dek).decrypt(self.description_nonce, self.description_enc, AAD)
-        return pt.decode("utf-8")
+        return decrypt_text(
+            self.enc_label, self.description_nonce, self.description_enc, AAD
+        )
 
     @description_text.setter
     def description_text(self, value: str | None):
@@ -117,9 +105,8 @@ class Transaction(Base):
             self.enc_label = None
             return
         label = get_write_label()
-        dek = get_dek_for_label(label)
         nonce = os.urandom(12)
-        ct = AESGCM(dek).encrypt(nonce, value.encode("utf-8"), AAD)
+        ct = get_aead_for_label(label).encrypt(nonce, value.encode("utf-8"), AAD)
         self.description_enc = ct
         self.description_nonce = nonce
         self.enc_label = label
@@ -128,10 +115,9 @@ class Transaction(Base):
     def merchant_raw_text(self) -> str | None:
         if not self.merchant_raw_enc or not self.merchant_raw_nonce:
             return None
-        label = self.enc_label or "active"
-        dek = get_dek_for_label(label)
-        pt = AESGCM(dek).decrypt(self.merchant_raw_nonce, self.merchant_raw_enc, AAD)
-        return pt.decode("utf-8")
+        return decrypt_text(
+            self.enc_label, self.merchant_raw_nonce, self.merchant_raw_enc, AAD
+        )
 
     @merchant_raw_text.setter
     def merchant_raw_text(self, value: str | None):
@@ -141,9 +127,8 @@ class Transaction(Base):
             # don't clear enc_label here; description/note may still be set
             return
         label = get_write_label()
-        dek = get_dek_for_label(label)
         nonce = os.urandom(12)
-        ct = AESGCM(dek).encrypt(nonce, value.encode("utf-8"), AAD)
+        ct = get_aead_for_label(label).encrypt(nonce, value.encode("utf-8"), AAD)
         self.merchant_raw_enc = ct
         self.merchant_raw_nonce = nonce
         self.enc_label = label
@@ -152,10 +137,7 @@ class Transaction(Base):
     def note_text(self) -> str | None:
         if not self.note_enc or not self.note_nonce:
             return None
-        label = self.enc_label or "active"
-        dek = get_dek_for_label(label)
-        pt = AESGCM(dek).decrypt(self.note_nonce, self.note_enc, AAD)
-        return pt.decode("utf-8")
+        return decrypt_text(self.enc_label, self.note_nonce, self.note_enc, AAD)
 
     @note_text.setter
     def note_text(self, value: str | None):
@@ -165,9 +147,8 @@ class Transaction(Base):
             # don't clear enc_label here; description/merchant may still be set
             return
         label = get_write_label()
-        dek = get_dek_for_label(label)
         nonce = os.urandom(12)
-        ct = AESGCM(dek).encrypt(nonce, value.encode("utf-8"), AAD)
+        ct = get_aead_for_label(label).encrypt(nonce, value.encode("utf-8"), AAD)
         self.note_enc = ct
         self.note_nonce = nonce
         self.enc_label = label
@@ -334,6 +315,43 @@ class RecurringSeries(Base):
     )
 
 
+# --- NEW: MonthlyRollup (materialized per-month aggregates for charts) -------
+class MonthlyRollup(Base):
+    """
+    Pre-aggregated transaction totals per user × month × pending × category ×
+    merchant. Maintained by app.services.monthly_rollups; never written directly.
+    """
+
+    __tablename__ = "monthly_rollups"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
+    month: Mapped[str] = mapped_column(String(7), nullable=False)
+    pending: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, server_default=sa_false()
+    )
+    category: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    merchant: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    merchant_canonical: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    txn_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Income/spend heuristics of charts_data (abs per row, and signed sums)
+    income: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    spend: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    income_net: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    spend_net: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Plain sign split: amount >= 0 vs. abs(amount < 0)
+    inflow: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    outflow: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    outflow_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sample_description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (Index("ix_monthly_rollups_user_month", "user_id", "month"),)
+
+
 # --- NEW: Feedback (ML training events, decoupled from transaction lifecycle) ---
 class Feedback(Base):
     """
@@ -488,6 +506,31 @@ class EncryptionSettings(Base):
     )
 
 
+# --- DekRotationCheckpoint (committed id ranges of a DEK rotation) -----------
+class DekRotationCheckpoint(Base):
+    """One committed keyset range of a rotation; written by app.services.dek_rotation."""
+
+    __tablename__ = "dek_rotation_checkpoints"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    target_label: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    source_label: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Inclusive transaction id bounds of the range
+    range_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    range_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    scanned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "target_label", "range_start", name="uq_dek_rotation_checkpoint_range"
+        ),
+    )
+
+
 # --- NEW: Budget -------------------------------------------------------------
 class Budget(Base):
     __tablename__ = "budgets"
@@ -863,3 +906,10 @@ class RagChunk(Base):
     __table_args__ = (
         Index("ix_rag_chunks_doc_id_chunk_idx", "doc_id", "chunk_idx", unique=True),
     )
+
+
+# Register session listeners that keep monthly_rollups in sync with transactions.
+import app.services.monthly_rollups  # noqa: E402,F401
+
+# Register the SQLite FTS5 table/triggers that back transaction text search.
+import app.services.txn_search  # noqa: E402,F401
@@ -1,12 +1,14 @@
 """NVIDIA NIM Embedding client adapter."""
 
+import asyncio
 import os
 import httpx
 import math
-import time
 import logging
 from typing import List
 
+from app.services.http_clients import get_async_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,30 +66,32 @@ class NimEmbedClient:
 
         for attempt in range(max_retries):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    resp = await client.post(
-                        f"{self.base_url}/embeddings", headers=headers, json=payload
-                    )
-
-                    # Handle rate limiting with exponential backoff
-                    if resp.status_code == 429:
-                        if attempt < max_retries - 1:
-                            backoff = min(2**attempt, 8)  # max 8 seconds
-                            logger.warning(
-                                f"Rate limited (429), retrying in {backoff}s (attempt {attempt + 1}/{max_retries})"
-                            )
-                            time.sleep(backoff)
-                            continue
-                        else:
-                            logger.error("Rate limit exceeded after max retries")
-                            resp.raise_for_status()
-
-                    resp.raise_for_status()
-                    data = resp.json()
-                    embeddings = [
-                        self._normalize(item["embedding"]) for item in data["data"]
-                    ]
-                    return embeddings
+                resp = await get_async_client("embed").post(
+                    f"{self.base_url}/embeddings",
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout,
+                )
+
+                # Handle rate limiting with exponential backoff
+                if resp.status_code == 429:
+                    if attempt < max_retries - 1:
+                        backoff = min(2**attempt, 8)  # max 8 seconds
+                        logger.warning(
+                            f"Rate limited (429), retrying in {backoff}s (attempt {attempt + 1}/{max_retries})"
+                        )
+                        await asyncio.sleep(backoff)
+                        continue
+                    else:
+                        logger.error("Rate limit exceeded after max retries")
+                        resp.raise_for_status()
+
+                resp.raise_for_status()
+                data = resp.json()
+                embeddings = [
+                    self._normalize(item["embedding"]) for item in data["data"]
+                ]
+                return embeddings
 
             except httpx.TimeoutException as e:
                 logger.error(
@@ -1,9 +1,10 @@
 """NVIDIA NIM LLM client adapter for llama-3.1-nemotron-nano-8B-v1."""
 
 import os
-import httpx
 from typing import List, Dict, Any, Optional
 
+from app.services.http_clients import get_async_client
+
 
 class NimLlmClient:
     """NVIDIA NIM LLM client using OpenAI-compatible chat completions API."""
@@ -52,12 +53,14 @@ class NimLlmClient:
             payload["tools"] = tools
             payload["tool_choice"] = tool_choice
 
-        async with httpx.AsyncClient(timeout=120) as client:
-            resp = await client.post(
-                f"{self.base_url}/chat/completions", headers=headers, json=payload
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await get_async_client("llm").post(
+            f"{self.base_url}/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=120,
+        )
+        resp.raise_for_status()
+        return resp.json()
 
     async def suggest_categories(self, txn: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Suggest top-3 categories for a transaction."""
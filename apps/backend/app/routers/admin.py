@@ -23,14 +23,14 @@ def _admin_token() -> str | None:
 
 @router.post("/help-cache/reset", status_code=204)
 def reset_help_cache(x_admin_token: str | None = Header(None)):
-    """Clear the help cache and its stats.
+    """Clear the help cache (including the shared Redis L2) and its stats.
     If ADMIN_TOKEN is set in the environment, require matching x-admin-token header.
     Returns 204 No Content on success.
     """
     token = _admin_token()
     if token and x_admin_token != token:
         raise HTTPException(status_code=401, detail="unauthorized")
-    help_cache.clear()
+    help_cache.clear(shared=True)
     # reset_stats clears hit/miss/eviction counters
     help_cache.reset_stats()
     return
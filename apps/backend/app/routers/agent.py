@@ -671,75 +671,111 @@ def _extract_style_context(ctx: Dict[str, Any], resp: Dict[str, Any]) -> Dict[st
     return style_ctx
 
 
+def _ctx_user_id(auth: Optional[Dict[str, Any]], db: Session) -> Optional[int]:
+    """Best-effort user id for context enrichment from the agent auth dict.
+
+    Cookie auth carries the numeric id; HMAC auth carries the client email.
+    """
+    client_id = (auth or {}).get("user_id") or (auth or {}).get("client_id")
+    if client_id is None:
+        return None
+    if str(client_id).isdigit():
+        return int(client_id)
+    try:
+        from app.orm_models import User
+
+        user = db.query(User).filter(User.email == str(client_id)).first()
+        return user.id if user else None
+    except Exception:
+        return None
+
+
 def _enrich_context(
-    db: Session, ctx: Optional[Dict[str, Any]], txn_id: Optional[str]
+    db: Session,
+    ctx: Optional[Dict[str, Any]],
+    txn_id: Optional[str],
+    user_id: Optional[int] = None,
+    timings: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
+    """Fill missing CONTEXT sections for the month (see services.agent_context).
+
+    Independent sections load concurrently, each on its own session, and are
+    reused across turns until the data changes. Per-section timings are
+    written into ``timings`` when given (debug payload). Without a resolved
+    ``user_id`` no data sections are loaded, since they would be unscoped.
+    """
+    from app.services import agent_context
+
     ctx = dict(ctx or {})
     month = ctx.get("month") or latest_month(db) or "1970-01"  # Safe fallback
+    ctx["month"] = month
+    if user_id is None:
+        return ctx
 
     # Only fetch what's missing to stay cheap and composable
-    if month:
-        ctx["month"] = month
+    sections: Dict[str, Any] = {}
 
-        if "summary" not in ctx and _opt_charts:
-            try:
-                summary_body = getattr(_opt_charts, "SummaryBody")(month=month)
-                summary_result = getattr(_opt_charts, "charts_summary")(
-                    summary_body, db
-                )
-                ctx["summary"] = summary_result.model_dump()
-            except Exception as e:
-                logging.getLogger("uvicorn").debug(f"Enrichment summary skipped: {e}")
+    if "summary" not in ctx and _opt_charts:
 
-        if "top_merchants" not in ctx and _opt_charts:
-            try:
-                merchants_body = getattr(_opt_charts, "MerchantsBody")(
-                    month=month, top_n=10
-                )
-                merchants_result = getattr(_opt_charts, "charts_merchants")(
-                    merchants_body, db
-                )
-                ctx["top_merchants"] = [
-                    item.model_dump() for item in merchants_result.items
-                ]
-            except Exception as e:
-                logging.getLogger("uvicorn").debug(f"Enrichment merchants skipped: {e}")
+        def _summary(s: Session) -> Dict[str, Any]:
+            body = getattr(_opt_charts, "SummaryBody")(month=month)
+            result = getattr(_opt_charts, "charts_summary")(
+                body, user_id=user_id, db=s
+            )
+            return result.model_dump()
 
-        if "insights" not in ctx and _opt_insights:
-            try:
-                insights_body = getattr(_opt_insights, "ExpandedIn")(
-                    month=month, large_limit=10
-                )
-                raw = getattr(_opt_insights, "insights_expanded")(insights_body, db)
-                if isinstance(raw, dict):
-                    normalized = getattr(_opt_insights, "expand")(raw).model_dump()
-                else:
-                    try:
-                        normalized = getattr(_opt_insights, "expand")(raw.model_dump()).model_dump()  # type: ignore[attr-defined]
-                    except Exception:
-                        normalized = getattr(
-                            _opt_insights, "ExpandedBody"
-                        )().model_dump()
-                ctx["insights"] = normalized
-            except Exception as e:
-                logging.getLogger("uvicorn").debug(f"Enrichment insights skipped: {e}")
+        sections["summary"] = _summary
+
+    if "top_merchants" not in ctx and _opt_charts:
+
+        def _top_merchants(s: Session) -> List[Dict[str, Any]]:
+            body = getattr(_opt_charts, "MerchantsBody")(month=month, top_n=10)
+            result = getattr(_opt_charts, "charts_merchants")(
+                body, user_id=user_id, db=s
+            )
+            return [item.model_dump() for item in result.items]
+
+        sections["top_merchants"] = _top_merchants
+
+    if "insights" not in ctx and _opt_insights:
+
+        def _insights(s: Session) -> Dict[str, Any]:
+            raw = getattr(_opt_insights, "build_expanded_insights")(
+                db=s, month=month, large_limit=10, user_id=user_id
+            )
+            return getattr(_opt_insights, "expand")(raw).model_dump()
+
+        sections["insights"] = _insights
 
     if "rules" not in ctx and _opt_rules_crud:
-        try:
-            rules_result = getattr(_opt_rules_crud, "list_rules")(db)
-            ctx["rules"] = [rule.model_dump() for rule in rules_result]
-        except Exception as e:
-            logging.getLogger("uvicorn").debug(f"Enrichment rules skipped: {e}")
+
+        def _rules(s: Session) -> List[Dict[str, Any]]:
+            rules_result = getattr(_opt_rules_crud, "list_rules")(db=s)
+            return [rule.model_dump() for rule in rules_result]
+
+        sections["rules"] = _rules
 
     if txn_id and "txn" not in ctx and _opt_txn_tools:
-        try:
-            get_body = getattr(_opt_txn_tools, "GetByIdsBody")(txn_ids=[int(txn_id)])
-            txn_result = getattr(_opt_txn_tools, "get_by_ids")(get_body, db)
-            if txn_result.items:
-                ctx["txn"] = txn_result.items[0].model_dump()
-        except Exception as e:
-            logging.getLogger("uvicorn").debug(f"Enrichment txn skipped: {e}")
 
+        def _txn(s: Session) -> Optional[Dict[str, Any]]:
+            body = getattr(_opt_txn_tools, "GetByIdsBody")(txn_ids=[int(txn_id)])
+            result = getattr(_opt_txn_tools, "get_by_ids")(
+                user_id=user_id, body=body, db=s
+            )
+            return result.items[0].model_dump() if result.items else None
+
+        sections["txn"] = _txn
+
+    if sections:
+        values, section_timings = agent_context.enrich(
+            sections,
+            user_id=user_id,
+            month=month,
+            cache_keys={"txn": str(txn_id)} if txn_id else None,
+        )
+        ctx.update(values)
+        if timings is not None:
+            timings.update(section_timings)
     return ctx
 
 
@@ -794,7 +830,9 @@ def agent_chat(
 
         if x_test_mode in ("echo", "stub") and (is_dev or allow_test_stubs):
             # Enrich context for test modes to match normal flow
-            ctx = _enrich_context(db, req.context, req.txn_id)
+            ctx = _enrich_context(
+                db, req.context, req.txn_id, user_id=_ctx_user_id(auth, db)
+            )
 
             if x_test_mode == "echo":
                 text = req.messages[-1].content if req.messages else "ok"
@@ -852,7 +890,14 @@ def agent_chat(
             },
         )
 
-        ctx = _enrich_context(db, req.context, req.txn_id)
+        enrich_timings: Dict[str, Any] = {}
+        ctx = _enrich_context(
+            db,
+            req.context,
+            req.txn_id,
+            user_id=_ctx_user_id(auth, db),
+            timings=enrich_timings,
+        )
         last_user_msg = next(
             (m.content for m in reversed(req.messages) if m.role == "user"), ""
         )
@@ -1464,6 +1509,7 @@ def agent_chat(
         resp = post_process_tool_reply(resp, ctx)
         if debug and getattr(settings, "ENV", "dev") != "prod":
             resp["__debug_context"] = ctx
+            resp["__debug_enrich_timings"] = enrich_timings
 
         # --- BEGIN post-processing guard for trivial "OK" on analytics prompts ---
         try:
@@ -1568,7 +1614,14 @@ def agent_rephrase(
 ):
     """Clean endpoint to always hit the LLM path without tool/router logic."""
     # Minimal enrichment (keep same helpers for consistency)
-    ctx = _enrich_context(db, req.context, req.txn_id)
+    enrich_timings: Dict[str, Any] = {}
+    ctx = _enrich_context(
+        db,
+        req.context,
+        req.txn_id,
+        user_id=_ctx_user_id(auth, db),
+        timings=enrich_timings,
+    )
     intent_hint = INTENT_HINTS.get(req.intent, INTENT_HINTS["general"])
     enhanced_system_prompt = f"{SYSTEM_PROMPT}\n\n{intent_hint}"
     final_messages = [{"role": "system", "content": enhanced_system_prompt}] + [
@@ -1627,6 +1680,7 @@ def agent_rephrase(
     }
     if debug and getattr(settings, "ENV", "dev") != "prod":
         resp["__debug_context"] = ctx
+        resp["__debug_enrich_timings"] = enrich_timings
 
     # Check for empty reply and log warning
     reply_text = (
@@ -1701,7 +1755,10 @@ async def agent_stream(
 
             # Enrich context
             ctx = _enrich_context(
-                db=_db, ctx={"month": _month} if _month else None, txn_id=None
+                db=_db,
+                ctx={"month": _month} if _month else None,
+                txn_id=None,
+                user_id=_ctx_user_id(_auth, _db),
             )
 
             # Determine mode/intent
@@ -4,7 +4,10 @@ from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from app.db import get_db
-from app.services.categorize_suggest import suggest_categories_for_txn
+from app.services.categorize_suggest import (
+    suggest_categories_batch,
+    suggest_categories_for_txn,
+)
 from app.orm_models import Transaction, MerchantCategoryHint, CategoryRule
 import re
 
@@ -73,16 +76,21 @@ def categorize_suggest_batch(body: SuggestBatchBody, db: Session = Depends(get_d
     # Pull all transactions at once
     txns = db.query(Transaction).filter(Transaction.id.in_(body.txn_ids)).all()
 
-    out = []
-    for t in txns:
-        payload = {
+    payloads = [
+        {
             "merchant": t.merchant,
             "description": t.description,
             "amount": float(t.amount),
             "merchant_canonical": getattr(t, "merchant_canonical", None),
         }
-        suggestions = suggest_categories_for_txn(payload, db=db)
-        out.append({"txn": t.id, "suggestions": suggestions})
+        for t in txns
+    ]
+    # Hints, rules and feedback stats are loaded once for the whole batch
+    results = suggest_categories_batch(payloads, db=db)
+    out = [
+        {"txn": t.id, "suggestions": suggestions}
+        for t, suggestions in zip(txns, results)
+    ]
 
     return {"items": out}
 
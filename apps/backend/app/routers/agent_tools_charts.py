@@ -200,7 +200,7 @@ def charts_merchants(
     from typing import Any, Dict
     from app.services.charts_data import canonical_and_label
     from app.redis_client import redis
-    from app.services.merchant_cache import learn_merchant
+    from app.services.merchant_cache import learn_merchants
     from app.core.demo import resolve_user_for_mode
 
     effective_user_id, _ = resolve_user_for_mode(user_id, body.demo)
@@ -229,12 +229,30 @@ def charts_merchants(
         }
     )
 
+    # Use merchant cache if available (one batched round-trip), fallback to
+    # canonical_and_label
+    hints = (
+        learn_merchants(
+            redis_client,
+            db,
+            (
+                (
+                    raw_merchant or "unknown",
+                    description or raw_merchant or "unknown",
+                    amount,
+                )
+                for raw_merchant, amount, description in txns
+            ),
+        )
+        if redis_client
+        else {}
+    )
+
     for raw_merchant, amount, description in txns:
         raw = raw_merchant or "unknown"
 
-        # Use merchant cache if available, fallback to canonical_and_label
-        if redis_client:
-            hint = learn_merchant(redis_client, db, raw, description or raw, amount)
+        hint = hints.get(raw)
+        if hint is not None:
             key = hint.normalized_name
             label = hint.display_name
             category = hint.category
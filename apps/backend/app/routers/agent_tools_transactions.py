@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.transactions import Transaction
+from app.services.txn_search import text_match
 from app.deps.auth_guard import get_current_user_id
 from app.agent.prompts import SEARCH_TRANSACTIONS_PROMPT
 
@@ -212,12 +213,12 @@ def search_transactions(
         q = q.filter(Transaction.month == body.month)
 
     if body.merchant_contains:
-        like = f"%{body.merchant_contains}%"
-        q = q.filter(Transaction.merchant.ilike(like))
+        q = q.filter(text_match(db, [Transaction.merchant], [body.merchant_contains]))
 
     if body.description_contains:
-        like = f"%{body.description_contains}%"
-        q = q.filter(Transaction.description.ilike(like))
+        q = q.filter(
+            text_match(db, [Transaction.description], [body.description_contains])
+        )
 
     if body.category_in:
         # special-case unlabeled sentinel
@@ -80,11 +80,15 @@ async def track(req: Request, body: TrackEvent):
     if ANALYTICS_DB:
         try:
             # import lazily to avoid overhead if unused
-            from app.services.analytics_sink import store_event  # sync function
-
-            loop = asyncio.get_running_loop()
-            # offload to default executor so we don't block the event loop
-            loop.create_task(loop.run_in_executor(None, store_event, record))
+            from app.services import analytics_sink
+
+            # buffered batch writer (started in lifespan) when available
+            if not analytics_sink.enqueue(record):
+                loop = asyncio.get_running_loop()
+                # offload to default executor so we don't block the event loop
+                loop.create_task(
+                    loop.run_in_executor(None, analytics_sink.store_event, record)
+                )
         except Exception:
             # swallow to avoid surfacing errors
             pass
@@ -2,6 +2,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Body, Query, Depends, HTTPException
 from pydantic import BaseModel, Field
 from typing import Any, Dict, Optional, Literal, List
+from app import db as app_db
 from app.db import get_db
 from sqlalchemy.orm import Session
 from app.config import settings
@@ -165,8 +166,19 @@ def describe_panel(
     key = help_cache.make_key(
         panel_id, req.month, fhash, rephrase_requested, user_id=user_id, mode=mode
     )
-    cached = help_cache.get(key)
-    if cached:
+
+    def _load() -> Dict[str, Any]:
+        return _describe_uncached(panel_id, req, user_id, db, mode, key)
+
+    def _refresh() -> Dict[str, Any]:
+        # Background revalidation outlives the request-scoped session
+        with app_db.SessionLocal() as fresh_db:
+            return _describe_uncached(panel_id, req, user_id, fresh_db, mode, key)
+
+    # Single-flight per key: concurrent misses share one (possibly LLM) load,
+    # and expired entries are served while _refresh runs in the background.
+    cached, from_cache = help_cache.get_or_load(key, _load, refresh=_refresh)
+    if from_cache:
         cached.setdefault("panel_id", panel_id)
         cached.setdefault("provider", "none")
         cached.setdefault("mode", mode)
@@ -180,8 +192,19 @@ def describe_panel(
             cached["rephrased"],
             cached.get("provider"),
         )
-        return cached
+    return cached
+
 
+def _describe_uncached(
+    panel_id: str,
+    req: DescribeRequest,
+    user_id: int,
+    db: Session,
+    mode: ModeType,
+    key: str,
+) -> Dict[str, Any]:
+    """Build the describe payload for a cache miss (stored by help_cache)."""
+    rephrase_requested = mode == "explain"
     if mode == "learn":
         text = get_static_help_for_panel(panel_id)
         payload = {
@@ -194,7 +217,6 @@ def describe_panel(
             "provider": "none",
             "reasons": [],
         }
-        help_cache.set_(key, payload)
         _record_metrics(panel_id, "learn", False, False, "none")
         logger.info(
             "help.describe",
@@ -239,7 +261,6 @@ def describe_panel(
             "provider": "none",
             "reasons": ["no_data"],
         }
-        help_cache.set_(key, payload)
         _record_metrics(panel_id, "explain", False, False, "none")
         logger.info(
             "help.describe",
@@ -354,7 +375,6 @@ def describe_panel(
         "fallback_reason": fallback_reason,
         "effective_unavailable": effective_unavailable,
     }
-    help_cache.set_(key, payload)
     _record_metrics(
         panel_id,
         "explain",
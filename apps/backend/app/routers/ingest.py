@@ -15,7 +15,9 @@ from app.utils.csrf import csrf_protect, issue_csrf_cookie
 from io import TextIOWrapper
 import csv
 import datetime as dt
+import itertools
 import logging
+import os
 import re
 from decimal import Decimal, InvalidOperation
 from enum import Enum
@@ -363,7 +365,11 @@ def _parse_generic_rows(rows: list[dict], flip: bool) -> Iterator[dict]:
         }
 
 
-MAX_UPLOAD_MB = 5  # adjust to your spec; 12MB test should 413
+# adjust to your spec; 12MB test should 413. Raise for large streaming imports.
+MAX_UPLOAD_MB = int(os.getenv("INGEST_MAX_UPLOAD_MB", "5"))
+# Opt-in: when set (> 0), uploads at least this large use the streaming path if
+# `stream` is not given. 0 (default) keeps the buffered path unless stream=true.
+STREAM_MIN_BYTES = int(os.getenv("INGEST_STREAM_MIN_BYTES", "0"))
 
 
 def enforce_max_upload(request: Request, max_mb: int = MAX_UPLOAD_MB):
@@ -390,12 +396,18 @@ async def ingest_csv(
     replace: bool = Query(False),
     expenses_are_positive: bool | None = Query(None),  # <-- now optional
     format: str = Query("csv"),  # format from frontend: csv|xls|xlsx
+    stream: bool | None = Query(None),  # None = INGEST_STREAM_MIN_BYTES policy
     db: Session = Depends(get_db),
 ):
     """
     Ingest CSV; if `expenses_are_positive` is None, auto-detect and flip if needed.
     Expected columns: date, amount, merchant, description, category? (category optional)
 
+    `stream=true` parses and writes in fixed-size batches with constant memory
+    (also used for uploads >= INGEST_STREAM_MIN_BYTES when that is set). The
+    response shape is identical, but conflicting rows are skipped without being
+    reported, `app.state.txns` is not mirrored and batches commit as they go.
+
     **Important**: When `replace=True`, only transaction data is deleted.
     ML training data (feedback, rules) is preserved for continuous learning.
     """
@@ -437,7 +449,10 @@ async def ingest_csv(
         # Only /demo/seed endpoint creates demo data (is_demo=True)
         is_demo_upload = False
 
-        result = await _ingest_csv_impl(
+        if stream is None:
+            stream = STREAM_MIN_BYTES > 0 and (file.size or 0) >= STREAM_MIN_BYTES
+        impl = _ingest_csv_stream_impl if stream else _ingest_csv_impl
+        result = await impl(
             user_id=user_id,
             file=file,
             replace=replace,
@@ -536,7 +551,7 @@ async def _ingest_csv_impl(
         try:
             from ..main import app
 
-            app.state.txns = []
+            app.state.txns.clear()
         except Exception:
             pass
 
@@ -597,7 +612,20 @@ async def _ingest_csv_impl(
         mem_list = getattr(app.state, "txns", [])
     except Exception:
         mem_list = None
-    next_id = (len(mem_list) + 1) if isinstance(mem_list, list) else 1
+    next_id = 1
+    if isinstance(mem_list, list):
+        # The mirror is trimmed to max_resident, so its length is not the last id
+        next_id = (
+            max(
+                (
+                    t["id"]
+                    for t in mem_list
+                    if isinstance(t, dict) and isinstance(t.get("id"), int)
+                ),
+                default=0,
+            )
+            + 1
+        )
 
     # Track earliest and latest dates to return detected month range
     earliest_date = None
@@ -900,12 +928,224 @@ async def _ingest_csv_impl(
     return result
 
 
+async def _ingest_csv_stream_impl(
+    user_id: int,
+    file: UploadFile,
+    replace: bool,
+    expenses_are_positive: bool | None,
+    db: Session,
+    phase: str,
+    is_demo: bool = False,
+):
+    """Streaming variant of `_ingest_csv_impl` with constant memory.
+
+    Rows are parsed lazily from the upload stream, deduplicated against hashed
+    keys loaded per month, and written by `TxnBatchWriter` in fixed-size Core
+    INSERT batches. Format detection, parsers and response shape are shared
+    with the buffered path. Unlike it, the legacy `app.state.txns` mirror is
+    not maintained, conflicting rows are skipped silently and each batch is
+    committed on its own, so it is opt-in only (see `ingest_csv`).
+    """
+    from app.services.ingest_stream import TxnBatchWriter
+
+    if replace:
+        try:
+            db.query(Transaction).filter(
+                Transaction.user_id == user_id, Transaction.is_demo == is_demo
+            ).delete()
+            db.commit()
+        except Exception:
+            INGEST_ERRORS.labels(phase="replace").inc()
+            raise
+        try:
+            from ..main import app
+
+            app.state.txns.clear()
+        except Exception:
+            pass
+
+    wrapper = TextIOWrapper(file.file, encoding="utf-8")
+    raw_count = 0
+
+    def _lines():
+        nonlocal raw_count
+        first = True
+        for line in wrapper:
+            if not line.strip():
+                continue
+            if not first:
+                raw_count += 1
+            first = False
+            yield line
+
+    reader = csv.DictReader(_lines(), skipinitialspace=True)
+    if reader.fieldnames:
+        original_headers = reader.fieldnames.copy()
+        reader.fieldnames = [h.lower().strip() if h else h for h in reader.fieldnames]
+    else:
+        original_headers = None
+
+    csv_format = detect_csv_format(reader.fieldnames)
+    logger.info(
+        f"CSV format={csv_format.value} | headers: {original_headers} (normalized to: {reader.fieldnames}) | mode=stream | (user_id={user_id}, filename={file.filename})"
+    )
+
+    if csv_format == CsvFormat.UNKNOWN:
+        logger.warning(
+            f"CSV ingest: unrecognized format (user_id={user_id}, headers={original_headers})"
+        )
+        headers_norm = (
+            [h.lower().strip() if h else h for h in original_headers]
+            if original_headers
+            else []
+        )
+        return {
+            "ok": False,
+            "added": 0,
+            "count": 0,
+            "flip_auto": False,
+            "detected_month": None,
+            "date_range": None,
+            "error": "unknown_format",
+            "headers_found": headers_norm,
+            "message": "CSV format not recognized.",
+        }
+
+    rows = iter(reader)
+    flip = False
+    if csv_format == CsvFormat.BANK_EXPORT_V1:
+        parsed_rows = _parse_bank_export_rows(rows)
+    elif csv_format == CsvFormat.BANK_DEBIT_CREDIT:
+        parsed_rows = _parse_bank_debit_credit_rows(rows)
+    elif csv_format == CsvFormat.BANK_POSTED_EFFECTIVE:
+        parsed_rows = _parse_bank_posted_effective_rows(rows)
+    else:  # GENERIC
+        if expenses_are_positive is None:
+            # Only the first 200 rows are buffered for sign inference
+            head = list(itertools.islice(rows, 200))
+            sample = []
+            for r in head:
+                amt_str = (r.get("amount") or "").strip()
+                if not amt_str:
+                    continue
+                try:
+                    amt = float(amt_str)
+                except ValueError:
+                    continue
+                desc = (r.get("description") or r.get("memo") or "").strip()
+                sample.append((amt, desc))
+            flip = detect_positive_expense_format(sample)
+            rows = itertools.chain(head, rows)
+        else:
+            flip = bool(expenses_are_positive)
+        parsed_rows = _parse_generic_rows(rows, flip)
+
+    writer = TxnBatchWriter(db, user_id, is_demo=is_demo, replace=replace)
+    try:
+        for row_data in parsed_rows:
+            writer.add(row_data)
+        writer.flush()
+    except Exception:
+        db.rollback()
+        raise
+
+    added = writer.added
+    duplicates = writer.duplicates
+    parsed_count = writer.parsed
+    flip_auto = flip and (expenses_are_positive is None)
+
+    if parsed_count == 0:
+        if raw_count == 0:
+            logger.warning(f"CSV ingest: empty file or headers only (user_id={user_id})")
+            return {
+                "ok": False,
+                "added": 0,
+                "count": 0,
+                "flip_auto": False,
+                "detected_month": None,
+                "date_range": None,
+                "error": "empty_file",
+                "message": "CSV file is empty or contains only headers.",
+            }
+        logger.warning(f"CSV ingest: no valid rows after parsing (user_id={user_id})")
+        return {
+            "ok": False,
+            "added": 0,
+            "count": 0,
+            "duplicates": 0,
+            "flip_auto": False,
+            "detected_month": None,
+            "date_range": None,
+            "error": "no_rows_parsed",
+            "message": "No valid transactions could be parsed from the file.",
+        }
+
+    if added == 0:
+        logger.info(
+            f"CSV ingest: all {duplicates} rows were duplicates (user_id={user_id})"
+        )
+        return {
+            "ok": False,
+            "added": 0,
+            "count": parsed_count,
+            "duplicates": duplicates,
+            "flip_auto": flip_auto,
+            "detected_month": None,
+            "date_range": None,
+            "error": "all_rows_duplicate",
+            "message": f"File contained {parsed_count} transactions but all of them already exist in your ledger. No new transactions were added. Try enabling 'Replace existing data' to re-import.",
+        }
+
+    if not replace:
+        # Same one-time maintenance as the buffered path
+        null_rows = db.execute(
+            select(Transaction.id, Transaction.date).where(Transaction.month.is_(None))
+        ).all()
+        if null_rows:
+            for rid, d in null_rows:
+                db.execute(
+                    update(Transaction)
+                    .where(Transaction.id == rid)
+                    .values(month=d.strftime("%Y-%m"))
+                )
+            db.commit()
+
+    earliest_date, latest_date = writer.earliest, writer.latest
+    detected_month = latest_date.strftime("%Y-%m") if latest_date else None
+    logger.info(
+        f"CSV ingest SUCCESS: user_id={user_id}, added={added}, duplicates={duplicates}, "
+        f"detected_month={detected_month}, "
+        f"date_range={earliest_date.isoformat() if earliest_date else None} to "
+        f"{latest_date.isoformat() if latest_date else None}, "
+        f"replace={replace}, flip_auto={flip}, batches={writer.batches}, "
+        f"total_rows_in_file={raw_count}, "
+        f"filename={file.filename}"
+    )
+    return {
+        "ok": True,
+        "added": added,
+        "count": parsed_count,
+        "duplicates": duplicates,
+        "flip_auto": flip_auto,
+        "detected_month": detected_month,
+        "date_range": (
+            {
+                "earliest": earliest_date.isoformat(),
+                "latest": latest_date.isoformat(),
+            }
+            if earliest_date and latest_date
+            else None
+        ),
+    }
+
+
 @router.put("")
 async def ingest_csv_put(
     response: Response,
     file: UploadFile = File(...),
     replace: bool = Query(False),
     expenses_are_positive: bool | None = Query(None),
+    stream: bool | None = Query(None),
     db: Session = Depends(get_db),
 ):
     """PUT alias for ingest to support idempotent clients; delegates to POST handler."""
@@ -914,6 +1154,7 @@ async def ingest_csv_put(
         file=file,
         replace=replace,
         expenses_are_positive=expenses_are_positive,
+        stream=stream,
         db=db,
     )
 
@@ -969,7 +1210,7 @@ async def dashboard_reset(
         try:
             from ..main import app
 
-            app.state.txns = []
+            app.state.txns.clear()
         except Exception:
             pass
 
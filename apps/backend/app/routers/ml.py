@@ -8,8 +8,12 @@ from app.transactions import Transaction
 from app.models import Feedback
 from app.services.ml_suggest import suggest_for_unknowns
 from app.services import rule_suggestions
-from app.services.ml_train import incremental_update, train_on_db
-from app.services.ml_train_service import incremental_update_rows, latest_model_path
+from app.services.ml_train import incremental_update, load_latest_model, train_on_db
+from app.services.ml_train_service import (
+    flush_incremental,
+    incremental_update_rows,
+    latest_model_path,
+)
 from app.utils.csrf import csrf_protect
 
 router = APIRouter()
@@ -82,16 +86,9 @@ def ml_status(db: Session = Depends(get_db)) -> Dict[str, Any]:
         info["feedback_count"] = None
     # Also surface model classes for UI visibility
     try:
-        import os
-        import joblib
-
-        model_path = os.path.abspath(
-            os.path.join(
-                os.path.dirname(__file__), "..", "data", "models", "latest.joblib"
-            )
-        )
-        if os.path.exists(model_path):
-            pipe = joblib.load(model_path)
+        # Resident model (includes incremental updates not yet snapshotted)
+        pipe = load_latest_model()
+        if pipe is not None:
             steps = getattr(pipe, "named_steps", {}) or {}
             clf = steps.get("clf")
             info["classes"] = (
@@ -164,6 +161,8 @@ def ml_selftest(db: Session = Depends(get_db)) -> Dict[str, Any]:
     # 4) Incremental update toward 'Coffee'
     upd = incremental_update_rows([row], ["Coffee"]) or {}
     updated_classes = upd.get("classes") or []
+    # Updates are batched and snapshotted with a debounce; persist now
+    flush_incremental()
 
     # 5) Re-check status and model timestamp
     time.sleep(0.15)
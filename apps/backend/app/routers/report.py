@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, Optional
+from typing import IO, Dict, Iterator, Optional
 from collections import defaultdict
 from enum import Enum
 from decimal import Decimal
+import csv
+import io
+import json
+import tempfile
 
+from app import db as app_db
 from app.db import get_db
 from app.deps.auth_guard import get_current_user_id
 from app.services.charts_data import (
@@ -18,8 +23,10 @@ from app.services.charts_data import (
     get_spending_trends,
 )
 from app.services.report_export import (
+    OPENPYXL_AVAILABLE,
     build_excel_bytes,
     build_pdf_bytes,
+    write_excel_stream,
     ReportMode as ExportMode,
 )
 from app.services.transaction_filters import ExportFilters, apply_export_filters
@@ -36,6 +43,81 @@ class ReportMode(str, Enum):
     unknowns = "unknowns"
 
 
+class ExportFormat(str, Enum):
+    """Row-streaming export format for /report/transactions."""
+
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+# Rows fetched per server-side cursor batch for streaming exports
+_STREAM_BATCH = 1000
+# Streamed workbooks spill from memory to a temp file past this size
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+_CHUNK_BYTES = 64 * 1024
+_TXN_COLUMNS = [
+    "date",
+    "merchant",
+    "description",
+    "amount",
+    "category_label",
+    "category_slug",
+]
+
+
+def _transactions_query(
+    db: Session,
+    user_id: int,
+    start_d,
+    end_d,
+    filters: ExportFilters,
+    only_unknowns: bool,
+):
+    query = db.query(
+        Transaction.date,
+        Transaction.merchant,
+        Transaction.description,
+        Transaction.category,
+        Transaction.amount,
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.date >= start_d,
+        Transaction.date <= end_d,
+    )
+
+    # Apply export filters BEFORE mode-specific filters
+    query = apply_export_filters(query, filters)
+
+    # Fetch all transactions for full mode or unknowns for unknowns mode
+    if only_unknowns:
+        query = query.filter(
+            (Transaction.category.is_(None)) | (Transaction.category == "unknown")
+        )
+    return query.order_by(Transaction.date.asc())
+
+
+def _txn_dict(r) -> Dict:
+    return {
+        "date": (r[0].isoformat() if getattr(r[0], "isoformat", None) else str(r[0])),
+        "merchant": r[1] or "",
+        "description": r[2] or "",
+        "amount": float(r[4] or 0.0),
+        "category_label": r[3] or "Unknown",
+        "category_slug": r[3] or "unknown",
+    }
+
+
+def _iter_file(fh: IO[bytes]) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = fh.read(_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fh.close()
+
+
 @router.get("/report")
 def report(month: str) -> Dict:
     from ..main import app
@@ -78,6 +160,10 @@ def report_excel(
         None, description="Deprecated: use mode parameter instead"
     ),
     split_transactions_alpha: bool = Query(False),
+    stream: bool = Query(
+        False,
+        description="Build with write-only sheets from a server-side cursor (large windows)",
+    ),
     db: Session = Depends(get_db),
 ):
     """Generate an Excel report for a month or custom date range.
@@ -87,6 +173,10 @@ def report_excel(
       - summary: summary only, no transactions sheet
       - unknowns: only unknown/uncategorized transactions + summary
 
+    stream=true writes the same sheets with constant memory: transactions are
+    read in batches and the workbook is spooled to a temp file, not a buffer.
+    Without openpyxl it falls back to the buffered (pandas) builder.
+
     Filters (optional):
       - category: category slug (e.g. 'groceries')
       - min_amount / max_amount: numeric bounds on transaction amount
@@ -125,42 +215,52 @@ def report_excel(
     include_transactions_flag = mode in (ReportMode.full, ReportMode.unknowns)
     only_unknowns = mode == ReportMode.unknowns
 
-    if include_transactions_flag:
-        query = db.query(
-            Transaction.date,
-            Transaction.merchant,
-            Transaction.description,
-            Transaction.category,
-            Transaction.amount,
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= start_d,
-            Transaction.date <= end_d,
-        )
-
-        # Apply export filters BEFORE mode-specific filters
-        query = apply_export_filters(query, filters)
+    # Filename reflects month or custom range and mode
+    safe_mode = mode.value
+    if month:
+        filename = f"ledgermind-{safe_mode}-{month}.xlsx"
+    else:
+        filename = f"ledgermind-{safe_mode}-{summary['start']}_to_{summary['end']}.xlsx"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
 
-        # Fetch all transactions for full mode or unknowns for unknowns mode
-        if only_unknowns:
-            query = query.filter(
-                (Transaction.category.is_(None)) | (Transaction.category == "unknown")
+    # Without openpyxl fall through to build_excel_bytes' pandas fallback
+    if stream and OPENPYXL_AVAILABLE:
+        rows = None
+        if include_transactions_flag:
+            query = _transactions_query(
+                db, user_id, start_d, end_d, filters, only_unknowns
+            )
+            rows = (_txn_dict(r) for r in query.yield_per(_STREAM_BATCH))
+        spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+        try:
+            write_excel_stream(
+                spool,
+                summary=summary,
+                merchants=merchants,
+                categories=categories,
+                mode=ExportMode(mode.value),
+                transactions=rows,
+                filters=filters,
             )
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        return StreamingResponse(
+            _iter_file(spool),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers=headers,
+        )
 
-        rows = query.order_by(Transaction.date.asc()).all()
+    if include_transactions_flag:
+        query = _transactions_query(
+            db, user_id, start_d, end_d, filters, only_unknowns
+        )
+        rows = query.all()
 
         # Convert to list of dicts
         for r in rows:
-            txn_dict = {
-                "date": (
-                    r[0].isoformat() if getattr(r[0], "isoformat", None) else str(r[0])
-                ),
-                "merchant": r[1] or "",
-                "description": r[2] or "",
-                "amount": float(r[4] or 0.0),
-                "category_label": r[3] or "Unknown",
-                "category_slug": r[3] or "unknown",
-            }
+            txn_dict = _txn_dict(r)
             transactions_list.append(txn_dict)
 
             # Track unknowns separately
@@ -182,13 +282,6 @@ def report_excel(
         split_txns_alpha=split_transactions_alpha,
         filters=filters,  # Pass filters to builder
     )
-    # Filename reflects month or custom range and mode
-    safe_mode = mode.value
-    if month:
-        filename = f"ledgermind-{safe_mode}-{month}.xlsx"
-    else:
-        filename = f"ledgermind-{safe_mode}-{summary['start']}_to_{summary['end']}.xlsx"
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
     return StreamingResponse(
         iter([data]),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -314,3 +407,97 @@ def report_pdf(
         media_type="application/pdf",
         headers=headers,
     )
+
+
+def _iter_transactions_export(
+    user_id: int,
+    start_d,
+    end_d,
+    filters: ExportFilters,
+    only_unknowns: bool,
+    fmt: ExportFormat,
+) -> Iterator[bytes]:
+    """Yield encoded export rows in batches from a server-side cursor.
+
+    Runs after the handler returns, so it owns its session instead of the
+    request-scoped one from get_db.
+    """
+    db = app_db.SessionLocal()
+    try:
+        query = _transactions_query(
+            db, user_id, start_d, end_d, filters, only_unknowns
+        )
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=_TXN_COLUMNS)
+        if fmt == ExportFormat.csv:
+            writer.writeheader()
+        for r in query.yield_per(_STREAM_BATCH):
+            row = _txn_dict(r)
+            if fmt == ExportFormat.csv:
+                writer.writerow(row)
+            else:
+                buf.write(json.dumps(row, ensure_ascii=False))
+                buf.write("\n")
+            if buf.tell() >= _CHUNK_BYTES:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
+
+@router.get("/report/transactions")
+def report_transactions(
+    user_id: int = Depends(get_current_user_id),
+    month: str | None = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    start: str | None = Query(None, description="YYYY-MM-DD"),
+    end: str | None = Query(None, description="YYYY-MM-DD"),
+    format: ExportFormat = Query(ExportFormat.csv, description="csv or ndjson"),
+    only_unknowns: bool = Query(False, description="Only uncategorized txns"),
+    # Filter parameters
+    category: Optional[str] = Query(None, description="Filter by category slug"),
+    min_amount: Optional[Decimal] = Query(
+        None, description="Minimum transaction amount"
+    ),
+    max_amount: Optional[Decimal] = Query(
+        None, description="Maximum transaction amount"
+    ),
+    search: Optional[str] = Query(
+        None, description="Text search in description/merchant"
+    ),
+    db: Session = Depends(get_db),
+):
+    """Stream transactions for a month or custom date range as CSV or NDJSON.
+
+    Rows are written as they are read from the database, so memory stays
+    constant regardless of the window size. Columns match the Transactions
+    sheet of /report/excel.
+    """
+    filters = ExportFilters(
+        category_slug=category,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        search=search,
+    )
+    try:
+        start_d, end_d = resolve_window(db, user_id, month, start, end)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="No data available for reporting")
+    span = month or f"{start_d.isoformat()}_to_{end_d.isoformat()}"
+    prefix = "ledgermind-unknowns" if only_unknowns else "ledgermind-transactions"
+    if format == ExportFormat.csv:
+        media_type = "text/csv; charset=utf-8"
+        filename = f"{prefix}-{span}.csv"
+    else:
+        media_type = "application/x-ndjson"
+        filename = f"{prefix}-{span}.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(
+        _iter_transactions_export(
+            user_id, start_d, end_d, filters, only_unknowns, format
+        ),
+        media_type=media_type,
+        headers=headers,
+    )
@@ -20,12 +20,17 @@ from ..services.metrics import (
 from ..services.suggest.metrics import ml_suggestion_accepts_total
 from ..models.suggestions import SuggestionEvent, SuggestionFeedback
 from ..db import SessionLocal, get_db
-from ..services.suggest.serve import suggest_auto
+from ..utils.auth import get_current_user
+from ..services.suggest.serve import suggest_auto, suggest_batch
 from ..orm_models import Transaction, Suggestion
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/ml/suggestions", tags=["ml-suggestions"])
 
+# Upper bound on transactions scored by one /batch request
+BATCH_MAX = 2000
+
 
 class SuggestionCandidate(BaseModel):
     """A single category suggestion candidate."""
@@ -56,6 +61,20 @@ class SuggestRequest(BaseModel):
     mode: str = "auto"
 
 
+class BatchSuggestRequest(BaseModel):
+    """Request for batched suggestions (explicit ids or a month's unknowns)."""
+
+    txn_ids: Optional[Union[List[str], List[int]]] = None
+    month: Optional[str] = Field(
+        None,
+        pattern=r"^\d{4}-\d{2}$",
+        description="YYYY-MM; suggest for uncategorized txns of this month",
+    )
+    limit: int = Field(500, ge=1, le=BATCH_MAX)
+    top_k: int | None = None
+    mode: str = "auto"
+
+
 class SuggestResponse(BaseModel):
     """Response containing suggestions for multiple transactions."""
 
@@ -94,21 +113,121 @@ def _get_txn_data(db, txn_id: int) -> Dict | None:
         txn = db.query(Transaction).filter(Transaction.id == txn_id).first()
         if not txn:
             return None
-
-        # Build transaction dict for heuristic suggester
-        return {
-            "id": txn.id,
-            "merchant": txn.merchant or "",
-            "memo": txn.description or "",
-            "amount": txn.amount or 0.0,
-            "category": txn.category,
-            "account": txn.account,
-            "date": txn.date.isoformat() if txn.date else None,
-        }
+        return _txn_dict(txn)
     except Exception:
         return None
 
 
+def _get_txns_data(
+    db, txn_ids: List[int], user_id: Optional[int] = None
+) -> List[Dict]:
+    """Fetch transaction dicts for many ids with one IN query.
+
+    Args:
+        db: Database session
+        txn_ids: Transaction IDs (order preserved, missing ids skipped)
+        user_id: Only return this user's transactions when given
+
+    Returns:
+        Transaction dicts with merchant, memo, amount, etc. for the suggester
+    """
+    if not txn_ids:
+        return []
+    q = db.query(Transaction).filter(Transaction.id.in_(set(txn_ids)))
+    if user_id is not None:
+        q = q.filter(Transaction.user_id == user_id)
+    rows = q.all()
+    by_id = {t.id: t for t in rows}
+    return [_txn_dict(by_id[i]) for i in txn_ids if i in by_id]
+
+
+def _txn_dict(txn: Transaction) -> Dict:
+    # Build transaction dict for heuristic suggester
+    return {
+        "id": txn.id,
+        "merchant": txn.merchant or "",
+        "memo": txn.description or "",
+        "amount": txn.amount or 0.0,
+        "category": txn.category,
+        "account": txn.account,
+        "date": txn.date.isoformat() if txn.date else None,
+    }
+
+
+def _normalize_ids(txn_ids) -> List[int]:
+    """Normalize txn_ids to ints early with helpful 400 on failure."""
+    norm_ids: List[int] = []
+    for tid in txn_ids:
+        try:
+            norm_ids.append(int(tid))
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid txn_id: {tid!r} - must be integer or numeric string",
+            )
+    return norm_ids
+
+
+def _suggest_items(
+    db, txns: List[Dict], top_k: int, mode: str
+) -> tuple[List[SuggestionItem], int]:
+    """Score txns with one batched model call and record a SuggestionEvent each.
+
+    Returns:
+        Tuple of (items, covered) where covered counts txns with candidates
+    """
+    # TODO: Extract user_id from request context for sticky canary
+    results = suggest_batch(txns, user_id="default", db=db)
+
+    events: List[SuggestionEvent] = []
+    covered = 0
+    for txn, (cands, model_id, features_hash, _source) in zip(txns, results):
+        cands = cands[:top_k]
+        if cands:
+            covered += 1
+        events.append(
+            SuggestionEvent(
+                txn_id=txn["id"],  # Use the actual transaction ID
+                model_id=model_id,
+                features_hash=features_hash,
+                candidates=[dict(c) for c in cands],  # Convert to plain dicts for JSON
+                mode=mode,
+            )
+        )
+    db.add_all(events)
+    db.flush()  # assign ids
+
+    items = [
+        SuggestionItem(
+            txn_id=str(ev.txn_id),
+            candidates=[SuggestionCandidate(**c) for c in ev.candidates],
+            event_id=str(ev.id),
+        )
+        for ev in events
+    ]
+    return items, covered
+
+
+def _run_suggest(
+    db, route: str, txns: List[Dict], top_k: int, mode: str
+) -> SuggestResponse:
+    t0 = time.time()
+    try:
+        items, covered = _suggest_items(db, txns, top_k, mode)
+        db.commit()
+    except Exception:
+        # Track 5xx errors in metrics before re-raising
+        HTTP_ERRORS.labels(route=route).inc()
+        raise
+
+    # Metrics are now tracked inside suggest_batch()
+    if covered:
+        SUGGESTIONS_COVERED.inc(covered)
+    SUGGESTIONS_LATENCY.observe((time.time() - t0) * 1000.0)
+
+    return SuggestResponse(items=items)
+
+
 @router.post("", response_model=SuggestResponse)
 def suggest(req: SuggestRequest):
     """Generate category suggestions for transactions.
@@ -194,6 +313,66 @@ def suggest(req: SuggestRequest):
     return SuggestResponse(items=items)
 
 
+@router.post("/batch", response_model=SuggestResponse)
+def suggest_batch_endpoint(
+    req: BatchSuggestRequest,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Generate suggestions for many transactions with one model call.
+
+    Scores either the explicit ``txn_ids`` or, when only ``month`` is given,
+    that month's uncategorized transactions (up to ``limit``). Only the
+    authenticated user's transactions are scored; other ids are skipped.
+
+    Args:
+        req: Batch request with txn_ids or month
+
+    Returns:
+        Suggestions for each transaction
+
+    Raises:
+        HTTPException: If suggestions are disabled or invalid input
+    """
+    if not settings.SUGGEST_ENABLED:
+        raise HTTPException(status_code=503, detail="Suggestions disabled")
+    if req.txn_ids is None and not req.month:
+        raise HTTPException(status_code=400, detail="txn_ids or month is required")
+
+    if req.txn_ids is not None:
+        norm_ids = _normalize_ids(req.txn_ids)
+        if len(norm_ids) > BATCH_MAX:
+            raise HTTPException(
+                status_code=400, detail=f"At most {BATCH_MAX} txn_ids per batch"
+            )
+        txns = _get_txns_data(db, norm_ids, user_id=user.id)
+    else:
+        rows = (
+            db.query(Transaction)
+            .filter(
+                Transaction.user_id == user.id,
+                Transaction.month == req.month,
+                Transaction.deleted_at.is_(None),
+                or_(
+                    Transaction.category.is_(None),
+                    Transaction.category.in_(("", "Unknown")),
+                ),
+            )
+            .order_by(Transaction.id)
+            .limit(req.limit)
+            .all()
+        )
+        txns = [_txn_dict(t) for t in rows]
+
+    return _run_suggest(
+        db,
+        "/ml/suggestions/batch",
+        txns,
+        req.top_k or settings.SUGGEST_TOPK,
+        req.mode,
+    )
+
+
 @router.post("/feedback", summary="Record suggestion feedback")
 def feedback(req: SuggestionFeedbackRequestV2, db: Session = Depends(get_db)):
     """Record user feedback on a suggestion.
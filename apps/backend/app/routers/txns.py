@@ -170,6 +170,10 @@ def categorize(txn_id: int, req: CategorizeRequest, db: Session = Depends(get_db
     for t in getattr(app.state, "txns", []):
         if t["id"] == txn_id:
             t["category"] = req.category
+            # Log the in-place edit so save_state writes a delta
+            replace = getattr(app.state.txns, "replace", None)
+            if replace is not None:
+                replace(t)
             app.state.user_labels.append({"txn_id": txn_id, "category": req.category})
             save_state(app)
             # Prefer returning the in-memory dict shape used by clients
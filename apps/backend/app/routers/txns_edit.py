@@ -9,6 +9,7 @@ from enum import Enum
 
 from app.db import get_db
 from app.orm_models import Transaction
+from app.services.txn_search import text_match
 from app.schemas.txns_edit import (
     TxnPatch,
     TxnBulkPatch,
@@ -55,10 +56,12 @@ def list_txns(
     if merchant:
         qry = qry.filter(Transaction.merchant_canonical == merchant)
     if q:
-        like = f"%{q.lower()}%"
         qry = qry.filter(
-            Transaction.description.ilike(like)
-            | Transaction.merchant_canonical.ilike(like)
+            text_match(
+                db,
+                [Transaction.description, Transaction.merchant_canonical],
+                [q.lower()],
+            )
         )
     
     # Apply status filter
@@ -0,0 +1,110 @@
+# Run with:  python -m app.scripts.bench_analytics --rows 5000 20000 50000
+"""Latency of analytics KPIs/forecast/anomalies/budget vs. transaction count.
+
+Seeds an in-memory SQLite database per row count and compares the legacy
+"hydrate every ORM row and sum in Python" aggregation with the GROUP BY
+helpers now used by ``app.services.analytics``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.services import analytics
+from app.transactions import Transaction
+
+
+def _seed(db, rows: int) -> None:
+    rng = random.Random(1)
+    merchants = [f"merchant {i}" for i in range(200)]
+    cats = ["Groceries", "Dining", "Transport", "Shopping", "Salary", None]
+    batch = []
+    for i in range(rows):
+        d = date(2023 + (i % 3), rng.randint(1, 12), rng.randint(1, 28))
+        batch.append(
+            {
+                "date": d,
+                "month": f"{d.year:04d}-{d.month:02d}",
+                "amount": rng.choice([1, -1, -1, -1]) * round(rng.uniform(1, 400), 2),
+                "description": f"txn {i}",
+                "merchant": rng.choice(merchants),
+                "category": rng.choice(cats),
+            }
+        )
+    db.execute(insert(Transaction.__table__), batch)
+    db.commit()
+
+
+def _legacy_monthly_sums(db, lookback, ref_month):
+    all_months = [m for (m,) in db.query(Transaction.month).distinct().all() if m]
+    months = analytics._months_window(all_months, ref_month, lookback)
+    series: dict = {}
+    by_month: dict = {}
+    for t in db.query(Transaction).filter(Transaction.month.in_(months)).all():
+        amt = float(t.amount or 0.0)
+        s = series.setdefault(t.month, {"in": 0.0, "out": 0.0, "net": 0.0})
+        s["in" if amt >= 0 else "out"] += abs(amt)
+        by_month.setdefault(t.month, []).append(
+            {
+                "date": t.date,
+                "amount": amt,
+                "merchant": t.merchant_canonical or t.merchant or "",
+                "category": t.category or "",
+            }
+        )
+    return series, by_month
+
+
+def _legacy_suite(db):
+    # compute_kpis (window + HHI month), forecast, anomalies, budget
+    _legacy_monthly_sums(db, 6, None)
+    _legacy_monthly_sums(db, 1, None)
+    _legacy_monthly_sums(db, 36, None)
+    _legacy_monthly_sums(db, 6, None)
+    _legacy_monthly_sums(db, 6, None)
+
+
+def _sql_suite(db):
+    analytics.compute_kpis(db)
+    analytics.forecast_cashflow(db, model="ema")
+    analytics.find_anomalies(db)
+    analytics.budget_suggest(db)
+
+
+def _time(fn, db, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        db.expunge_all()
+        t0 = time.perf_counter()
+        fn(db)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Analytics aggregation benchmark")
+    ap.add_argument("--rows", type=int, nargs="+", default=[5000, 20000, 50000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'rows':>8} {'legacy_ms':>10} {'sql_ms':>8} {'speedup':>8}")
+    for n in args.rows:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[Transaction.__table__])
+        db = sessionmaker(bind=engine)()
+        _seed(db, n)
+        legacy = _time(_legacy_suite, db, args.repeat)
+        sql = _time(_sql_suite, db, args.repeat)
+        print(f"{n:>8} {legacy:>10.1f} {sql:>8.1f} {legacy / max(sql, 1e-6):>7.1f}x")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
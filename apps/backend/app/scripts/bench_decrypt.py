@@ -0,0 +1,127 @@
+# Run with:  python -m app.scripts.bench_decrypt --rows 10000 100000
+"""Decrypt throughput for the encrypted transaction columns.
+
+Rows carry description / merchant_raw / note ciphertext under two DEK
+labels. Compares:
+
+* legacy:   new AESGCM(dek) per cell (the previous property implementation)
+* property: Transaction.*_text per row (shared cipher per DEK)
+* bulk:     decrypt_transactions over the ORM objects
+* rows:     decrypt_transactions over column rows (the load_plaintext path)
+* threaded: decrypt_transactions split across --workers threads
+* memo:     the property path read twice inside plaintext_memo()
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from collections import namedtuple
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core import crypto_state
+from app.core.bulk_decrypt import (
+    TXN_AAD,
+    TXN_ENC_FIELDS,
+    decrypt_transactions,
+    plaintext_memo,
+)
+from app.orm_models import Transaction
+
+_LABELS = ("active", "rotating::bench")
+
+
+def _rows(n: int) -> list[Transaction]:
+    keys = {label: os.urandom(32) for label in _LABELS}
+    for label, dek in keys.items():
+        crypto_state._deks[label] = dek
+    rows = []
+    for i in range(n):
+        label = _LABELS[i % 10 == 0]
+        aead = AESGCM(keys[label])
+        t = Transaction(enc_label=label)
+        for field, (nonce_col, ct_col) in TXN_ENC_FIELDS.items():
+            nonce = os.urandom(12)
+            pt = f"{field} STARBUCKS STORE #{i % 5000} SEATTLE WA".encode()
+            setattr(t, nonce_col, nonce)
+            setattr(t, ct_col, aead.encrypt(nonce, pt, TXN_AAD))
+        rows.append(t)
+    return rows
+
+
+def _column_rows(rows: list[Transaction]) -> list[tuple]:
+    cols = ["enc_label"] + [c for pair in TXN_ENC_FIELDS.values() for c in pair]
+    Row = namedtuple("Row", cols)
+    return [Row(*(getattr(t, c) for c in cols)) for t in rows]
+
+
+def _legacy(rows):
+    out = []
+    for t in rows:
+        dek = crypto_state.get_dek_for_label(t.enc_label or "active")
+        out.append(
+            {
+                f: AESGCM(dek).decrypt(getattr(t, n), getattr(t, c), TXN_AAD).decode()
+                for f, (n, c) in TXN_ENC_FIELDS.items()
+            }
+        )
+    return out
+
+
+def _property(rows):
+    return [
+        {
+            "description": t.description_text,
+            "merchant_raw": t.merchant_raw_text,
+            "note": t.note_text,
+        }
+        for t in rows
+    ]
+
+
+def _memo_twice(rows):
+    with plaintext_memo(max_entries=len(rows) * 3):
+        _property(rows)
+        return _property(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    for n in args.rows:
+        rows = _rows(n)
+        column_rows = _column_rows(rows)
+        expected = _legacy(rows)
+        variants = [
+            ("legacy", _legacy),
+            ("property", _property),
+            ("bulk", lambda r: decrypt_transactions(r, workers=1)),
+            ("rows", lambda _r: decrypt_transactions(column_rows, workers=1)),
+            (
+                "threaded",
+                lambda r: decrypt_transactions(r, workers=args.workers, threshold=1),
+            ),
+            ("memo x2", _memo_twice),
+        ]
+        print(f"rows={n} cells={n * len(TXN_ENC_FIELDS)} cpus={os.cpu_count()}")
+        base = None
+        for label, fn in variants:
+            assert fn(rows) == expected, label
+            ms = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                fn(rows)
+                ms = min(ms, (time.perf_counter() - t0) * 1000)
+            base = base or ms
+            print(f"  {label:<9} {ms:9.1f} ms  {base / ms:6.1f}x")
+        crypto_state.purge_dek_cache(*_LABELS)
+
+
+if __name__ == "__main__":
+    main()
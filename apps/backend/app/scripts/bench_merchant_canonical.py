@@ -0,0 +1,150 @@
+# Run with:  python -m app.scripts.bench_merchant_canonical --rows 100000
+"""Merchant canonicalization throughput over a synthetic statement corpus.
+
+The corpus mimics a bank export: a few thousand distinct merchants with
+store numbers / locations, drawn with a Zipf-like skew so popular merchants
+repeat heavily. Compares, per canonicalizer:
+
+* legacy:   the previous per-call implementation (re.sub passes + linear rule scan)
+* compiled: the compiled matcher without memoization (``__wrapped__``)
+* memoized: the public cached function
+* bulk:     the ``*_many`` API
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+
+from app.services import charts_data
+from app.services.charts_data import (
+    MERCHANT_BRAND_RULES,
+    canonical_and_label,
+    canonical_and_label_many,
+)
+from app.services.merchant_normalizer import (
+    BRAND_RULES,
+    _basic_normalize,
+    _normalize_cached,
+)
+from app.utils.text import canonicalize_many, canonicalize_merchant
+
+_BRANDS = [
+    "AMAZON MKTPL*{n}",
+    "AMZN Mktp US*{n}",
+    "TARGET T-{n}",
+    "WALMART SUPERCENTER #{n}",
+    "STARBUCKS STORE {n}",
+    "HARRIS TEETER #{n} {street}",
+    "PLAYSTATION NETWORK {n}",
+    "NOW WITHDRAWAL ZELLE TO {name}",
+    "SQ *{name} COFFEE",
+    "PAYPAL *{name}",
+    "VENMO PAYMENT {n}",
+    "CVS/PHARMACY #{n} {street}",
+    "SHELL OIL {n}",
+]
+_NAMES = ["BOB", "ALICE", "JOE", "MAPLE", "BLUE BOTTLE", "CORNER"]
+_STREETS = ["HIGHLAND CROS", "MAIN ST", "CENTREVILLE", "OAK AVE"]
+
+
+def _corpus(rows: int, distinct: int = 3000, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    merchants = []
+    for i in range(distinct):
+        if i % 3 == 0:
+            merchants.append(f"LOCAL SHOP {i} LLC")
+            continue
+        merchants.append(
+            rng.choice(_BRANDS).format(
+                n=rng.randint(100, 99999),
+                name=rng.choice(_NAMES),
+                street=rng.choice(_STREETS),
+            )
+        )
+    weights = [1.0 / (i + 1) for i in range(distinct)]
+    return rng.choices(merchants, weights=weights, k=rows)
+
+
+def _legacy_canonical_and_label(raw: str) -> tuple[str, str]:
+    if not raw:
+        base = "unknown"
+    else:
+        s = raw.lower()
+        s = re.sub(r"\d+", " ", s)
+        s = re.sub(r"[^a-z& ]+", " ", s)
+        s = re.sub(r"\s+", " ", s).strip()
+        base = s or raw.lower()
+    for rule in MERCHANT_BRAND_RULES:
+        if any(pat in base for pat in rule.patterns):
+            return rule.key, rule.label
+    key = base or "unknown"
+    label = key.title()
+    return key, (label[:29] + "...") if len(label) > 32 else label
+
+
+def _legacy_normalize(raw: str) -> tuple:
+    for rule in BRAND_RULES:
+        if rule.pattern.search(raw):
+            return (rule.normalized, rule.kind, rule.category_hint or "other", rule.id)
+    return (_basic_normalize(raw), None, "unknown", None)
+
+
+def _time(fn, corpus) -> float:
+    t0 = time.perf_counter()
+    fn(corpus)
+    return (time.perf_counter() - t0) * 1000
+
+
+def _per_row(f):
+    return lambda corpus: [f(r) for r in corpus]
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--distinct", type=int, default=3000)
+    args = ap.parse_args(argv)
+
+    corpus = _corpus(args.rows, args.distinct)
+    print(f"rows={len(corpus)} distinct={len(set(corpus))}")
+
+    # Parity with the legacy implementations before timing anything
+    for raw in set(corpus):
+        assert canonical_and_label(raw) == _legacy_canonical_and_label(raw), raw
+        assert _normalize_cached(raw) == _legacy_normalize(raw), raw
+
+    suites = {
+        "canonical_and_label": [
+            ("legacy", _per_row(_legacy_canonical_and_label)),
+            ("compiled", _per_row(canonical_and_label.__wrapped__)),
+            ("memoized", _per_row(canonical_and_label)),
+            ("bulk", canonical_and_label_many),
+        ],
+        "normalize_merchant_for_category": [
+            ("legacy", _per_row(_legacy_normalize)),
+            ("compiled", _per_row(_normalize_cached.__wrapped__)),
+            ("memoized", _per_row(_normalize_cached)),
+        ],
+        "canonicalize_merchant": [
+            ("uncached", _per_row(canonicalize_merchant.__wrapped__)),
+            ("memoized", _per_row(canonicalize_merchant)),
+            ("bulk", canonicalize_many),
+        ],
+    }
+    for name, variants in suites.items():
+        print(name)
+        base = None
+        for label, fn in variants:
+            charts_data.reset_merchant_brand_rules()
+            _normalize_cached.cache_clear()
+            canonicalize_merchant.cache_clear()
+            ms = _time(fn, corpus)
+            base = base or ms
+            print(f"  {label:<9} {ms:9.1f} ms  {base / ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Run with:  python -m app.scripts.bench_rag_index --chunks 5000 --dim 768 --queries 50
+"""Compare the legacy pure-Python cosine loop with the NumPy chunk index."""
+from __future__ import annotations
+
+import argparse
+import random
+import struct
+import time
+
+import numpy as np
+
+from app.services.rag_index import ChunkIndex
+from app.services.rag_store import _coerce_vec, _cos
+
+
+def _legacy_top_k(qvec, blobs, k):
+    scored = []
+    for cid, blob in blobs:
+        emb = _coerce_vec(blob)
+        if emb:
+            scored.append((_cos(qvec, emb), cid))
+    scored.sort(key=lambda t: t[0], reverse=True)
+    return [cid for _, cid in scored[:k]]
+
+
+def _index_from_blobs(blobs) -> ChunkIndex:
+    ids = np.fromiter((cid for cid, _ in blobs), dtype=np.int64, count=len(blobs))
+    matrix = np.vstack([np.frombuffer(b, dtype=np.float32) for _, b in blobs])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return ChunkIndex(ids=ids, matrix=matrix, fingerprint=(len(blobs), len(blobs)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="RAG semantic_search scoring benchmark")
+    ap.add_argument("--chunks", type=int, default=5000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--k", type=int, default=8)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    blobs = []
+    for cid in range(1, args.chunks + 1):
+        v = [rng.gauss(0, 1) for _ in range(args.dim)]
+        blobs.append((cid, struct.pack(f"{args.dim}f", *v)))
+    queries = [[rng.gauss(0, 1) for _ in range(args.dim)] for _ in range(args.queries)]
+
+    t0 = time.perf_counter()
+    idx = _index_from_blobs(blobs)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    legacy = [_legacy_top_k(q, blobs, args.k) for q in queries]
+    legacy_ms = (time.perf_counter() - t0) * 1000 / args.queries
+
+    t0 = time.perf_counter()
+    fast = [[cid for cid, _ in idx.search(q, args.k)] for q in queries]
+    index_ms = (time.perf_counter() - t0) * 1000 / args.queries
+
+    agree = sum(a == b for a, b in zip(legacy, fast))
+    print(f"[bench_rag_index] chunks={args.chunks} dim={args.dim} k={args.k}")
+    print(f"  index build:        {build_ms:9.2f} ms (once per change)")
+    print(f"  legacy loop/query:  {legacy_ms:9.2f} ms")
+    print(f"  index/query:        {index_ms:9.3f} ms")
+    print(f"  speedup:            {legacy_ms / max(index_ms, 1e-9):9.1f}x")
+    print(f"  identical top-k:    {agree}/{args.queries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Run with:  python -m app.scripts.bench_recurring --rows 20000 100000 500000
+"""Latency of recurring detection vs. transaction count.
+
+Seeds an in-memory SQLite database per row count and compares the legacy
+implementations (ORM rows grouped in Python, one RecurringSeries lookup per
+merchant; per-element gap loops over re-hydrated window rows) with the
+vectorized ``recurring.merchant_stats`` engine behind ``scan_recurring`` and
+``analytics.detect_recurring``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics as stats
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.orm_models import RecurringSeries
+from app.services import analytics, recurring
+from app.transactions import Transaction
+
+
+def _seed(db, rows: int) -> None:
+    rng = random.Random(1)
+    merchants = [f"merchant {i}" for i in range(2000)]
+    subs = [f"subscription {i}" for i in range(200)]
+    batch = []
+    for i in range(rows):
+        if i % 10 == 0:
+            m = rng.choice(subs)
+            amt = -9.99
+        else:
+            m = rng.choice(merchants)
+            amt = rng.choice([1, -1, -1, -1]) * round(rng.uniform(1, 400), 2)
+        d = date(2023, 1, 1) + timedelta(days=rng.randint(0, 1000))
+        batch.append(
+            {
+                "date": d,
+                "month": f"{d.year:04d}-{d.month:02d}",
+                "amount": amt,
+                "merchant": m,
+                "merchant_canonical": m,
+                "category": rng.choice(["Shopping", "Dining", "Transfer", None]),
+            }
+        )
+    db.execute(insert(Transaction.__table__), batch)
+    db.commit()
+
+
+def _legacy_scan(db) -> int:
+    by_merchant = defaultdict(list)
+    for t in db.query(Transaction).filter(Transaction.merchant.isnot(None)).all():
+        if t.category and t.category.lower() in ("transfer", "internal"):
+            continue
+        by_merchant[t.merchant.strip()].append(t)
+    upserts = 0
+    for m, rows in by_merchant.items():
+        amounts = [float(abs(r.amount)) for r in rows]
+        avg = sum(amounts) / len(amounts)
+        if avg <= 0:
+            continue
+        stdev = (sum((a - avg) ** 2 for a in amounts) / len(amounts)) ** 0.5
+        if stdev / avg > 0.15:
+            continue
+        dates = sorted(r.date for r in rows)
+        db.query(RecurringSeries).filter(RecurringSeries.merchant == m).first()
+        db.add(
+            RecurringSeries(
+                merchant=m,
+                avg_amount=round(avg, 2),
+                cadence="unknown",
+                first_seen=dates[0],
+                last_seen=dates[-1],
+                sample_txn_id=rows[-1].id,
+            )
+        )
+        upserts += 1
+    db.commit()
+    return upserts
+
+
+def _legacy_detect(db, lookback: int = 24) -> int:
+    _, by_month = analytics._monthly_sums(db, lookback, None)
+    groups = defaultdict(list)
+    for arr in by_month.values():
+        for t in arr:
+            if t["amount"] < 0:
+                groups[t["merchant"]].append(t)
+    out = 0
+    for arr in groups.values():
+        arr = sorted(arr, key=lambda x: x["date"])
+        if len(arr) < 3:
+            continue
+        Counter(d["date"].day for d in arr).most_common(1)
+        gaps = [(arr[i]["date"] - arr[i - 1]["date"]).days for i in range(1, len(arr))]
+        stats.median(gaps)
+        out += 1
+    return out
+
+
+def _time(fn, db, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        db.execute(delete(RecurringSeries))
+        db.commit()
+        db.expunge_all()
+        t0 = time.perf_counter()
+        fn(db)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recurring detection benchmark")
+    ap.add_argument("--rows", type=int, nargs="+", default=[20000, 100000, 500000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(
+        f"{'rows':>8} {'scan_legacy':>12} {'scan_ms':>8} "
+        f"{'detect_legacy':>14} {'detect_ms':>10}"
+    )
+    for n in args.rows:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(
+            engine, tables=[Transaction.__table__, RecurringSeries.__table__]
+        )
+        db = sessionmaker(bind=engine)()
+        _seed(db, n)
+        scan_old = _time(_legacy_scan, db, args.repeat)
+        scan_new = _time(recurring.scan_recurring, db, args.repeat)
+        det_old = _time(_legacy_detect, db, args.repeat)
+        det_new = _time(lambda s: analytics.detect_recurring(s, None, 24), db, args.repeat)
+        print(
+            f"{n:>8} {scan_old:>12.1f} {scan_new:>8.1f} "
+            f"{det_old:>14.1f} {det_new:>10.1f}"
+        )
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Run with:  python -m app.scripts.bench_suggest_batch --rows 50 200 1000
+"""Throughput of single-row vs. batched suggestion inference.
+
+Trains a small model on synthetic rows with the production preprocessor
+(``app.ml.encode``) and compares, per batch size:
+
+* predict:  ``SuggestModel.predict_one`` per row vs. ``predict_many``
+* compiled: the same two calls on the compiled (pandas-free) form
+* suggest:  ``suggest_auto`` per row vs. ``suggest_batch`` (shadow enabled,
+  no DB so merchant-majority lookups are skipped)
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from app import config
+from app.ml import runtime
+from app.ml.encode import build_preprocessor
+from app.ml.model import SuggestModel, compile_model
+from app.services.suggest import serve
+
+_MERCHANTS = {
+    "Groceries": ["HARRIS TEETER", "WHOLE FOODS", "COSTCO"],
+    "Dining": ["STARBUCKS", "CHIPOTLE", "UBER EATS"],
+    "Transport": ["UBER", "LYFT", "SHELL GAS"],
+    "Subscriptions": ["NETFLIX", "SPOTIFY"],
+    "Shopping": ["AMAZON", "TARGET", "WALMART"],
+}
+
+
+def _txns(n: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        merchant = rng.choice(rng.choice(list(_MERCHANTS.values())))
+        out.append(
+            {
+                "id": i,
+                "merchant": merchant,
+                "description": f"{merchant} #{rng.randint(100, 999)} coffee lunch",
+                "amount": -round(rng.uniform(3, 250), 2),
+                "channel": rng.choice(["pos", "online"]),
+            }
+        )
+    return out
+
+
+_mk_row = serve._mk_row
+
+
+def _model_row(txn: dict) -> dict:
+    # serve._mk_row omits columns the training preprocessor expects
+    row = _mk_row(txn)
+    row.update(mcc="", feat_p2p_flag=0, feat_p2p_large_outflow=0)
+    return row
+
+
+def _train() -> SuggestModel:
+    rows, labels = [], []
+    for label, merchants in _MERCHANTS.items():
+        for m in merchants:
+            for txn in _txns(60, seed=hash(m) & 0xFFFF):
+                txn["merchant"] = m
+                txn["description"] = m
+                rows.append(_model_row(txn))
+                labels.append(label)
+    pipe = Pipeline(
+        [("prep", build_preprocessor()), ("clf", LogisticRegression(max_iter=300))]
+    )
+    pipe.fit(pd.DataFrame(rows), np.array(labels))
+    return SuggestModel(pipe, list(pipe.classes_))
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Batched suggestion inference benchmark")
+    ap.add_argument("--rows", type=int, nargs="+", default=[50, 200, 1000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    model = _train()
+    fast = SuggestModel(
+        model.pipeline,
+        model.classes_,
+        compiled=compile_model(model.pipeline, model.classes_),
+    )
+    meta = {"run_id": "bench", "val_f1_macro": 0.0, "class_count": len(model.classes_)}
+    runtime._load_latest = lambda: (model, meta)
+    serve._mk_row = _model_row
+    config.SUGGEST_ENABLE_SHADOW = True
+
+    print(
+        f"{'rows':>6} {'stage':>9} {'single_ms':>10} {'batch_ms':>9} "
+        f"{'speedup':>8} {'rows/s':>9}"
+    )
+    for n in args.rows:
+        txns = _txns(n)
+        rows = [_model_row(t) for t in txns]
+        stages = [
+            (
+                "predict",
+                lambda: [model.predict_one(r) for r in rows],
+                lambda: model.predict_many(rows),
+            ),
+            (
+                "compiled",
+                lambda: [fast.predict_one(r) for r in rows],
+                lambda: fast.predict_many(rows),
+            ),
+            (
+                "suggest",
+                lambda: [serve.suggest_auto(t) for t in txns],
+                lambda: serve.suggest_batch(txns),
+            ),
+        ]
+        for stage, single_fn, batch_fn in stages:
+            single = _time(single_fn, args.repeat)
+            batch = _time(batch_fn, args.repeat)
+            print(
+                f"{n:>6} {stage:>9} {single:>10.1f} {batch:>9.1f} "
+                f"{single / max(batch, 1e-6):>7.1f}x {n / max(batch, 1e-6) * 1000:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
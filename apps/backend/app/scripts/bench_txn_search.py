@@ -0,0 +1,102 @@
+# Run with:  python -m app.scripts.bench_txn_search --rows 1000000
+"""Latency of transaction text search: plain ILIKE vs. ``txn_search.text_match``.
+
+Seeds an in-memory SQLite database (the FTS5 trigram table is filled by its
+insert trigger) and times the substring filters used by the NL query
+(merchant / merchant_canonical, category), the transactions list search
+(description / merchant_canonical) and export filters (description / merchant),
+counting matches with both predicates and checking they agree.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, func, insert, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.services.txn_search import text_match
+from app.transactions import Transaction
+
+_WORDS = [
+    "coffee", "grocery", "market", "fuel", "pharmacy", "books", "cinema",
+    "bakery", "hardware", "garden", "pizza", "sushi", "taxi", "parking",
+]  # fmt: skip
+
+_QUERIES = [
+    ("nl merchant", ["merchant", "merchant_canonical"], ["starbucks"]),
+    ("nl merchants x3", ["merchant", "merchant_canonical"], ["uber", "lyft", "shell"]),
+    ("nl category", ["category"], ["groceries"]),
+    ("list search", ["description", "merchant_canonical"], ["pharmacy 12"]),
+    ("export search", ["description", "merchant"], ["sushi"]),
+]
+
+
+def _seed(db, rows: int, chunk: int = 50_000) -> None:
+    rng = random.Random(1)
+    merchants = [f"store {i} {rng.choice(_WORDS)}" for i in range(5000)]
+    merchants += ["STARBUCKS", "UBER", "LYFT", "SHELL GAS"]
+    cats = ["Groceries", "Dining", "Transport", "Shopping", "Salary", None]
+    for start in range(0, rows, chunk):
+        batch = []
+        for i in range(start, min(rows, start + chunk)):
+            d = date(2023 + (i % 3), rng.randint(1, 12), rng.randint(1, 28))
+            m = rng.choice(merchants) if rng.random() < 0.999 else "STARBUCKS"
+            batch.append(
+                {
+                    "date": d,
+                    "month": f"{d.year:04d}-{d.month:02d}",
+                    "amount": -round(rng.uniform(1, 400), 2),
+                    "description": f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}",
+                    "merchant": m,
+                    "merchant_canonical": m.lower(),
+                    "category": rng.choice(cats),
+                }
+            )
+        db.execute(insert(Transaction.__table__), batch)
+    db.commit()
+
+
+def _time(db, clause, repeat: int) -> tuple[float, int]:
+    stmt = select(func.count()).select_from(Transaction).where(clause)
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        count = db.execute(stmt).scalar_one()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, count
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Transaction text search benchmark")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'rows':>8} {'query':<16} {'ilike_ms':>9} {'index_ms':>9} {'speedup':>8} {'hits':>7}")
+    for n in args.rows:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[Transaction.__table__])
+        db = sessionmaker(bind=engine)()
+        t0 = time.perf_counter()
+        _seed(db, n)
+        print(f"# seeded {n} rows (with FTS triggers) in {time.perf_counter() - t0:.1f}s")
+        for label, names, terms in _QUERIES:
+            cols = [getattr(Transaction, c) for c in names]
+            ilike = or_(*[c.ilike(f"%{t}%") for t in terms for c in cols])
+            base_ms, base_hits = _time(db, ilike, args.repeat)
+            idx_ms, idx_hits = _time(db, text_match(db, cols, terms), args.repeat)
+            assert base_hits == idx_hits, (label, base_hits, idx_hits)
+            print(
+                f"{n:>8} {label:<16} {base_ms:>9.1f} {idx_ms:>9.1f} "
+                f"{base_ms / max(idx_ms, 1e-6):>7.1f}x {idx_hits:>7}"
+            )
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
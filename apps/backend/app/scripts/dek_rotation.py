@@ -23,6 +23,7 @@ except Exception:  # pragma: no cover
 
 from app.services.dek_rotation import run_rotation as svc_run_rotation  # type: ignore
 from app.services.dek_rotation import finalize_rotation as svc_finalize_rotation  # type: ignore
+from app.services.dek_rotation import checkpoint_progress as svc_checkpoint_progress  # type: ignore
 
 # (Service delegation removed for test stability; inline logic used)
 _service_run_rotation = None  # placeholder
@@ -163,18 +164,23 @@ def rotation_status(new_label: Optional[str] = None) -> dict:
         "total_cipher_rows": int(tot),
         "done": int(done),
         "remaining": int(tot - done),
+        "checkpoint": svc_checkpoint_progress(db, new_label),
     }
 
 
 def run_rotation(
-    new_label: str, batch_size: int = 1000, max_batches: int = 0, dry_run: bool = False
+    new_label: str,
+    batch_size: int = 1000,
+    max_batches: int = 0,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
 ) -> dict:
     """Adapter delegating to service-based rotation logic.
 
     Preserves legacy return schema expected by tests:
       - label, total_cipher_rows, done, remaining (from rotation_status)
       - processed_this_run, batches, dry_run
-    Ignores max_batches except to cap reported batches if provided.
+    max_batches > 0 stops after that many committed ranges; rerun to resume.
     """
     db: Session = next(get_db())
     svc_out = svc_run_rotation(
@@ -183,6 +189,8 @@ def run_rotation(
         source_label="active",
         batch_size=batch_size,
         dry_run=dry_run,
+        max_batches=max_batches,
+        workers=workers,
     )
     # Derive legacy status metrics
     status = rotation_status(new_label)
@@ -0,0 +1,233 @@
+"""Concurrent, cached context enrichment for agent chat.
+
+``/agent/chat`` used to build its CONTEXT (month summary, top merchants,
+expanded insights, rules, the focused transaction) with serial calls on the
+request session, re-running every aggregation on each turn. ``enrich()`` runs
+the missing sections concurrently on a small thread pool, each loader with its
+own session, and caches results per ``(user_id, month, section)`` tagged with
+the process data version.
+
+Freshness:
+
+* Commits that touch transactions, rules or labels (ORM unit of work or bulk
+  ``insert/update/delete`` statements, e.g. ingest) bump the data version, so
+  the next turn misses and reloads.
+* Writes from other workers are bounded by ``AGENT_CTX_CACHE_TTL_S``.
+
+Per-section timings (``ms``, ``cached``, ``error``) are returned alongside the
+context for the debug payload.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+
+from app import db as app_db
+from app.orm_models import RuleORM, Transaction, TransactionSplit, UserLabel
+
+log = logging.getLogger(__name__)
+
+_TTL_S = float(os.getenv("AGENT_CTX_CACHE_TTL_S", "120"))
+_MAX_ENTRIES = int(os.getenv("AGENT_CTX_CACHE_MAX_ENTRIES", "1024"))
+_WORKERS = int(os.getenv("AGENT_CTX_WORKERS", "4"))
+# Overall wait for concurrent loaders; late sections are left out of the turn
+_TIMEOUT_S = float(os.getenv("AGENT_CTX_TIMEOUT_S", "10"))
+
+_CHANGED = "agent_context_changed"
+_TRACKED = (Transaction, RuleORM, UserLabel, TransactionSplit)
+
+Loader = Callable[[Session], Any]
+_MISSING = object()
+
+_lock = threading.Lock()
+_version = 0
+_cache: "OrderedDict[Tuple[Hashable, ...], Tuple[int, float, Any]]" = OrderedDict()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def data_version() -> int:
+    return _version
+
+
+def invalidate(*_args: Any, **_kw: Any) -> None:
+    """Bump the data version; cached sections are reloaded on next use."""
+    global _version
+    with _lock:
+        _version += 1
+        _cache.clear()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, _WORKERS), thread_name_prefix="agent-ctx"
+            )
+        return _pool
+
+
+def _concurrent() -> bool:
+    # One shared connection (in-memory SQLite) cannot serve parallel sessions
+    pool = getattr(getattr(app_db, "engine", None), "pool", None)
+    return _WORKERS > 1 and not isinstance(pool, (StaticPool, SingletonThreadPool))
+
+
+def _cache_get(key: Tuple[Hashable, ...]) -> Any:
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return _MISSING
+        version, stored_at, value = entry
+        if version != _version or now - stored_at > _TTL_S:
+            _cache.pop(key, None)
+            return _MISSING
+        _cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key: Tuple[Hashable, ...], version: int, value: Any) -> None:
+    with _lock:
+        if version != _version:
+            return  # data changed while loading
+        _cache[key] = (version, time.monotonic(), value)
+        _cache.move_to_end(key)
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _run_loader(loader: Loader) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    session = app_db.SessionLocal()
+    try:
+        return loader(session), (time.perf_counter() - t0) * 1000.0
+    finally:
+        session.close()
+
+
+def enrich(
+    sections: Dict[str, Loader],
+    *,
+    user_id: Optional[int],
+    month: Optional[str],
+    cache_keys: Optional[Dict[str, Hashable]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Load ``sections`` concurrently, serving cached values when fresh.
+
+    Each loader receives its own session and returns the section value, or
+    None to leave the section out. ``cache_keys`` extends the cache key of a
+    section (e.g. the txn id); sections mapped to None there are not cached.
+    Loader errors are logged at debug level and reported in the timings.
+
+    Returns ``(values, timings)`` where ``timings[name]`` has ``ms``,
+    ``cached`` and (on failure) ``error``.
+    """
+    cache_keys = cache_keys or {}
+    values: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, Any]] = {}
+    version = _version
+    pending = {}
+
+    for name, loader in sections.items():
+        extra = cache_keys.get(name, "")
+        key = None if extra is None else (user_id, month, name, extra)
+        if key is not None:
+            hit = _cache_get(key)
+            if hit is not _MISSING:
+                if hit is not None:
+                    values[name] = hit
+                timings[name] = {"ms": 0.0, "cached": True}
+                continue
+        pending[name] = (loader, key)
+
+    if pending and not _concurrent():
+        for name, (loader, key) in pending.items():
+            inline = lambda ld=loader: _run_loader(ld)  # noqa: E731
+            _record(name, key, version, inline, values, timings)
+    elif pending:
+        futures = {
+            _executor().submit(_run_loader, loader): (name, key)
+            for name, (loader, key) in pending.items()
+        }
+        done, not_done = wait(futures, timeout=_TIMEOUT_S)
+        for fut in not_done:
+            name, _ = futures[fut]
+            fut.cancel()
+            timings[name] = {
+                "ms": _TIMEOUT_S * 1000.0,
+                "cached": False,
+                "error": "timeout",
+            }
+        for fut in done:
+            name, key = futures[fut]
+            _record(name, key, version, fut.result, values, timings)
+    return values, timings
+
+
+def _record(
+    name: str,
+    key: Optional[Tuple[Hashable, ...]],
+    version: int,
+    result: Callable[[], Tuple[Any, float]],
+    values: Dict[str, Any],
+    timings: Dict[str, Dict[str, Any]],
+) -> None:
+    """Store one section from ``result()`` (an inline load or Future.result)."""
+    try:
+        value, ms = result()
+    except Exception as e:
+        log.debug("agent context section %s skipped: %s", name, e)
+        timings[name] = {"ms": None, "cached": False, "error": str(e)}
+        return
+    timings[name] = {"ms": round(ms, 2), "cached": False}
+    if value is not None:
+        values[name] = value
+    if key is not None:
+        _cache_put(key, version, value)
+
+
+# --- Change tracking --------------------------------------------------------------
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    if any(
+        isinstance(o, _TRACKED)
+        for o in (*session.new, *session.dirty, *session.deleted)
+    ):
+        session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state) -> None:
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _TRACKED):
+        orm_execute_state.session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    if session.info.pop(_CHANGED, False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED, None)
@@ -1,10 +1,12 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple, Optional, Any, cast
-from collections import defaultdict, Counter
+from typing import Dict, List, Tuple, Optional, Any
+from collections import defaultdict
 from datetime import date as _date, datetime as _dt
 import math
 import statistics as stats
+import numpy as np
 
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 import time
 import logging
@@ -72,11 +74,114 @@ def _months_window(
     return all_months_list[start_idx : end_idx + 1]
 
 
-def _fetch_txns_window(db: Session, months: List[str]) -> List[Transaction]:
+# --- SQL-side aggregation --------------------------------------------------------
+# Month/category/merchant totals are computed with GROUP BY so analytics calls
+# never hydrate the whole lookback window. Only functions that genuinely need
+# row-level detail (anomalies, recurring) fetch rows, and then only the columns
+# and months they use. All expressions are portable across SQLite and Postgres.
+
+_AMT = func.coalesce(Transaction.amount, 0.0)
+_SPEND = case((_AMT < 0, -_AMT), else_=0.0)
+_INFLOW = case((_AMT >= 0, _AMT), else_=0.0)
+# Mirrors `t.merchant_canonical or t.merchant or ""` (empty strings fall through)
+_MERCHANT_KEY = func.coalesce(
+    func.nullif(Transaction.merchant_canonical, ""),
+    func.nullif(Transaction.merchant, ""),
+    "",
+)
+
+
+def _window(db: Session, lookback: int, ref_month: Optional[str]) -> List[str]:
+    """Last ``lookback`` months with data, ending at ``ref_month`` when it has data
+    (else at the latest month), without scanning every distinct month."""
+    end: Optional[str] = None
+    if ref_month:
+        end = (
+            db.query(Transaction.month)
+            .filter(Transaction.month == ref_month)
+            .limit(1)
+            .scalar()
+        )
+    if end is None:
+        end = db.query(func.max(Transaction.month)).scalar()
+    if not end:
+        return []
+    rows = (
+        db.query(Transaction.month)
+        .filter(Transaction.month.isnot(None), Transaction.month <= end)
+        .group_by(Transaction.month)
+        .order_by(Transaction.month.desc())
+        .limit(max(1, lookback))
+        .all()
+    )
+    return sorted(m for (m,) in rows if m)
+
+
+def _series_for(db: Session, months: List[str]) -> Dict[str, Dict[str, float]]:
+    """series[month] = {in, out, net} via one GROUP BY month query."""
     if not months:
-        return cast(List[Transaction], [])
-    rows = db.query(Transaction).filter(Transaction.month.in_(months)).all()
-    return cast(List[Transaction], rows)
+        return {}
+    rows = (
+        db.query(Transaction.month, func.sum(_INFLOW), func.sum(_SPEND))
+        .filter(Transaction.month.in_(months))
+        .group_by(Transaction.month)
+        .all()
+    )
+    series: Dict[str, Dict[str, float]] = {}
+    for m, inflow, outflow in rows:
+        i, o = float(inflow or 0.0), float(outflow or 0.0)
+        series[m] = {"in": i, "out": o, "net": i - o}
+    return series
+
+
+def _category_spend(db: Session, months: List[str]) -> Dict[str, Dict[str, float]]:
+    """spend[month][category] = total outflow (positive), via GROUP BY month, category."""
+    if not months:
+        return {}
+    rows = (
+        db.query(Transaction.month, Transaction.category, func.sum(-_AMT))
+        .filter(Transaction.month.in_(months), _AMT < 0)
+        .group_by(Transaction.month, Transaction.category)
+        .all()
+    )
+    out: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for m, cat, total in rows:
+        out[m][cat or "Unknown"] += float(total or 0.0)
+    return {m: dict(v) for m, v in out.items()}
+
+
+def _merchant_spend(db: Session, month: str) -> Dict[str, float]:
+    """spend[merchant] = total outflow (positive) for one month."""
+    rows = (
+        db.query(_MERCHANT_KEY, func.sum(-_AMT))
+        .filter(Transaction.month == month, _AMT < 0)
+        .group_by(_MERCHANT_KEY)
+        .all()
+    )
+    return {merch: float(total or 0.0) for merch, total in rows}
+
+
+def _txn_rows(
+    db: Session, months: List[str], outflows_only: bool = False
+) -> Dict[str, List[Dict]]:
+    """Row-level detail (date, amount, merchant, category) for the given months."""
+    if not months:
+        return {}
+    q = db.query(
+        Transaction.month,
+        Transaction.date,
+        _AMT,
+        _MERCHANT_KEY,
+        func.coalesce(Transaction.category, ""),
+    ).filter(Transaction.month.in_(months))
+    if outflows_only:
+        q = q.filter(_AMT < 0)
+    by_month: Dict[str, List[Dict]] = defaultdict(list)
+    for m, d, amt, merch, cat in q.order_by(Transaction.id).all():
+        by_month[m].append(
+            {"date": d, "amount": float(amt), "merchant": merch, "category": cat}
+        )
+    return dict(by_month)
 
 
 def _monthly_sums(
@@ -85,40 +190,18 @@ def _monthly_sums(
     """Portable monthly aggregator over Transaction rows.
     Returns (series, txns_by_month) where series[month] = {in,out,net} and
     txns_by_month[month] = list of dicts for downstream analytics.
+
+    Kept for callers that want both; analytics functions below use the
+    narrower helpers so they only pay for what they read.
     """
-    # Get all known months
-    all_months = [m for (m,) in db.query(Transaction.month).distinct().all() if m]
-    months = _months_window(all_months, ref_month, lookback)
-    txns = _fetch_txns_window(db, months)
-    series: Dict[str, Dict[str, float]] = defaultdict(
-        lambda: {"in": 0.0, "out": 0.0, "net": 0.0}
-    )
-    txns_by_month: Dict[str, List[Dict]] = defaultdict(list)
-    for t in txns:
-        m = t.month
-        amt = float(t.amount or 0.0)
-        if amt >= 0:
-            series[m]["in"] += amt
-        else:
-            series[m]["out"] += abs(amt)
-        # carry minimal fields to keep outputs stable
-        txns_by_month[m].append(
-            {
-                "date": t.date,
-                "amount": amt,
-                "merchant": t.merchant_canonical or t.merchant or "",
-                "category": t.category or "",
-            }
-        )
-    for m in list(series.keys()):
-        series[m]["net"] = series[m]["in"] - series[m]["out"]
-    return dict(series), dict(txns_by_month)
+    months = _window(db, lookback, ref_month)
+    return _series_for(db, months), _txn_rows(db, months)
 
 
 def compute_kpis(db: Session, month: Optional[str] = None, lookback: int = 6) -> Dict:
     with _Timed("kpis"):
         lookback = max(1, min(24, int(lookback or 6)))
-        series, _ = _monthly_sums(db, lookback, month)
+        series = _series_for(db, _window(db, lookback, month))
     months = sorted(series.keys())
     if not months:
         return {"months": [], "series": {}, "kpis": {}}
@@ -154,12 +237,7 @@ def compute_kpis(db: Session, month: Optional[str] = None, lookback: int = 6) ->
     }
 
     # Compute simple HHI for last month's spend share by merchant
-    last = months[-1]
-    _, by_month = _monthly_sums(db, 1, last)
-    spend_by_merch: Dict[str, float] = defaultdict(float)
-    for t in by_month.get(last, []):
-        if t["amount"] < 0:
-            spend_by_merch[t["merchant"]] += abs(t["amount"])
+    spend_by_merch = _merchant_spend(db, months[-1])
     total = sum(spend_by_merch.values()) or 1.0
     shares = [v / total for v in spend_by_merch.values()]
     hhi = sum((s * 100) ** 2 for s in shares) / 10000.0
@@ -188,7 +266,7 @@ def forecast_cashflow(
 ) -> Dict:
     with _Timed("forecast_cashflow"):
         horizon = max(1, min(12, int(horizon or 3)))
-        series, _ = _monthly_sums(db, lookback=36, ref_month=month)
+        series = _series_for(db, _window(db, 36, month))
 
     MIN_MONTHS = 3
     months = sorted(series.keys())
@@ -327,10 +405,9 @@ def forecast_cashflow(
 def find_anomalies(db: Session, month: Optional[str] = None, lookback: int = 6) -> Dict:
     with _Timed("anomalies"):
         lookback = max(1, min(24, int(lookback or 6)))
-        series, by_month = _monthly_sums(db, lookback, month)
-    months = sorted(series.keys())
-    last = months[-1] if months else None
-    txns = by_month.get(last, []) if last else []
+        months = _window(db, lookback, month)
+        last = months[-1] if months else None
+        txns = _txn_rows(db, [last], outflows_only=True).get(last, []) if last else []
     amounts = [abs(t["amount"]) for t in txns if t["amount"] < 0]
     if len(amounts) < 6:
         return {"month": last, "items": []}
@@ -369,50 +446,30 @@ def find_anomalies(db: Session, month: Optional[str] = None, lookback: int = 6)
 def detect_recurring(
     db: Session, month: Optional[str] = None, lookback: int = 6
 ) -> Dict:
+    from app.services.recurring import merchant_stats
+
     with _Timed("recurring"):
         lookback = max(1, min(24, int(lookback or 6)))
-        _, by_month = _monthly_sums(db, lookback, month)
-    all_txns: List[Dict] = []
-    for arr in by_month.values():
-        all_txns.extend(arr)
-    groups: Dict[str, List[Dict]] = defaultdict(list)
-    for t in all_txns:
-        if t["amount"] < 0:
-            groups[t["merchant"]].append(t)
+        months = _window(db, lookback, month)
+        if not months:
+            return {"items": []}
+        st = merchant_stats(
+            db, _MERCHANT_KEY, Transaction.month.in_(months), _AMT < 0
+        )
 
     results = []
-    for merch, arr in groups.items():
-        arr = sorted(arr, key=lambda x: x["date"])
-        if len(arr) < 3:
-            continue
-        dom = Counter(
-            [
-                getattr(d["date"], "day", None)
-                or _dt.fromisoformat(str(d["date"])[:10]).day
-                for d in arr
-            ]
-        )
-        gaps = [
-            (
-                (arr[i]["date"] - arr[i - 1]["date"]).days
-                if hasattr(arr[i]["date"], "__sub__")
-                else (
-                    _dt.fromisoformat(str(arr[i]["date"])[:10])
-                    - _dt.fromisoformat(str(arr[i - 1]["date"])[:10])
-                ).days
-            )
-            for i in range(1, len(arr))
-        ]
-        median_gap = stats.median(gaps) if gaps else None
+    for i in np.flatnonzero(st.count >= 3):
+        n_gaps = int(st.count[i]) - 1
+        median_gap: float | int = float(st.median_gap[i])
+        if n_gaps % 2:  # statistics.median returns the element itself
+            median_gap = int(median_gap)
         monthlyish = median_gap and 25 <= median_gap <= 35
-        dom_peak = dom.most_common(1)[0][1] / len(arr)
-        strength = (dom_peak + (1 if monthlyish else 0)) / 2
-        avg_amt = sum(abs(x["amount"]) for x in arr) / len(arr)
+        strength = (float(st.dom_peak[i]) + (1 if monthlyish else 0)) / 2
         results.append(
             {
-                "merchant": merch,
-                "count": len(arr),
-                "avg_amount": round(avg_amt, 2),
+                "merchant": st.merchant[i],
+                "count": int(st.count[i]),
+                "avg_amount": round(float(st.mean_abs[i]), 2),
                 "median_gap_days": median_gap,
                 "strength": round(strength, 2),
             }
@@ -604,18 +661,12 @@ def build_subscriptions_response(
 def budget_suggest(db: Session, month: Optional[str] = None, lookback: int = 6) -> Dict:
     with _Timed("budget_suggest"):
         lookback = max(1, min(24, int(lookback or 6)))
-        series, by_month = _monthly_sums(db, lookback, month)
-    # Aggregate spend per category per month
+        by_month = _category_spend(db, _window(db, lookback, month))
+    # Spend per category per month, one value per month the category appears
     spend_per: Dict[str, List[float]] = defaultdict(list)
-    for m in sorted(series.keys()):
-        txns = by_month.get(m, [])
-        cat_spend: Dict[str, float] = defaultdict(float)
-        for t in txns:
-            if t["amount"] < 0:
-                cat = t["category"] or "Unknown"
-                cat_spend[cat] += abs(t["amount"])
-        for cat, s in cat_spend.items():
-            spend_per[cat].append(float(s))
+    for m in sorted(by_month.keys()):
+        for cat, s in by_month[m].items():
+            spend_per[cat].append(s)
 
     def pct(xs: List[float], p: float) -> float:
         xs = sorted(xs)
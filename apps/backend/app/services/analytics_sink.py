@@ -1,55 +1,234 @@
+"""Analytics event persistence.
+
+Events are written through a buffered batch writer when it is running: callers
+``enqueue()`` records into a bounded in-process queue and
+``batch_writer_loop()`` (started from the FastAPI lifespan in ``app.main``)
+flushes them with multi-row INSERTs once ``ANALYTICS_SINK_BATCH_SIZE`` records
+are queued or every ``ANALYTICS_SINK_FLUSH_INTERVAL_S`` seconds, and once more
+on shutdown. When the queue is full new events are dropped and counted rather
+than blocking the request.
+
+``store_event()`` keeps the original one-row synchronous path for callers
+outside the app lifecycle (scripts, tests without lifespan).
+"""
+
+import asyncio
+import ipaddress
 import json
-from typing import Dict, Any
+import logging
+import os
+import queue
+from typing import Any, Dict, List, Optional
+
 from sqlalchemy import text
 from app.db import SessionLocal, engine
 
+# Optional Prometheus metrics (safe if library absent)
+try:  # pragma: no cover - optional dependency
+    from prometheus_client import Counter, Gauge  # type: ignore
+
+    _METRICS = {
+        "enqueued": Counter(
+            "analytics_sink_enqueued_total", "Analytics events queued for writing"
+        ),
+        "dropped": Counter(
+            "analytics_sink_dropped_total",
+            "Analytics events dropped because the write queue was full",
+        ),
+        "written": Counter(
+            "analytics_sink_written_total", "Analytics events written to the database"
+        ),
+        "failed": Counter(
+            "analytics_sink_failed_total",
+            "Analytics events lost to failed batch writes",
+        ),
+        "flushes": Counter("analytics_sink_flushes_total", "Batch writer flushes"),
+        "depth": Gauge("analytics_sink_queue_depth", "Analytics events awaiting write"),
+    }
+except Exception:  # pragma: no cover - no prometheus
+    _METRICS = None
+
+log = logging.getLogger(__name__)
+
+_BATCH_SIZE = int(os.getenv("ANALYTICS_SINK_BATCH_SIZE", "200"))
+_FLUSH_INTERVAL_S = float(os.getenv("ANALYTICS_SINK_FLUSH_INTERVAL_S", "1.0"))
+_QUEUE_MAX = int(os.getenv("ANALYTICS_SINK_QUEUE_MAX", "10000"))
+# 8 bound params per row keeps each statement under SQLite's variable limit
+_ROWS_PER_STATEMENT = 100
+
+_COLUMNS = ("event", "props_json", "client_ts", "server_ts", "rid", "path", "ip", "ua")
+
+_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=_QUEUE_MAX)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wake: Optional[asyncio.Event] = None
+_running = False
+
+
+def _inc(name: str, n: int = 1) -> None:
+    if _METRICS and n:
+        _METRICS[name].inc(n)
+
+
+def _set_depth() -> None:
+    if _METRICS:
+        _METRICS["depth"].set(_queue.qsize())
+
+
+def _valid_ip(value: Any) -> Optional[str]:
+    # Client-supplied (CF-Connecting-IP): one bad value must not fail a batch
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        return None
+
+
+def _params(rec: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event": rec.get("event"),
+        "props_json": json.dumps(rec.get("props") or {}, ensure_ascii=False),
+        "client_ts": rec.get("client_ts"),
+        "server_ts": rec.get("server_ts"),
+        "rid": rec.get("rid"),
+        "path": rec.get("path"),
+        "ip": _valid_ip(rec["ip"]) if rec.get("ip") else None,
+        "ua": rec.get("ua"),
+    }
+
+
+def _insert_sql(n: int, is_pg: bool) -> str:
+    rows = []
+    for i in range(n):
+        if is_pg:
+            rows.append(
+                f"(:event_{i}, :props_json_{i}, :client_ts_{i}, "
+                f"COALESCE(:server_ts_{i}, (extract(epoch from now())*1000)::bigint), "
+                f":rid_{i}, :path_{i}, CAST(:ip_{i} AS inet), :ua_{i})"
+            )
+        else:
+            rows.append("(" + ", ".join(f":{c}_{i}" for c in _COLUMNS) + ")")
+    return (
+        "INSERT INTO analytics_events "
+        "(event, props_json, client_ts, server_ts, rid, path, ip, ua) VALUES "
+        + ", ".join(rows)
+    )
+
+
+def write_batch(records: List[Dict[str, Any]]) -> int:
+    """Insert ``records`` in one transaction using multi-row INSERTs.
+
+    Returns the number of rows written; raises on database errors.
+    """
+    if not records:
+        return 0
+    is_pg = engine.url.get_backend_name() == "postgresql"
+    db = SessionLocal()
+    try:
+        for start in range(0, len(records), _ROWS_PER_STATEMENT):
+            chunk = records[start : start + _ROWS_PER_STATEMENT]
+            bind: Dict[str, Any] = {}
+            for i, rec in enumerate(chunk):
+                for col, val in _params(rec).items():
+                    bind[f"{col}_{i}"] = val
+            db.execute(text(_insert_sql(len(chunk), is_pg)), bind)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return len(records)
+
 
 def store_event(rec: Dict[str, Any]) -> None:
     """Synchronous insert using existing SessionLocal.
     Called off-thread via run_in_executor to avoid blocking the event loop.
     """
     try:
-        db = SessionLocal()
-        try:
-            is_pg = engine.url.get_backend_name() == "postgresql"
-            if is_pg:
-                q = text(
-                    """
-                    INSERT INTO analytics_events
-                      (event, props_json, client_ts, server_ts, rid, path, ip, ua)
-                    VALUES
-                      (:event, :props_json, :client_ts,
-                       COALESCE(:server_ts, (extract(epoch from now())*1000)::bigint),
-                       :rid, :path, :ip::inet, :ua)
-                    """
-                )
-            else:
-                q = text(
-                    """
-                    INSERT INTO analytics_events
-                      (event, props_json, client_ts, server_ts, rid, path, ip, ua)
-                    VALUES
-                      (:event, :props_json, :client_ts, :server_ts, :rid, :path, :ip, :ua)
-                    """
-                )
-            db.execute(
-                q,
-                {
-                    "event": rec.get("event"),
-                    "props_json": json.dumps(
-                        rec.get("props") or {}, ensure_ascii=False
-                    ),
-                    "client_ts": rec.get("client_ts"),
-                    "server_ts": rec.get("server_ts"),
-                    "rid": rec.get("rid"),
-                    "path": rec.get("path"),
-                    "ip": rec.get("ip"),
-                    "ua": rec.get("ua"),
-                },
-            )
-            db.commit()
-        finally:
-            db.close()
+        write_batch([rec])
     except Exception:
         # Swallow errors to ensure analytics never breaks main flow
         pass
+
+
+def enqueue(rec: Dict[str, Any]) -> bool:
+    """Hand ``rec`` to the batch writer without blocking.
+
+    Returns False when the writer is not running so the caller can fall back
+    to ``store_event``. A full queue drops the event (counted) and returns True.
+    """
+    if not _running:
+        return False
+    try:
+        _queue.put_nowait(rec)
+    except queue.Full:
+        _inc("dropped")
+        return True
+    _inc("enqueued")
+    if _queue.qsize() >= _BATCH_SIZE and _loop is not None and _wake is not None:
+        try:
+            _loop.call_soon_threadsafe(_wake.set)
+        except RuntimeError:  # loop already closed during shutdown
+            pass
+    return True
+
+
+def _take(limit: int) -> List[Dict[str, Any]]:
+    batch: List[Dict[str, Any]] = []
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def flush() -> int:
+    """Write everything currently queued; returns the number of rows written."""
+    written = 0
+    while True:
+        batch = _take(_BATCH_SIZE)
+        if not batch:
+            break
+        try:
+            written += write_batch(batch)
+            _inc("written", len(batch))
+        except Exception as e:
+            _inc("failed", len(batch))
+            log.warning("analytics_sink: batch of %s failed: %s", len(batch), e)
+        _inc("flushes")
+    _set_depth()
+    return written
+
+
+async def batch_writer_loop(
+    flush_interval_s: float = _FLUSH_INTERVAL_S,
+) -> None:
+    """Drain the event queue on size/time thresholds until cancelled.
+
+    Writes run in the default executor; remaining events are flushed on
+    cancellation (lifespan shutdown), which still propagates to the caller.
+    """
+    global _loop, _wake, _running
+    _loop = asyncio.get_running_loop()
+    _wake = asyncio.Event()
+    _running = True
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            _wake.clear()
+            _set_depth()
+            if not _queue.empty():
+                await _loop.run_in_executor(None, flush)
+    finally:
+        # New events take the synchronous path from here on
+        _running = False
+        try:
+            flushed = flush()
+            if flushed:
+                log.info("analytics_sink: flushed %s events on shutdown", flushed)
+        except Exception as e:  # pragma: no cover (defensive logging)
+            log.warning("analytics_sink: shutdown flush failed: %s", e)
+        _loop = _wake = None
@@ -1,5 +1,8 @@
 """Smart categorization suggestion service with ranked scoring."""
 
+from __future__ import annotations
+
+import logging
 import os
 import re
 from collections import defaultdict
@@ -28,7 +31,8 @@ def _ml_feedback_enabled() -> bool:
 try:
     from app.services.ml_feedback_scores import (
         FeedbackKey,
-        load_feedback_stats_map,
+        FeedbackStats,
+        load_feedback_stats_for_merchants,
         adjust_score_with_feedback,
     )
 
@@ -36,6 +40,8 @@ try:
 except ImportError:
     ML_FEEDBACK_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
 WEIGHTS = {
     "hints": 0.65,
     "rules": 0.60,
@@ -53,32 +59,152 @@ def _combine_scores(scores: List[float]) -> float:
     return 1.0 - prod
 
 
-def _blocked_for(db: Session, merchant_canonical: str) -> set[str]:
+# Numbered/named backreferences would point at the wrong group once combined
+_BACKREF = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class CompiledCategoryRules:
+    """Enabled CategoryRules compiled once, in priority order.
+
+    All patterns are joined into one alternation with a named group per rule.
+    A single ``finditer`` pass yields rules that certainly match (their group
+    fired); if the combined regex finds nothing, no rule can match anywhere.
+    Only when something fired are the remaining rules checked individually,
+    because an alternation reports one rule per position.
+    """
+
+    def __init__(self, rules: List[CategoryRule]):
+        self.rules: List[tuple[str, str, int, re.Pattern]] = []
+        for r in rules:
+            try:
+                rx = re.compile(r.pattern, re.I)
+            except re.error:
+                logger.warning("skipping invalid category rule pattern %r", r.pattern)
+                continue
+            self.rules.append((r.pattern, r.category_slug, r.priority, rx))
+        self.combined: re.Pattern | None = None
+        if not any(_BACKREF.search(r[0]) for r in self.rules):
+            try:
+                self.combined = re.compile(
+                    "|".join(f"(?P<r{i}>{r[0]})" for i, r in enumerate(self.rules)),
+                    re.I,
+                )
+            except re.error:
+                # Inline flags / clashing group names: match per rule only
+                self.combined = None
+
+    def matches(self, text: str) -> List[tuple[str, str, int]]:
+        """(pattern, category_slug, priority) for every rule matching text."""
+        if not self.rules:
+            return []
+        if self.combined is None:
+            return [r[:3] for r in self.rules if r[3].search(text)]
+        fired = {int(m.lastgroup[1:]) for m in self.combined.finditer(text)}
+        if not fired:
+            return []
+        return [
+            r[:3] for i, r in enumerate(self.rules) if i in fired or r[3].search(text)
+        ]
+
+
+class CategorizeContext:
+    """Request-scoped lookups shared by every transaction in a batch.
+
+    ``prefetch(merchants)`` loads hints for all merchants with one ``IN``
+    query; ML feedback stats for the same merchants are loaded together on
+    first use, and rules and the category map are loaded once. Suggesting N transactions therefore costs a
+    constant number of round trips instead of ~4 queries per transaction.
+    """
+
+    _CHUNK = 500
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._hints: Dict[str, List[MerchantCategoryHint]] = {}
+        self._rules: CompiledCategoryRules | None = None
+        self._category_map: tuple[dict[str, str], list[str]] | None = None
+        self._feedback: Dict[FeedbackKey, FeedbackStats] = {}
+        self._feedback_merchants: set[str] = set()
+        self._feedback_pending: set[str] = set()
+
+    def prefetch(self, merchants: List[str]) -> None:
+        """Bulk-load hints (and feedback stats when enabled) for merchants."""
+        missing = sorted({m for m in merchants if m and m not in self._hints})
+        for m in missing:
+            self._hints[m] = []
+        for i in range(0, len(missing), self._CHUNK):
+            chunk = missing[i : i + self._CHUNK]
+            for h in (
+                self.db.query(MerchantCategoryHint)
+                .filter(MerchantCategoryHint.merchant_canonical.in_(chunk))
+                .order_by(MerchantCategoryHint.id)
+            ):
+                self._hints[h.merchant_canonical].append(h)
+        # Feedback stats are loaded lazily (first feedback_stats call) for
+        # every merchant registered here
+        self._feedback_pending.update(m for m in merchants if m)
+
+    def hints(self, merchant_canonical: str) -> List[MerchantCategoryHint]:
+        if merchant_canonical not in self._hints:
+            self.prefetch([merchant_canonical])
+        return self._hints.get(merchant_canonical, [])
+
+    @property
+    def rules(self) -> CompiledCategoryRules:
+        if self._rules is None:
+            self._rules = CompiledCategoryRules(
+                self.db.query(CategoryRule)
+                .filter_by(enabled=True)
+                .order_by(CategoryRule.priority.asc())
+                .all()
+            )
+        return self._rules
+
+    @property
+    def category_map(self) -> tuple[dict[str, str], list[str]]:
+        if self._category_map is None:
+            self._category_map = _get_category_map(self.db)
+        return self._category_map
+
+    def feedback_stats(
+        self, keys: List[FeedbackKey]
+    ) -> Dict[FeedbackKey, FeedbackStats]:
+        """Feedback stats for keys, loading all prefetched merchants in one go."""
+        todo = (
+            self._feedback_pending | {k.merchant_normalized for k in keys}
+        ) - self._feedback_merchants
+        todo.discard("")
+        if todo:
+            self._feedback.update(load_feedback_stats_for_merchants(self.db, todo))
+            self._feedback_merchants |= todo
+            self._feedback_pending.clear()
+        return {k: self._feedback[k] for k in keys if k in self._feedback}
+
+
+def _blocked_for(
+    db: Session, merchant_canonical: str, ctx: CategorizeContext | None = None
+) -> set[str]:
     """Return set of category slugs blocked by user feedback for merchant."""
+    ctx = ctx or CategorizeContext(db)
     blocked: set[str] = set()
-    for h in (
-        db.query(MerchantCategoryHint)
-        .filter_by(merchant_canonical=merchant_canonical)
-        .all()
-    ):
+    for h in ctx.hints(merchant_canonical):
         if (h.source or "") == "user_block":
             blocked.add(h.category_slug)
     return blocked
 
 
-def from_hints(db: Session, merchant_canonical: str) -> List[Dict]:
+def from_hints(
+    db: Session, merchant_canonical: str, ctx: CategorizeContext | None = None
+) -> List[Dict]:
     """
     Get category suggestions from learned merchant hints.
 
     High-confidence hints (>=0.7) get boosted scores to ensure they dominate
     over prior fallback suggestions (0.35).
     """
+    ctx = ctx or CategorizeContext(db)
     out = []
-    for h in (
-        db.query(MerchantCategoryHint)
-        .filter_by(merchant_canonical=merchant_canonical)
-        .all()
-    ):
+    for h in ctx.hints(merchant_canonical):
         if (h.source or "") == "user_block":
             # Do not suggest blocked categories
             continue
@@ -104,24 +230,19 @@ def from_hints(db: Session, merchant_canonical: str) -> List[Dict]:
     return out
 
 
-def from_rules(db: Session, text: str) -> List[Dict]:
+def from_rules(
+    db: Session, text: str, ctx: CategorizeContext | None = None
+) -> List[Dict]:
     """Get category suggestions from pattern matching rules."""
-    out = []
-    q = (
-        db.query(CategoryRule)
-        .filter_by(enabled=True)
-        .order_by(CategoryRule.priority.asc())
-    )
-    for r in q:
-        if re.search(r.pattern, text, flags=re.I):
-            out.append(
-                {
-                    "category_slug": r.category_slug,
-                    "score": WEIGHTS["rules"],
-                    "why": [f"matched rule `{r.pattern}` (p{r.priority})"],
-                }
-            )
-    return out
+    ctx = ctx or CategorizeContext(db)
+    return [
+        {
+            "category_slug": slug,
+            "score": WEIGHTS["rules"],
+            "why": [f"matched rule `{pattern}` (p{priority})"],
+        }
+        for pattern, slug, priority in ctx.rules.matches(text)
+    ]
 
 
 def from_recurring(text: str, merchant: str, cadence_days: int | None) -> List[Dict]:
@@ -230,13 +351,53 @@ def _get_category_map(db: Session) -> tuple[dict[str, str], list[str]]:
     return labels, all_slugs
 
 
-def suggest_categories_for_txn(txn: dict, db: Session | None = None) -> List[Dict]:
+def _merchant_canonical_for(txn: dict) -> str:
+    # Get or compute canonical merchant name
+    # Prefer: 1) provided merchant_canonical, 2) canonicalize description (has store #s),
+    # 3) canonicalize merchant field
+    merchant_canonical = txn.get("merchant_canonical")
+    if not merchant_canonical:
+        merchant = txn.get("merchant", "") or ""
+        desc = txn.get("description", "") or ""
+        # Try description first (it has more detail like store numbers)
+        merchant_canonical = _canonicalize(desc) if desc else _canonicalize(merchant)
+    return merchant_canonical
+
+
+def suggest_categories_batch(
+    txns: List[dict], db: Session | None = None
+) -> List[List[Dict]]:
+    """
+    Get ranked category suggestions for many transactions.
+
+    Hints, rules, categories and feedback stats are loaded once for the whole
+    batch through a shared CategorizeContext.
+
+    Returns:
+        One suggestion list (as suggest_categories_for_txn) per input txn
+    """
+    close = False
+    if db is None:
+        db, close = SessionLocal(), True
+    try:
+        ctx = CategorizeContext(db)
+        ctx.prefetch([_merchant_canonical_for(t) for t in txns])
+        return [suggest_categories_for_txn(t, db=db, ctx=ctx) for t in txns]
+    finally:
+        if close:
+            db.close()
+
+
+def suggest_categories_for_txn(
+    txn: dict, db: Session | None = None, ctx: CategorizeContext | None = None
+) -> List[Dict]:
     """
     Get ranked category suggestions for a transaction.
 
     Args:
         txn: {merchant, description, amount, cadence_days?, merchant_canonical?}
         db: Optional database session (will create one if not provided)
+        ctx: Optional CategorizeContext shared across a batch
 
     Returns:
         List of dicts: [{"category_slug": str, "score": float, "why": [str]}]
@@ -250,28 +411,22 @@ def suggest_categories_for_txn(txn: dict, db: Session | None = None) -> List[Dic
         amount = float(txn.get("amount", 0) or 0)
         cadence_days = txn.get("cadence_days")
 
-        # Get or compute canonical merchant name
-        # Prefer: 1) provided merchant_canonical, 2) canonicalize description (has store #s),
-        # 3) canonicalize merchant field
-        merchant_canonical = txn.get("merchant_canonical")
-        if not merchant_canonical:
-            # Try description first (it has more detail like store numbers)
-            merchant_canonical = (
-                _canonicalize(desc) if desc else _canonicalize(merchant)
-            )
+        merchant_canonical = _merchant_canonical_for(txn)
+        if ctx is None:
+            ctx = CategorizeContext(db)
 
-        blocked = _blocked_for(db, merchant_canonical)
+        blocked = _blocked_for(db, merchant_canonical, ctx)
 
         textq = f"{merchant} {desc}"
 
         cands: List[Dict] = []
-        cands += from_hints(db, merchant_canonical)
-        cands += from_rules(db, textq)
+        cands += from_hints(db, merchant_canonical, ctx)
+        cands += from_rules(db, textq, ctx)
         cands += from_recurring(textq, merchant, cadence_days)
         cands += from_amount(amount, textq)
 
         # Use all categories for ML so we can propose true alternates
-        labels_map, all_slugs = _get_category_map(db)
+        labels_map, all_slugs = ctx.category_map
         cands += from_ml(
             {"merchant": merchant, "description": desc, "amount": amount}, all_slugs
         )
@@ -293,8 +448,8 @@ def suggest_categories_for_txn(txn: dict, db: Session | None = None) -> List[Dic
             ]
 
             if keys:
-                # Batch load stats in single query
-                stats_map = load_feedback_stats_map(db, keys)
+                # Batch load stats (cached per context)
+                stats_map = ctx.feedback_stats(keys)
 
                 # Adjust scores based on historical feedback
                 for r in ranked:
@@ -4,7 +4,8 @@ import re
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date as _date, timedelta
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
 
 from sqlalchemy import select, func, case, or_, and_
 from sqlalchemy.orm import Session
@@ -87,7 +88,9 @@ def _income_keywords(lower_merc, lower_desc):
     )
 
 
-def income_case():
+def income_case(value=None):
+    """Income-classified ``value`` (default: signed amount), else 0."""
+    value = Transaction.amount if value is None else value
     lower_cat = func.lower(func.coalesce(Transaction.category, ""))
     lower_merc = func.lower(func.coalesce(Transaction.merchant, ""))
     lower_desc = func.lower(func.coalesce(Transaction.description, ""))
@@ -95,17 +98,19 @@ def income_case():
     return case(
         (
             and_(~_is_transfer(lower_cat, lower_merc), lower_cat.in_(["income"])),
-            Transaction.amount,
+            value,
         ),
         (
             and_(~_is_transfer(lower_cat, lower_merc), income_keywords),
-            Transaction.amount,
+            value,
         ),
         else_=0.0,
     )
 
 
-def spend_case():
+def spend_case(value=None):
+    """Spend-classified ``value`` (default: signed amount), else 0."""
+    value = Transaction.amount if value is None else value
     lower_cat = func.lower(func.coalesce(Transaction.category, ""))
     lower_merc = func.lower(func.coalesce(Transaction.merchant, ""))
     lower_desc = func.lower(func.coalesce(Transaction.description, ""))
@@ -117,7 +122,7 @@ def spend_case():
                 ~income_keywords,
                 ~lower_cat.in_(["income"]),
             ),
-            Transaction.amount,
+            value,
         ),
         else_=0.0,
     )
@@ -126,51 +131,32 @@ def spend_case():
 # --- Data aggregations used by both charts and exports ------------------------
 
 
-def get_month_summary(db: Session, user_id: int, month: str) -> Dict[str, Any]:
-    start, end = month_bounds(month)
+def _rollups(db: Session):
+    """MonthlyRollup model, after applying this session's pending rollup updates."""
+    from app.orm_models import MonthlyRollup
+    from app.services import monthly_rollups
 
-    lower_cat = func.lower(func.coalesce(Transaction.category, ""))
-    lower_merc = func.lower(func.coalesce(Transaction.merchant, ""))
-    lower_desc = func.lower(func.coalesce(Transaction.description, ""))
-    income_keywords = _income_keywords(lower_merc, lower_desc)
-    is_transfer = _is_transfer(lower_cat, lower_merc)
-    amt_abs = func.abs(Transaction.amount)
+    monthly_rollups.sync(db)
+    return MonthlyRollup
 
-    income_expr = case(
-        (and_(~is_transfer, lower_cat.in_(["income"])), amt_abs),
-        (and_(~is_transfer, income_keywords), amt_abs),
-        else_=0.0,
-    )
-    spend_expr = case(
-        (and_(~is_transfer, ~income_keywords, ~lower_cat.in_(["income"])), amt_abs),
-        else_=0.0,
-    )
+
+def get_month_summary(db: Session, user_id: int, month: str) -> Dict[str, Any]:
+    """Posted income/spend totals and per-category spend, read from monthly_rollups."""
+    R = _rollups(db)
+    scope = (R.user_id == user_id, R.month == month, ~R.pending)
 
     totals = db.execute(
-        select(
-            func.sum(spend_expr),
-            func.sum(income_expr),
-        ).where(
-            Transaction.user_id == user_id,  # ✅ Scope by user
-            Transaction.date >= start,
-            Transaction.date < end,
-            ~Transaction.pending,  # Exclude pending transactions
-        )
+        select(func.sum(R.spend), func.sum(R.income)).where(*scope)
     ).one()
     total_spend = float(totals[0] or 0.0)
     total_income = float(totals[1] or 0.0)
 
-    cat_expr = func.coalesce(Transaction.category, "Unknown")
+    cat_expr = func.coalesce(R.category, "Unknown")
     cat_rows = db.execute(
-        select(cat_expr.label("cat"), func.sum(spend_expr).label("amt"))
-        .where(
-            Transaction.user_id == user_id,  # ✅ Scope by user
-            Transaction.date >= start,
-            Transaction.date < end,
-            ~Transaction.pending,  # Exclude pending transactions
-        )
+        select(cat_expr.label("cat"), func.sum(R.spend).label("amt"))
+        .where(*scope)
         .group_by(cat_expr)
-        .order_by(func.sum(spend_expr).desc())
+        .order_by(func.sum(R.spend).desc())
     ).all()
     categories = [{"name": c, "amount": round(float(a or 0), 2)} for (c, a) in cat_rows]
 
@@ -236,6 +222,14 @@ MERCHANT_BRAND_RULES: List[MerchantBrandRule] = [
 ]
 
 
+_DIGITS_RE = re.compile(r"\d+")
+_NON_ALPHA_RE = re.compile(r"[^a-z& ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+# Memoized canonical_and_label results (statement merchants repeat heavily)
+CANONICAL_CACHE_SIZE = 65536
+
+
 def normalize_merchant_base(raw: str) -> str:
     """
     Base merchant normalization - brand-agnostic.
@@ -247,13 +241,38 @@ def normalize_merchant_base(raw: str) -> str:
     s = raw.lower()
 
     # Strip digits / punctuation / duplicate spaces
-    s = re.sub(r"\d+", " ", s)
-    s = re.sub(r"[^a-z& ]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _DIGITS_RE.sub(" ", s)
+    s = _NON_ALPHA_RE.sub(" ", s)
+    s = _SPACES_RE.sub(" ", s).strip()
 
     return s or raw.lower()
 
 
+def _compile_brand_matcher(rules: List[MerchantBrandRule]) -> Optional[re.Pattern]:
+    """
+    One alternation of every brand substring, used as a one-pass prefilter:
+    merchants that match no brand (the common case) cost a single search
+    instead of a substring scan per pattern. Hits are resolved in rule order.
+    """
+    pats = sorted({p for rule in rules for p in rule.patterns}, key=len, reverse=True)
+    if not pats:
+        return None
+    return re.compile("|".join(re.escape(p) for p in pats))
+
+
+_brand_matcher = _compile_brand_matcher(MERCHANT_BRAND_RULES)
+
+
+def _match_brand(base: str) -> Optional[MerchantBrandRule]:
+    if _brand_matcher is None or _brand_matcher.search(base) is None:
+        return None
+    for rule in MERCHANT_BRAND_RULES:
+        if any(pat in base for pat in rule.patterns):
+            return rule
+    return None
+
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
 def canonical_and_label(raw: str) -> tuple[str, str]:
     """
     Combined function: base normalize → then apply brand rules.
@@ -262,9 +281,9 @@ def canonical_and_label(raw: str) -> tuple[str, str]:
     base = normalize_merchant_base(raw)
 
     # 1) Try brand rules first
-    for rule in MERCHANT_BRAND_RULES:
-        if any(pat in base for pat in rule.patterns):
-            return rule.key, rule.label
+    rule = _match_brand(base)
+    if rule is not None:
+        return rule.key, rule.label
 
     # 2) Generic fallback for unknown merchants
     key = base or "unknown"
@@ -274,6 +293,20 @@ def canonical_and_label(raw: str) -> tuple[str, str]:
     return key, label
 
 
+def canonical_and_label_many(raws: Iterable[str]) -> List[tuple[str, str]]:
+    """canonical_and_label for many merchants (each distinct string computed once)."""
+    raws = list(raws)
+    memo = {raw: canonical_and_label(raw) for raw in dict.fromkeys(raws)}
+    return [memo[raw] for raw in raws]
+
+
+def reset_merchant_brand_rules() -> None:
+    """Recompile brand rules and drop memoized results (after editing MERCHANT_BRAND_RULES)."""
+    global _brand_matcher
+    _brand_matcher = _compile_brand_matcher(MERCHANT_BRAND_RULES)
+    canonical_and_label.cache_clear()
+
+
 def get_month_merchants(
     db: Session, user_id: int, month: str, limit: int = 8
 ) -> Dict[str, Any]:
@@ -291,20 +324,26 @@ def get_month_merchants(
     - category: str | None - learned category from merchant cache
     """
     from app.redis_client import redis
-    from app.services.merchant_cache import learn_merchant
+    from app.services.merchant_cache import learn_merchants
 
-    start, end = month_bounds(month)
     redis_client = redis()
+    R = _rollups(db)
 
-    # Fetch all expense transactions for the month
-    txns = db.execute(
-        select(Transaction.merchant, Transaction.amount, Transaction.description).where(
-            Transaction.user_id == user_id,
-            Transaction.date >= start,
-            Transaction.date < end,
-            Transaction.amount < 0,
-            ~Transaction.pending,
+    # Posted expense totals per raw merchant string for the month
+    rows = db.execute(
+        select(
+            R.merchant,
+            func.sum(R.outflow),
+            func.sum(R.outflow_count),
+            func.max(R.sample_description),
         )
+        .where(
+            R.user_id == user_id,
+            R.month == month,
+            ~R.pending,
+            R.outflow_count > 0,
+        )
+        .group_by(R.merchant)
     ).all()
 
     # Aggregate using brand-aware normalization with cache
@@ -318,14 +357,31 @@ def get_month_merchants(
         }
     )
 
-    for raw_merchant, amount, description in txns:
+    # Learn/lookup every raw merchant in one batched cache round-trip
+    hints = (
+        learn_merchants(
+            redis_client,
+            db,
+            (
+                (
+                    raw_merchant or "unknown",
+                    description,
+                    -float(total or 0.0) / count if count else None,
+                )
+                for raw_merchant, total, count, description in rows
+            ),
+        )
+        if redis_client
+        else {}
+    )
+
+    for raw_merchant, total, count, description in rows:
         raw = raw_merchant or "unknown"
+        total = float(total or 0.0)
+        count = int(count or 0)
 
-        # Try to learn/lookup merchant from cache
-        if redis_client:
-            hint = learn_merchant(
-                redis_client, db, raw, description=description, amount=amount
-            )
+        hint = hints.get(raw)
+        if hint is not None:
             key = hint.normalized_name
             display = hint.display_name
             category = hint.category
@@ -337,8 +393,8 @@ def get_month_merchants(
         b = buckets[key]
         b["display"] = display
         b["category"] = category
-        b["total"] = float(b["total"]) + abs(float(amount or 0.0))
-        b["count"] = int(b["count"]) + 1
+        b["total"] = float(b["total"]) + total
+        b["count"] = int(b["count"]) + count
         b["statement_examples"].add(raw)  # type: ignore
 
     # Convert to list and sort by total spend
@@ -376,23 +432,19 @@ def get_month_categories(
     db: Session, user_id: int, month: str, limit: int = 50
 ) -> list[dict[str, Any]]:
     """Category spend aggregation (expenses only), descending by total spend."""
-    start, end = month_bounds(month)
-    spend_abs = func.sum(func.abs(Transaction.amount)).label("spend")
+    R = _rollups(db)
+    spend_abs = func.sum(R.outflow).label("spend")
     rows = db.execute(
-        select(
-            Transaction.category.label("category"),
-            spend_abs,
-        )
+        select(R.category.label("category"), spend_abs)
         .where(
-            Transaction.user_id == user_id,  # ✅ Scope by user
-            Transaction.date >= start,
-            Transaction.date < end,
-            Transaction.amount < 0,
-            Transaction.category.is_not(None),
-            Transaction.category != "",
-            ~Transaction.pending,  # Exclude pending transactions
+            R.user_id == user_id,  # ✅ Scope by user
+            R.month == month,
+            R.outflow_count > 0,
+            R.category.is_not(None),
+            R.category != "",
+            ~R.pending,  # Exclude pending transactions
         )
-        .group_by(Transaction.category)
+        .group_by(R.category)
         .order_by(spend_abs.desc())
         .limit(limit)
     ).all()
@@ -427,15 +479,16 @@ def get_month_flows(db: Session, user_id: int, month: str) -> Dict[str, Any]:
 
 
 def get_spending_trends(db: Session, user_id: int, months: int = 6) -> Dict[str, Any]:
+    R = _rollups(db)
     rows = db.execute(
         select(
-            Transaction.month.label("month"),
-            func.sum(spend_case()).label("spend"),
-            func.sum(income_case()).label("income"),
+            R.month.label("month"),
+            func.sum(R.spend_net).label("spend"),
+            func.sum(R.income_net).label("income"),
         )
-        .where(Transaction.user_id == user_id)  # ✅ Scope by user
-        .group_by(Transaction.month)
-        .order_by(Transaction.month.desc())
+        .where(R.user_id == user_id)  # ✅ Scope by user
+        .group_by(R.month)
+        .order_by(R.month.desc())
         .limit(months)
     ).all()
     trends = []
@@ -457,45 +510,32 @@ def get_category_timeseries(db: Session, user_id: int, category: str, months: in
     - Income and transfers are excluded.
     - Returns a list of { month: 'YYYY-MM', amount: number } sorted ascending by month.
     """
-    # find max date
-    max_dt = db.execute(
-        select(func.max(Transaction.date)).where(
-            Transaction.user_id == user_id
-        )  # ✅ Scope by user
+    R = _rollups(db)
+    latest = db.execute(
+        select(func.max(R.month)).where(R.user_id == user_id)  # ✅ Scope by user
     ).scalar()
-    if not max_dt:
+    if not latest:
         return None
-    # compute earliest month start
-    y, m = max_dt.year, max_dt.month
-    ey, em = y, m
+    # compute earliest month in the window
+    ey, em = map(int, latest.split("-", 1))
     for _ in range(months - 1):
         em -= 1
         if em <= 0:
             em += 12
             ey -= 1
-    earliest = _date(ey, em, 1)
-    # window end is first day of next month
-    nm_y, nm_m = (y + 1, 1) if m == 12 else (y, m + 1)
-    end = _date(nm_y, nm_m, 1)
-
-    # Dialect-specific month key
-    if db.bind and getattr(db.bind.dialect, "name", "") == "sqlite":
-        ym = func.strftime("%Y-%m", Transaction.date)
-    else:
-        # Prefer ANSI via to_char on Postgres
-        ym = func.to_char(Transaction.date, "YYYY-MM")
+    earliest = f"{ey:04d}-{em:02d}"
 
     rows = db.execute(
-        select(ym.label("ym"), func.sum(func.abs(Transaction.amount)).label("amt"))
+        select(R.month.label("ym"), func.sum(R.outflow).label("amt"))
         .where(
-            Transaction.user_id == user_id,  # ✅ Scope by user
-            Transaction.date >= earliest,
-            Transaction.date < end,
-            Transaction.category == category,
-            Transaction.amount < 0,
+            R.user_id == user_id,  # ✅ Scope by user
+            R.month >= earliest,
+            R.month <= latest,
+            R.category == category,
+            R.outflow_count > 0,
         )
-        .group_by(ym)
-        .order_by(ym.asc())
+        .group_by(R.month)
+        .order_by(R.month.asc())
     ).all()
     series = [{"month": k, "amount": float(v or 0.0)} for k, v in rows]
     return series
@@ -3,6 +3,7 @@ from __future__ import annotations
 import base64
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 try:  # optional dependency during hermetic tests
@@ -27,6 +28,17 @@ except Exception:  # pragma: no cover - fallback stub
     AESGCM = _StubAESGCM  # type: ignore
 
 
+@lru_cache(maxsize=32)
+def aead_for(dek: bytes) -> AESGCM:
+    """Return a shared AESGCM for ``dek``.
+
+    Building the cipher per call costs more than decrypting a short field, so
+    every data-key user goes through this cache. Cleared by
+    ``purge_dek_cache`` together with the DEK cache.
+    """
+    return AESGCM(dek)
+
+
 @dataclass
 class EnvelopeKey:
     label: str  # e.g., "active"
@@ -87,14 +99,12 @@ class EnvelopeCrypto:
     def aesgcm_encrypt(
         dek: bytes, plaintext: bytes, aad: Optional[bytes] = None
     ) -> tuple[bytes, bytes]:
-        aead = AESGCM(dek)
         nonce = os.urandom(12)
-        ct = aead.encrypt(nonce, plaintext, aad)
+        ct = aead_for(dek).encrypt(nonce, plaintext, aad)
         return ct, nonce
 
     @staticmethod
     def aesgcm_decrypt(
         dek: bytes, ciphertext: bytes, nonce: bytes, aad: Optional[bytes] = None
     ) -> bytes:
-        aead = AESGCM(dek)
-        return aead.decrypt(nonce, ciphertext, aad)
+        return aead_for(dek).decrypt(nonce, ciphertext, aad)
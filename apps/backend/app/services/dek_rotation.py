@@ -1,20 +1,23 @@
 from __future__ import annotations
 import os
 import logging
-from typing import Dict, Any, List, Tuple
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Sequence, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select, update
 
 from app.orm_models import (
+    DekRotationCheckpoint,
     Transaction,
     EncryptionKey,
     EncryptionSettings,
 )  # adjusted to actual orm_models
 from app.core.crypto_state import (
-    get_dek_for_label,
+    get_aead_for_label,
     purge_dek_cache,
 )  # canonical DEK retrieval
-from app.services.crypto import EnvelopeCrypto
 import time
 
 # Optional Prometheus instrumentation
@@ -67,6 +70,15 @@ _logger = logging.getLogger(__name__)
 
 _TXN_AAD = b"txn:v1"
 _FAIL_SAMPLE_LIMIT = 5
+# Ranges re-encrypted concurrently (each in its own session); SQLite runs serially
+DEK_ROTATION_WORKERS = int(os.getenv("DEK_ROTATION_WORKERS", "4"))
+
+# Encrypted columns in the Transaction model
+_ENC_COLS = (
+    ("description_nonce", "description_enc"),
+    ("merchant_raw_nonce", "merchant_raw_enc"),
+    ("note_nonce", "note_enc"),
+)
 
 
 def _to_bytes(x):
@@ -79,6 +91,27 @@ def _to_bytes(x):
     return x if isinstance(x, (bytes, bytearray)) else None
 
 
+def checkpoint_progress(db: Session, target_label: str | None) -> Dict[str, Any]:
+    """Summarize committed rotation ranges for ``target_label``."""
+    if not target_label:
+        return {"ranges_done": 0, "processed": 0, "failed": 0, "last_at": None}
+    C = DekRotationCheckpoint
+    row = db.execute(
+        select(
+            func.count(C.id),
+            func.coalesce(func.sum(C.processed), 0),
+            func.coalesce(func.sum(C.failed), 0),
+            func.max(C.completed_at),
+        ).where(C.target_label == target_label)
+    ).one()
+    return {
+        "ranges_done": int(row[0]),
+        "processed": int(row[1]),
+        "failed": int(row[2]),
+        "last_at": row[3].isoformat() if row[3] else None,
+    }
+
+
 def rotation_status(db: Session) -> Dict[str, Any]:
     settings = db.execute(select(EncryptionSettings).limit(1)).scalar_one()
     # For backward compatibility with in-progress schema: treat write_label as active;
@@ -107,7 +140,222 @@ def rotation_status(db: Session) -> Dict[str, Any]:
         )
         .count()
     )
-    return {"active": active, "rotating": rotating, "done": done, "total": total}
+    return {
+        "active": active,
+        "rotating": rotating,
+        "done": done,
+        "total": total,
+        "checkpoint": checkpoint_progress(db, rotating),
+    }
+
+
+def _payload_filter():
+    return (
+        (Transaction.description_enc != None)  # noqa: E711
+        | (Transaction.merchant_raw_enc != None)  # noqa: E711
+        | (Transaction.note_enc != None)  # noqa: E711
+    )
+
+
+def _done_intervals(db: Session, target_label: str) -> List[Tuple[int, int]]:
+    """Checkpointed id ranges for a target, merged and sorted."""
+    C = DekRotationCheckpoint
+    rows = db.execute(
+        select(C.range_start, C.range_end)
+        .where(C.target_label == target_label)
+        .order_by(C.range_start)
+    ).all()
+    merged: List[Tuple[int, int]] = []
+    for lo, hi in rows:
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def plan_ranges(
+    db: Session,
+    *,
+    source_label: str,
+    batch_size: int,
+    done: Sequence[Tuple[int, int]] = (),
+) -> List[Tuple[int, int]]:
+    """Keyset-partition pending row ids into inclusive (first_id, last_id)
+    ranges of at most ``batch_size`` rows, skipping checkpointed intervals.
+
+    Only ids are read, so planning stays cheap on large tables.
+    """
+    ids = db.execute(
+        select(Transaction.id)
+        .where(_payload_filter())
+        .where(
+            (Transaction.enc_label == None)  # noqa: E711
+            | (Transaction.enc_label == source_label)
+        )
+        .order_by(Transaction.id)
+        .execution_options(yield_per=10_000)
+    ).scalars()
+    starts = [lo for lo, _ in done]
+    ranges: List[Tuple[int, int]] = []
+    first = last = None
+    count = 0
+    for tid in ids:
+        k = bisect_right(starts, tid) - 1
+        if k >= 0 and tid <= done[k][1]:
+            continue
+        if first is None:
+            first = tid
+        last = tid
+        count += 1
+        if count == batch_size:
+            ranges.append((first, last))
+            first, count = None, 0
+    if first is not None:
+        ranges.append((first, last))
+    return ranges
+
+
+@dataclass
+class _RangeResult:
+    lo: int
+    hi: int
+    scanned: int = 0
+    processed: int = 0
+    skipped: int = 0
+    dec_ok: int = 0
+    dec_fail: int = 0
+    seconds: float = 0.0
+    fail_samples: List[Dict[str, Any]] = field(default_factory=list)
+    error: str | None = None
+
+
+_ROW_COLS = (
+    Transaction.id,
+    *(getattr(Transaction, c) for pair in _ENC_COLS for c in pair),
+)
+_UPDATE_ROWS = (
+    update(Transaction.__table__)
+    .where(Transaction.__table__.c.id == bindparam("_id"))
+    .values(
+        {
+            **{c: bindparam(c) for pair in _ENC_COLS for c in pair},
+            "enc_label": bindparam("_label"),
+        }
+    )
+)
+
+
+def _rotate_range(
+    session: Session,
+    lo: int,
+    hi: int,
+    *,
+    source_label: str,
+    target_label: str,
+    old_aead,
+    new_aead,
+    dry_run: bool,
+) -> _RangeResult:
+    """Re-encrypt one id range and, unless dry-run, commit it with its checkpoint."""
+    res = _RangeResult(lo, hi)
+    start = time.monotonic()
+    rows = session.execute(
+        select(*_ROW_COLS)
+        .where(Transaction.id.between(lo, hi))
+        .where(_payload_filter())
+        .where(
+            (Transaction.enc_label == None)  # noqa: E711
+            | (Transaction.enc_label == source_label)
+        )
+        .order_by(Transaction.id)
+    ).all()
+    updates: List[Dict[str, Any]] = []
+    for row in rows:
+        res.scanned += 1
+        values: Dict[str, Any] = {"_id": row.id, "_label": target_label}
+        changed_any = False
+        for nonce_field, ct_field in _ENC_COLS:
+            ct = _to_bytes(getattr(row, ct_field))
+            nonce = _to_bytes(getattr(row, nonce_field))
+            values[nonce_field], values[ct_field] = nonce, ct
+            if not ct or not nonce:
+                continue
+            try:
+                pt = old_aead.decrypt(nonce, ct, _TXN_AAD)
+            except Exception as exc:
+                res.dec_fail += 1
+                if len(res.fail_samples) < _FAIL_SAMPLE_LIMIT:
+                    res.fail_samples.append(
+                        {
+                            "id": row.id,
+                            "field": ct_field,
+                            "nonce_len": len(nonce),
+                            "ct_len": len(ct),
+                            "nonce_prefix": nonce[:8].hex(),
+                            "ct_prefix": ct[:8].hex(),
+                            "error": exc.__class__.__name__,
+                        }
+                    )
+                if _ROTATE_FAIL_FIELD:
+                    try:
+                        _ROTATE_FAIL_FIELD.labels(field=ct_field).inc()
+                    except Exception:
+                        pass
+                continue
+            res.dec_ok += 1
+            changed_any = True
+            if dry_run:
+                continue
+            new_nonce = os.urandom(12)
+            values[nonce_field] = new_nonce
+            values[ct_field] = new_aead.encrypt(new_nonce, pt, _TXN_AAD)
+        if changed_any:
+            res.processed += 1
+            updates.append(values)
+        else:
+            res.skipped += 1
+    if not dry_run:
+        if updates:
+            session.execute(_UPDATE_ROWS, updates)
+        session.add(
+            DekRotationCheckpoint(
+                target_label=target_label,
+                source_label=source_label,
+                range_start=lo,
+                range_end=hi,
+                scanned=res.scanned,
+                processed=res.processed,
+                failed=res.dec_fail,
+            )
+        )
+        session.commit()
+    res.seconds = time.monotonic() - start
+    return res
+
+
+def _rotate_range_in_own_session(bind, lo: int, hi: int, **kw) -> _RangeResult:
+    with Session(bind=bind) as session:
+        try:
+            return _rotate_range(session, lo, hi, **kw)
+        except Exception as exc:
+            session.rollback()
+            return _RangeResult(lo, hi, error=f"{exc.__class__.__name__}: {exc}")
+
+
+def _observe_batch(res: _RangeResult, remaining: int) -> None:
+    if not _ROTATE_SCANNED:
+        return
+    try:
+        _ROTATE_SCANNED.inc(res.scanned)
+        _ROTATE_PROCESSED.inc(res.processed)
+        _ROTATE_FAILED.inc(res.dec_fail)
+        _ROTATE_OK.inc(res.dec_ok)
+        _ROTATE_LAST_BATCH.set(res.processed)
+        _ROTATE_REMAINING.set(remaining)
+        _ROTATE_BATCH_LATENCY.observe(res.seconds)
+    except Exception:
+        pass
 
 
 def run_rotation(
@@ -117,10 +365,18 @@ def run_rotation(
     source_label: str = "active",
     batch_size: int = 500,
     dry_run: bool = False,
+    max_batches: int = 0,
+    workers: int | None = None,
 ) -> Dict[str, Any]:
     """Re-encrypt rows under source_label → target_label.
 
     Tests set write_label to target early; we therefore ignore settings.write_label and rely on explicit source_label (default 'active').
+
+    Pending row ids are split into keyset ranges of ``batch_size`` rows. Each
+    range is re-encrypted and committed with a checkpoint row, so a crashed
+    or ``max_batches``-limited run resumes with the ranges not yet done.
+    Ranges run on ``workers`` threads with one session each (serially on
+    SQLite, which allows a single writer).
     """
     rotating = target_label
     if not rotating or rotating == source_label:
@@ -130,30 +386,12 @@ def run_rotation(
     purge_dek_cache(source_label, rotating)
 
     try:
-        old_dek = get_dek_for_label(source_label)
-        new_dek = get_dek_for_label(rotating)
+        old_aead = get_aead_for_label(source_label)
+        new_aead = get_aead_for_label(rotating)
     except Exception as e:
         return {"ok": False, "reason": f"dek-lookup-failed: {e}"}
 
-    scanned = processed = skipped = 0
-    dec_ok = dec_fail = 0
-    batches: List[Tuple[int, int]] = []
-    batch_seen = 0
-    current_batch = 0
-
-    # Encrypted columns in the Transaction model
-    enc_cols = [
-        ("description_nonce", "description_enc"),
-        ("merchant_raw_nonce", "merchant_raw_enc"),
-        ("note_nonce", "note_enc"),
-    ]
-
-    payload_filter = (
-        (Transaction.description_enc != None)  # noqa: E711
-        | (Transaction.merchant_raw_enc != None)  # noqa: E711
-        | (Transaction.note_enc != None)  # noqa: E711
-    )
-
+    payload_filter = _payload_filter()
     count_source_label = (
         db.query(Transaction)
         .filter(payload_filter)
@@ -167,90 +405,71 @@ def run_rotation(
         .count()
     )
 
-    q = (
-        db.query(Transaction)
-        .filter(payload_filter)
-        .filter(
-            (Transaction.enc_label == None) | (Transaction.enc_label == source_label)
-        )  # noqa: E711
-        .yield_per(batch_size)
+    done = [] if dry_run else _done_intervals(db, rotating)
+    ranges = plan_ranges(
+        db, source_label=source_label, batch_size=max(1, batch_size), done=done
     )
+    pending_ranges = len(ranges)
+    if max_batches:
+        ranges = ranges[:max_batches]
 
-    fail_samples: List[Dict[str, Any]] = []
+    bind = db.get_bind()
+    workers = DEK_ROTATION_WORKERS if workers is None else workers
+    if bind.dialect.name == "sqlite":
+        workers = 1
+    kw = dict(
+        source_label=source_label,
+        target_label=rotating,
+        old_aead=old_aead,
+        new_aead=new_aead,
+        dry_run=dry_run,
+    )
 
-    last_batch_processed = 0
     rotation_start = time.monotonic()
-    batch_start = time.monotonic()
-    for row in q:
-        scanned += 1
-        current_batch += 1
-        changed_any = False
-        for nonce_field, ct_field in enc_cols:
-            ct = _to_bytes(getattr(row, ct_field, None))
-            nonce = _to_bytes(getattr(row, nonce_field, None))
-            if not ct or not nonce:
-                continue
+    results: List[_RangeResult] = []
+    processed = 0
+
+    def _collect(res: _RangeResult) -> None:
+        nonlocal processed
+        results.append(res)
+        processed += res.processed
+        remaining = count_source_label if dry_run else count_source_label - processed
+        _observe_batch(res, max(0, remaining))
+
+    if workers > 1 and len(ranges) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(_rotate_range_in_own_session, bind, lo, hi, **kw)
+                for lo, hi in ranges
+            ]
+            for fut in as_completed(futures):
+                _collect(fut.result())
+    else:
+        for lo, hi in ranges:
             try:
-                pt = EnvelopeCrypto.aesgcm_decrypt(old_dek, ct, nonce, aad=_TXN_AAD)
+                res = _rotate_range(db, lo, hi, **kw)
             except Exception as exc:
-                dec_fail += 1
-                if len(fail_samples) < _FAIL_SAMPLE_LIMIT:
-                    fail_samples.append(
-                        {
-                            "id": getattr(row, "id", None),
-                            "field": ct_field,
-                            "nonce_len": len(nonce),
-                            "ct_len": len(ct),
-                            "nonce_prefix": nonce[:8].hex() if len(nonce) >= 1 else "",
-                            "ct_prefix": ct[:8].hex() if len(ct) >= 1 else "",
-                            "error": exc.__class__.__name__,
-                        }
-                    )
-                if _ROTATE_FAIL_FIELD:
-                    try:
-                        _ROTATE_FAIL_FIELD.labels(field=ct_field).inc()
-                    except Exception:
-                        pass
-                continue
-            dec_ok += 1
-            if dry_run:
-                changed_any = True
-                continue
-            new_ct, new_nonce = EnvelopeCrypto.aesgcm_encrypt(new_dek, pt, aad=_TXN_AAD)
-            setattr(row, nonce_field, new_nonce)
-            setattr(row, ct_field, new_ct)
-            changed_any = True
-        if changed_any:
-            if not dry_run:
-                row.enc_label = rotating
-            processed += 1
-            last_batch_processed += 1
-        else:
-            skipped += 1
-        if current_batch == batch_size:
-            batches.append((batch_seen, current_batch))
-            batch_seen += current_batch
-            if _ROTATE_BATCH_LATENCY:
-                try:
-                    _ROTATE_BATCH_LATENCY.observe(time.monotonic() - batch_start)
-                except Exception:
-                    pass
-            batch_start = time.monotonic()
-            current_batch = 0
-
-    if current_batch:
-        batches.append((batch_seen, current_batch))
-        if _ROTATE_BATCH_LATENCY:
-            try:
-                _ROTATE_BATCH_LATENCY.observe(time.monotonic() - batch_start)
-            except Exception:
-                pass
+                db.rollback()
+                res = _RangeResult(lo, hi, error=f"{exc.__class__.__name__}: {exc}")
+            _collect(res)
 
-    if not dry_run:
-        db.commit()
+    results.sort(key=lambda r: r.lo)
+    scanned = sum(r.scanned for r in results)
+    skipped = sum(r.skipped for r in results)
+    dec_ok = sum(r.dec_ok for r in results)
+    dec_fail = sum(r.dec_fail for r in results)
+    fail_samples = [s for r in results for s in r.fail_samples][:_FAIL_SAMPLE_LIMIT]
+    range_errors = [
+        {"range": [r.lo, r.hi], "error": r.error} for r in results if r.error
+    ]
+    batches: List[Tuple[int, int]] = []
+    offset = 0
+    for r in results:
+        batches.append((offset, r.scanned))
+        offset += r.scanned
 
     result = {
-        "ok": True,
+        "ok": not range_errors,
         "source": source_label,
         "rotating": rotating,
         "scanned": scanned,
@@ -263,25 +482,14 @@ def run_rotation(
             "count_rotating_label": count_rotating_label,
             "fail_samples": fail_samples,
             "batches": batches,
+            "ranges_planned": pending_ranges,
+            "ranges_run": len(results),
+            "ranges_resumed_past": len(done),
+            "range_errors": range_errors,
+            "workers": workers,
         },
         "dry_run": dry_run,
     }
-    # Metrics update
-    if _ROTATE_SCANNED:
-        try:
-            _ROTATE_SCANNED.inc(scanned)
-            _ROTATE_PROCESSED.inc(processed)
-            _ROTATE_FAILED.inc(dec_fail)
-            _ROTATE_OK.inc(dec_ok)
-            remaining = (
-                max(0, (count_source_label - processed))
-                if not dry_run
-                else count_source_label
-            )
-            _ROTATE_REMAINING.set(remaining)
-            _ROTATE_LAST_BATCH.set(last_batch_processed)
-        except Exception:
-            pass
     # Cache last stats for JSON health endpoint
     global _last_rotation_stats
     elapsed = time.monotonic() - rotation_start
@@ -356,6 +564,10 @@ def finalize_rotation(db: Session, *, target_label: str) -> Dict[str, Any]:
     db.query(Transaction).filter(Transaction.enc_label == rotating).update(
         {Transaction.enc_label: rotating}, synchronize_session=False
     )
+    # Rotation is complete; nothing left to resume
+    db.query(DekRotationCheckpoint).filter(
+        DekRotationCheckpoint.target_label == rotating
+    ).delete(synchronize_session=False)
     db.commit()
     # Metrics finalize counter
     if _ROTATE_FINALIZE:
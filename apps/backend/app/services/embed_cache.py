@@ -0,0 +1,167 @@
+"""
+Content-addressed embedding cache.
+
+Vectors are keyed by (provider, model, input_type, sha256(text)) and stored as
+packed float32 blobs in a small standalone SQLite file, so re-ingesting
+unchanged documents or repeating a RAG query never calls the embed provider.
+
+Path: EMBED_CACHE_PATH (default app/data/store/embed_cache.sqlite).
+Set EMBED_CACHE_PATH=off to disable. Under tests/CI the cache is kept in
+memory only (same guard as app.utils.state persistence).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_DEFAULT_PATH = (
+    Path(__file__).resolve().parent.parent / "data" / "store" / "embed_cache.sqlite"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embed_cache (
+    provider   TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    input_type TEXT NOT NULL,
+    text_sha   TEXT NOT NULL,
+    dim        INTEGER NOT NULL,
+    vec        BLOB NOT NULL,
+    PRIMARY KEY (provider, model, input_type, text_sha)
+)
+"""
+
+# SQLite default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds
+_IN_CHUNK = 500
+
+
+def text_sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vec: List[float]) -> bytes:
+    return struct.pack(f"{len(vec)}f", *vec)
+
+
+def _unpack(blob: bytes, dim: int) -> List[float]:
+    return list(struct.unpack(f"{dim}f", blob))
+
+
+class EmbeddingCache:
+    """Thread-safe get_many/put_many over SQLite (or a dict when path is None)."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mem: Dict[Tuple[str, str, str, str], List[float]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+
+    def get_many(
+        self, provider: str, model: str, input_type: str, shas: Iterable[str]
+    ) -> Dict[str, List[float]]:
+        wanted = list(dict.fromkeys(shas))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            if self._conn is None:
+                for sha in wanted:
+                    vec = self._mem.get((provider, model, input_type, sha))
+                    if vec is not None:
+                        found[sha] = vec
+            else:
+                for i in range(0, len(wanted), _IN_CHUNK):
+                    part = wanted[i : i + _IN_CHUNK]
+                    marks = ",".join("?" for _ in part)
+                    rows = self._conn.execute(
+                        "SELECT text_sha, dim, vec FROM embed_cache "
+                        "WHERE provider=? AND model=? AND input_type=? "
+                        f"AND text_sha IN ({marks})",
+                        (provider, model, input_type, *part),
+                    ).fetchall()
+                    for sha, dim, blob in rows:
+                        found[sha] = _unpack(blob, dim)
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(
+        self,
+        provider: str,
+        model: str,
+        input_type: str,
+        items: Dict[str, List[float]],
+    ) -> None:
+        if not items:
+            return
+        with self._lock:
+            if self._conn is None:
+                for sha, vec in items.items():
+                    self._mem[(provider, model, input_type, sha)] = vec
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embed_cache "
+                "(provider, model, input_type, text_sha, dim, vec) VALUES (?,?,?,?,?,?)",
+                [
+                    (provider, model, input_type, sha, len(vec), _pack(vec))
+                    for sha, vec in items.items()
+                ],
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embed_cache")
+                self._conn.commit()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, object]:
+        return {"path": self.path, "hits": self.hits, "misses": self.misses}
+
+
+def _persist_allowed() -> bool:
+    if os.getenv("PYTEST_CURRENT_TEST"):
+        return False
+    return (os.getenv("APP_ENV") or "").lower() not in {"ci", "test", "tests"}
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide cache, or None when EMBED_CACHE_PATH=off."""
+    global _cache
+    if _cache is not None:
+        return _cache
+    raw = os.getenv("EMBED_CACHE_PATH", "")
+    if raw.lower() in {"off", "0", "false", "none"}:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            path = (raw or str(_DEFAULT_PATH)) if _persist_allowed() else None
+            try:
+                _cache = EmbeddingCache(path)
+            except sqlite3.Error:
+                _cache = EmbeddingCache(None)
+        return _cache
+
+
+def reset_cache() -> None:
+    """Drop the process-wide cache handle (tests / config reload)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
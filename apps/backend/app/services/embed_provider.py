@@ -1,6 +1,14 @@
+import asyncio
 import os
-import httpx
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional, Tuple
+
+from app.services.embed_cache import get_cache, text_sha
+from app.services.http_clients import (
+    AsyncPool,
+    PoolConfig,
+    get_async_client,
+    register_pool,
+)
 
 ProviderName = Literal["openai", "ollama", "nim"]
 EMBED_PROVIDER: ProviderName = os.getenv("EMBED_PROVIDER", "ollama")  # default local
@@ -14,6 +22,19 @@ EMBED_INPUT_TYPE_QUERY = os.getenv("EMBED_INPUT_TYPE_QUERY", "query")
 EMBED_INPUT_TYPE_PASSAGE = os.getenv("EMBED_INPUT_TYPE_PASSAGE", "passage")
 NIM_TIMEOUT_SEC = int(os.getenv("NIM_TIMEOUT_SEC", "30"))
 EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "16"))
+# Max batches in flight at once (per embed_texts call)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+# Size the shared "embed" pool for EMBED_CONCURRENCY batches in flight
+register_pool(
+    "embed",
+    PoolConfig(
+        max_connections=max(EMBED_CONCURRENCY * 2, 4),
+        max_keepalive=max(EMBED_CONCURRENCY, 2),
+    ),
+)
+# Ollama: None = unknown, True = /api/embed (batched) works, False = legacy only
+_ollama_batch_api: Optional[bool] = None
 
 
 def _normalize(vec: List[float]) -> List[float]:
@@ -23,6 +44,67 @@ def _normalize(vec: List[float]) -> List[float]:
     return [v / n for v in vec]
 
 
+def _get_client() -> AsyncPool:
+    return get_async_client("embed")
+
+
+def _provider_model() -> Tuple[str, str]:
+    if EMBED_PROVIDER == "nim":
+        return "nim", os.getenv("NIM_EMBED_MODEL", "nvidia/nv-embed-v2")
+    if EMBED_PROVIDER == "openai":
+        return "openai", OPENAI_MODEL
+    return "ollama", OLLAMA_MODEL
+
+
+async def _embed_openai(texts: List[str]) -> List[List[float]]:
+    key = os.environ.get("OPENAI_API_KEY")
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY not set for embed provider 'openai'")
+    r = await _get_client().post(
+        "https://api.openai.com/v1/embeddings",
+        headers={"Authorization": f"Bearer {key}"},
+        json={"model": OPENAI_MODEL, "input": texts},
+    )
+    r.raise_for_status()
+    data = r.json()
+    return [_normalize(d["embedding"]) for d in data["data"]]
+
+
+async def _embed_ollama(texts: List[str]) -> List[List[float]]:
+    global _ollama_batch_api
+    client = _get_client()
+    if _ollama_batch_api is not False:
+        # Ollama >= 0.3: one request per batch
+        r = await client.post(
+            f"{OLLAMA_URL}/api/embed", json={"model": OLLAMA_MODEL, "input": texts}
+        )
+        if r.status_code != 404:
+            r.raise_for_status()
+            _ollama_batch_api = True
+            return [_normalize(v) for v in r.json()["embeddings"]]
+        _ollama_batch_api = False
+    # Legacy endpoint: single prompt per request
+    out: List[List[float]] = []
+    for t in texts:
+        r = await client.post(
+            f"{OLLAMA_URL}/api/embeddings",
+            json={"model": OLLAMA_MODEL, "prompt": t},
+        )
+        r.raise_for_status()
+        out.append(_normalize(r.json()["embedding"]))
+    return out
+
+
+async def _embed_batch(batch: List[str], input_type: str) -> List[List[float]]:
+    if EMBED_PROVIDER == "nim":
+        from app.providers.nim_embed import NimEmbedClient
+
+        return await NimEmbedClient().embed_texts(batch, input_type=input_type)
+    if EMBED_PROVIDER == "openai":
+        return await _embed_openai(batch)
+    return await _embed_ollama(batch)
+
+
 async def embed_texts(
     texts: List[str], input_type: str = "passage"
 ) -> List[List[float]]:
@@ -32,46 +114,51 @@ async def embed_texts(
         texts: List of texts to embed
         input_type: Either "passage" (for documents) or "query" (for search queries).
                    Only used by NIM provider with asymmetric models.
+
+    Identical texts are embedded once; vectors already in the embedding cache
+    (provider+model+input_type+sha256) are reused. Remaining texts are sent in
+    EMBED_BATCH_SIZE batches, at most EMBED_CONCURRENCY batches at a time.
     """
     if not texts:
         return []
 
-    # NIM provider support
-    if EMBED_PROVIDER == "nim":
-        from app.providers.nim_embed import NimEmbedClient
+    provider, model = _provider_model()
+    shas = [text_sha(t) for t in texts]
+    cache = get_cache()
+    vectors: Dict[str, List[float]] = (
+        cache.get_many(provider, model, input_type, shas) if cache else {}
+    )
 
-        client = NimEmbedClient()
-        return await client.embed_texts(texts, input_type=input_type)
+    pending: Dict[str, str] = {}
+    for sha, t in zip(shas, texts):
+        if sha not in vectors and sha not in pending:
+            pending[sha] = t
 
-    if EMBED_PROVIDER == "openai":
-        key = os.environ.get("OPENAI_API_KEY")
-        if not key:
-            raise RuntimeError("OPENAI_API_KEY not set for embed provider 'openai'")
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(
-                "https://api.openai.com/v1/embeddings",
-                headers={"Authorization": f"Bearer {key}"},
-                json={"model": OPENAI_MODEL, "input": texts},
-            )
-            r.raise_for_status()
-            data = r.json()
-            emb = [_normalize(d["embedding"]) for d in data["data"]]
-            # Optional sanity: store dimension into env for migrations downstream (non-persistent)
-            os.environ.setdefault("EMBED_DIM", str(len(emb[0]) if emb else EMBED_DIM))
-            return emb
-    else:
-        # ollama embeddings
-        out: List[List[float]] = []
-        async with httpx.AsyncClient(timeout=60) as client:
-            for t in texts:
-                r = await client.post(
-                    f"{OLLAMA_URL}/api/embeddings",
-                    json={"model": OLLAMA_MODEL, "prompt": t},
+    if pending:
+        todo = list(pending.items())
+        size = max(EMBED_BATCH_SIZE, 1)
+        batches = [todo[i : i + size] for i in range(0, len(todo), size)]
+        sem = asyncio.Semaphore(max(EMBED_CONCURRENCY, 1))
+
+        async def _run(batch: List[Tuple[str, str]]) -> List[List[float]]:
+            async with sem:
+                return await _embed_batch([t for _, t in batch], input_type)
+
+        results = await asyncio.gather(*(_run(b) for b in batches))
+        fresh: Dict[str, List[float]] = {}
+        for batch, embs in zip(batches, results):
+            if len(embs) != len(batch):
+                raise RuntimeError(
+                    f"embed provider '{provider}' returned {len(embs)} vectors for {len(batch)} inputs"
                 )
-                r.raise_for_status()
-                vec = _normalize(r.json()["embedding"])
-                out.append(vec)
-        # Optional sanity: push dim to env for later processes (same process only)
-        if out:
-            os.environ.setdefault("EMBED_DIM", str(len(out[0])))
-        return out
+            for (sha, _), vec in zip(batch, embs):
+                fresh[sha] = vec
+        if cache:
+            cache.put_many(provider, model, input_type, fresh)
+        vectors.update(fresh)
+
+    out = [vectors[sha] for sha in shas]
+    # Optional sanity: push dim to env for later processes (same process only)
+    if out:
+        os.environ.setdefault("EMBED_DIM", str(len(out[0])))
+    return out
@@ -117,7 +117,7 @@ def _cache_set(key: Tuple[Any, ...], value: Dict[str, Any]):
 
 
 def _rule_matches_txn(rule: Rule, txn: Transaction) -> bool:
-    """Deterministic rule match. Mirrors logic used in rules_apply."""
+    """Deterministic rule match. Mirrors rule_matcher.CompiledRules."""
     ok = True
     if getattr(rule, "merchant", None):
         ok = ok and ((txn.merchant or "").lower().find(rule.merchant.lower()) >= 0)
@@ -1,6 +1,11 @@
+import json
+import logging
+import os
 import time
 import threading
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
 
 # Optional Prometheus metrics (safe if library absent)
 try:  # pragma: no cover - optional dependency
@@ -11,20 +16,59 @@ try:  # pragma: no cover - optional dependency
         "misses": Counter("help_cache_misses_total", "Help cache misses"),
         "evictions": Counter("help_cache_evictions_total", "Help cache evictions"),
         "size": Gauge("help_cache_entries", "Help cache current size"),
+        "stale": Counter(
+            "help_cache_stale_served_total",
+            "Expired entries served while a refresh runs",
+        ),
+        "coalesced": Counter(
+            "help_cache_coalesced_total",
+            "Misses that waited on another request's in-flight load",
+        ),
+        "l2_hits": Counter("help_cache_l2_hits_total", "Misses served from Redis L2"),
     }
 except Exception:  # pragma: no cover - no prometheus
     _METRICS = None
 
+logger = logging.getLogger(__name__)
+
 _TTL_DEFAULT: float = 300.0  # seconds (5m)
-_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+# Expired entries are still served (and refreshed in the background) this long
+_STALE_SEC: float = float(os.getenv("HELP_CACHE_STALE_SEC", "60"))
+_MAX_ENTRIES: int = int(os.getenv("HELP_CACHE_MAX_ENTRIES", "2048"))
+_L2_PREFIX = "help:v1:"
+
+# key -> (value, expires_at); ordered least- to most-recently used
+_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_inflight: Dict[str, Future] = {}
 _lock = threading.Lock()
-_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "stale": 0,
+    "coalesced": 0,
+    "l2_hits": 0,
+}
+_l2: Any = None
+_l2_checked = False
 
 
 def _now() -> float:
     return time.time()
 
 
+def _inc(name: str, n: int = 1) -> None:
+    # Callers hold _lock
+    _stats[name] += n
+    if _METRICS:
+        _METRICS[name].inc(n)
+
+
+def _set_size_metric() -> None:
+    if _METRICS:
+        _METRICS["size"].set(len(_cache))
+
+
 def make_key(
     panel_id: str,
     month: Optional[str],
@@ -39,45 +83,214 @@ def make_key(
     return f"{panel_id}|{safe_mode}|{user_token}|{month or 'none'}|{filters_hash}|r={1 if rephrase else 0}"
 
 
+# --- Redis L2 (optional) -----------------------------------------------------
+
+
+def set_l2_client(client: Any) -> None:
+    """Use ``client`` (redis-py compatible) as the shared L2; None disables it."""
+    global _l2, _l2_checked
+    _l2, _l2_checked = client, True
+
+
+def _l2_client() -> Any:
+    global _l2, _l2_checked
+    if not _l2_checked:
+        _l2_checked = True
+        if os.getenv("HELP_CACHE_REDIS", "0").lower() in {"1", "true", "yes", "on"}:
+            from app.redis_client import redis
+
+            _l2 = redis()
+    return _l2
+
+
+def _l2_get(key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    client = _l2_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(_L2_PREFIX + key)
+        if not raw:
+            return None
+        doc = json.loads(raw)
+        return doc["v"], float(doc["exp"])
+    except Exception:
+        return None
+
+
+def _l2_set(key: str, value: Dict[str, Any], exp: float) -> None:
+    client = _l2_client()
+    if client is None:
+        return
+    try:
+        ttl = max(1, int(exp - _now() + _STALE_SEC))
+        client.setex(_L2_PREFIX + key, ttl, json.dumps({"v": value, "exp": exp}))
+    except Exception:
+        pass
+
+
+# --- L1 ----------------------------------------------------------------------
+
+
+def _store(key: str, value: Dict[str, Any], exp: float) -> None:
+    # Callers hold _lock
+    _cache[key] = (value, exp)
+    _cache.move_to_end(key)
+    while len(_cache) > _MAX_ENTRIES:
+        _cache.popitem(last=False)
+        _inc("evictions")
+    _set_size_metric()
+
+
 def get(key: str) -> Optional[Dict[str, Any]]:
     with _lock:
         entry = _cache.get(key)
         if not entry:
-            _stats["misses"] += 1
-            if _METRICS:
-                _METRICS["misses"].inc()
+            _inc("misses")
             return None
         val, exp = entry
         # Treat an entry whose expiry second has arrived as expired (>=)
         if _now() >= exp:
             _cache.pop(key, None)
-            _stats["misses"] += 1
-            _stats["evictions"] += 1
-            if _METRICS:
-                _METRICS["misses"].inc()
-                _METRICS["evictions"].inc()
-                _METRICS["size"].set(len(_cache))
+            _inc("misses")
+            _inc("evictions")
+            _set_size_metric()
             return None
-        _stats["hits"] += 1
-        if _METRICS:
-            _METRICS["hits"].inc()
+        _cache.move_to_end(key)
+        _inc("hits")
         return val
 
 
 def set_(key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+    t = float(_TTL_DEFAULT if ttl is None else ttl)
+    exp = _now() + t
     with _lock:
-        t = float(_TTL_DEFAULT if ttl is None else ttl)
-        _cache[key] = (value, _now() + t)
-        if _METRICS:
-            _METRICS["size"].set(len(_cache))
+        _store(key, value, exp)
+    _l2_set(key, value, exp)
+
+
+def _run_load(
+    key: str,
+    loader: Callable[[], Dict[str, Any]],
+    fut: Future,
+    ttl: Optional[float],
+) -> None:
+    try:
+        value = loader()
+    except BaseException as exc:
+        with _lock:
+            _inflight.pop(key, None)
+        fut.set_exception(exc)
+        return
+    set_(key, value, ttl)
+    with _lock:
+        _inflight.pop(key, None)
+    fut.set_result(value)
+
 
+def _log_refresh_failure(fut: Future) -> None:
+    exc = fut.exception()
+    if exc is not None:
+        logger.warning("help_cache background refresh failed: %s", exc)
 
-def clear() -> None:
+
+def get_or_load(
+    key: str,
+    loader: Callable[[], Dict[str, Any]],
+    *,
+    ttl: Optional[float] = None,
+    refresh: Optional[Callable[[], Dict[str, Any]]] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """Return ``(value, cached)`` for ``key``, calling ``loader`` at most once
+    per key at a time.
+
+    * fresh entry: returned as is.
+    * expired within HELP_CACHE_STALE_SEC: the stale value is returned and
+      ``refresh`` (default ``loader``) runs on a background thread, unless a
+      load for the key is already running.
+    * miss: the Redis L2 is consulted when enabled. Otherwise the first caller
+      runs ``loader`` and concurrent callers for the key wait for its result
+      (and its exception).
+
+    ``cached`` is False only for the caller whose ``loader`` produced the value.
+    """
+    now = _now()
+    with _lock:
+        entry = _cache.get(key)
+        if entry:
+            val, exp = entry
+            if now < exp:
+                _cache.move_to_end(key)
+                _inc("hits")
+                return val, True
+            if now < exp + _STALE_SEC:
+                _cache.move_to_end(key)
+                _inc("stale")
+                if key not in _inflight:
+                    fut: Future = Future()
+                    _inflight[key] = fut
+                    fut.add_done_callback(_log_refresh_failure)
+                    threading.Thread(
+                        target=_run_load,
+                        args=(key, refresh or loader, fut, ttl),
+                        name="help-cache-refresh",
+                        daemon=True,
+                    ).start()
+                return val, True
+            _cache.pop(key, None)
+            _inc("evictions")
+            _set_size_metric()
+        _inc("misses")
+        waiting = _inflight.get(key)
+        if waiting is None:
+            fut = Future()
+            _inflight[key] = fut
+        else:
+            _inc("coalesced")
+    if waiting is not None:
+        return waiting.result(), True
+
+    hit = _l2_get(key)
+    if hit is not None and now < hit[1]:
+        with _lock:
+            _store(key, hit[0], hit[1])
+            _inflight.pop(key, None)
+            _inc("l2_hits")
+        fut.set_result(hit[0])
+        return hit[0], True
+
+    _run_load(key, loader, fut, ttl)
+    return fut.result(), False
+
+
+def prune() -> int:
+    """Drop entries past their stale window; returns the number removed."""
+    cutoff = _now() - _STALE_SEC
+    with _lock:
+        dead = [k for k, (_, exp) in _cache.items() if exp <= cutoff]
+        for k in dead:
+            del _cache[k]
+        if dead:
+            _inc("evictions", len(dead))
+            _set_size_metric()
+    return len(dead)
+
+
+def clear(shared: bool = False) -> None:
+    """Empty the in-process cache (and, with ``shared``, the Redis L2)."""
     with _lock:
         _cache.clear()
-        _stats["hits"] = _stats["misses"] = _stats["evictions"] = 0
+        for name in _stats:
+            _stats[name] = 0
         if _METRICS:
             _METRICS["size"].set(0)
+    client = _l2_client() if shared else None
+    if client is not None:
+        try:
+            keys = list(client.scan_iter(match=_L2_PREFIX + "*", count=500))
+            if keys:
+                client.delete(*keys)
+        except Exception:
+            pass
 
 
 def size() -> int:
@@ -92,14 +305,18 @@ def stats() -> Dict[str, int]:
             "misses": _stats["misses"],
             "evictions": _stats["evictions"],
             "size": len(_cache),
+            "max_entries": _MAX_ENTRIES,
+            "stale_served": _stats["stale"],
+            "coalesced": _stats["coalesced"],
+            "l2_hits": _stats["l2_hits"],
+            "inflight": len(_inflight),
         }
 
 
 def reset_stats() -> None:
     with _lock:
-        _stats["hits"] = 0
-        _stats["misses"] = 0
-        _stats["evictions"] = 0
+        for name in _stats:
+            _stats[name] = 0
 
 
 # For tests
@@ -135,9 +352,6 @@ def _force_expire_for_tests(key: str) -> None:
             # synthesize then remove to count as an eviction path
             _cache[key] = ({"_synthetic": True}, _now())
             _cache.pop(key, None)
-        _stats["misses"] += 1  # eviction is also a miss surface for requester
-        _stats["evictions"] += 1
-        if _METRICS:
-            _METRICS["misses"].inc()
-            _METRICS["evictions"].inc()
-            _METRICS["size"].set(len(_cache))
+        _inc("misses")  # eviction is also a miss surface for requester
+        _inc("evictions")
+        _set_size_metric()
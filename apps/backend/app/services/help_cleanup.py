@@ -1,6 +1,7 @@
 """Background cleanup loop for pruning expired help_cache rows.
 
-Runs periodically (default every 30 minutes) removing rows where expires_at < now.
+Runs periodically (default every 30 minutes) removing rows where expires_at < now,
+and pruning in-process help_cache entries past their stale window.
 Skips execution entirely if no rows found or an exception occurs (logs once per failure).
 """
 
@@ -12,6 +13,7 @@ from sqlalchemy import delete
 
 from app.db import SessionLocal
 from app.orm_models import HelpCache
+from app.services import help_cache
 
 log = logging.getLogger("help.cleanup")
 
@@ -33,6 +35,9 @@ async def help_cache_cleanup_loop(interval_seconds: int = 1800):  # 30m default
                     removed = 0
             if removed:
                 log.info("help_cache cleanup removed %s expired rows", removed)
+            pruned = help_cache.prune()
+            if pruned:
+                log.info("help_cache cleanup pruned %s stale entries", pruned)
         except Exception as e:  # pragma: no cover (defensive logging)
             log.warning("help_cache cleanup error: %s", e)
         await asyncio.sleep(interval_seconds)
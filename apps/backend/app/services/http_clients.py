@@ -0,0 +1,356 @@
+"""Shared, pooled HTTP clients for LLM, embedding and fetch traffic.
+
+Every outbound provider call used to open its own connection (bare
+``requests.post`` or a throwaway ``httpx.AsyncClient``), paying a TCP/TLS
+handshake per LLM hop. This module keeps one keep-alive pool per named
+purpose instead:
+
+* ``get_session(name)``      -> sync pool backed by a ``requests.Session``
+* ``get_async_client(name)`` -> async pool backed by an ``httpx.AsyncClient``
+  (HTTP/2 when the optional ``h2`` package is installed)
+
+Pools are limited to ``max_connections`` concurrent requests; callers beyond
+that wait for a slot, and the wait is reported in
+``lm_http_pool_wait_seconds{pool}`` next to ``lm_http_pool_in_use{pool}``.
+
+Limits are configurable per pool via env, e.g. ``HTTP_POOL_LLM_MAX_CONNECTIONS``
+(falling back to ``HTTP_POOL_MAX_CONNECTIONS``). ``startup()`` /
+``aclose_all()`` are called from the FastAPI lifespan in ``app.main``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Set
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 for httpx needs the optional ``h2`` package
+_H2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+try:  # pragma: no cover - optional metrics
+    from prometheus_client import Counter, Gauge, Histogram  # type: ignore
+
+    _METRICS = {
+        "in_use": Gauge(
+            "lm_http_pool_in_use",
+            "Requests currently holding a pooled connection slot",
+            ["pool"],
+        ),
+        "wait": Histogram(
+            "lm_http_pool_wait_seconds",
+            "Time spent waiting for a pooled connection slot",
+            ["pool"],
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+        ),
+        "clients": Counter(
+            "lm_http_pool_clients_created_total",
+            "Underlying HTTP clients created (stays flat when connections are reused)",
+            ["pool", "kind"],
+        ),
+    }
+except Exception:  # pragma: no cover - no prometheus
+    _METRICS = {}
+
+
+def _env_num(name: str, pool: str, default: float) -> float:
+    for key in (f"HTTP_POOL_{pool.upper()}_{name}", f"HTTP_POOL_{name}"):
+        raw = os.getenv(key)
+        if raw:
+            try:
+                return float(raw)
+            except ValueError:
+                logger.warning("http_clients: ignoring invalid %s=%r", key, raw)
+    return default
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+    follow_redirects: bool = False
+    http2: bool = True
+
+    def from_env(self, name: str) -> "PoolConfig":
+        http2 = os.getenv("HTTP_POOL_HTTP2", "1").lower() not in {"0", "false", "no"}
+        return replace(
+            self,
+            max_connections=max(
+                1, int(_env_num("MAX_CONNECTIONS", name, self.max_connections))
+            ),
+            max_keepalive=max(
+                0, int(_env_num("MAX_KEEPALIVE", name, self.max_keepalive))
+            ),
+            keepalive_expiry=_env_num("KEEPALIVE_EXPIRY", name, self.keepalive_expiry),
+            timeout=_env_num("TIMEOUT", name, self.timeout),
+            http2=self.http2 and http2 and _H2_AVAILABLE,
+        )
+
+
+# Built-in pools; modules may tune theirs with ``register_pool`` at import time.
+_POOL_DEFAULTS: Dict[str, PoolConfig] = {
+    "llm": PoolConfig(timeout=120.0),
+    "embed": PoolConfig(),
+    "fetch": PoolConfig(max_connections=10, timeout=30.0, follow_redirects=True),
+}
+
+_lock = threading.Lock()
+_configs: Dict[str, PoolConfig] = {}
+_sync_pools: Dict[str, "SyncPool"] = {}
+_async_pools: Dict[str, "AsyncPool"] = {}
+# Close tasks for pools replaced after a loop change (kept referenced until done)
+_retiring: Set["asyncio.Task[None]"] = set()
+
+
+def register_pool(name: str, config: PoolConfig) -> None:
+    """Set the default limits for a pool (env overrides still apply)."""
+    with _lock:
+        _POOL_DEFAULTS[name] = config
+        _configs.pop(name, None)
+
+
+def pool_config(name: str) -> PoolConfig:
+    cfg = _configs.get(name)
+    if cfg is None:
+        cfg = _POOL_DEFAULTS.get(name, PoolConfig()).from_env(name)
+        _configs[name] = cfg
+    return cfg
+
+
+def _observe_wait(pool: str, seconds: float) -> None:
+    if _METRICS:
+        _METRICS["wait"].labels(pool=pool).observe(seconds)
+
+
+def _in_use(pool: str, delta: int) -> None:
+    if _METRICS:
+        _METRICS["in_use"].labels(pool=pool).inc(delta)
+
+
+def _created(pool: str, kind: str) -> None:
+    if _METRICS:
+        _METRICS["clients"].labels(pool=pool, kind=kind).inc()
+
+
+class SyncPool:
+    """Keep-alive ``requests.Session`` with a bounded number of in-flight requests."""
+
+    def __init__(self, name: str, config: PoolConfig):
+        self.name = name
+        self.config = config
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=config.max_connections,
+            max_retries=0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(config.max_connections)
+        self._count_lock = threading.Lock()
+        self.in_use = 0
+        _created(name, "sync")
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        start = time.perf_counter()
+        self._slots.acquire()
+        _observe_wait(self.name, time.perf_counter() - start)
+        with self._count_lock:
+            self.in_use += 1
+        _in_use(self.name, 1)
+        try:
+            yield
+        finally:
+            with self._count_lock:
+                self.in_use -= 1
+            _in_use(self.name, -1)
+            self._slots.release()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.config.timeout)
+        with self._slot():
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncPool:
+    """Keep-alive ``httpx.AsyncClient`` bound to the event loop that created it."""
+
+    def __init__(self, name: str, config: PoolConfig):
+        self.name = name
+        self.config = config
+        self.loop = asyncio.get_running_loop()
+        self.client = httpx.AsyncClient(
+            timeout=config.timeout,
+            follow_redirects=config.follow_redirects,
+            http2=config.http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+        self._slots = asyncio.Semaphore(config.max_connections)
+        self.in_use = 0
+        _created(name, "async")
+
+    @property
+    def is_closed(self) -> bool:
+        return self.client.is_closed
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        await self._slots.acquire()
+        _observe_wait(self.name, time.perf_counter() - start)
+        self.in_use += 1
+        _in_use(self.name, 1)
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            _in_use(self.name, -1)
+            self._slots.release()
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self._slot():
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        """Streaming request; the slot is held until the body is consumed."""
+        async with self._slot():
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def aclose(self) -> None:
+        if self.client.is_closed:
+            return
+        try:
+            await self.client.aclose()
+        except RuntimeError:
+            # Loop that owned the pool is gone; nothing left to release
+            pass
+
+
+def get_session(name: str) -> SyncPool:
+    """Shared sync pool for ``name`` (created on first use)."""
+    pool = _sync_pools.get(name)
+    if pool is None:
+        with _lock:
+            pool = _sync_pools.get(name)
+            if pool is None:
+                pool = SyncPool(name, pool_config(name))
+                _sync_pools[name] = pool
+    return pool
+
+
+def _retire(pool: AsyncPool) -> None:
+    """Close a pool that belongs to another event loop before dropping it.
+
+    A still-running owner loop closes it itself; otherwise (the usual case:
+    that loop has finished) the close is scheduled on the current loop so the
+    client and its keep-alive connections are released rather than leaked.
+    """
+    if pool.is_closed:
+        return
+    try:
+        if pool.loop.is_running():
+            asyncio.run_coroutine_threadsafe(pool.aclose(), pool.loop)
+            return
+    except RuntimeError:
+        pass  # owner loop closed between the check and the call
+    task = asyncio.get_running_loop().create_task(pool.aclose())
+    _retiring.add(task)
+    task.add_done_callback(_retiring.discard)
+
+
+def get_async_client(name: str) -> AsyncPool:
+    """Shared async pool for ``name``; recreated if the running loop changed."""
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(name)
+    if pool is None or pool.is_closed or pool.loop is not loop:
+        if pool is not None:
+            _retire(pool)
+        pool = AsyncPool(name, pool_config(name))
+        _async_pools[name] = pool
+    return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of live pools (for diagnostics)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for kind, pools in (("sync", _sync_pools), ("async", _async_pools)):
+        for name, pool in list(pools.items()):
+            cfg = pool.config
+            out[f"{name}:{kind}"] = {
+                "in_use": pool.in_use,
+                "max_connections": cfg.max_connections,
+                "max_keepalive": cfg.max_keepalive,
+                "http2": bool(kind == "async" and cfg.http2),
+            }
+    return out
+
+
+def startup(preload: Optional[tuple] = ("llm",)) -> None:
+    """Resolve pool configs and open sync pools ahead of the first request."""
+    for name in _POOL_DEFAULTS:
+        cfg = pool_config(name)
+        logger.info(
+            "http_clients: pool=%s max=%d keepalive=%d http2=%s",
+            name,
+            cfg.max_connections,
+            cfg.max_keepalive,
+            cfg.http2,
+        )
+    for name in preload or ():
+        get_session(name)
+
+
+def close_all() -> None:
+    """Close sync pools."""
+    with _lock:
+        pools = list(_sync_pools.values())
+        _sync_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+async def aclose_all() -> None:
+    """Close every pool (app shutdown). Configs are re-read on next use."""
+    pools = list(_async_pools.values())
+    _async_pools.clear()
+    for pool in pools:
+        await pool.aclose()
+    close_all()
+    _configs.clear()
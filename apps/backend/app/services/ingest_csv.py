@@ -89,7 +89,6 @@ async def ingest_csv_file(
                 date=date_obj,  # <-- store DATE, not string
                 month=month,  # <-- keep month string
                 merchant=merchant,
-                merchant_canonical=merchant,
                 description=description,
                 amount=amount,
                 category=category or None,  # Internal slug from mapping
@@ -200,7 +199,6 @@ def ingest_csv_for_user(
                 date=date_obj,
                 month=month,
                 merchant=merchant,
-                merchant_canonical=merchant,
                 description=description,
                 amount=amount,
                 category=category_slug,
@@ -0,0 +1,188 @@
+"""
+Constant-memory batch writer for streaming CSV ingest.
+
+Parsed rows (as yielded by the ``_parse_*_rows`` generators in
+``app.routers.ingest``) are deduplicated against a compact set of 64-bit
+hashes of (date, amount, normalized description), loaded lazily one month at a
+time, and written in fixed-size batches with a single Core
+``INSERT ... VALUES (...), (...) ON CONFLICT DO NOTHING`` per batch. Rows that
+hit ``uq_txn_dedup`` (e.g. pre-existing rows outside this user's scope) are
+counted as duplicates instead of aborting the whole upload.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.category_mappings import normalize_category
+from app.services import monthly_rollups
+from app.orm_models import Transaction
+from app.utils.text import canonicalize_merchant
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+
+
+def dedup_hash(date: dt.date, amount: float, description: str | None) -> int:
+    """64-bit key equivalent to the (date, amount, lower(strip(desc))) tuple."""
+    norm = (description or "").strip().lower()
+    raw = f"{date.isoformat()}\x1f{float(amount)!r}\x1f{norm}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big")
+
+
+def _month_bounds(month: str) -> tuple[dt.date, dt.date]:
+    y, m = int(month[:4]), int(month[5:7])
+    start = dt.date(y, m, 1)
+    end = dt.date(y + (m == 12), 1 if m == 12 else m + 1, 1)
+    return start, end
+
+
+def _insert_stmt(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect.startswith("postgres"):
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(Transaction).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(Transaction).on_conflict_do_nothing()
+    from sqlalchemy import insert
+
+    return insert(Transaction)
+
+
+class TxnBatchWriter:
+    """Deduplicate and bulk-insert parsed rows for one user in fixed-size batches.
+
+    In replace mode each month's existing rows are deleted the first time the
+    stream reaches that month, before any of its rows are written.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: int,
+        *,
+        is_demo: bool = False,
+        replace: bool = False,
+        batch_size: Optional[int] = None,
+        on_flush: Optional[Callable[[Dict[str, int]], None]] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.is_demo = is_demo
+        self.replace = replace
+        self.batch_size = max(1, batch_size or INGEST_BATCH_SIZE)
+        self.on_flush = on_flush
+        self._stmt = _insert_stmt(db)
+        self._seen: Set[int] = set()
+        self._months_loaded: Set[str] = set()
+        self._pending: List[dict] = []
+        self.parsed = 0
+        self.added = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.earliest: Optional[dt.date] = None
+        self.latest: Optional[dt.date] = None
+
+    def _load_month(self, month: str) -> None:
+        self._months_loaded.add(month)
+        if self.replace:
+            # No row of this month has been queued yet, so the delete can only
+            # remove pre-existing data; nothing is left to dedup against.
+            deleted = self.db.execute(
+                delete(Transaction).where(
+                    Transaction.user_id == self.user_id, Transaction.month == month
+                )
+            ).rowcount
+            logger.info(
+                f"Replace mode: deleted {deleted} existing transactions for month {month} (user_id={self.user_id})"
+            )
+            return
+        start, end = _month_bounds(month)
+        result = self.db.execute(
+            select(Transaction.date, Transaction.amount, Transaction.description)
+            .where(
+                Transaction.user_id == self.user_id,
+                Transaction.date >= start,
+                Transaction.date < end,
+            )
+            .execution_options(yield_per=self.batch_size)
+        )
+        for txn_date, txn_amount, txn_desc in result:
+            if txn_date is not None and txn_amount is not None:
+                self._seen.add(dedup_hash(txn_date, txn_amount, txn_desc))
+
+    def add(self, row: dict) -> None:
+        """Queue one parsed row; flushes automatically every ``batch_size`` rows."""
+        date = row["date"]
+        month = row.get("month") or date.strftime("%Y-%m")
+        self.parsed += 1
+        if self.earliest is None or date < self.earliest:
+            self.earliest = date
+        if self.latest is None or date > self.latest:
+            self.latest = date
+
+        if month not in self._months_loaded:
+            self._load_month(month)
+
+        key = dedup_hash(date, row["amount"], row["description"])
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        self._seen.add(key)
+
+        raw_cat = row.get("category")
+        merch = row.get("merchant")
+        self._pending.append(
+            {
+                "user_id": self.user_id,
+                "date": date,
+                "amount": row["amount"],
+                "description": row["description"],
+                "merchant": merch,
+                "merchant_canonical": canonicalize_merchant(merch) if merch else None,
+                "account": row.get("account"),
+                "raw_category": raw_cat,
+                "category": normalize_category(raw_cat) if raw_cat else None,
+                "month": month,
+                "pending": bool(row.get("pending", False)),
+                "is_demo": self.is_demo,
+                "source": "upload",
+            }
+        )
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        res = self.db.execute(self._stmt.values(batch))
+        for month in {r["month"] for r in batch}:
+            monthly_rollups.mark_dirty(self.db, self.user_id, month)
+        self.db.commit()
+        inserted = res.rowcount
+        if inserted is None or inserted < 0:
+            inserted = len(batch)
+        self.added += inserted
+        self.duplicates += len(batch) - inserted
+        self.batches += 1
+        progress = {
+            "batches": self.batches,
+            "parsed": self.parsed,
+            "added": self.added,
+            "duplicates": self.duplicates,
+        }
+        logger.info("ingest.progress", extra={"user_id": self.user_id, **progress})
+        if self.on_flush:
+            self.on_flush(progress)
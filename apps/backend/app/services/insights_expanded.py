@@ -16,8 +16,13 @@ UNLABELED = {"", "Unknown", None}
 TransactionStatus = Literal["all", "posted", "pending"]
 
 
-def latest_month_from_data(db: Session) -> Optional[str]:
-    row = db.query(Transaction).order_by(Transaction.date.desc()).first()
+def latest_month_from_data(
+    db: Session, user_id: Optional[int] = None
+) -> Optional[str]:
+    q = db.query(Transaction)
+    if user_id is not None:
+        q = q.filter(Transaction.user_id == user_id)
+    row = q.order_by(Transaction.date.desc()).first()
     return row.date.strftime("%Y-%m") if row and row.date else None
 
 
@@ -49,13 +54,6 @@ def _safe_pct(curr: float, prev: float) -> Optional[float]:
     return (curr - prev) / abs(prev)
 
 
-def _abs_amount(x: Any) -> float:
-    try:
-        return abs(float(x or 0.0))
-    except Exception:
-        return 0.0
-
-
 def _sum_dict(items: List[Tuple[str, float]]) -> Dict[str, float]:
     out: Dict[str, float] = defaultdict(float)
     for k, v in items:
@@ -68,18 +66,40 @@ def load_month(
     month: str,
     status: TransactionStatus = "posted",
     large_limit: int = 10,
+    user_id: Optional[int] = None,
 ) -> MonthAgg:
-    # Pull all txns for month (filtering by pending status)
-    query = db.query(Transaction).filter(Transaction.month == month)
-
-    # Filter by pending status
-    if status == "posted":
-        query = query.filter(Transaction.pending.is_(False))
-    elif status == "pending":
-        query = query.filter(Transaction.pending.is_(True))
-    # status == "all" → no filter
-
-    txns: List[Transaction] = query.all()
+    """Aggregate one month; ``user_id`` scopes it to that user's rows."""
+    from app.orm_models import MonthlyRollup as R
+    from app.services import monthly_rollups
+
+    monthly_rollups.sync(db)
+
+    def _owner(col):
+        # None → every user's rows (legacy single-tenant callers)
+        return [] if user_id is None else [col == user_id]
+
+    def _status(q, col):
+        # Filter by pending status; status == "all" → no filter
+        if status == "posted":
+            return q.filter(col.is_(False))
+        if status == "pending":
+            return q.filter(col.is_(True))
+        return q
+
+    # Per category × merchant totals for the month (pre-aggregated)
+    rows = _status(
+        db.query(
+            R.category,
+            R.merchant,
+            func.sum(R.txn_count),
+            func.sum(R.inflow),
+            func.sum(R.outflow),
+            func.sum(R.outflow_count),
+        )
+        .filter(R.month == month, *_owner(R.user_id))
+        .group_by(R.category, R.merchant),
+        R.pending,
+    ).all()
 
     income = 0.0
     spend = 0.0
@@ -87,30 +107,39 @@ def load_month(
     by_merch_items: List[Tuple[str, float]] = []
     unknown_amount = 0.0
     unknown_count = 0
+    txn_count = 0
 
     # Aggregate
-    for t in txns:
-        amt = float(t.amount or 0.0)
-        if amt >= 0:
-            income += amt
-        else:
-            spend += -amt  # spend as positive number
-        cat_key = t.category or "Unknown"
-        by_cat_items.append((cat_key, _abs_amount(amt) if amt < 0 else 0.0))
-        merch_key = t.merchant or "Unknown"
-        by_merch_items.append((merch_key, _abs_amount(amt) if amt < 0 else 0.0))
-        if (t.category in UNLABELED) and amt < 0:
-            unknown_amount += -amt
-            unknown_count += 1
+    for cat, merch, count, inflow, outflow, outflow_count in rows:
+        inflow, outflow = float(inflow or 0.0), float(outflow or 0.0)
+        income += inflow
+        spend += outflow  # spend as positive number
+        txn_count += int(count or 0)
+        by_cat_items.append((cat or "Unknown", outflow))
+        by_merch_items.append((merch or "Unknown", outflow))
+        if cat in UNLABELED and outflow_count:
+            unknown_amount += outflow
+            unknown_count += int(outflow_count)
 
     by_category = _sum_dict(by_cat_items)
     by_merchant = _sum_dict(by_merch_items)
 
     # Large transactions (top N by absolute spend)
-    spenders = [t for t in txns if (t.amount or 0) < 0]
-    spenders.sort(key=lambda x: _abs_amount(x.amount), reverse=True)
+    spenders = (
+        _status(
+            db.query(Transaction).filter(
+                Transaction.month == month,
+                Transaction.amount < 0,
+                *_owner(Transaction.user_id),
+            ),
+            Transaction.pending,
+        )
+        .order_by(Transaction.amount.asc(), Transaction.id.asc())
+        .limit(large_limit)
+        .all()
+    )
     large = []
-    for t in spenders[:large_limit]:
+    for t in spenders:
         large.append(
             {
                 "id": t.id,
@@ -132,7 +161,7 @@ def load_month(
         unknown_spend_amount=unknown_amount,
         unknown_spend_count=unknown_count,
         large_transactions=large,
-        transaction_count=len(txns),
+        transaction_count=txn_count,
     )
 
 
@@ -192,9 +221,10 @@ def build_expanded_insights(
     month: Optional[str],
     status: TransactionStatus = "posted",
     large_limit: int = 10,
+    user_id: Optional[int] = None,
 ) -> Dict[str, Any]:
     # Resolve month
-    resolved = month or latest_month_from_data(db)
+    resolved = month or latest_month_from_data(db, user_id)
     if not resolved:
         return {
             "month": None,
@@ -208,19 +238,21 @@ def build_expanded_insights(
             "anomalies": {"categories": [], "merchants": []},
         }
 
-    curr = load_month(db, resolved, status=status, large_limit=large_limit)
+    curr = load_month(
+        db, resolved, status=status, large_limit=large_limit, user_id=user_id
+    )
     prev = None
     try:
         pm = prev_month(resolved)
         # Only load if previous month actually exists (has rows)
-        prev_has = (
-            db.query(func.count(Transaction.id))
-            .filter(Transaction.month == pm)
-            .scalar()
-            or 0
-        )
+        prev_q = db.query(func.count(Transaction.id)).filter(Transaction.month == pm)
+        if user_id is not None:
+            prev_q = prev_q.filter(Transaction.user_id == user_id)
+        prev_has = prev_q.scalar() or 0
         prev = (
-            load_month(db, pm, status=status, large_limit=large_limit)
+            load_month(
+                db, pm, status=status, large_limit=large_limit, user_id=user_id
+            )
             if prev_has
             else None
         )
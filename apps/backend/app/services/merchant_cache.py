@@ -10,7 +10,7 @@ from __future__ import annotations
 import hashlib
 import json
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -153,14 +153,61 @@ def update_merchant_seen(
     if not hint:
         return
 
-    hint.last_seen = datetime.now(timezone.utc).isoformat()
-    hint.seen_count += 1
+    _bump_seen(hint, new_example, datetime.now(timezone.utc).isoformat())
+    store_merchant_hint(redis_client, raw_merchant, hint)
 
-    if new_example and new_example not in hint.raw_examples:
-        hint.raw_examples.append(new_example)
-        hint.raw_examples = hint.raw_examples[:5]  # Keep only 5 examples
 
-    store_merchant_hint(redis_client, raw_merchant, hint)
+def lookup_merchant_hints(
+    redis_client, raw_merchants: Iterable[str]
+) -> Dict[str, Optional[MerchantHint]]:
+    """
+    Batched lookup_merchant_hint: one MGET for all distinct merchant keys.
+    Returns raw merchant -> cached hint (None when missing or on Redis errors).
+    """
+    raws = list(dict.fromkeys(raw_merchants))
+    out: Dict[str, Optional[MerchantHint]] = {raw: None for raw in raws}
+    if not redis_client or not raws:
+        return out
+
+    keys = {raw: merchant_redis_key(raw) for raw in raws}
+    distinct = list(dict.fromkeys(keys.values()))
+    try:
+        payloads = redis_client.mget(distinct)
+    except Exception:
+        # Redis errors shouldn't break the app
+        return out
+
+    decoded: Dict[str, MerchantHint] = {}
+    for key, payload in zip(distinct, payloads):
+        if not payload:
+            continue
+        try:
+            decoded[key] = MerchantHint.from_dict(json.loads(payload))
+        except Exception:
+            continue
+    for raw, key in keys.items():
+        out[raw] = decoded.get(key)
+    return out
+
+
+def store_merchant_hints(
+    redis_client, hints: Dict[str, MerchantHint], ttl_seconds: int = 2592000
+) -> None:
+    """
+    Batched store_merchant_hint: one pipelined round-trip of SETEX commands.
+    ``hints`` maps Redis key -> hint.
+    """
+    if not redis_client or not hints:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for redis_key, hint in hints.items():
+            pipe.setex(redis_key, ttl_seconds, json.dumps(hint.to_dict()))
+        pipe.execute()
+    except Exception:
+        # Redis errors shouldn't break the app
+        pass
 
 
 # --- Learning pipeline --------------------------------------------------------
@@ -192,21 +239,84 @@ def learn_merchant(
         update_merchant_seen(redis_client, raw_merchant, raw_merchant)
         return cached
 
-    # 2. Compute normalized key and label
-    canonical_key, display_label = canonical_and_label(raw_merchant)
-
-    # 3. Check DB for existing merchant_hints
+    # 2. Check DB for existing merchant_hints
     # TODO: Query merchant_hints table when available
     # For now, use heuristics
 
-    # 4. Use heuristics to infer category
+    # 3. Use heuristics to infer category and build the hint
     # TODO: Replace with LLM call for better accuracy
+    hint = _learn_new(raw_merchant, description, amount, mcc)
+
+    # 4. Store in Redis
+    store_merchant_hint(redis_client, raw_merchant, hint)
+
+    # 5. TODO: Enqueue background job to persist to DB
+
+    return hint
+
+
+MerchantSample = Tuple[str, Optional[str], Optional[float]]
+
+
+def learn_merchants(
+    redis_client,
+    db: Session,
+    samples: Iterable[MerchantSample],
+) -> Dict[str, MerchantHint]:
+    """
+    Batched learn_merchant for (raw_merchant, description, amount) samples.
+
+    Raw merchants are de-duplicated and resolved with a single MGET; seen-count
+    bumps and newly learned hints are coalesced per merchant key into one
+    pipelined write. The resulting hints match calling learn_merchant once per
+    sample in order. Returns raw merchant -> hint.
+    """
+    samples = list(samples)
+    cached = lookup_merchant_hints(redis_client, (raw for raw, _, _ in samples))
+    now = datetime.now(timezone.utc).isoformat()
+
+    by_key: Dict[str, MerchantHint] = {}
+    dirty: Dict[str, MerchantHint] = {}
+    out: Dict[str, MerchantHint] = {}
+    for raw, description, amount in samples:
+        redis_key = merchant_redis_key(raw)
+        hint = by_key.get(redis_key)
+        if hint is not None:
+            # Repeat sighting within this batch: same as a cache hit
+            _bump_seen(hint, raw, now)
+        elif cached.get(raw) is not None:
+            hint = cached[raw]
+            _bump_seen(hint, raw, now)
+        else:
+            hint = _learn_new(raw, description, amount, None)
+        by_key[redis_key] = hint
+        dirty[redis_key] = hint
+        out[raw] = hint
+
+    store_merchant_hints(redis_client, dirty)
+    return out
+
+
+def _bump_seen(hint: MerchantHint, example: Optional[str], now: str) -> None:
+    hint.last_seen = now
+    hint.seen_count += 1
+    if example and example not in hint.raw_examples:
+        hint.raw_examples.append(example)
+        hint.raw_examples = hint.raw_examples[:5]  # Keep only 5 examples
+
+
+def _learn_new(
+    raw_merchant: str,
+    description: Optional[str],
+    amount: Optional[float],
+    mcc: Optional[str],
+) -> MerchantHint:
+    """Build a fresh hint from normalization + category heuristics."""
+    canonical_key, display_label = canonical_and_label(raw_merchant)
     category, subcategories, confidence = _infer_category_heuristic(
         raw_merchant, description, amount, mcc
     )
-
-    # 5. Create hint
-    hint = MerchantHint(
+    return MerchantHint(
         normalized_name=canonical_key,
         display_name=display_label,
         category=category,
@@ -219,13 +329,6 @@ def learn_merchant(
         raw_examples=[raw_merchant],
     )
 
-    # 6. Store in Redis
-    store_merchant_hint(redis_client, raw_merchant, hint)
-
-    # 7. TODO: Enqueue background job to persist to DB
-
-    return hint
-
 
 def _infer_category_heuristic(
     raw_merchant: str,
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Literal, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -83,6 +84,44 @@ BRAND_RULES: list[MerchantBrandRule] = [
 ]
 
 
+def _compile_rules(rules: list[MerchantBrandRule]) -> Optional[re.Pattern]:
+    """
+    Single alternation of all brand patterns, used as a one-pass prefilter.
+
+    Most statement merchants match no brand rule; for those one search of the
+    combined pattern replaces a search per rule. On a hit the rules are still
+    checked in order so priority is unchanged. Returns None (plain linear scan)
+    if the patterns cannot be combined.
+    """
+    if not rules or any(not r.pattern.flags & re.I for r in rules):
+        return None
+    try:
+        return re.compile("|".join(f"(?:{r.pattern.pattern})" for r in rules), re.I)
+    except re.error:
+        return None
+
+
+_RULES_MATCHER = _compile_rules(BRAND_RULES)
+_SEPARATORS_RE = re.compile(r"[*_]+")
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+_NUMERIC_TAIL_RE = re.compile(
+    r"\s+(x?\d{4,}|\d{3}-\d{3,}-\d{3,}|\d{10,}|[0-9]{4,}[A-Z0-9-]*)\s*$", re.I
+)
+
+
+def _first_rule(raw: str) -> Optional[MerchantBrandRule]:
+    if _RULES_MATCHER is not None and _RULES_MATCHER.search(raw) is None:
+        return None
+    return next((r for r in BRAND_RULES if r.pattern.search(raw)), None)
+
+
+def reset_brand_rules() -> None:
+    """Recompile BRAND_RULES and drop memoized results (after editing the rules)."""
+    global _RULES_MATCHER
+    _RULES_MATCHER = _compile_rules(BRAND_RULES)
+    _normalize_cached.cache_clear()
+
+
 def _basic_normalize(raw: str) -> str:
     if not raw:
         return "Unknown"
@@ -90,16 +129,11 @@ def _basic_normalize(raw: str) -> str:
     s = raw.strip()
 
     # Simplify separators
-    s = re.sub(r"[*_]+", " ", s)
-    s = re.sub(r"\s{2,}", " ", s)
+    s = _SEPARATORS_RE.sub(" ", s)
+    s = _MULTI_SPACE_RE.sub(" ", s)
 
     # Drop long numeric / phone-like tails
-    s = re.sub(
-        r"\s+(x?\d{4,}|\d{3}-\d{3,}-\d{3,}|\d{10,}|[0-9]{4,}[A-Z0-9-]*)\s*$",
-        "",
-        s,
-        flags=re.I,
-    ).strip()
+    s = _NUMERIC_TAIL_RE.sub("", s).strip()
 
     if not s:
         return "Unknown"
@@ -121,19 +155,16 @@ def normalize_merchant_for_category(raw: str) -> NormalizedMerchant:
     if not raw:
         return NormalizedMerchant(display="Unknown", category_hint="unknown")
 
-    for rule in BRAND_RULES:
-        if rule.pattern.search(raw):
-            return NormalizedMerchant(
-                display=rule.normalized,
-                kind=rule.kind,
-                category_hint=rule.category_hint or "other",
-                rule_id=rule.id,
-            )
+    # Fresh instance per call: callers may mutate the dataclass
+    return NormalizedMerchant(*_normalize_cached(raw))
+
 
-    return NormalizedMerchant(
-        display=_basic_normalize(raw),
-        category_hint="unknown",
-    )
+@lru_cache(maxsize=65536)
+def _normalize_cached(raw: str) -> tuple:
+    rule = _first_rule(raw)
+    if rule is not None:
+        return (rule.normalized, rule.kind, rule.category_hint or "other", rule.id)
+    return (_basic_normalize(raw), None, "unknown", None)
 
 
 async def normalize_merchant_with_memory(
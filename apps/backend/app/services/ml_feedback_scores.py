@@ -74,6 +74,42 @@ def load_feedback_stats_map(
     return result
 
 
+def load_feedback_stats_for_merchants(
+    db: Session,
+    merchants: Iterable[str],
+    chunk: int = 500,
+) -> Dict[FeedbackKey, FeedbackStats]:
+    """
+    Batch-load feedback stats for every category of the given merchants.
+
+    Used to prefetch stats for a whole batch of transactions before their
+    candidate categories are known (one query per ``chunk`` merchants).
+    """
+    merchant_values = sorted({m for m in merchants if m})
+    result: Dict[FeedbackKey, FeedbackStats] = {}
+    for i in range(0, len(merchant_values), chunk):
+        rows: List[MlFeedbackMerchantCategoryStats] = (
+            db.query(MlFeedbackMerchantCategoryStats)
+            .filter(
+                MlFeedbackMerchantCategoryStats.merchant_normalized.in_(
+                    merchant_values[i : i + chunk]
+                )
+            )
+            .all()
+        )
+        for row in rows:
+            key = FeedbackKey(
+                merchant_normalized=row.merchant_normalized,
+                category=row.category,
+            )
+            result[key] = FeedbackStats(
+                accept_count=row.accept_count or 0,
+                reject_count=row.reject_count or 0,
+                last_feedback_at=row.last_feedback_at,
+            )
+    return result
+
+
 def adjust_score_with_feedback(
     base_score: float,
     merchant_normalized: str | None,
@@ -109,7 +145,11 @@ def adjust_score_with_feedback(
     # Optional: small recency bonus (feedback in last 30 days)
     if stats.last_feedback_at:
         now = datetime.now(timezone.utc)
-        delta_days = (now - stats.last_feedback_at).days
+        last = stats.last_feedback_at
+        if last.tzinfo is None:
+            # SQLite drops tzinfo; stored values are UTC
+            last = last.replace(tzinfo=timezone.utc)
+        delta_days = (now - last).days
         if delta_days <= 30:
             # Recent feedback → slight boost for exploration
             score += 0.05
@@ -0,0 +1,359 @@
+"""Resident online learner for incremental model updates.
+
+Feedback used to ``joblib.load`` the whole pipeline, ``partial_fit`` a row or
+two and ``joblib.dump`` it back on every categorization click. An
+``OnlineLearner`` keeps the model resident in the process instead:
+
+* feedback is queued and applied with one ``partial_fit`` per mini-batch, once
+  ``ML_ONLINE_BATCH_SIZE`` rows are pending or the oldest has waited
+  ``ML_ONLINE_FLUSH_S`` seconds (the first fit of an empty classifier is
+  applied immediately so its classes get initialised),
+* the model is snapshotted at most once per ``ML_ONLINE_SNAPSHOT_S`` seconds
+  (tmp file + ``os.replace``), bumping the counter in ``<path>.version.json``,
+* when another worker (or a full retrain) replaced the file, the learner
+  reloads it; batches applied locally but not yet snapshotted are replayed
+  on top of the newer model instead of overwriting it.
+
+Setting ``ML_ONLINE_FLUSH_S`` / ``ML_ONLINE_SNAPSHOT_S`` to 0 applies and
+persists synchronously (the previous behaviour).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("ML_ONLINE_BATCH_SIZE", "16"))
+FLUSH_INTERVAL_S = float(os.getenv("ML_ONLINE_FLUSH_S", "2"))
+SNAPSHOT_DEBOUNCE_S = float(os.getenv("ML_ONLINE_SNAPSHOT_S", "5"))
+
+Featurize = Callable[[Any], Any]  # model -> feature matrix
+
+
+def pipeline_classifier(model: Any) -> Any:
+    """Final estimator of a Pipeline (``clf`` step, else the last step)."""
+    named = getattr(model, "named_steps", None)
+    clf = named.get("clf") if isinstance(named, dict) else None
+    if clf is None and getattr(model, "steps", None):
+        clf = model.steps[-1][1]
+    return clf
+
+
+@dataclass
+class _Feedback:
+    featurize: Featurize
+    labels: List[Any]
+    init_classes: Any
+    # Features computed at submit time, valid while ``model`` is resident
+    X: Any
+    model: Any
+
+
+def _stack(parts: List[Any]) -> Any:
+    if len(parts) == 1:
+        return parts[0]
+    from scipy import sparse
+
+    if any(sparse.issparse(p) for p in parts):
+        return sparse.vstack(parts, format="csr")
+    return np.vstack(parts)
+
+
+def _timer(delay: float, fn: Callable[[], None]) -> threading.Timer:
+    t = threading.Timer(delay, fn)
+    t.daemon = True
+    t.start()
+    return t
+
+
+class OnlineLearner:
+    """Keeps one on-disk model resident and applies feedback in mini-batches.
+
+    ``classifier`` maps the loaded object to the estimator implementing
+    ``partial_fit`` (a Pipeline's last step by default).
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        classifier: Callable[[Any], Any] = pipeline_classifier,
+        batch_size: Optional[int] = None,
+        flush_interval_s: Optional[float] = None,
+        snapshot_debounce_s: Optional[float] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.version_path = self.path.with_name(self.path.name + ".version.json")
+        self._classifier = classifier
+        self.batch_size = max(1, BATCH_SIZE if batch_size is None else batch_size)
+        self.flush_interval_s = (
+            FLUSH_INTERVAL_S if flush_interval_s is None else flush_interval_s
+        )
+        self.snapshot_debounce_s = (
+            SNAPSHOT_DEBOUNCE_S if snapshot_debounce_s is None else snapshot_debounce_s
+        )
+        self.version = 0
+        self._lock = threading.RLock()
+        self._model: Any = None
+        self._loaded_mtime: Optional[int] = None
+        self._pending: List[_Feedback] = []
+        self._pending_rows = 0
+        # Batches applied since the last snapshot (replayed on a rebase)
+        self._unsaved: List[_Feedback] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        self._snapshot_timer: Optional[threading.Timer] = None
+
+    # --- model state -------------------------------------------------------------
+
+    def _disk_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_version(self) -> int:
+        try:
+            return int(json.loads(self.version_path.read_text())["version"])
+        except Exception:
+            return 0
+
+    def _refresh(self) -> None:
+        mtime = self._disk_mtime()
+        if mtime is None or mtime == self._loaded_mtime:
+            return
+        try:
+            disk_model = joblib.load(self.path)
+        except Exception:
+            log.warning("online learner: cannot load %s", self.path, exc_info=True)
+            return
+        self._model = disk_model
+        self._loaded_mtime = mtime
+        self.version = self._read_version()
+        if self._unsaved:
+            # Someone else saved first: replay our unsaved batches on top
+            replay, self._unsaved = self._unsaved, []
+            for fb in replay:
+                try:
+                    self._fit([fb])
+                    self._unsaved.append(fb)
+                except Exception as e:
+                    log.warning("online learner: dropped feedback on rebase: %s", e)
+
+    def model(self) -> Any:
+        """The resident model (reloaded if the file changed), or None."""
+        with self._lock:
+            self._refresh()
+            return self._model
+
+    def set_model(self, model: Any) -> None:
+        """Install a fresh in-memory model (persisted by the next snapshot)."""
+        with self._lock:
+            self._model = model
+            self._loaded_mtime = self._disk_mtime()
+
+    def classes(self) -> List[Any]:
+        with self._lock:
+            clf = self._classifier(self._model) if self._model is not None else None
+            out = getattr(clf, "classes_", None)
+            if out is None:
+                return []
+            return out.tolist() if hasattr(out, "tolist") else list(out)
+
+    @property
+    def pending(self) -> int:
+        return self._pending_rows
+
+    # --- feedback ----------------------------------------------------------------
+
+    def submit(
+        self,
+        featurize: Featurize,
+        labels: List[Any],
+        *,
+        init_classes: Any = None,
+    ) -> Dict[str, Any]:
+        """Queue labelled rows; ``featurize(model)`` builds their feature matrix.
+
+        Returns the ``incremental_update`` result shape: ``updated`` (accepted),
+        ``applied`` (fitted now rather than queued), ``pending``, ``classes``
+        and ``version``; or ``updated: False`` with a ``reason``.
+
+        Raises:
+            FileNotFoundError: if there is no model to update
+        """
+        with self._lock:
+            self._refresh()
+            if self._model is None:
+                raise FileNotFoundError(f"No model at {self.path}")
+            clf = self._classifier(self._model)
+            if clf is None or not hasattr(clf, "partial_fit"):
+                return {"updated": False, "reason": "classifier_has_no_partial_fit"}
+
+            known = getattr(clf, "classes_", None)
+            if known is not None:
+                known_set = set(known.tolist() if hasattr(known, "tolist") else known)
+                missing = sorted(set(labels) - known_set)
+                if missing:
+                    return {
+                        "updated": False,
+                        "reason": "label_not_in_model",
+                        "missing_labels": missing,
+                        "known_classes": sorted(known_set),
+                    }
+
+            # Featurize now so bad input fails the request, not a later batch
+            X = featurize(self._model)
+            self._pending.append(
+                _Feedback(featurize, list(labels), init_classes, X, self._model)
+            )
+            self._pending_rows += len(labels)
+            applied = (
+                known is None
+                or self._pending_rows >= self.batch_size
+                or self.flush_interval_s <= 0
+            )
+            if applied:
+                self._apply()
+            elif self._flush_timer is None:
+                self._flush_timer = _timer(self.flush_interval_s, self._on_flush_timer)
+            return {
+                "updated": True,
+                "applied": applied,
+                "pending": self._pending_rows,
+                "classes": self.classes(),
+                "version": self.version,
+            }
+
+    def _fit(self, batch: List[_Feedback]) -> None:
+        model = self._model
+        clf = self._classifier(model)
+        parts, labels, init = [], [], None
+        for fb in batch:
+            parts.append(fb.X if fb.model is model else fb.featurize(model))
+            labels.extend(fb.labels)
+            if init is None:
+                init = fb.init_classes
+        X = _stack(parts)
+        if getattr(clf, "classes_", None) is None:
+            classes = init if init is not None else np.array(sorted(set(labels)))
+            clf.partial_fit(X, labels, classes=classes)
+        else:
+            clf.partial_fit(X, labels)
+
+    def _apply(self) -> int:
+        """partial_fit everything pending in one call; schedules a snapshot."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch, self._pending, rows = self._pending, [], self._pending_rows
+        self._pending_rows = 0
+        if not batch:
+            return 0
+        self._fit(batch)
+        self._unsaved.extend(batch)
+        if self.snapshot_debounce_s <= 0:
+            self.snapshot()
+        elif self._snapshot_timer is None:
+            self._snapshot_timer = _timer(
+                self.snapshot_debounce_s, self._on_snapshot_timer
+            )
+        return rows
+
+    def _on_flush_timer(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+            try:
+                self._apply()
+            except Exception:
+                log.warning("online learner: batch update failed", exc_info=True)
+
+    def _on_snapshot_timer(self) -> None:
+        with self._lock:
+            self._snapshot_timer = None
+            try:
+                self.snapshot()
+            except Exception:
+                log.warning("online learner: snapshot failed", exc_info=True)
+
+    # --- persistence -------------------------------------------------------------
+
+    def snapshot(self) -> bool:
+        """Atomically write the model if it has unsaved updates."""
+        with self._lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+            if not self._unsaved:
+                return False
+            self._refresh()  # rebase onto a newer file before overwriting it
+            if not self._unsaved:
+                return False
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            joblib.dump(self._model, tmp)
+            os.replace(tmp, self.path)
+            self.version = max(self.version, self._read_version()) + 1
+            vtmp = self.version_path.with_name(f".{self.version_path.name}.tmp")
+            vtmp.write_text(
+                json.dumps(
+                    {"version": self.version, "saved_at": time.time(), "pid": os.getpid()}
+                )
+            )
+            os.replace(vtmp, self.version_path)
+            self._loaded_mtime = self._disk_mtime()
+            self._unsaved = []
+            return True
+
+    def flush(self) -> Dict[str, Any]:
+        """Apply pending feedback and snapshot now (shutdown, selftest)."""
+        with self._lock:
+            applied = self._apply() if self._pending else 0
+            saved = self.snapshot()
+            return {"applied": applied, "saved": saved, "version": self.version}
+
+    def reset(self) -> None:
+        """Forget resident state (e.g. after a full retrain replaced the file)."""
+        with self._lock:
+            for t in (self._flush_timer, self._snapshot_timer):
+                if t is not None:
+                    t.cancel()
+            self._flush_timer = self._snapshot_timer = None
+            self._pending, self._pending_rows, self._unsaved = [], 0, []
+            self._model = None
+            self._loaded_mtime = None
+
+
+_learners: Dict[str, OnlineLearner] = {}
+_learners_lock = threading.Lock()
+
+
+def learner_for(path: str | os.PathLike, **kwargs: Any) -> OnlineLearner:
+    """Process-wide learner for ``path`` (created on first use)."""
+    key = os.path.abspath(os.fspath(path))
+    with _learners_lock:
+        learner = _learners.get(key)
+        if learner is None:
+            learner = _learners[key] = OnlineLearner(key, **kwargs)
+        return learner
+
+
+def flush_all() -> None:
+    """Flush every learner; called on shutdown."""
+    with _learners_lock:
+        learners = list(_learners.values())
+    for learner in learners:
+        try:
+            learner.flush()
+        except Exception:
+            log.warning("online learner: flush failed for %s", learner.path, exc_info=True)
@@ -9,14 +9,15 @@ ENABLED = os.getenv("ML_SUGGEST_ENABLED", "0") == "1"
 
 # Try to import ML dependencies (may not be available in all environments)
 try:
-    import joblib
     from sklearn.linear_model import SGDClassifier
 
+    from app.services.ml_online import learner_for
+
     HAS_SKLEARN = True
 except ImportError:
     HAS_SKLEARN = False
-    joblib = None  # type: ignore
     SGDClassifier = None  # type: ignore
+    learner_for = None  # type: ignore
 
 
 def featurize(merchant: str, description: str, amount: float) -> np.ndarray:
@@ -61,28 +62,46 @@ class MLSuggester:
     Incremental learning classifier for category suggestions.
 
     Uses SGDClassifier with log loss (logistic regression) and online learning
-    via partial_fit. Model persists to disk after each update.
+    via partial_fit. The (model, classes) pair stays resident in an
+    OnlineLearner, which batches updates and snapshots to disk with a debounce.
     """
 
     def __init__(self):
-        self.model: SGDClassifier | None = None
-        self.classes_: List[str] = []
+        self._learner = None
+
+    @property
+    def learner(self):
+        if self._learner is None:
+            self._learner = learner_for(MODEL_PATH, classifier=lambda obj: obj[0])
+        return self._learner
+
+    def _state(self):
+        if not HAS_SKLEARN:
+            return None
+        return self.learner.model()
+
+    @property
+    def model(self) -> "SGDClassifier | None":
+        state = self._state()
+        return state[0] if state else None
+
+    @property
+    def classes_(self) -> List[str]:
+        state = self._state()
+        return list(state[1]) if state else []
 
     def _ensure(self, classes: List[str]):
         """Initialize or load model."""
         if not HAS_SKLEARN:
             return
 
-        if self.model is None:
-            if os.path.exists(MODEL_PATH):
-                try:
-                    self.model, self.classes_ = joblib.load(MODEL_PATH)
-                    return
-                except Exception:
-                    pass  # Fall through to create new model
-
-            self.model = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
-            self.classes_ = classes
+        if self._state() is None:
+            self.learner.set_model(
+                (
+                    SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42),
+                    list(classes),
+                )
+            )
 
     def predict_topk(
         self, x: np.ndarray, classes: List[str], k: int = 3
@@ -98,7 +117,7 @@ class MLSuggester:
         Returns:
             List of (category_slug, probability) tuples
         """
-        if not ENABLED or not HAS_SKLEARN or self.model is None:
+        if not ENABLED or not HAS_SKLEARN or self._state() is None:
             return []
 
         # Ensure classes match (model must be trained on same classes)
@@ -106,9 +125,10 @@ class MLSuggester:
             return []
 
         try:
-            probs = self.model.predict_proba([x])[0]
+            model, model_classes = self._state()
+            probs = model.predict_proba([x])[0]
             idxs = np.argsort(probs)[::-1][:k]
-            return [(self.classes_[i], float(probs[i])) for i in idxs]
+            return [(model_classes[i], float(probs[i])) for i in idxs]
         except Exception:
             return []
 
@@ -118,7 +138,7 @@ class MLSuggester:
 
         Args:
             X: Feature matrix (n_samples, n_features)
-            y: Target labels (n_samples,)
+            y: Target labels as indices into ``classes`` (n_samples,)
             classes: All possible category slugs
         """
         if not ENABLED or not HAS_SKLEARN:
@@ -126,11 +146,13 @@ class MLSuggester:
 
         try:
             self._ensure(classes)
-            self.model.partial_fit(X, y, classes=np.array(self.classes_))
-
-            # Persist model to disk
-            os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-            joblib.dump((self.model, self.classes_), MODEL_PATH)
+            X = np.asarray(X)
+            # y holds class indices, so the estimator's classes are 0..n-1
+            self.learner.submit(
+                lambda _state: X,
+                np.asarray(y).tolist(),
+                init_classes=np.arange(len(self.classes_)),
+            )
         except Exception:
             pass  # Best-effort training
 
@@ -20,6 +20,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, f1_score
 import joblib
 
+from app.services.ml_online import learner_for
+
 MODELS_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "data", "models")
 )
@@ -120,11 +122,15 @@ def _make_pipeline() -> Pipeline:
     return Pipeline(steps=[("pre", pre), ("clf", clf)])
 
 
+def latest_learner():
+    """Resident online learner for the latest model (shared per process)."""
+    return learner_for(LATEST_MODEL_PATH)
+
+
 def load_latest_model() -> Optional[Pipeline]:
-    if not os.path.exists(LATEST_MODEL_PATH):
-        return None
+    """Latest pipeline, kept resident and hot-reloaded when the file changes."""
     try:
-        return joblib.load(LATEST_MODEL_PATH)
+        return latest_learner().model()
     except Exception:
         return None
 
@@ -232,6 +238,8 @@ def train_on_db(
             joblib.dump(pipe, LATEST_MODEL_PATH)
         except Exception:
             pass
+        # Queued/unsaved feedback targeted the old model; the retrain replaces it
+        latest_learner().reset()
 
         meta = {
             "model_path": model_path,
@@ -251,90 +259,12 @@ def train_on_db(
 
 
 # ---------- Incremental update (best-effort) ----------
-def _load_pipeline() -> Pipeline:
-    """Load the latest pipeline or raise if missing."""
-    if not os.path.exists(LATEST_MODEL_PATH):
-        raise FileNotFoundError(f"No model at {LATEST_MODEL_PATH}")
-    pipe = joblib.load(LATEST_MODEL_PATH)
-    return pipe
-
-
-def _save_pipeline(pipe: Pipeline) -> None:
-    """Atomically save pipeline to latest path via a tmp file."""
-    tmp = LATEST_MODEL_PATH + ".tmp"
-    joblib.dump(pipe, tmp)
-    try:
-        if os.path.exists(LATEST_MODEL_PATH):
-            os.remove(LATEST_MODEL_PATH)
-    except Exception:
-        # best-effort; proceed to replace
-        pass
-    os.replace(tmp, LATEST_MODEL_PATH)
-
-
-def incremental_update(texts: List[str], labels: List[str]) -> Dict[str, Any]:
-    """
-    Perform partial_fit on the pipeline's classifier if supported.
-    Assumes the pipeline ends with a classifier that implements partial_fit.
-
-    Inputs:
-    - texts: list of transaction text (merchant + description)
-    - labels: list of categories (same length as texts)
-
-    Returns: { updated: bool, reason?: str, classes?: list[str] }
-    """
-    if not texts or not labels or len(texts) != len(labels):
-        return {"updated": False, "reason": "invalid_inputs"}
-
-    pipe = _load_pipeline()
-    # Get classifier (last step)
-    clf = None
-    try:
-        clf = pipe.named_steps.get("clf")  # type: ignore[attr-defined]
-    except Exception:
-        pass
-    if clf is None and hasattr(pipe, "steps") and pipe.steps:
-        clf = pipe.steps[-1][1]
-
-    if not hasattr(clf, "partial_fit"):
-        return {"updated": False, "reason": "classifier_has_no_partial_fit"}
-
-    # Determine whether this is the first call (no classes_ yet)
-    existing_classes = getattr(clf, "classes_", None)
-    is_first_fit = existing_classes is None
-    if is_first_fit:
-        # On first fit, compute classes from provided labels
-        classes_ = np.array(sorted(list(set(labels))))
-        if classes_.size == 0:
-            return {"updated": False, "reason": "no_labels_to_initialize_classes"}
-        labels_to_use = labels
-        texts_to_use = texts
-    else:
-        # If model is already initialized, ensure ALL incoming labels are known; otherwise reject with hint.
-        known = (
-            set(existing_classes.tolist())
-            if hasattr(existing_classes, "tolist")
-            else set(existing_classes)
-        )
-        new_labels = sorted(list(set(labels) - known))
-        if new_labels:
-            return {
-                "updated": False,
-                "reason": "label_not_in_model",
-                "missing_labels": new_labels,
-                "known_classes": sorted(list(known)),
-            }
-        labels_to_use = labels
-        texts_to_use = texts
-
-    # Build a minimal DataFrame to satisfy the pipeline's preprocessor
-    # Our pipeline expects columns: text, num0, num1
-    # Use only the subset we kept (or all when first fit)
-    tx = texts_to_use
-    n = len(tx)
+def _featurize_texts(pipe: Pipeline, texts: List[str]):
+    """Transform texts with the pipeline's preprocessor (columns text, num0, num1)."""
+    n = len(texts)
     X_df = pd.DataFrame(
         {
-            "text": tx,
+            "text": texts,
             "num0": np.zeros(n, dtype=float),
             "num1": np.zeros(n, dtype=float),
         }
@@ -356,16 +286,24 @@ def incremental_update(texts: List[str], labels: List[str]) -> Dict[str, Any]:
                 Xt = pre_only.transform(X_df)
         except Exception:
             pass
+    return Xt
 
-    # Update classifier incrementally
-    if is_first_fit:
-        clf.partial_fit(Xt, labels_to_use, classes=classes_)
-    else:
-        # Do not pass classes once the classifier is initialized
-        clf.partial_fit(Xt, labels_to_use)
-    _save_pipeline(pipe)
-    try:
-        out_classes = list(getattr(clf, "classes_", classes_))
-    except Exception:
-        out_classes = list(classes_)
-    return {"updated": True, "classes": out_classes}
+
+def incremental_update(texts: List[str], labels: List[str]) -> Dict[str, Any]:
+    """
+    Queue feedback for partial_fit on the resident pipeline's classifier.
+    Assumes the pipeline ends with a classifier that implements partial_fit.
+    Rows are applied in mini-batches and snapshotted to disk with a debounce
+    (see app.services.ml_online).
+
+    Inputs:
+    - texts: list of transaction text (merchant + description)
+    - labels: list of categories (same length as texts)
+
+    Returns: { updated: bool, applied?: bool, pending?: int, reason?: str, classes?: list[str] }
+    """
+    if not texts or not labels or len(texts) != len(labels):
+        return {"updated": False, "reason": "invalid_inputs"}
+
+    texts = list(texts)
+    return latest_learner().submit(lambda pipe: _featurize_texts(pipe, texts), labels)
@@ -1,38 +1,27 @@
 from __future__ import annotations
-import joblib
-import numpy as np
 from pathlib import Path
-import os
 from typing import List, Optional, Dict, Any
 import pandas as pd
 from sqlalchemy.orm import Session
 
 from app.services.ml_train import train_on_db
+from app.services.ml_online import learner_for
 
 
 MODELS_DIR = Path(__file__).resolve().parents[1] / "data" / "models"
 LATEST = MODELS_DIR / "latest.joblib"
 
 
-def _load_pipeline():
-    if not LATEST.exists():
-        raise FileNotFoundError(f"No model at {LATEST}")
-    return joblib.load(LATEST)
-
-
-def _save_pipeline(pipe) -> None:
-    # Ensure target dir exists
-    os.makedirs(MODELS_DIR, exist_ok=True)
-    tmp = LATEST.with_suffix(".tmp.joblib")
-    joblib.dump(pipe, tmp)
-    tmp.replace(LATEST)
-
-
 def latest_model_path() -> str:
     """Return absolute path to latest joblib (string) for easy JSON/reporting."""
     return str(LATEST)
 
 
+def flush_incremental() -> Dict[str, Any]:
+    """Apply queued feedback and snapshot the latest model now."""
+    return learner_for(LATEST).flush()
+
+
 def _featurize(pipe, texts: List[str]):
     """
     Return a 2D feature matrix by applying all steps except the final classifier.
@@ -68,49 +57,16 @@ def incremental_update(texts: List[str], labels: List[str]) -> dict:
     Incremental update for a Pipeline([('pre' or 'tfidf'/..., ...), ('clf', SGDClassifier(...))]).
     - If the classifier has no classes_ yet, initialize with incoming labels (classes=...).
     - If it already has classes_, reject truly new labels with a clear reason.
+    Feedback is applied in mini-batches on the resident model (app.services.ml_online).
     """
-    pipe = _load_pipeline()
-    named = getattr(pipe, "named_steps", {})
-    clf = named.get("clf") if isinstance(named, dict) else None
-    if clf is None or not hasattr(clf, "partial_fit"):
-        return {"updated": False, "reason": "classifier_has_no_partial_fit"}
-
-    # Build features
+    texts = list(texts)
     try:
-        X = _featurize(pipe, texts)
+        return learner_for(LATEST).submit(lambda pipe: _featurize(pipe, texts), labels)
     except RuntimeError as e:
         if str(e) == "no_feature_transformer_found":
             return {"updated": False, "reason": "no_vectorizer_transform"}
         raise
 
-    current_classes = getattr(clf, "classes_", None)
-    if current_classes is None:
-        # first incremental update: initialize classes
-        init_classes = np.array(sorted(set(labels)))
-        clf.partial_fit(X, labels, classes=init_classes)
-    else:
-        # subsequent updates: ensure no new classes appear
-        known = set(
-            current_classes.tolist()
-            if hasattr(current_classes, "tolist")
-            else current_classes
-        )
-        missing = sorted(set(labels) - known)
-        if missing:
-            return {
-                "updated": False,
-                "reason": "label_not_in_model",
-                "missing_labels": missing,
-                "known_classes": sorted(list(known)),
-            }
-        clf.partial_fit(X, labels)
-
-    _save_pipeline(pipe)
-    out_classes = getattr(clf, "classes_", [])
-    if hasattr(out_classes, "tolist"):
-        out_classes = out_classes.tolist()
-    return {"updated": True, "classes": list(out_classes)}
-
 
 def retrain_model(
     db: Session,
@@ -159,40 +115,8 @@ def incremental_update_rows(rows: List[Dict[str, Any]], labels: List[str]) -> di
     rows: list of {"text": str, "num0": float, "num1": float}
     labels: list of str
     """
-    pipe = _load_pipeline()
-    named = getattr(pipe, "named_steps", {})
-    clf = named.get("clf") if isinstance(named, dict) else None
-    if clf is None or not hasattr(clf, "partial_fit"):
-        return {"updated": False, "reason": "classifier_has_no_partial_fit"}
-
-    # Featurize
+    rows = list(rows)
     try:
-        X = _featurize_rows(pipe, rows)
+        return learner_for(LATEST).submit(lambda pipe: _featurize_rows(pipe, rows), labels)
     except RuntimeError as e:
         return {"updated": False, "reason": str(e)}
-
-    current_classes = getattr(clf, "classes_", None)
-    if current_classes is None:
-        init_classes = np.array(sorted(set(labels)))
-        clf.partial_fit(X, labels, classes=init_classes)
-    else:
-        known = set(
-            current_classes.tolist()
-            if hasattr(current_classes, "tolist")
-            else current_classes
-        )
-        missing = sorted(set(labels) - known)
-        if missing:
-            return {
-                "updated": False,
-                "reason": "label_not_in_model",
-                "missing_labels": missing,
-                "known_classes": sorted(list(known)),
-            }
-        clf.partial_fit(X, labels)
-
-    _save_pipeline(pipe)
-    out_classes = getattr(clf, "classes_", [])
-    if hasattr(out_classes, "tolist"):
-        out_classes = out_classes.tolist()
-    return {"updated": True, "classes": list(out_classes)}
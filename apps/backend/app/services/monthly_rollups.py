@@ -0,0 +1,417 @@
+"""
+Incrementally maintained ``monthly_rollups`` table.
+
+One row per user × month × pending × category × merchant carries the income /
+spend / count totals that the dashboard charts and insights used to compute
+from raw ``transactions`` on every request, so those reads become
+O(categories + merchants) instead of O(transactions).
+
+Maintenance is month-granular: whenever transactions of a (user, month) change,
+that month's rollup rows are recomputed from ``transactions`` with a single
+``INSERT ... SELECT ... GROUP BY`` inside the same database transaction. Keys
+are collected automatically from
+
+* ORM flushes (ingest ``add_all``, ``txns_edit`` patch/delete/restore,
+  categorize, ``db.delete``),
+* ORM-enabled ``DELETE`` statements on ``Transaction`` (replace-mode ingest,
+  dashboard reset, demo reset), whose affected months are selected first, and
+* ``UPDATE`` statements (ORM or on the table) that set a tracked column (bulk
+  categorize, rule apply): the months matched by the WHERE clause, plus the
+  target month / user when the statement moves rows to a literal one. Rows
+  moved to a computed month rebuild the matched users; executemany updates
+  keyed by ``id = :param`` read the affected months by id. Only UPDATEs whose
+  rows or target users can't be resolved schedule a full rebuild.
+
+Core ``INSERT`` paths that bypass the unit of work (streaming ingest) call
+:func:`mark_dirty` explicitly. Pending keys are applied just before commit,
+or by readers via :func:`sync`. Work whose sync fails is logged and kept per
+engine; the next :func:`sync` on that engine retries it.
+
+``python -m app.cli rollups-rebuild`` recomputes everything from scratch.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, select
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+
+from app.orm_models import MonthlyRollup, Transaction
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[Optional[int], str]
+_DIRTY = "monthly_rollups_dirty"
+_REBUILD = "monthly_rollups_rebuild"
+_REBUILD_USERS = "monthly_rollups_rebuild_users"
+# Primary keys per SELECT ... IN when resolving bulk-by-primary-key updates
+_ID_CHUNK = 500
+
+_GROUP_COLS = (
+    Transaction.user_id,
+    Transaction.month,
+    Transaction.pending,
+    Transaction.category,
+    Transaction.merchant,
+    Transaction.merchant_canonical,
+)
+_TARGET_COLS = [
+    "user_id",
+    "month",
+    "pending",
+    "category",
+    "merchant",
+    "merchant_canonical",
+    "txn_count",
+    "income",
+    "spend",
+    "income_net",
+    "spend_net",
+    "inflow",
+    "outflow",
+    "outflow_count",
+    "sample_description",
+]
+
+
+def _user_clause(col, user_id: Optional[int]):
+    return col.is_(None) if user_id is None else col == user_id
+
+
+def _aggregate_select(*criteria):
+    """SELECT producing rollup rows for transactions matching ``criteria``."""
+    from app.services.charts_data import income_case, spend_case
+
+    amt = Transaction.amount
+    amt_abs = func.abs(amt)
+    return (
+        select(
+            *_GROUP_COLS,
+            func.count(),
+            func.coalesce(func.sum(income_case(amt_abs)), 0.0),
+            func.coalesce(func.sum(spend_case(amt_abs)), 0.0),
+            func.coalesce(func.sum(income_case()), 0.0),
+            func.coalesce(func.sum(spend_case()), 0.0),
+            func.coalesce(func.sum(case((amt >= 0, amt), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((amt < 0, -amt), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((amt < 0, 1), else_=0)), 0),
+            func.max(Transaction.description),
+        )
+        .where(Transaction.month.is_not(None), *criteria)
+        .group_by(*_GROUP_COLS)
+    )
+
+
+def refresh(db: Session, keys: Iterable[Key]) -> int:
+    """Recompute rollup rows for the given (user_id, month) keys. Caller commits."""
+    by_user: Dict[Optional[int], Set[str]] = defaultdict(set)
+    for user_id, month in keys:
+        if month:
+            by_user[user_id].add(month)
+    table = MonthlyRollup.__table__
+    written = 0
+    for user_id, months in by_user.items():
+        month_list = sorted(months)
+        db.execute(
+            delete(table).where(
+                _user_clause(table.c.user_id, user_id),
+                table.c.month.in_(month_list),
+            )
+        )
+        res = db.execute(
+            insert(table).from_select(
+                _TARGET_COLS,
+                _aggregate_select(
+                    _user_clause(Transaction.user_id, user_id),
+                    Transaction.month.in_(month_list),
+                ),
+            )
+        )
+        written += max(res.rowcount or 0, 0)
+    return written
+
+
+def _rebuild_user(db: Session, user_id: Optional[int]) -> None:
+    """Recompute every month of one user (``None``: rows without a user)."""
+    table = MonthlyRollup.__table__
+    db.execute(delete(table).where(_user_clause(table.c.user_id, user_id)))
+    db.execute(
+        insert(table).from_select(
+            _TARGET_COLS,
+            _aggregate_select(_user_clause(Transaction.user_id, user_id)),
+        )
+    )
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Drop and recompute all rollups (or one user's). Caller commits."""
+    table = MonthlyRollup.__table__
+    criteria = []
+    if user_id is not None:
+        db.execute(delete(table).where(table.c.user_id == user_id))
+        criteria.append(Transaction.user_id == user_id)
+    else:
+        db.execute(delete(table))
+    res = db.execute(
+        insert(table).from_select(_TARGET_COLS, _aggregate_select(*criteria))
+    )
+    db.info.pop(_DIRTY, None)
+    db.info.pop(_REBUILD, None)
+    db.info.pop(_REBUILD_USERS, None)
+    return max(res.rowcount or 0, 0)
+
+
+# --- Change tracking --------------------------------------------------------------
+
+
+def mark_dirty(db: Session, user_id: Optional[int], month: Optional[str]) -> None:
+    """Record that (user_id, month) changed outside the ORM unit of work."""
+    if month:
+        db.info.setdefault(_DIRTY, set()).add((user_id, month))
+
+
+# Work whose sync failed, per engine: [full rebuild, users, keys]
+_retry: Dict[int, list] = {}
+_retry_lock = threading.Lock()
+
+
+def _engine_key(db: Session) -> int:
+    bind = db.get_bind()
+    return id(getattr(bind, "engine", bind))
+
+
+def sync(db: Session) -> None:
+    """Apply pending rollup updates for this session (flushes first)."""
+    if db.new or db.dirty or db.deleted:
+        db.flush()
+    full = db.info.pop(_REBUILD, False)
+    users: Set[Optional[int]] = db.info.pop(_REBUILD_USERS, None) or set()
+    keys: Set[Key] = db.info.pop(_DIRTY, None) or set()
+    engine_key = _engine_key(db)
+    if _retry:
+        with _retry_lock:
+            failed = _retry.pop(engine_key, None)
+        if failed:
+            full = full or failed[0]
+            users |= failed[1]
+            keys |= failed[2]
+    if not (full or users or keys):
+        return
+    try:
+        with db.begin_nested():
+            if full:
+                rebuild(db)
+            else:
+                for user_id in users:
+                    _rebuild_user(db, user_id)
+                refresh(db, (k for k in keys if k[0] not in users))
+    except Exception:
+        # Never block transaction writes on rollup maintenance: keep the work
+        # for the next sync on this engine (or python -m app.cli rollups-rebuild).
+        logger.exception(
+            "monthly_rollups sync failed (full=%s, users=%s, keys=%s); will retry",
+            full,
+            len(users),
+            len(keys),
+        )
+        with _retry_lock:
+            pending = _retry.setdefault(engine_key, [False, set(), set()])
+            pending[0] = pending[0] or full
+            pending[1] |= users
+            pending[2] |= keys
+
+
+# Columns that feed rollup keys or measures; edits to anything else (notes,
+# encrypted blobs, soft-delete stamps) leave rollups untouched.
+_TRACKED = (
+    "user_id",
+    "month",
+    "pending",
+    "category",
+    "merchant",
+    "merchant_canonical",
+    "amount",
+    "description",
+    "raw_category",
+)
+
+
+def _history_values(obj: Any, attr: str) -> Iterable[Any]:
+    hist = attributes.get_history(obj, attr)
+    return [*hist.unchanged, *hist.added, *hist.deleted]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    changed = [
+        o for o in (*session.new, *session.deleted) if isinstance(o, Transaction)
+    ]
+    changed.extend(
+        o
+        for o in session.dirty
+        if isinstance(o, Transaction)
+        and any(attributes.get_history(o, a).has_changes() for a in _TRACKED)
+    )
+    for obj in changed:
+        users = _history_values(obj, "user_id") or [None]
+        months = _history_values(obj, "month")
+        for user_id in users:
+            for month in months:
+                mark_dirty(session, user_id, month)
+
+
+_NO_VALUE = object()
+
+
+def _update_targets(stmt) -> Optional[Dict[str, Any]]:
+    """Columns set by a bulk UPDATE, or None when they can't be resolved.
+
+    Values are the literal new value, or ``_NO_VALUE`` for SQL expressions.
+    """
+    values = getattr(stmt, "_values", None)
+    if not values:
+        return None  # executemany / bulk-by-primary-key form
+    out: Dict[str, Any] = {}
+    for col, val in values.items():
+        literal = isinstance(val, BindParameter) and not val.required
+        out[getattr(col, "key", str(col))] = val.value if literal else _NO_VALUE
+    return out
+
+
+def _id_param(stmt) -> Optional[str]:
+    """Parameter name of a ``WHERE transactions.id = :name`` clause, if that's all."""
+    where = stmt.whereclause
+    if not (isinstance(where, BinaryExpression) and where.operator is operators.eq):
+        return None
+    col, param = where.left, where.right
+    if isinstance(col, BindParameter):
+        col, param = param, col
+    if (
+        getattr(col, "table", None) is Transaction.__table__
+        and getattr(col, "key", None) == "id"
+        and isinstance(param, BindParameter)
+    ):
+        return param.key
+    return None
+
+
+def _executemany_keys(session: Session, stmt, params: Any) -> Optional[Set[Key]]:
+    """Old and new keys of a per-id executemany UPDATE, or None if unresolvable."""
+    id_key = _id_param(stmt)
+    if id_key is None or not isinstance(params, list):
+        return None
+    # New user_id / month per parameter set: from its bound parameter or a literal
+    new: Dict[str, Any] = {}
+    for col, val in (getattr(stmt, "_values", None) or {}).items():
+        name = getattr(col, "key", str(col))
+        if name not in ("user_id", "month"):
+            continue
+        if not isinstance(val, BindParameter):
+            return None
+        new[name] = (val.key,) if val.required else val.value
+    if any(not isinstance(p, dict) or id_key not in p for p in params):
+        return None
+    ids = [p[id_key] for p in params]
+    old: Dict[int, Key] = {}
+    for start in range(0, len(ids), _ID_CHUNK):
+        rows = session.execute(
+            select(Transaction.id, Transaction.user_id, Transaction.month).where(
+                Transaction.id.in_(ids[start : start + _ID_CHUNK])
+            )
+        )
+        old.update((i, (user_id, month)) for i, user_id, month in rows)
+    keys = set(old.values())
+    if new:
+        for p in params:
+            if p[id_key] not in old:
+                continue
+            user_id, month = old[p[id_key]]
+            for name, v in new.items():
+                value = p.get(v[0]) if isinstance(v, tuple) else v
+                if name == "user_id":
+                    user_id = value
+                else:
+                    month = value
+            keys.add((user_id, month))
+    return keys
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_dml(orm_execute_state) -> None:
+    if not (orm_execute_state.is_delete or orm_execute_state.is_update):
+        return
+    mapper = orm_execute_state.bind_mapper
+    target = getattr(orm_execute_state.statement, "table", None)
+    if (mapper is None or mapper.class_ is not Transaction) and (
+        target is not Transaction.__table__
+    ):
+        return
+    session = orm_execute_state.session
+    params = orm_execute_state.parameters
+    moved: Dict[str, Any] = {}
+    if orm_execute_state.is_update:
+        targets = _update_targets(orm_execute_state.statement)
+        if targets is not None and not targets.keys() & set(_TRACKED):
+            return
+        if targets is None or orm_execute_state.is_executemany:
+            keys = _executemany_keys(session, orm_execute_state.statement, params)
+            if keys is None:
+                session.info[_REBUILD] = True
+                return
+            for user_id, month in keys:
+                mark_dirty(session, user_id, month)
+            return
+        moved = {k: targets[k] for k in ("user_id", "month") if k in targets}
+        if moved.get("user_id") is _NO_VALUE:
+            session.info[_REBUILD] = True  # target users unknown
+            return
+    where = orm_execute_state.statement.whereclause
+    bind = params if isinstance(params, dict) else None
+    if moved.get("month") is _NO_VALUE:
+        # Computed month: recompute every month of the matched users (and of
+        # the literal target user, if the rows move there too)
+        stmt = select(Transaction.user_id).distinct()
+        if where is not None:
+            stmt = stmt.where(where)
+        users = session.info.setdefault(_REBUILD_USERS, set())
+        users.update(u for (u,) in session.execute(stmt, bind).all())
+        if "user_id" in moved:
+            users.add(moved["user_id"])
+        return
+    stmt = select(Transaction.user_id, Transaction.month).distinct()
+    if where is not None:
+        stmt = stmt.where(where)
+    for user_id, month in session.execute(stmt, bind).all():
+        mark_dirty(session, user_id, month)
+        if moved:
+            mark_dirty(
+                session,
+                moved.get("user_id", user_id),
+                moved.get("month", month),
+            )
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_before_commit(session: Session) -> None:
+    if (
+        session.info.get(_DIRTY)
+        or session.info.get(_REBUILD)
+        or session.info.get(_REBUILD_USERS)
+        or session.new
+        or session.dirty
+        or session.deleted
+    ):
+        sync(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY, None)
+    session.info.pop(_REBUILD, None)
+    session.info.pop(_REBUILD_USERS, None)
@@ -0,0 +1,167 @@
+"""
+Process-local vector index for the SQLite RAG path.
+
+Chunk embeddings are packed into one contiguous float32 matrix with
+L2-normalized rows, so cosine scoring for a query is a single matmul plus
+``argpartition`` for the top-k. Only chunk ids are kept alongside the matrix;
+content/metadata for the winning rows is fetched afterwards in one query.
+
+The index is built lazily on first search and is rebuilt when:
+- ``invalidate()`` is called (ingest/rebuild paths in ``rag_store``/``rag_tools``)
+- the cheap ``COUNT(*)/MAX(id)`` fingerprint of ``rag_chunks`` changes, which
+  covers writes made by other workers or by code that bypasses ``rag_store``.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+_FINGERPRINT_SQL = text(
+    "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM rag_chunks WHERE LENGTH(embedding) > 0"
+)
+_LOAD_SQL = text(
+    "SELECT id, embedding FROM rag_chunks WHERE LENGTH(embedding) > 0 ORDER BY id"
+)
+
+
+@dataclass
+class ChunkIndex:
+    """Immutable snapshot of normalized chunk embeddings."""
+
+    ids: np.ndarray  # int64, shape (n,)
+    matrix: np.ndarray  # float32, shape (n, dim), rows L2-normalized
+    fingerprint: Tuple[int, int]
+
+    @property
+    def size(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    def search(self, qvec: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        """Return up to ``k`` (chunk_id, cosine) pairs, best first."""
+        if self.size == 0 or k <= 0:
+            return []
+        q = np.asarray(qvec, dtype=np.float32)
+        if q.shape != (self.dim,):
+            return []
+        qn = float(np.linalg.norm(q))
+        if qn == 0.0:
+            return []
+        scores = self.matrix @ (q / qn)
+        np.clip(scores, -1.0, 1.0, out=scores)
+        k = min(k, self.size)
+        if k < self.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(self.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+
+_lock = threading.Lock()
+_indexes: Dict[int, ChunkIndex] = {}
+_stats = {"builds": 0, "searches": 0}
+
+
+def _bind_key(db: Session) -> int:
+    bind = db.get_bind()
+    return id(getattr(bind, "engine", bind))
+
+
+def _decode(blob) -> Optional[np.ndarray]:
+    if blob is None:
+        return None
+    if isinstance(blob, (bytes, bytearray, memoryview)):
+        data = bytes(blob)
+        if not data or len(data) % 4:
+            return None
+        return np.frombuffer(data, dtype=np.float32)
+    # Text-encoded vectors (legacy rows): reuse the tolerant parser
+    from app.services.rag_store import _coerce_vec
+
+    vec = _coerce_vec(blob)
+    return np.asarray(vec, dtype=np.float32) if vec else None
+
+
+def _fingerprint(db: Session) -> Tuple[int, int]:
+    row = db.execute(_FINGERPRINT_SQL).fetchone()
+    return (int(row[0] or 0), int(row[1] or 0)) if row else (0, 0)
+
+
+def build_index(db: Session) -> ChunkIndex:
+    """Load all embedded chunks and pack them into a normalized matrix.
+
+    Rows whose dimension differs from the dominant one are skipped (they could
+    never score against a query of the active embedding model anyway).
+    """
+    fp = _fingerprint(db)
+    decoded: List[Tuple[int, np.ndarray]] = []
+    for chunk_id, blob in db.execute(_LOAD_SQL):
+        vec = _decode(blob)
+        if vec is not None and vec.size:
+            decoded.append((int(chunk_id), vec))
+
+    if not decoded:
+        return ChunkIndex(
+            ids=np.empty(0, dtype=np.int64),
+            matrix=np.empty((0, 0), dtype=np.float32),
+            fingerprint=fp,
+        )
+
+    dim = Counter(v.size for _, v in decoded).most_common(1)[0][0]
+    kept = [(cid, v) for cid, v in decoded if v.size == dim]
+    ids = np.fromiter((cid for cid, _ in kept), dtype=np.int64, count=len(kept))
+    matrix = np.vstack([v for _, v in kept]).astype(np.float32, copy=False)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    matrix /= norms
+    _stats["builds"] += 1
+    return ChunkIndex(ids=ids, matrix=np.ascontiguousarray(matrix), fingerprint=fp)
+
+
+def get_index(db: Session) -> ChunkIndex:
+    """Return the cached index for this DB bind, rebuilding it if stale."""
+    key = _bind_key(db)
+    fp = _fingerprint(db)
+    idx = _indexes.get(key)
+    if idx is not None and idx.fingerprint == fp:
+        return idx
+    with _lock:
+        idx = _indexes.get(key)
+        if idx is None or idx.fingerprint != fp:
+            idx = build_index(db)
+            _indexes[key] = idx
+        return idx
+
+
+def search(db: Session, qvec: Sequence[float], k: int) -> List[Tuple[int, float]]:
+    """Top-k cosine search over embedded chunks: [(chunk_id, score), ...]."""
+    _stats["searches"] += 1
+    return get_index(db).search(qvec, k)
+
+
+def invalidate(db: Optional[Session] = None) -> None:
+    """Drop the cached index (for one bind, or all) so the next search rebuilds."""
+    with _lock:
+        if db is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(_bind_key(db), None)
+
+
+def stats() -> Dict[str, int]:
+    return {
+        "indexes": len(_indexes),
+        "rows": sum(i.size for i in _indexes.values()),
+        **_stats,
+    }
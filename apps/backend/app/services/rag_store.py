@@ -2,15 +2,17 @@ import hashlib
 import json
 import os
 from typing import List, Dict
-import httpx
 import math
 import re
 import io
+import struct
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
 from app.services.rag_chunk import html_to_text, chunk_text
 from app.services.embed_provider import embed_texts
+from app.services.http_clients import get_async_client
+from app.services import rag_index
 
 # Feature flags for production-safe RAG configuration
 RAG_STORE = os.getenv("RAG_STORE", "sqlite")  # "sqlite" or "pgvector"
@@ -25,6 +27,11 @@ def _vec_str(v: list[float]) -> str:
     return "[" + ",".join(f"{x:.7f}" for x in v) + "]"
 
 
+def _pack_vec(v: list[float]) -> bytes:
+    # SQLite storage: packed float32 (read back by rag_index / _coerce_vec)
+    return struct.pack(f"{len(v)}f", *v)
+
+
 def _dot(a, b):
     """Dot product with empty vector guard."""
     if not a or not b or len(a) != len(b):
@@ -54,8 +61,6 @@ def _coerce_vec(v):
         return [float(x) for x in v]
     # Handle binary-packed embeddings from SQLite (struct.pack format)
     if isinstance(v, (bytes, memoryview)):
-        import struct
-
         data = bytes(v) if isinstance(v, memoryview) else v
         if len(data) == 0:
             return []
@@ -79,17 +84,16 @@ async def fetch_url(
         headers["If-None-Match"] = etag
     if last_modified:
         headers["If-Modified-Since"] = last_modified
-    async with httpx.AsyncClient(follow_redirects=True, timeout=30) as client:
-        r = await client.get(url, headers=headers)
-        if r.status_code == 304:
-            return {"status": "not_modified"}
-        r.raise_for_status()
-        return {
-            "status": "ok",
-            "content": r.text,
-            "etag": r.headers.get("ETag"),
-            "last_modified": r.headers.get("Last-Modified"),
-        }
+    r = await get_async_client("fetch").get(url, headers=headers)
+    if r.status_code == 304:
+        return {"status": "not_modified"}
+    r.raise_for_status()
+    return {
+        "status": "ok",
+        "content": r.text,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
 
 
 def _is_postgres(db: Session) -> bool:
@@ -201,10 +205,8 @@ async def ingest_urls(db: Session, urls: List[str], force: bool = False) -> Dict
                     },
                 )
             else:
-                # Non-Postgres: store embedding as JSON array in BLOB column for cosine similarity search
-                import struct
-
-                embedding_bytes = struct.pack(f"{len(emb)}f", *emb)
+                # Non-Postgres: store embedding as packed float32 BLOB for cosine similarity search
+                embedding_bytes = _pack_vec(emb)
                 db.execute(
                     text(
                         """
@@ -222,6 +224,7 @@ async def ingest_urls(db: Session, urls: List[str], force: bool = False) -> Dict
                 )
 
         db.commit()
+        rag_index.invalidate(db)
         results.append({"url": url, "status": "ingested", "chunks": len(chunks)})
     return {"ok": True, "results": results}
 
@@ -232,34 +235,31 @@ async def semantic_search(
     [qvec] = await embed_texts([query], input_type="query")
 
     if not _is_postgres(db):
-        # SQLite fallback: fetch all chunks and compute cosine similarity in Python
+        # SQLite fallback: score against the in-process normalized matrix,
+        # then hydrate only the winning chunks.
+        top = rag_index.search(db, qvec, k)
+        if not top:
+            return []
+        ids = [cid for cid, _ in top]
         rows = db.execute(
             text(
                 """
-                SELECT c.doc_id, c.chunk_idx, c.content, c.meta_json, c.embedding,
+                SELECT c.id, c.doc_id, c.chunk_idx, c.content, c.meta_json,
                        d.url, d.vendor, d.title
                 FROM rag_chunks c
                 JOIN rag_documents d ON c.doc_id = d.id
-                WHERE LENGTH(c.embedding) > 0
+                WHERE c.id IN :ids
             """
-            )
+            ).bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids},
         ).fetchall()
+        by_id = {r.id: r for r in rows}
 
-        # Compute cosine similarities
-        scored = []
-        for r in rows:
-            emb = _coerce_vec(r.embedding)
-            if emb:
-                cos = _cos(qvec, emb)
-                scored.append((cos, r))
-
-        # Sort by score descending and take top k
-        scored.sort(key=lambda t: t[0], reverse=True)
-        top_rows = scored[:k]
-
-        # Build results
         hits: List[Dict] = []
-        for score, r in top_rows:
+        for cid, score in top:
+            r = by_id.get(cid)
+            if r is None:
+                continue
             hits.append(
                 {
                     "doc_id": r.doc_id,
@@ -399,10 +399,11 @@ async def ingest_files(db: Session, files: List[Dict]) -> Dict:
                         "i": idx,
                         "c": content,
                         "m": json.dumps(meta),
-                        "b": memoryview(bytes()),
+                        "b": _pack_vec(emb),
                     },
                 )
         db.commit()
+        rag_index.invalidate(db)
         results.append(
             {"file": f["filename"], "status": "ingested", "chunks": len(chunks)}
         )
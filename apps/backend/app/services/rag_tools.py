@@ -9,6 +9,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+from app.services import rag_index
 from app.services.rag_store import ingest_urls, ingest_files
 from app.orm_models import User
 
@@ -88,6 +89,7 @@ async def _rag_status(db: Session) -> Dict:
             "embedded": embedded_count,
             "vendors": vendors,
             "models": models,
+            "index": rag_index.stats(),
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -99,6 +101,7 @@ async def _rag_rebuild(db: Session) -> Dict:
         db.execute(text("DELETE FROM rag_chunks"))
         db.execute(text("DELETE FROM rag_documents"))
         db.commit()
+        rag_index.invalidate(db)
         return {"status": "ok", "message": "Index cleared (re-ingest to populate)"}
     except Exception as e:
         db.rollback()
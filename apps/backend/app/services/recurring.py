@@ -1,99 +1,232 @@
-from collections import defaultdict
+"""Recurring-charge detection shared by ``/txns/recurring/scan`` and analytics.
+
+``merchant_stats`` is the single engine: it selects only (merchant key, date,
+amount, id) for the matching transactions and computes every per-merchant
+statistic in one vectorized NumPy pass (rows factorized by merchant, sorted
+with one ``lexsort``, then ``reduceat`` / cumulative sums over the group
+boundaries). ``scan_recurring`` turns the stats into ``RecurringSeries`` rows
+(prefetched in one query, bulk inserted/updated) and
+``analytics.detect_recurring`` ranks them for the recurring/subscriptions
+responses.
+"""
+
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, insert, or_, select, update
 from sqlalchemy.orm import Session
-from app.transactions import Transaction
+
 from app.orm_models import RecurringSeries
+from app.transactions import Transaction
 
+# Categories never treated as recurring charges by the scan
+_EXCLUDED_CATEGORIES = ("transfer", "internal")
+# Scan accepts a merchant only if stdev/mean of |amount| is at most this
+_MAX_AMOUNT_CV = 0.15
+_NEXT_DUE_DAYS = {"monthly": 30, "weekly": 7, "yearly": 365}
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
-def _infer_cadence(sorted_dates: List[date]) -> str:
-    if len(sorted_dates) < 3:
-        return "unknown"
-    # crude distance histogram in days
-    diffs = [
-        (sorted_dates[i] - sorted_dates[i - 1]).days
-        for i in range(1, len(sorted_dates))
-    ]
-    avg = sum(diffs) / len(diffs)
-    if 26 <= avg <= 35:  # monthly-ish
+
+def _cadence_for_gap(avg_gap: float) -> str:
+    if 26 <= avg_gap <= 35:  # monthly-ish
         return "monthly"
-    if 6 <= avg <= 8:  # weekly-ish
+    if 6 <= avg_gap <= 8:  # weekly-ish
         return "weekly"
-    if 350 <= avg <= 380:
+    if 350 <= avg_gap <= 380:
         return "yearly"
     return "unknown"
 
 
-def scan_recurring(db: Session, month: str | None = None) -> int:
+@dataclass
+class MerchantStats:
+    """Column-oriented per-merchant statistics (one array entry per merchant)."""
+
+    merchant: np.ndarray  # object (str)
+    count: np.ndarray  # int
+    mean_abs: np.ndarray  # mean |amount|
+    std_abs: np.ndarray  # population stdev of |amount|
+    first_seen: np.ndarray  # datetime64[D]
+    last_seen: np.ndarray  # datetime64[D]
+    mean_gap: np.ndarray  # days; NaN for a single transaction
+    median_gap: np.ndarray  # days; NaN for a single transaction
+    dom_peak: np.ndarray  # share of txns on the most common day of month
+    last_id: np.ndarray  # id of the latest transaction
+
+    def __len__(self) -> int:
+        return len(self.merchant)
+
+
+def _empty_stats() -> MerchantStats:
+    f = np.array([], dtype=float)
+    d = np.array([], dtype="datetime64[D]")
+    return MerchantStats(
+        np.array([], dtype=object), np.array([], dtype=int), f, f, d, d, f, f, f,
+        np.array([], dtype=np.int64),
+    )  # fmt: skip
+
+
+def merchant_stats(
+    db: Session,
+    merchant_key: Any,
+    *filters: Any,
+) -> MerchantStats:
+    """Per-merchant amount / gap / day-of-month statistics in one pass.
+
+    Args:
+        db: session
+        merchant_key: SQL expression grouping transactions (e.g. merchant
+            canonical with raw merchant fallback)
+        filters: extra WHERE clauses on Transaction
+    """
+    import pandas as pd  # lazy: keep analytics imports light
+
+    # Core execution: plain tuples, no ORM row processing
+    rows = (
+        db.connection()
+        .execute(
+            select(
+                merchant_key, Transaction.date, Transaction.amount, Transaction.id
+            ).where(Transaction.date.isnot(None), *filters)
+        )
+        .all()
+    )
+    if not rows:
+        return _empty_stats()
+
+    n = len(rows)
+    keys, dates, amounts, ids = zip(*rows)
+    # Hash-based factorize (O(n)); groups are ordered by lexsort below
+    gid, merchants = pd.factorize(np.array(keys, dtype=object), sort=False)
+    merchants = np.asarray(merchants, dtype=object)
+    day_num = np.fromiter((d.toordinal() for d in dates), np.int64, n) - _EPOCH_ORDINAL
+    days = day_num.astype("datetime64[D]")
+    amt = np.abs(np.fromiter(amounts, float, n))
+    ids_arr = np.fromiter(ids, np.int64, n)
+
+    # Group-contiguous, date-ascending (id breaks ties, like ORDER BY id)
+    order = np.lexsort((ids_arr, day_num, gid))
+    gid, days, day_num, amt, ids_arr = (
+        gid[order], days[order], day_num[order], amt[order], ids_arr[order]
+    )  # fmt: skip
+    n_groups = len(merchants)
+    count = np.bincount(gid, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    ends = starts + count - 1
+
+    mean_abs = np.add.reduceat(amt, starts) / count
+    dev = amt - np.repeat(mean_abs, count)
+    std_abs = np.sqrt(np.add.reduceat(dev * dev, starts) / count)
+
+    n_gaps = count - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_gap = (day_num[ends] - day_num[starts]) / n_gaps
+
+    # Median of within-group gaps: drop the gap that crosses each boundary,
+    # sort by (group, gap) and pick the middle one/two of each group.
+    gaps = np.diff(day_num)
+    gap_gid = gid[1:]
+    keep = gid[1:] == gid[:-1]
+    gaps, gap_gid = gaps[keep], gap_gid[keep]
+    gaps = gaps[np.lexsort((gaps, gap_gid))]
+    gap_starts = np.concatenate(([0], np.cumsum(n_gaps)[:-1]))
+    median_gap = np.full(n_groups, np.nan)
+    has = n_gaps > 0
+    lo = gap_starts[has] + (n_gaps[has] - 1) // 2
+    hi = gap_starts[has] + n_gaps[has] // 2
+    median_gap[has] = (gaps[lo] + gaps[hi]) / 2.0
+
+    # Most common day of month per group
+    dom = (days - days.astype("datetime64[M]")).astype(np.int64) + 1
+    codes, dom_counts = np.unique(gid * 32 + dom, return_counts=True)
+    peak = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(peak, codes // 32, dom_counts)
+
+    return MerchantStats(
+        merchant=merchants,
+        count=count,
+        mean_abs=mean_abs,
+        std_abs=std_abs,
+        first_seen=days[starts],
+        last_seen=days[ends],
+        mean_gap=mean_gap,
+        median_gap=median_gap,
+        dom_peak=peak / count,
+        last_id=ids_arr[ends],
+    )
+
+
+def _prefetch_series(
+    db: Session, merchants: Sequence[str]
+) -> Dict[str, RecurringSeries]:
+    existing: Dict[str, RecurringSeries] = {}
+    if not merchants:
+        return existing
+    q = (
+        db.query(RecurringSeries)
+        .filter(RecurringSeries.merchant.in_(list(merchants)))
+        .order_by(RecurringSeries.id)
+    )
+    for s in q:
+        existing.setdefault(s.merchant, s)
+    return existing
+
+
+def scan_recurring(db: Session, month: Optional[str] = None) -> int:
     """
     Group by merchant; pick near-constant amounts; write/update RecurringSeries.
     Returns number of series upserted.
     """
-    q = db.query(Transaction).filter(Transaction.merchant.isnot(None))
+    filters = [
+        Transaction.merchant.isnot(None),
+        or_(
+            Transaction.category.is_(None),
+            func.lower(Transaction.category).notin_(_EXCLUDED_CATEGORIES),
+        ),
+    ]
     if month:
-        q = q.filter(Transaction.month == month)
-    txns = q.all()
-    by_merchant = defaultdict(list)
-    for t in txns:
-        if t.category and t.category.lower() in ("transfer", "internal"):
-            continue
-        by_merchant[t.merchant.strip()].append(t)
-
-    upserts = 0
-    for m, rows in by_merchant.items():
-        # cluster amounts within small variance (e.g., ±5%)
-        amounts = [
-            float(abs(r.amount)) for r in rows
-        ]  # subs are usually charges (negative), use abs
-        if not amounts:
-            continue
-        avg_amt = sum(amounts) / len(amounts)
-        # accept only if stdev small relative to mean (quick proxy)
-        variance = sum((a - avg_amt) ** 2 for a in amounts) / len(amounts)
-        stdev = variance**0.5
-        if avg_amt <= 0:
-            continue
-        if stdev / avg_amt > 0.15:  # >15% variation -> weak candidate
-            continue
-
-        dates = sorted([r.date for r in rows if r.date is not None])
-        if not dates:
-            continue
-
-        cadence = _infer_cadence(dates)
-        first_seen, last_seen = dates[0], dates[-1]
-        next_due = None
-        if cadence == "monthly":
-            # naive: last_seen + 30 days
-            next_due = last_seen + timedelta(days=30)
-        elif cadence == "weekly":
-            next_due = last_seen + timedelta(days=7)
-        elif cadence == "yearly":
-            next_due = last_seen + timedelta(days=365)
-
-        existing = (
-            db.query(RecurringSeries).filter(RecurringSeries.merchant == m).first()
+        filters.append(Transaction.month == month)
+    st = merchant_stats(db, func.trim(Transaction.merchant), *filters)
+
+    # cluster amounts within small variance (subs are charges; stats use |amount|)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ok = (st.mean_abs > 0) & (st.std_abs / st.mean_abs <= _MAX_AMOUNT_CV)
+    idx = np.flatnonzero(ok)
+    if not len(idx):
+        db.commit()
+        return 0
+
+    existing = _prefetch_series(db, [str(st.merchant[i]) for i in idx])
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for i in idx:
+        m = str(st.merchant[i])
+        cadence = (
+            _cadence_for_gap(float(st.mean_gap[i])) if st.count[i] >= 3 else "unknown"
         )
-        sample_txn_id = rows[-1].id if rows else None
-        if existing:
-            existing.avg_amount = round(avg_amt, 2)
-            existing.cadence = cadence
-            existing.first_seen = min(existing.first_seen, first_seen)
-            existing.last_seen = max(existing.last_seen, last_seen)
-            existing.next_due = next_due
-            existing.sample_txn_id = sample_txn_id
+        first_seen = st.first_seen[i].item()
+        last_seen = st.last_seen[i].item()
+        due_days = _NEXT_DUE_DAYS.get(cadence)
+        values = {
+            "avg_amount": round(float(st.mean_abs[i]), 2),
+            "cadence": cadence,
+            "next_due": last_seen + timedelta(days=due_days) if due_days else None,
+            "sample_txn_id": int(st.last_id[i]),
+        }
+        cur = existing.get(m)
+        if cur is not None:
+            values["id"] = cur.id
+            values["first_seen"] = min(cur.first_seen or first_seen, first_seen)
+            values["last_seen"] = max(cur.last_seen or last_seen, last_seen)
+            updates.append(values)
         else:
-            s = RecurringSeries(
-                merchant=m,
-                avg_amount=round(avg_amt, 2),
-                cadence=cadence,
-                first_seen=first_seen,
-                last_seen=last_seen,
-                next_due=next_due,
-                sample_txn_id=sample_txn_id,
-            )
-            db.add(s)
-        upserts += 1
+            values.update(merchant=m, first_seen=first_seen, last_seen=last_seen)
+            inserts.append(values)
 
+    if updates:
+        db.execute(update(RecurringSeries), updates)
+    if inserts:
+        db.execute(insert(RecurringSeries), inserts)
     db.commit()
-    return upserts
+    return len(updates) + len(inserts)
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import itertools
 from io import BytesIO
 from enum import Enum
-from typing import TYPE_CHECKING
+from typing import IO, TYPE_CHECKING, Iterable
 
 if TYPE_CHECKING:
     from app.services.transaction_filters import ExportFilters
 
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font
 
     OPENPYXL_AVAILABLE = True
@@ -354,6 +356,187 @@ def build_excel_bytes(
     return buf.getvalue()
 
 
+# --- Streaming (write-only) Excel export -------------------------------------
+
+_TXN_HEADERS = [
+    "date",
+    "merchant",
+    "description",
+    "amount",
+    "category_label",
+    "category_slug",
+]
+_TXN_WIDTHS = [12, 30, 40, 12, 20, 20]
+
+
+def _bold_row(ws, values: list, size: int | None = None) -> list:
+    font = Font(bold=True, size=size) if size else Font(bold=True)
+    row = []
+    for v in values:
+        cell = WriteOnlyCell(ws, value=v)
+        cell.font = font
+        row.append(cell)
+    return row
+
+
+def _set_widths(ws, widths: list[int]) -> None:
+    for idx, width in enumerate(widths):
+        ws.column_dimensions[chr(ord("A") + idx)].width = width
+
+
+def _txn_row(txn: dict) -> list:
+    return [
+        txn.get("date", ""),
+        txn.get("merchant", ""),
+        txn.get("description", ""),
+        round(float(txn.get("amount", 0.0)), 2),
+        txn.get("category_label", txn.get("category", "")),
+        txn.get("category_slug", txn.get("category", "")),
+    ]
+
+
+def _stream_summary_sheet(
+    wb: "Workbook",
+    month: str,
+    summary: dict,
+    unknown_count: int,
+    unknown_amount: float,
+    filters: "ExportFilters | None" = None,
+) -> None:
+    """Write-only counterpart of add_summary_sheet (same layout)."""
+    ws = wb.create_sheet("Summary")
+    _set_widths(ws, [25, 15])
+    ws.append(_bold_row(ws, ["LedgerMind — Monthly Summary"], size=14))
+    ws.append(["Month", month])
+    if filters and filters.is_active():
+        label = WriteOnlyCell(ws, value="Active Filters:")
+        label.font = Font(bold=True, italic=True)
+        ws.append([label])
+        if filters.category_slug:
+            ws.append([f"  Category: {filters.category_slug}"])
+        if filters.min_amount is not None:
+            ws.append([f"  Min amount: ${filters.min_amount}"])
+        if filters.max_amount is not None:
+            ws.append([f"  Max amount: ${filters.max_amount}"])
+        if filters.search:
+            ws.append([f"  Search: {filters.search}"])
+        ws.append([])
+    ws.append(_bold_row(ws, ["Metric", "Value"]))
+    ws.append(["Total income", round(float(summary.get("total_income", 0.0)), 2)])
+    ws.append(["Total spend", round(float(summary.get("total_spend", 0.0)), 2)])
+    ws.append(["Net", round(float(summary.get("net", 0.0)), 2)])
+    ws.append(["Unknown spend", round(float(unknown_amount), 2)])
+    ws.append(["Unknown txns", unknown_count])
+
+
+def _stream_table_sheet(
+    wb: "Workbook", title: str, headers: list, widths: list[int], rows: Iterable
+) -> None:
+    ws = wb.create_sheet(title)
+    _set_widths(ws, widths)
+    ws.append(_bold_row(ws, headers))
+    for row in rows:
+        ws.append(row)
+
+
+def write_excel_stream(
+    out: IO[bytes],
+    summary: dict,
+    merchants: list[dict],
+    categories: list[dict],
+    mode: ReportMode = ReportMode.full,
+    transactions: Iterable[dict] | None = None,
+    unknown_count: int = 0,
+    unknown_amount: float = 0.0,
+    filters: "ExportFilters | None" = None,
+) -> None:
+    """Write the workbook of build_excel_bytes to ``out`` with constant memory.
+
+    Uses openpyxl write-only worksheets, so ``transactions`` may be a lazy
+    iterator (e.g. a server-side cursor); each row is serialized as it is
+    consumed. In unknowns mode ``transactions`` are the unknown rows. Because
+    sheets are written in order, the summary's unknown totals are passed in
+    rather than derived from the rows.
+    """
+    if not OPENPYXL_AVAILABLE:
+        raise RuntimeError("openpyxl is not installed in this environment")
+
+    wb = Workbook(write_only=True)
+    month_str = summary.get("month", "")
+    rows = (_txn_row(t) for t in (transactions or ()))
+
+    if mode == ReportMode.unknowns:
+        ws = wb.create_sheet("Unknowns")
+        _set_widths(ws, _TXN_WIDTHS)
+        ws.append(_bold_row(ws, [f"Uncategorized Transactions — {month_str}"], 14))
+        ws.append([])
+        ws.append(_bold_row(ws, _TXN_HEADERS))
+        for row in rows:
+            ws.append(row)
+    else:
+        _stream_summary_sheet(
+            wb, month_str, summary, unknown_count, unknown_amount, filters
+        )
+        if mode == ReportMode.full:
+            _stream_table_sheet(
+                wb,
+                "Categories",
+                [
+                    "category_slug",
+                    "category_label",
+                    "txn_count",
+                    "total_amount",
+                    "pct_of_spend",
+                ],
+                [20, 20, 12, 15, 12],
+                (
+                    [
+                        c.get("slug", c.get("category", "")),
+                        c.get("label", c.get("name", c.get("category", ""))),
+                        c.get("txn_count", c.get("count", 0)),
+                        round(float(c.get("amount", c.get("spend", 0.0))), 2),
+                        round(float(c.get("pct_of_spend", 0.0)), 2),
+                    ]
+                    for c in categories
+                ),
+            )
+            _stream_table_sheet(
+                wb,
+                "Merchants",
+                [
+                    "merchant_display",
+                    "merchant_canonical",
+                    "txn_count",
+                    "total_amount",
+                    "top_category_slug",
+                    "top_category_label",
+                ],
+                [25, 25, 12, 15, 18, 18],
+                (
+                    [
+                        m.get("merchant_display", m.get("merchant", "")),
+                        m.get("merchant_canonical", m.get("canonical", "")),
+                        m.get("n", m.get("txn_count", 0)),
+                        round(float(m.get("amount", m.get("total_amount", 0.0))), 2),
+                        m.get("top_category_slug", m.get("category", "")),
+                        m.get("top_category_label", m.get("category_label", "")),
+                    ]
+                    for m in merchants
+                ),
+            )
+            # Like build_excel_bytes: no Transactions sheet for an empty window
+            first = next(rows, None)
+            if first is not None:
+                _stream_table_sheet(
+                    wb,
+                    "Transactions",
+                    _TXN_HEADERS,
+                    _TXN_WIDTHS,
+                    itertools.chain((first,), rows),
+                )
+    wb.save(out)
+
+
 def _build_excel_bytes_pandas(
     summary: dict,
     merchants: list[dict],
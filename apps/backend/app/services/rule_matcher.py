@@ -0,0 +1,261 @@
+"""
+Compiled multi-pattern matcher for categorization rules.
+
+All rule needles (merchant / description / pattern substrings) are lowercased
+once and loaded into a single Aho-Corasick automaton. Matching a transaction
+scans its merchant and description text once each, then checks only the rules
+that reference a needle actually found (plus rules with no conditions), so the
+cost per transaction no longer grows with the number of rules.
+
+Semantics mirror ``explain_service._rule_matches_txn``: every non-empty field on a
+rule must match (merchant ⊂ txn.merchant, description ⊂ txn.description,
+pattern ⊂ merchant or description) and the first rule in id order wins.
+
+The compiled form for active DB rules is cached per engine and rebuilt when a
+``Rule`` row is written through the ORM (mapper events) or when the
+``COUNT/MAX(id)/MAX(updated_at)`` fingerprint of active rules changes (writes
+from other workers or Core statements).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session
+
+from app.orm_models import RuleORM, Transaction
+
+
+class AhoCorasick:
+    """Minimal Aho-Corasick automaton over lowercased needles."""
+
+    def __init__(self, needles: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        outs: List[List[int]] = [[]]
+        for nid, needle in enumerate(needles):
+            state = 0
+            for ch in needle:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outs.append([])
+                state = nxt
+            outs[state].append(nid)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                outs[nxt].extend(outs[self._fail[nxt]])
+        self._out = [tuple(o) for o in outs]
+
+    def find(self, text: str) -> Set[int]:
+        """Return ids of all needles occurring in ``text`` (already lowercased)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+@dataclass(frozen=True)
+class _RuleSpec:
+    rule_id: Any
+    category: str
+    merchant: Optional[int]  # needle ids, None when the field is unset
+    description: Optional[int]
+    pattern: Optional[int]
+
+
+class CompiledRules:
+    """Ordered rule list compiled into one automaton + needle→rule index."""
+
+    def __init__(
+        self,
+        rules: Iterable[Tuple[Any, str, Optional[str], Optional[str], Optional[str]]],
+    ):
+        """``rules``: (rule_id, category, merchant, description, pattern) in priority order."""
+        needle_ids: Dict[str, int] = {}
+
+        def _nid(s: Optional[str]) -> Optional[int]:
+            s = (s or "").lower()
+            if not s:
+                return None
+            return needle_ids.setdefault(s, len(needle_ids))
+
+        self.specs: List[_RuleSpec] = []
+        for rule_id, category, merchant, description, pattern in rules:
+            self.specs.append(
+                _RuleSpec(
+                    rule_id, category, _nid(merchant), _nid(description), _nid(pattern)
+                )
+            )
+
+        by_needle: Dict[int, List[int]] = {}
+        self._always: List[int] = []
+        for idx, spec in enumerate(self.specs):
+            ids = {
+                n
+                for n in (spec.merchant, spec.description, spec.pattern)
+                if n is not None
+            }
+            if not ids:
+                self._always.append(idx)
+            for n in ids:
+                by_needle.setdefault(n, []).append(idx)
+        self._by_needle = by_needle
+        self._ac = AhoCorasick(list(needle_ids))
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def match(
+        self, merchant: Optional[str], description: Optional[str]
+    ) -> Optional[_RuleSpec]:
+        """First rule (priority order) matching the given text fields, or None."""
+        if not self.specs:
+            return None
+        in_m = self._ac.find((merchant or "").lower()) if merchant else set()
+        in_d = self._ac.find((description or "").lower()) if description else set()
+        cands: Set[int] = set(self._always)
+        for n in in_m | in_d:
+            cands.update(self._by_needle.get(n, ()))
+        for idx in sorted(cands):
+            s = self.specs[idx]
+            if s.merchant is not None and s.merchant not in in_m:
+                continue
+            if s.description is not None and s.description not in in_d:
+                continue
+            if (
+                s.pattern is not None
+                and s.pattern not in in_m
+                and s.pattern not in in_d
+            ):
+                continue
+            return s
+        return None
+
+
+# --- Active DB rules cache ------------------------------------------------------
+
+_lock = threading.Lock()
+_version = 0
+_cache: Dict[int, Tuple[int, Tuple[Any, ...], CompiledRules]] = {}
+
+
+def invalidate(*_args: Any) -> None:
+    """Drop compiled rules everywhere in this process (called on rule CRUD)."""
+    global _version
+    with _lock:
+        _version += 1
+        _cache.clear()
+
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(RuleORM, _evt, invalidate)
+
+
+def _fingerprint(db: Session) -> Tuple[Any, ...]:
+    row = (
+        db.query(
+            func.count(RuleORM.id), func.max(RuleORM.id), func.max(RuleORM.updated_at)
+        )
+        .filter(RuleORM.active.is_(True))
+        .one()
+    )
+    return tuple(row)
+
+
+def get_active_rules(db: Session) -> CompiledRules:
+    """Compiled matcher for all active rules (ordered by id), cached per engine."""
+    bind = db.get_bind()
+    key = id(getattr(bind, "engine", bind))
+    fp = _fingerprint(db)
+    hit = _cache.get(key)
+    if hit is not None and hit[0] == _version and hit[1] == fp:
+        return hit[2]
+    version = _version
+    rows = (
+        db.query(
+            RuleORM.id,
+            RuleORM.category,
+            RuleORM.merchant,
+            RuleORM.description,
+            RuleORM.pattern,
+        )
+        .filter(RuleORM.active.is_(True))
+        .order_by(RuleORM.id.asc())
+        .all()
+    )
+    compiled = CompiledRules(tuple(r) for r in rows)
+    with _lock:
+        if version == _version:
+            _cache[key] = (version, fp, compiled)
+    return compiled
+
+
+@lru_cache(maxsize=32)
+def compile_target_rules(
+    rules: Tuple[Tuple[str, str, str], ...],
+) -> CompiledRules:
+    """Compile legacy ``(target, pattern, category)`` rules (see rules_engine).
+
+    Rules with an unknown target can only match when their pattern is empty,
+    exactly as the original per-rule scan behaved.
+    """
+    specs = []
+    for i, (target, pattern, category) in enumerate(rules):
+        if target == "merchant":
+            specs.append((i, category, pattern, None, None))
+        elif target == "description" or not pattern:
+            specs.append((i, category, None, pattern, None))
+    return CompiledRules(specs)
+
+
+# --- Bulk write path ------------------------------------------------------------
+
+
+def bulk_set_category(
+    db: Session, assignments: Dict[int, str], chunk: int = 500
+) -> int:
+    """Set ``category`` for many transactions with one UPDATE per (category, chunk).
+
+    Replaces per-object dirty tracking; categories are few, so this is a small
+    constant number of statements regardless of row count. Caller commits.
+    """
+    by_cat: Dict[str, List[int]] = {}
+    for txn_id, cat in assignments.items():
+        by_cat.setdefault(cat, []).append(txn_id)
+    updated = 0
+    for cat, ids in by_cat.items():
+        for i in range(0, len(ids), chunk):
+            part = ids[i : i + chunk]
+            res = db.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(part))
+                .values(category=cat)
+                .execution_options(synchronize_session="evaluate")
+            )
+            updated += max(res.rowcount or 0, 0)
+    return updated
@@ -1,9 +1,9 @@
 # app/services/rules_apply.py
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
-from typing import Iterable, Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, List
 from app.transactions import Transaction
-from app.models import Rule
+from app.services.rule_matcher import bulk_set_category, get_active_rules
 
 UNLABELED_VALUES = ("", "Unknown")
 
@@ -66,71 +66,44 @@ def latest_month_from_data(db: Session) -> Optional[str]:
     return d.strftime("%Y-%m") if d else None
 
 
-def _rule_matches_txn(rule: Rule, txn: Transaction) -> bool:
-    """Extra safety when we match in-Python (primary filtering done in SQL)."""
-    ok = True
-    if rule.merchant:
-        ok = ok and (txn.merchant or "").lower().find(rule.merchant.lower()) >= 0
-    if rule.description:
-        ok = ok and (txn.description or "").lower().find(rule.description.lower()) >= 0
-    if rule.pattern:
-        ok = ok and (
-            rule.pattern.lower() in (txn.merchant or "").lower()
-            or rule.pattern.lower() in (txn.description or "").lower()
-        )
-    return ok
-
-
-def find_candidates(
-    db: Session, month: str, rules: Iterable[Rule]
-) -> List[Transaction]:
-    """
-    Prefilter: unlabeled for the month. We’ll still guard per-rule in Python.
-    """
-    q = (
-        db.query(Transaction)
-        .filter(Transaction.month == month)
-        .filter(is_unlabeled_expr())
-    )
-    return list(q.all())
-
-
 def apply_all_active_rules(
     db: Session, month: str
 ) -> Tuple[int, int, List[Dict[str, Any]]]:
     """
     Returns: (applied, skipped, details[])
     details: [{id, rule_id, category}] for applied items
+
+    Active rules come pre-compiled from `rule_matcher` (one automaton scan per
+    txn instead of txns × rules string ops); only (id, merchant, description)
+    columns are loaded and categories are written with bulk UPDATEs.
     """
-    rules: List[Rule] = (
-        db.query(Rule).filter(Rule.active.is_(True)).order_by(Rule.id.asc()).all()
-    )
-    if not rules:
+    compiled = get_active_rules(db)
+    if not len(compiled):
         return 0, 0, []
 
-    txns = find_candidates(db, month, rules)
-    applied = 0
+    rows = (
+        db.query(Transaction.id, Transaction.merchant, Transaction.description)
+        .filter(Transaction.month == month)
+        .filter(is_unlabeled_expr())
+        .all()
+    )
     skipped = 0
     details: List[Dict[str, Any]] = []
+    assignments: Dict[int, str] = {}
 
     # Simple deterministic application: first matching rule wins.
-    for t in txns:
-        matched: Optional[Rule] = None
-        for r in rules:
-            if _rule_matches_txn(r, t):
-                matched = r
-                break
-        if not matched:
+    for txn_id, merchant, description in rows:
+        matched = compiled.match(merchant, description)
+        if matched is None:
             skipped += 1
             continue
-        # Apply category
-        t.category = matched.category
-        applied += 1
+        assignments[txn_id] = matched.category
         details.append(
-            {"id": t.id, "rule_id": matched.id, "category": matched.category}
+            {"id": txn_id, "rule_id": matched.rule_id, "category": matched.category}
         )
 
-    if applied:
+    if assignments:
+        bulk_set_category(db, assignments)
         db.commit()
 
-    return applied, skipped, details
+    return len(assignments), skipped, details
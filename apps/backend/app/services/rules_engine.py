@@ -1,10 +1,9 @@
+from app.services.rule_matcher import compile_target_rules
+
+
 def apply_rules(txn, rules):
-    text_fields = {
-        "merchant": (txn.get("merchant") or "").lower(),
-        "description": (txn.get("description") or "").lower(),
-    }
-    for r in rules:
-        hay = text_fields.get(r["target"], "")
-        if r["pattern"].lower() in hay:
-            return r["category"]
-    return None
+    compiled = compile_target_rules(
+        tuple((r["target"], r["pattern"], r["category"]) for r in rules)
+    )
+    hit = compiled.match(txn.get("merchant"), txn.get("description"))
+    return hit.category if hit else None
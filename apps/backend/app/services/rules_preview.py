@@ -6,6 +6,7 @@ from typing import Optional, Tuple, List, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
 from app.models import Transaction
+from app.services.rule_matcher import bulk_set_category
 
 
 def _cutoff(window_days: Optional[int]) -> Optional[datetime]:
@@ -110,14 +111,11 @@ def backfill_rule_apply(
     q = _q_base(db, only_uncategorized)
     q = _q_window(q, _cutoff(window_days))
     q = _q_when(q, ri["when"])
+    q = q.with_entities(Transaction.id)
     if limit:
         q = q.limit(int(limit))
-    rows = q.all()
-    ids: List[int] = []
-    for t in rows:
-        ids.append(t.id)
-        if not dry_run:
-            t.category = new_cat
+    ids: List[int] = [row[0] for row in q.all()]
     if not dry_run and ids:
+        bulk_set_category(db, {i: new_cat for i in ids})
         db.commit()
     return {"matched": len(ids), "changed_ids": ids[:50]}
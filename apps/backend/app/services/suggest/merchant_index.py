@@ -0,0 +1,307 @@
+"""In-process merchant → label histogram index for merchant-majority voting.
+
+``majority_for_merchant`` used to run a ``JOIN ... WHERE lower(merchant)=...
+GROUP BY label`` query per suggestion; that predicate cannot use the merchant
+index and is repeated for every transaction of the same merchant in a batch.
+Instead, all label counts are loaded with one ``GROUP BY lower(merchant),
+label`` query into ``{merchant_lower: {label: count}}`` and lookups are dict
+hits.
+
+Freshness:
+
+* Label rows written through the ORM are applied incrementally when their
+  session commits (deltas collected at flush, discarded on rollback).
+* Writes from other workers / Core statements are caught by a
+  ``COUNT/MAX(id)`` fingerprint of the label table, checked at most every
+  ``RECHECK_SECONDS``; a mismatch triggers a full rebuild.
+* Transaction merchant edits and transaction deletes (which change the join),
+  and DDL on the label table, drop the index so the next lookup rebuilds it.
+  Bulk UPDATEs of other transaction columns (category, encrypted fields) keep
+  it.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, attributes
+
+from app.orm_models import Transaction
+
+from .metrics import record_merchant_index_lookup, record_merchant_index_rebuild
+
+# How often (seconds) to re-check the label table fingerprint for writes made
+# outside this process.
+RECHECK_SECONDS = 5.0
+
+_DELTAS = "merchant_index_deltas"
+_DELTAS_SEQ = "merchant_index_deltas_seq"
+_STALE = "merchant_index_stale"
+
+Histogram = Dict[str, int]
+
+
+class MerchantLabelIndex:
+    """Label histograms keyed by lowercased merchant."""
+
+    def __init__(
+        self,
+        histograms: Dict[str, Histogram],
+        fingerprint: Tuple[int, Optional[int]],
+    ):
+        self.histograms = histograms
+        self.fingerprint = fingerprint
+        self.checked_at = time.monotonic()
+        self.seq = next(_build_seq)
+
+    def get(self, merchant: str) -> Optional[Histogram]:
+        return self.histograms.get(merchant.lower())
+
+    def apply(self, deltas: Iterable[Tuple[Optional[str], str, int, int]]) -> None:
+        """Apply (merchant, label, +1/-1, label_id) deltas and advance the fingerprint."""
+        count, max_id = self.fingerprint
+        for merchant, label, delta, label_id in deltas:
+            count += delta
+            if delta > 0 and label_id is not None:
+                max_id = max(max_id or 0, label_id)
+            if not merchant:
+                continue
+            hist = self.histograms.setdefault(merchant.lower(), {})
+            n = hist.get(label, 0) + delta
+            if n > 0:
+                hist[label] = n
+            else:
+                hist.pop(label, None)
+                if not hist:
+                    self.histograms.pop(merchant.lower(), None)
+        self.fingerprint = (count, max_id)
+
+
+_lock = threading.Lock()
+_indexes: Dict[int, MerchantLabelIndex] = {}
+_build_seq = itertools.count(1)
+
+
+def _engine_key(db: Session) -> int:
+    bind = db.get_bind()
+    return id(getattr(bind, "engine", bind))
+
+
+def _label_table():
+    from .merchant_labeler import LABEL_COL, LabelTable
+
+    if LabelTable is None:
+        return None, None
+    return LabelTable, getattr(LabelTable, LABEL_COL)
+
+
+def _fingerprint(db: Session) -> Tuple[int, Optional[int]]:
+    LabelTable, _ = _label_table()
+    count, max_id = db.execute(
+        select(func.count(LabelTable.id), func.max(LabelTable.id))
+    ).one()
+    return int(count or 0), max_id
+
+
+def build(db: Session) -> MerchantLabelIndex:
+    """Load every merchant's label histogram with a single GROUP BY query."""
+    LabelTable, label_attr = _label_table()
+    fp = _fingerprint(db)
+    merchant = func.lower(Transaction.merchant)
+    rows = db.execute(
+        select(merchant, label_attr, func.count())
+        .join(Transaction, Transaction.id == LabelTable.txn_id)
+        .where(Transaction.merchant.is_not(None), Transaction.merchant != "")
+        .group_by(merchant, label_attr)
+    ).all()
+    histograms: Dict[str, Histogram] = defaultdict(dict)
+    for m, label, cnt in rows:
+        histograms[m][str(label)] = int(cnt)
+    record_merchant_index_rebuild(len(histograms))
+    return MerchantLabelIndex(dict(histograms), fp)
+
+
+def get_index(db: Session) -> Optional[MerchantLabelIndex]:
+    """Current index for this session's engine, rebuilt if stale."""
+    if _label_table()[0] is None:
+        return None
+    key = _engine_key(db)
+    idx = _indexes.get(key)
+    now = time.monotonic()
+    if idx is not None:
+        if now - idx.checked_at < RECHECK_SECONDS:
+            return idx
+        if _fingerprint(db) == idx.fingerprint:
+            idx.checked_at = now
+            return idx
+    idx = build(db)
+    with _lock:
+        _indexes[key] = idx
+    return idx
+
+
+def label_histogram(db: Session, merchant: str) -> Optional[Histogram]:
+    """Label → count for a merchant (case-insensitive), or None if unlabeled."""
+    if not merchant:
+        return None
+    idx = get_index(db)
+    hist = idx.get(merchant) if idx is not None else None
+    record_merchant_index_lookup(hit=bool(hist))
+    return hist or None
+
+
+def majority_label(hist: Histogram) -> Tuple[str, int, int]:
+    """(label, count, total) for the most frequent label (ties by label name)."""
+    total = sum(hist.values())
+    label, cnt = max(hist.items(), key=lambda kv: (kv[1], kv[0]))
+    return label, cnt, total
+
+
+def invalidate(*_args: Any, **_kw: Any) -> None:
+    """Drop all cached indexes (next lookup rebuilds)."""
+    with _lock:
+        _indexes.clear()
+
+
+# --- Change tracking --------------------------------------------------------------
+
+
+def _label_changes(session: Session) -> List[Tuple[int, str, int, Optional[int]]]:
+    """(txn_id, label, +1/-1, label_id) for label rows in this flush."""
+    LabelTable, label_attr = _label_table()
+    if LabelTable is None:
+        return []
+    col = label_attr.key
+    out: List[Tuple[int, str, int, Optional[int]]] = []
+    for obj in session.new:
+        if isinstance(obj, LabelTable):
+            out.append((obj.txn_id, str(getattr(obj, col)), 1, obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, LabelTable):
+            hist = attributes.get_history(obj, col)
+            old = (hist.deleted or hist.unchanged or [getattr(obj, col)])[0]
+            out.append((obj.txn_id, str(old), -1, obj.id))
+    for obj in session.dirty:
+        if not isinstance(obj, LabelTable):
+            continue
+        hist = attributes.get_history(obj, col)
+        if hist.added and hist.deleted:
+            out.append((obj.txn_id, str(hist.deleted[0]), -1, None))
+            out.append((obj.txn_id, str(hist.added[0]), 1, None))
+    return out
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    LabelTable, _ = _label_table()
+    if any(isinstance(o, Transaction) for o in session.deleted) or any(
+        (
+            isinstance(o, Transaction)
+            and attributes.get_history(o, "merchant").has_changes()
+        )
+        or (
+            LabelTable is not None
+            and isinstance(o, LabelTable)
+            and attributes.get_history(o, "txn_id").has_changes()
+        )
+        for o in session.dirty
+    ):
+        session.info[_STALE] = True
+
+    changes = _label_changes(session)
+    if not changes:
+        return
+    txn_ids = {c[0] for c in changes}
+    merchants = dict(
+        session.execute(
+            select(Transaction.id, Transaction.merchant).where(
+                Transaction.id.in_(txn_ids)
+            )
+        ).all()
+    )
+    # Indexes built after this point may already see these uncommitted rows
+    session.info.setdefault(_DELTAS_SEQ, next(_build_seq))
+    session.info.setdefault(_DELTAS, []).extend(
+        (merchants.get(txn_id), label, delta, label_id)
+        for txn_id, label, delta, label_id in changes
+    )
+
+
+# Transaction columns the index reads (the join key and the grouped merchant)
+_JOIN_COLS = frozenset({"id", "merchant"})
+
+
+def _update_columns(stmt) -> Optional[Set[str]]:
+    """Column names set by a bulk UPDATE, or None when they can't be resolved."""
+    values = getattr(stmt, "_values", None)
+    if not values:
+        return None  # executemany / bulk-by-primary-key form
+    return {getattr(col, "key", str(col)) for col in values}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_dml(orm_execute_state) -> None:
+    if not (orm_execute_state.is_delete or orm_execute_state.is_update):
+        return
+    mapper = orm_execute_state.bind_mapper
+    cls = mapper.class_ if mapper is not None else None
+    target = getattr(orm_execute_state.statement, "table", None)
+    LabelTable, _ = _label_table()
+    if cls is Transaction or target is Transaction.__table__:
+        if orm_execute_state.is_update:
+            cols = _update_columns(orm_execute_state.statement)
+            if cols is not None and not cols & _JOIN_COLS:
+                return
+    elif LabelTable is None or (
+        cls is not LabelTable and target is not LabelTable.__table__
+    ):
+        return
+    orm_execute_state.session.info[_STALE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    stale = session.info.pop(_STALE, False)
+    deltas = session.info.pop(_DELTAS, None)
+    seq = session.info.pop(_DELTAS_SEQ, 0)
+    if stale:
+        invalidate()
+        return
+    if not deltas:
+        return
+    try:
+        key = _engine_key(session)
+    except Exception:
+        invalidate()
+        return
+    with _lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            return
+        if idx.seq > seq:
+            # Built mid-transaction (possibly counting these rows already)
+            _indexes.pop(key, None)
+        else:
+            idx.apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    for k in (_DELTAS, _DELTAS_SEQ, _STALE):
+        session.info.pop(k, None)
+
+
+def _listen_ddl() -> None:
+    LabelTable, _ = _label_table()
+    for table in (Transaction.__table__, getattr(LabelTable, "__table__", None)):
+        if table is not None:
+            event.listen(table, "after_create", invalidate)
+            event.listen(table, "after_drop", invalidate)
+
+
+_listen_ddl()
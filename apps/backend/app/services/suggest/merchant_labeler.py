@@ -11,11 +11,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
-from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.orm_models import Transaction
-
 # Try both label tables gracefully
 try:
     from app.orm_models import UserLabel as LabelTable
@@ -30,6 +27,8 @@ except Exception:
         LabelTable = None
         LABEL_COL = None
 
+from .merchant_index import label_histogram, majority_label  # noqa: E402
+
 # Tunables
 MIN_SUPPORT = 3  # Minimum number of labeled transactions
 MAJORITY_P = 0.70  # Minimum proportion for majority label
@@ -58,22 +57,12 @@ def majority_for_merchant(db: Session, merchant: str) -> Optional[MerchantMajori
     if not merchant or LabelTable is None:
         return None
 
-    # SELECT label, COUNT(*) FROM labels JOIN transactions ON ...
-    # WHERE lower(merchant)=... GROUP BY label
-    label_attr = getattr(LabelTable, LABEL_COL)
-    q = (
-        select(label_attr.label("lbl"), func.count().label("cnt"))
-        .join(Transaction, Transaction.id == LabelTable.txn_id)
-        .where(func.lower(Transaction.merchant) == merchant.lower())
-        .group_by(label_attr)
-    )
-    rows = db.execute(q).all()
-
-    if not rows:
+    # Label histogram from the in-process merchant index (see merchant_index)
+    hist = label_histogram(db, merchant)
+    if not hist:
         return None
 
-    total = sum(r.cnt for r in rows)
-    lbl, cnt = max(((r.lbl, r.cnt) for r in rows), key=lambda x: x[1])
+    lbl, cnt, total = majority_label(hist)
     p = cnt / max(total, 1)
 
     if cnt >= MIN_SUPPORT and p >= MAJORITY_P:
@@ -1,6 +1,6 @@
 """Prometheus metrics for ML suggestions."""
 
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge
 
 # Suggestion acceptance tracking
 ml_suggestion_accepts_total = Counter(
@@ -30,6 +30,23 @@ ml_merchant_majority_hits_total = Counter(
     ["merchant_label"],
 )
 
+# Merchant → label index (merchant_index.py)
+ml_merchant_index_lookups_total = Counter(
+    "lm_ml_merchant_index_lookups_total",
+    "Merchant label index lookups (hit = merchant has labeled history)",
+    ["result"],
+)
+
+ml_merchant_index_rebuilds_total = Counter(
+    "lm_ml_merchant_index_rebuilds_total",
+    "Full rebuilds of the in-process merchant label index",
+)
+
+ml_merchant_index_merchants = Gauge(
+    "lm_ml_merchant_index_merchants",
+    "Merchants with labeled history in the merchant label index",
+)
+
 
 def record_suggestion_acceptance(
     *, model_version: str | None, source: str, label: str, accepted: bool
@@ -70,3 +87,22 @@ def record_merchant_majority_hit(label: str):
         label: Category label from merchant majority
     """
     ml_merchant_majority_hits_total.labels(merchant_label=label).inc()
+
+
+def record_merchant_index_lookup(hit: bool):
+    """Record a merchant label index lookup.
+
+    Args:
+        hit: Whether the merchant had any labeled history
+    """
+    ml_merchant_index_lookups_total.labels(result="hit" if hit else "miss").inc()
+
+
+def record_merchant_index_rebuild(merchants: int):
+    """Record a full merchant label index rebuild.
+
+    Args:
+        merchants: Number of merchants in the rebuilt index
+    """
+    ml_merchant_index_rebuilds_total.inc()
+    ml_merchant_index_merchants.set(merchants)
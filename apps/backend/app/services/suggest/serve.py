@@ -18,6 +18,7 @@ from ...metrics_ml import (
     lm_ml_predict_latency_seconds,
 )
 from ...ml.runtime import predict_row as ml_predict_row
+from ...ml.runtime import predict_rows as ml_predict_rows
 from ...ml.feature_build import normalize_description
 from .heuristics import suggest_for_txn
 from .features import extract_features, FEATURE_NAMES
@@ -219,6 +220,76 @@ def suggest_auto(
         - features_hash: Hash of features used (None for heuristic)
         - source: "rule", "model", "shadow", "ask"
     """
+    model_features = None
+    model_result = None
+
+    if config.SUGGEST_ENABLE_SHADOW:
+        # Build feature row
+        model_features = _mk_row(txn)
+
+        # Time the prediction
+        t0 = time.time()
+        model_result = ml_predict_row(model_features)
+        latency = time.time() - t0
+
+        # Record latency
+        lm_ml_predict_latency_seconds.observe(latency)
+
+    return _suggest_one(txn, db, model_features, model_result)
+
+
+def suggest_batch(
+    txns: List[Dict], user_id: Optional[str] = None, db=None
+) -> List[Tuple[List[Dict], str, Optional[str], str]]:
+    """Batch variant of suggest_auto.
+
+    Builds all model rows up front and runs a single batched prediction
+    (one predict_proba call), then applies the same per-row merchant
+    majority / rules / shadow / ask-gate logic as suggest_auto.
+
+    Args:
+        txns: Transaction dicts (same shape as suggest_auto)
+        user_id: Optional user ID for sticky canary rollout
+        db: Database session for merchant labeler
+
+    Returns:
+        One (candidates, model_id, features_hash, source) tuple per input
+        transaction, in input order
+    """
+    if not txns:
+        return []
+
+    model_rows: List[Optional[Dict]] = [None] * len(txns)
+    model_results: List[Optional[Dict]] = [None] * len(txns)
+
+    if config.SUGGEST_ENABLE_SHADOW:
+        model_rows = [_mk_row(txn) for txn in txns]
+
+        # Time the batched prediction
+        t0 = time.time()
+        model_results = ml_predict_rows(model_rows)
+        latency = time.time() - t0
+
+        # Record latency (one observation per predict call)
+        lm_ml_predict_latency_seconds.observe(latency)
+
+    return [
+        _suggest_one(txn, db, row, result)
+        for txn, row, result in zip(txns, model_rows, model_results)
+    ]
+
+
+def _suggest_one(
+    txn: Dict,
+    db,
+    model_features: Optional[Dict],
+    model_result: Optional[Dict],
+) -> Tuple[List[Dict], str, Optional[str], str]:
+    """Rank rule/majority/model candidates for one transaction.
+
+    Shared by suggest_auto and suggest_batch; ``model_result`` is the
+    runtime prediction for ``model_features`` or None when shadow is off.
+    """
     candidates = []
 
     # 0) HIGHEST PRIORITY: Merchant Majority (Top-K)
@@ -248,26 +319,14 @@ def suggest_auto(
             }
         )
 
-    # 2) SHADOW = MODEL (always predict if enabled)
+    # 2) SHADOW = MODEL (prediction supplied by caller when enabled)
     model_available = False
     model_label = None
     model_conf = 0.0
-    model_result = None
     features_hash = None
     model_id = "heuristic@v1"
 
-    if config.SUGGEST_ENABLE_SHADOW:
-        # Build feature row
-        model_features = _mk_row(txn)
-
-        # Time the prediction
-        t0 = time.time()
-        model_result = ml_predict_row(model_features)
-        latency = time.time() - t0
-
-        # Record latency
-        lm_ml_predict_latency_seconds.observe(latency)
-
+    if model_result is not None:
         model_available = model_result.get("available", False)
         ml_predict_requests_total.labels(available=str(model_available)).inc()
 
@@ -4,9 +4,10 @@ from dataclasses import dataclass
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_
 from sqlalchemy.orm import Query
 
+from app.services.txn_search import text_match
 from app.transactions import Transaction
 
 
@@ -65,11 +66,11 @@ def apply_export_filters(query: Query, filters: ExportFilters) -> Query:
 
     # Search filter (case-insensitive substring match on description or merchant)
     if filters.search:
-        like_pattern = f"%{filters.search}%"
         conditions.append(
-            or_(
-                Transaction.description.ilike(like_pattern),
-                Transaction.merchant.ilike(like_pattern),
+            text_match(
+                query.session,
+                [Transaction.description, Transaction.merchant],
+                [filters.search],
             )
         )
 
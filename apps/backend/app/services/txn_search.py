@@ -0,0 +1,191 @@
+"""
+Indexed substring search over transaction text columns.
+
+``ILIKE '%term%'`` on merchant / description / category cannot use the btree
+indexes on ``transactions``, so NL queries, the transactions list search and
+export filters scanned a user's whole history. :func:`text_match` builds the
+same predicate on top of a trigram index instead:
+
+* Postgres: ``pg_trgm`` GIN indexes (``gin_trgm_ops``) on merchant,
+  merchant_canonical, description and category (migration
+  ``20261016_add_txn_text_search``). The planner serves the unchanged
+  ``ILIKE`` predicates from them, so on Postgres the clause stays ``ILIKE``.
+* SQLite: an external-content FTS5 table ``transactions_fts`` using the
+  ``trigram`` tokenizer, kept in sync by AFTER INSERT / UPDATE / DELETE
+  triggers (so ORM, Core bulk and raw SQL writes are all covered). Terms of
+  three or more characters become
+  ``id IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ...)``.
+
+Terms shorter than a trigram or containing LIKE wildcards, columns outside the
+index, and databases where the index is missing fall back to ``ILIKE``.
+
+The SQLite table and triggers are created with the ``transactions`` table
+(``metadata.create_all``) and by the migration.
+``python -m app.cli txn-search-rebuild`` repopulates the index from scratch.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import event, literal_column, or_, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.orm_models import Transaction
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "transactions_fts"
+# Indexed text columns (same set on both backends)
+INDEXED = ("merchant", "merchant_canonical", "description", "category")
+# Trigram indexes can only narrow terms of at least this many characters
+MIN_TERM_LEN = 3
+
+_READY_KEY = "txn_search_fts_ready"
+
+_cols = ", ".join(INDEXED)
+_new = ", ".join(f"new.{c}" for c in INDEXED)
+_old = ", ".join(f"old.{c}" for c in INDEXED)
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_cols}, content='transactions', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON transactions BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) "
+    f"VALUES ('delete', old.id, {_old}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_cols} "
+    f"ON transactions BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) "
+    f"VALUES ('delete', old.id, {_old}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new}); END",
+)
+SQLITE_DROP = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+PG_INDEXES = {f"ix_transactions_{c}_trgm": c for c in INDEXED}
+
+
+# --- Schema -----------------------------------------------------------------------
+
+
+def install_sqlite(conn: Connection) -> bool:
+    """Create the FTS5 table + triggers and index existing rows (SQLite only)."""
+    if conn.dialect.name != "sqlite":
+        return False
+    try:
+        for stmt in SQLITE_DDL:
+            conn.exec_driver_sql(stmt)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    except Exception as e:  # e.g. SQLite built without FTS5 / trigram (< 3.34)
+        logger.warning("txn_search: FTS5 trigram index unavailable: %s", e)
+        conn.info[_READY_KEY] = False
+        return False
+    conn.info[_READY_KEY] = True
+    return True
+
+
+def drop_sqlite(conn: Connection) -> None:
+    if conn.dialect.name != "sqlite":
+        return
+    for stmt in SQLITE_DROP:
+        conn.exec_driver_sql(stmt)
+    conn.info.pop(_READY_KEY, None)
+
+
+def rebuild(db: Session) -> str:
+    """Repopulate the search index from ``transactions``. Caller commits."""
+    conn = db.connection()
+    if conn.dialect.name == "sqlite":
+        return "fts5_rebuilt" if install_sqlite(conn) else "fts5_unavailable"
+    if conn.dialect.name == "postgresql":
+        for name in PG_INDEXES:
+            conn.exec_driver_sql(f"REINDEX INDEX {name}")
+        return "trgm_reindexed"
+    return "unsupported_dialect"
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _create_fts(target, connection, **kw) -> None:
+    install_sqlite(connection)
+
+
+@event.listens_for(Transaction.__table__, "before_drop")
+def _drop_fts(target, connection, **kw) -> None:
+    drop_sqlite(connection)
+
+
+# --- Query ------------------------------------------------------------------------
+
+
+def _fts_ready(db: Session) -> bool:
+    conn = db.connection()
+    ready = conn.info.get(_READY_KEY)
+    if ready is None:
+        ready = (
+            conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                (FTS_TABLE,),
+            ).first()
+            is not None
+        )
+        conn.info[_READY_KEY] = ready
+    return ready
+
+
+def _phrase(term: str) -> str:
+    # A quoted trigram phrase matches the term as a contiguous substring
+    return '"' + term.replace('"', '""') + '"'
+
+
+def match_query(columns: Sequence[str], terms: Iterable[str]) -> str:
+    """FTS5 query: any of ``terms`` as a substring of any of ``columns``."""
+    return "{%s} : (%s)" % (" ".join(columns), " OR ".join(map(_phrase, terms)))
+
+
+def text_match(
+    db: Session,
+    columns: Sequence[ColumnElement],
+    terms: Iterable[str],
+) -> ColumnElement:
+    """Case-insensitive "any column contains any term" predicate on Transaction.
+
+    Equivalent to ``or_(col.ilike(f"%{t}%") for col in columns for t in terms)``
+    but index-backed where possible (see module docstring).
+    """
+    terms = [t for t in (str(t) for t in terms) if t]
+    ilike = [col.ilike(f"%{t}%") for t in terms for col in columns]
+    if not terms or db.get_bind().dialect.name != "sqlite":
+        return or_(*ilike)
+
+    names = [getattr(col, "key", None) for col in columns]
+    # LIKE wildcards inside a term have no FTS equivalent; keep those on ILIKE
+    long_terms = [
+        t
+        for t in terms
+        if len(t.strip()) >= MIN_TERM_LEN and "%" not in t and "_" not in t
+    ]
+    if (
+        not long_terms
+        or any(n not in INDEXED for n in names)
+        or not _fts_ready(db)
+    ):
+        return or_(*ilike)
+
+    matched = (
+        select(literal_column("rowid"))
+        .select_from(table(FTS_TABLE))
+        .where(literal_column(FTS_TABLE).op("MATCH")(match_query(names, long_terms)))
+    )
+    clauses: List[ColumnElement] = [Transaction.id.in_(matched)]
+    clauses.extend(
+        col.ilike(f"%{t}%") for t in terms if t not in long_terms for col in columns
+    )
+    return or_(*clauses)
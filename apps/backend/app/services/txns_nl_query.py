@@ -7,9 +7,10 @@ from calendar import monthrange
 from typing import Optional, Tuple, List, Dict, Any
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_
 
 from app.orm_models import Transaction  # assumes existing ORM model
+from app.services.txn_search import text_match
 
 # ---- helpers -----------------------------------------------------
 
@@ -269,17 +270,16 @@ def run_txn_query(db: Session, nlq: NLQuery) -> Dict[str, Any]:
     if nlq.start and nlq.end:
         filters.append(and_(Transaction.date >= nlq.start, Transaction.date <= nlq.end))
     if nlq.merchants:
-        ors = []
-        for m in nlq.merchants:
-            # match either canonical or raw merchant
-            ors.append(Transaction.merchant.ilike(f"%{m}%"))
-            if hasattr(Transaction, "merchant_canonical"):
-                # no .lower(); merchant_canonical should already be normalized
-                ors.append(Transaction.merchant_canonical.ilike(f"%{m}%"))
-        filters.append(or_(*ors))
+        # match either canonical or raw merchant (trigram/FTS index backed)
+        filters.append(
+            text_match(
+                db,
+                [Transaction.merchant, Transaction.merchant_canonical],
+                nlq.merchants,
+            )
+        )
     if nlq.categories:
-        ors = [Transaction.category.ilike(f"%{c}%") for c in nlq.categories]
-        filters.append(or_(*ors))
+        filters.append(text_match(db, [Transaction.category], nlq.categories))
     if nlq.min_amount is not None:
         # amounts likely stored + for income, - for spend; normalize by abs for spend queries
         filters.append(func.abs(Transaction.amount) >= nlq.min_amount)
@@ -8,6 +8,8 @@ import email.utils as eut
 import threading
 import logging
 
+from app.services.http_clients import get_session
+
 # --- GPU Request Guardrails --------------------------------------------------
 # Prevent concurrent GPU inference requests that can cause timeouts/OOM
 _gpu_request_lock = threading.Lock()
@@ -112,7 +114,9 @@ def _post_chat(
         # Let connection/timeout errors bubble up for caller to handle
         # Use separate connect/read timeouts for better early-fail behavior.
         eff_timeout = (LLM_CONNECT_TIMEOUT, min(timeout, LLM_READ_TIMEOUT))
-        r = requests.post(url, json=payload, headers=headers, timeout=eff_timeout)
+        r = get_session("llm").post(
+            url, json=payload, headers=headers, timeout=eff_timeout
+        )
         if r.status_code == 429:
             ra = _parse_retry_after(r.headers.get("Retry-After"))
             base_delay = delays[attempt] if attempt < len(delays) else delays[-1]
@@ -322,7 +326,7 @@ def _call_llm_impl(
                 "stream": False,
                 "options": {"temperature": temperature, "top_p": top_p},
             }
-            r = requests.post(
+            r = get_session("llm").post(
                 f"{root}/api/chat", json=chat_body, headers=headers, timeout=20
             )
             if 200 <= r.status_code < 300:
@@ -348,7 +352,7 @@ def _call_llm_impl(
                 "stream": False,
                 "options": {"temperature": temperature, "top_p": top_p},
             }
-            r2 = requests.post(
+            r2 = get_session("llm").post(
                 f"{root}/api/generate", json=gen_body, headers=headers, timeout=20
             )
             if 200 <= r2.status_code < 300:
@@ -532,7 +536,7 @@ def list_models() -> Dict[str, List[Dict[str, str]]]:
     if provider == "ollama":
         root = base_ollama.rstrip("/")
         url = f"{root}/api/tags"
-        r = requests.get(url, timeout=15)
+        r = get_session("llm").get(url, timeout=15)
         r.raise_for_status()
         data = r.json()
         # data = {"models":[{"name":"llama3.1:8b", ...}, ...]}
@@ -548,7 +552,7 @@ def list_models() -> Dict[str, List[Dict[str, str]]]:
     # OpenAI (or any OpenAI-compatible host)
     url = f"{base_openai.rstrip('/')}/models"
     headers = {"Authorization": f"Bearer {key}"}
-    r = requests.get(url, headers=headers, timeout=15)
+    r = get_session("llm").get(url, headers=headers, timeout=15)
     r.raise_for_status()
     data = r.json()
     # data = {"object":"list","data":[{"id":"gpt-5", ...}, ...]}
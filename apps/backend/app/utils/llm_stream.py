@@ -12,10 +12,14 @@ import httpx
 
 from app.config import settings
 from app.utils.request_ctx import get_request_id
+from app.services.http_clients import get_async_client
 
 
 _log = logging.getLogger(__name__)
 
+# Fail fast on connect, allow slow token generation between chunks
+_STREAM_TIMEOUT = httpx.Timeout(10.0, read=60.0)
+
 
 def _get_effective_openai_key() -> str:
     """
@@ -131,39 +135,40 @@ async def _stream_from_local(
     _log.info("llm_stream.local start rid=%s base=%s model=%s url=%s", rid, base, model, url)
 
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=60.0)) as client:
-            async with client.stream("POST", url, json=payload, headers=headers) as res:
-                res.raise_for_status()
+        async with get_async_client("llm").stream(
+            "POST", url, json=payload, headers=headers, timeout=_STREAM_TIMEOUT
+        ) as res:
+            res.raise_for_status()
 
-                async for line in res.aiter_lines():
-                    if not line:
-                        continue
+            async for line in res.aiter_lines():
+                if not line:
+                    continue
 
-                    # Skip SSE comments
-                    if line.startswith(":"):
-                        continue
+                # Skip SSE comments
+                if line.startswith(":"):
+                    continue
 
-                    # Parse data: prefix
-                    if line.startswith("data: "):
-                        data_str = line[6:]
+                # Parse data: prefix
+                if line.startswith("data: "):
+                    data_str = line[6:]
 
-                        # [DONE] marker
-                        if data_str.strip() == "[DONE]":
-                            break
+                    # [DONE] marker
+                    if data_str.strip() == "[DONE]":
+                        break
 
-                        try:
-                            chunk = json.loads(data_str)
-                            delta = chunk.get("choices", [{}])[0].get("delta", {})
-                            content = delta.get("content")
+                    try:
+                        chunk = json.loads(data_str)
+                        delta = chunk.get("choices", [{}])[0].get("delta", {})
+                        content = delta.get("content")
 
-                            if content:
-                                yield {
-                                    "type": "token",
-                                    "data": {"text": content},
-                                }
+                        if content:
+                            yield {
+                                "type": "token",
+                                "data": {"text": content},
+                            }
 
-                        except json.JSONDecodeError:
-                            continue
+                    except json.JSONDecodeError:
+                        continue
 
         _log.info("llm_stream.local success rid=%s", rid)
     except httpx.HTTPStatusError as http_err:
@@ -228,39 +233,40 @@ async def _stream_from_openai(
         model,
     )
 
-    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=60.0)) as client:
-        async with client.stream("POST", url, json=payload, headers=headers) as res:
-            res.raise_for_status()
+    async with get_async_client("llm").stream(
+        "POST", url, json=payload, headers=headers, timeout=_STREAM_TIMEOUT
+    ) as res:
+        res.raise_for_status()
 
-            async for line in res.aiter_lines():
-                if not line:
-                    continue
+        async for line in res.aiter_lines():
+            if not line:
+                continue
 
-                # Skip SSE comments
-                if line.startswith(":"):
-                    continue
+            # Skip SSE comments
+            if line.startswith(":"):
+                continue
 
-                # Parse data: prefix
-                if line.startswith("data: "):
-                    data_str = line[6:]
+            # Parse data: prefix
+            if line.startswith("data: "):
+                data_str = line[6:]
 
-                    # [DONE] marker
-                    if data_str.strip() == "[DONE]":
-                        break
+                # [DONE] marker
+                if data_str.strip() == "[DONE]":
+                    break
 
-                    try:
-                        chunk = json.loads(data_str)
-                        delta = chunk.get("choices", [{}])[0].get("delta", {})
-                        content = delta.get("content")
+                try:
+                    chunk = json.loads(data_str)
+                    delta = chunk.get("choices", [{}])[0].get("delta", {})
+                    content = delta.get("content")
 
-                        if content:
-                            yield {
-                                "type": "token",
-                                "data": {"text": content},
-                            }
+                    if content:
+                        yield {
+                            "type": "token",
+                            "data": {"text": content},
+                        }
 
-                    except json.JSONDecodeError:
-                        continue
+                except json.JSONDecodeError:
+                    continue
 
     _log.info("llm_stream.openai success rid=%s", rid)
 
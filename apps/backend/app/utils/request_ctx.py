@@ -2,7 +2,7 @@ from __future__ import annotations
 from contextvars import ContextVar
 from typing import Optional
 
-# Per-request correlation id set by RequestLogMiddleware
+# Per-request correlation id set by RequestStackMiddleware
 request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
 
 
@@ -1,53 +1,44 @@
 from __future__ import annotations
-import json
 import os
 from pathlib import Path
 from typing import Dict, Set, Tuple
 from datetime import date
 
+from app.utils.state_store import PersistentList
+
 STORE_DIR = Path(__file__).resolve().parent.parent / "data" / "store"
 STORE_DIR.mkdir(parents=True, exist_ok=True)
+# Legacy full-snapshot files; imported once into the op logs below
 TXNS_PATH = STORE_DIR / "txns.json"
 LABELS_PATH = STORE_DIR / "user_labels.json"
 RULES_PATH = STORE_DIR / "rules.json"
 
-
-def _read_json(path: Path, default):
-    try:
-        if path.exists():
-            with path.open("r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return default
-
-
-def _write_json(path: Path, data) -> None:
-    # Secondary guard: legacy callsites bypassing save_state
-    if not _should_persist_state():
-        return
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
-    try:
-        tmp.replace(path)
-    except PermissionError:
-        try:
-            with path.open("w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False)
-        except Exception:
-            if os.getenv("PYTEST_CURRENT_TEST") or (
-                os.getenv("APP_ENV") or ""
-            ).lower() in {"test", "tests", "ci"}:
-                return
-            raise
+# name -> (op log, legacy json)
+_STORES = {
+    "txns": (STORE_DIR / "txns.log.jsonl", TXNS_PATH),
+    "user_labels": (STORE_DIR / "user_labels.log.jsonl", LABELS_PATH),
+    "rules": (STORE_DIR / "rules.log.jsonl", RULES_PATH),
+}
+# Entries kept per list (oldest dropped); the DB is the source of truth
+MAX_RESIDENT = int(os.getenv("STATE_MAX_RESIDENT", "50000"))
 
 
 def load_state(app) -> None:
-    """Load txns/rules/labels into app.state if present on disk."""
-    app.state.txns = _read_json(TXNS_PATH, [])
-    app.state.user_labels = _read_json(LABELS_PATH, [])
-    app.state.rules = _read_json(RULES_PATH, [])
+    """Attach lazily loaded txns/rules/labels lists to app.state.
+
+    No file is read here; each list replays its log on first access.
+    """
+    for name, (log_path, legacy) in _STORES.items():
+        setattr(
+            app.state,
+            name,
+            PersistentList(
+                log_path,
+                legacy_json=legacy,
+                max_resident=MAX_RESIDENT,
+                should_persist=_should_persist_state,
+            ),
+        )
 
 
 def _should_persist_state() -> bool:
@@ -62,13 +53,28 @@ def _should_persist_state() -> bool:
 
 
 def save_state(app) -> None:
+    """Append pending deltas of each state list to its log (no full rewrite)."""
     if not _should_persist_state():
         return {"ok": True, "skipped": True, "reason": "persistence disabled by env"}
     try:
-        _write_json(TXNS_PATH, getattr(app.state, "txns", []))
-        _write_json(LABELS_PATH, getattr(app.state, "user_labels", []))
-        _write_json(RULES_PATH, getattr(app.state, "rules", []))
-        return {"ok": True}
+        written = 0
+        for name, (log_path, legacy) in _STORES.items():
+            current = getattr(app.state, name, None)
+            if current is None:
+                continue
+            if not isinstance(current, PersistentList):
+                # Plain list assigned by legacy code: persist it as a snapshot
+                store = PersistentList(
+                    log_path,
+                    legacy_json=legacy,
+                    max_resident=MAX_RESIDENT,
+                    should_persist=_should_persist_state,
+                )
+                store.reset(current)
+                setattr(app.state, name, store)
+                current = store
+            written += current.flush()
+        return {"ok": True, "written": written}
     except PermissionError as e:
         return {"ok": False, "error": f"permission_error:{e.__class__.__name__}"}
 
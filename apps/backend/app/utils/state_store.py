@@ -0,0 +1,304 @@
+"""Append-only persistence for the legacy in-memory state lists.
+
+``app.state.txns`` / ``user_labels`` / ``rules`` used to be rewritten in full
+as JSON on every shutdown and parsed in full on startup. Each list is now a
+``PersistentList`` backed by a JSON-lines operation log:
+
+* nothing is read at startup; the log is replayed on first access,
+* mutations are buffered as deltas (``{"a": doc}`` add, ``{"u": doc}`` replace
+  by ``id``, ``{"c": 1}`` clear) and ``flush()`` appends only those lines,
+* the log is compacted into a plain snapshot of adds once it holds more than
+  ``COMPACT_RATIO`` times the live entries,
+* at most ``max_resident`` entries are kept (oldest dropped first), in memory
+  and in the compacted log. The database is the source of truth; these lists
+  are a bounded compatibility mirror.
+
+A legacy ``<name>.json`` file is imported on first load when no log exists.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+COMPACT_RATIO = 2
+# Compaction is not worth it below this many log lines
+COMPACT_MIN_OPS = 1000
+# Buffered deltas beyond this are flushed from the mutating call
+FLUSH_THRESHOLD = 5000
+
+
+def _load_log(path: Path, legacy_json: Optional[Path]) -> tuple[List[Any], int]:
+    """Replay ``path`` into a list; returns (docs, number of log lines)."""
+    docs: List[Any] = []
+    ops = 0
+    if not path.exists():
+        if legacy_json is not None and legacy_json.exists():
+            try:
+                with legacy_json.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    docs = data
+            except Exception:
+                pass
+        return docs, 0
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                op = json.loads(line)
+            except ValueError:
+                continue  # torn write at the tail
+            ops += 1
+            if "a" in op:
+                docs.append(op["a"])
+            elif "u" in op:
+                doc = op["u"]
+                for i in range(len(docs) - 1, -1, -1):
+                    cur = docs[i]
+                    if isinstance(cur, dict) and cur.get("id") == doc.get("id"):
+                        docs[i] = doc
+                        break
+            elif "c" in op:
+                docs.clear()
+    return docs, ops
+
+
+class PersistentList(list):
+    """``list`` that lazily loads from, and appends deltas to, an op log."""
+
+    def __init__(
+        self,
+        path: Path,
+        legacy_json: Optional[Path] = None,
+        max_resident: Optional[int] = None,
+        should_persist: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.legacy_json = legacy_json
+        self.max_resident = max_resident
+        # When this returns False (tests/CI) no deltas are buffered or written
+        self.should_persist = should_persist or (lambda: True)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._pending: List[Dict[str, Any]] = []
+        self._rewrite = False
+        self._log_ops = 0
+
+    # --- loading -------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            docs, self._log_ops = _load_log(self.path, self.legacy_json)
+            # Anything appended before the first read goes after the log
+            early = list.__iter__(self)
+            merged = [*docs, *early]
+            list.clear(self)
+            list.extend(self, merged)
+            self._loaded = True
+            if self._log_ops == 0 and docs:
+                self._rewrite = True  # legacy JSON import: write a snapshot
+            self._trim()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _trim(self) -> None:
+        if self.max_resident is None:
+            return
+        # Trim in chunks (10% slack) so appends stay amortized O(1)
+        if list.__len__(self) > self.max_resident * 1.1:
+            list.__delitem__(self, slice(0, list.__len__(self) - self.max_resident))
+
+    # --- reads -----------------------------------------------------------------
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return list.__iter__(self)
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._ensure_loaded()
+        return list.__getitem__(self, index)
+
+    def __contains__(self, item) -> bool:
+        self._ensure_loaded()
+        return list.__contains__(self, item)
+
+    def __eq__(self, other) -> bool:
+        self._ensure_loaded()
+        return list.__eq__(self, other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        self._ensure_loaded()
+        return list.__repr__(self)
+
+    def __reversed__(self):
+        self._ensure_loaded()
+        return list.__reversed__(self)
+
+    def index(self, *args):
+        self._ensure_loaded()
+        return list.index(self, *args)
+
+    def count(self, item) -> int:
+        self._ensure_loaded()
+        return list.count(self, item)
+
+    def copy(self) -> List[Any]:
+        self._ensure_loaded()
+        return list(list.__iter__(self))
+
+    # --- logged mutations ------------------------------------------------------
+
+    def _log(self, op: Dict[str, Any]) -> None:
+        if not self.should_persist():
+            return
+        self._pending.append(op)
+        if len(self._pending) >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def append(self, item: Any) -> None:
+        with self._lock:
+            list.append(self, item)
+            self._log({"a": item})
+            if self._loaded:
+                self._trim()
+
+    def extend(self, items: Iterable[Any]) -> None:
+        with self._lock:
+            for item in items:
+                self.append(item)
+
+    def __iadd__(self, items: Iterable[Any]):
+        self.extend(items)
+        return self
+
+    def clear(self) -> None:
+        with self._lock:
+            list.clear(self)
+            self._loaded = True  # nothing on disk survives a clear
+            self._pending = [{"c": 1}] if self.should_persist() else []
+            self._rewrite = False
+
+    def replace(self, item: Dict[str, Any]) -> None:
+        """Persist an in-place edit of ``item`` (matched by its ``id``)."""
+        with self._lock:
+            self._log({"u": item})
+
+    # Positional edits are rare; persist them with a full snapshot
+    def _mutated(self) -> None:
+        self._rewrite = True
+        self._pending = []
+
+    def __setitem__(self, index, value) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            list.__setitem__(self, index, value)
+            self._mutated()
+
+    def __delitem__(self, index) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            list.__delitem__(self, index)
+            self._mutated()
+
+    def insert(self, index, value) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            list.insert(self, index, value)
+            self._mutated()
+
+    def pop(self, index=-1):
+        with self._lock:
+            self._ensure_loaded()
+            value = list.pop(self, index)
+            self._mutated()
+            return value
+
+    def remove(self, value) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            list.remove(self, value)
+            self._mutated()
+
+    def sort(self, *args, **kwargs) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            list.sort(self, *args, **kwargs)
+            self._mutated()
+
+    def reverse(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            list.reverse(self)
+            self._mutated()
+
+    def reset(self, items: Iterable[Any]) -> None:
+        """Replace the whole contents (persisted as a snapshot)."""
+        with self._lock:
+            list.clear(self)
+            list.extend(self, items)
+            self._loaded = True
+            self._trim()
+            self._mutated()
+
+    # --- writing ---------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Write buffered deltas (or a compacted snapshot); returns lines written."""
+        if not self.should_persist():
+            return 0
+        with self._lock:
+            if self._rewrite or (
+                self._loaded
+                and self._log_ops + len(self._pending) > COMPACT_MIN_OPS
+                and self._log_ops + len(self._pending)
+                > COMPACT_RATIO * list.__len__(self)
+            ):
+                return self.compact()
+            if not self._pending:
+                return 0
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lines = "".join(
+                json.dumps(op, ensure_ascii=False) + "\n" for op in self._pending
+            )
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(lines)
+            written = len(self._pending)
+            self._log_ops += written
+            self._pending = []
+            return written
+
+    def compact(self) -> int:
+        """Rewrite the log as one add per resident entry."""
+        if not self.should_persist():
+            return 0
+        with self._lock:
+            self._ensure_loaded()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                for doc in list.__iter__(self):
+                    f.write(json.dumps({"a": doc}, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._log_ops = list.__len__(self)
+            self._pending = []
+            self._rewrite = False
+            return self._log_ops
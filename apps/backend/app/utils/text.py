@@ -14,7 +14,8 @@ Examples:
 from __future__ import annotations
 import re
 import unicodedata
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
 _WS_RE = re.compile(r"\s+")
 _PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
@@ -42,6 +43,8 @@ def _strip_diacritics(s: str) -> str:
     )
 
 
+# Memoized: the same statement merchant strings are canonicalized over and over
+@lru_cache(maxsize=65536)
 def canonicalize_merchant(val: Optional[str]) -> Optional[str]:
     """
     Normalize merchant name for matching against hints and rules.
@@ -94,3 +97,10 @@ def canonicalize_merchant(val: Optional[str]) -> Optional[str]:
 
     s = " ".join(tokens)
     return s or None
+
+
+def canonicalize_many(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """canonicalize_merchant for many values (each distinct string computed once)."""
+    values = list(values)
+    memo = {v: canonicalize_merchant(v) for v in dict.fromkeys(values)}
+    return [memo[v] for v in values]
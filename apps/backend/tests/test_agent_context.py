@@ -0,0 +1,125 @@
+import datetime as dt
+import threading
+
+import pytest
+
+from app.orm_models import Transaction
+from app.services import agent_context
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    agent_context.invalidate()
+    yield
+    agent_context.invalidate()
+
+
+def _counting(calls, name, value):
+    def loader(session):
+        calls.append(name)
+        return value
+
+    return loader
+
+
+def test_follow_up_turns_reuse_cached_sections():
+    calls = []
+    sections = {
+        "summary": _counting(calls, "summary", {"net": 1}),
+        "rules": _counting(calls, "rules", []),
+    }
+    values, timings = agent_context.enrich(sections, user_id=1, month="2025-08")
+    assert values == {"summary": {"net": 1}, "rules": []}
+    assert not timings["summary"]["cached"] and timings["summary"]["ms"] >= 0
+
+    values, timings = agent_context.enrich(sections, user_id=1, month="2025-08")
+    assert values["summary"] == {"net": 1}
+    assert timings["summary"]["cached"] and timings["rules"]["cached"]
+    assert sorted(calls) == ["rules", "summary"]
+
+    # other user / month are separate entries
+    agent_context.enrich(sections, user_id=2, month="2025-08")
+    agent_context.enrich(sections, user_id=1, month="2025-07")
+    assert len(calls) == 6
+
+
+def test_commit_touching_transactions_invalidates(db_session):
+    calls = []
+    sections = {"summary": _counting(calls, "summary", {"net": 1})}
+    agent_context.enrich(sections, user_id=None, month="2025-08")
+
+    db_session.add(
+        Transaction(
+            date=dt.date(2025, 8, 3),
+            merchant="Cafe",
+            description="latte",
+            amount=-4.5,
+            month="2025-08",
+        )
+    )
+    db_session.commit()
+
+    _, timings = agent_context.enrich(sections, user_id=None, month="2025-08")
+    assert not timings["summary"]["cached"]
+    assert calls == ["summary", "summary"]
+
+
+def test_errors_are_reported_and_not_fatal():
+    def boom(session):
+        raise RuntimeError("no charts")
+
+    values, timings = agent_context.enrich(
+        {"summary": boom, "rules": lambda s: [1]}, user_id=1, month="2025-08"
+    )
+    assert values == {"rules": [1]}
+    assert timings["summary"]["error"] == "no charts"
+
+
+def test_sections_run_concurrently_on_own_sessions(monkeypatch):
+    monkeypatch.setattr(agent_context, "_concurrent", lambda: True)
+    barrier = threading.Barrier(3, timeout=5)
+    sessions = []
+
+    def loader(session):
+        sessions.append(session)
+        barrier.wait()  # deadlocks (BrokenBarrierError) unless all run at once
+        return threading.current_thread().name
+
+    values, timings = agent_context.enrich(
+        {"a": loader, "b": loader, "c": loader}, user_id=1, month="2025-08"
+    )
+    assert set(values) == {"a", "b", "c"}
+    assert all(v.startswith("agent-ctx") for v in values.values())
+    assert len({id(s) for s in sessions}) == 3
+
+
+def test_enriched_sections_are_scoped_to_the_user(db_session):
+    from app.orm_models import User
+    from app.routers.agent import _enrich_context
+
+    alice = User(email="alice@test", password_hash="x")
+    bob = User(email="bob@test", password_hash="x")
+    db_session.add_all([alice, bob])
+    db_session.flush()
+    for owner, merchant, amount in ((alice, "Cafe", -4.5), (bob, "Casino", -900.0)):
+        db_session.add(
+            Transaction(
+                user_id=owner.id,
+                date=dt.date(2025, 8, 3),
+                merchant=merchant,
+                description=merchant.lower(),
+                amount=amount,
+                month="2025-08",
+            )
+        )
+    db_session.commit()
+
+    ctx = _enrich_context(db_session, {"month": "2025-08"}, None, user_id=alice.id)
+    assert {"summary", "top_merchants", "insights"} <= set(ctx)
+    assert "Casino" not in repr(ctx) and "900" not in repr(ctx)
+    assert "Cafe" in repr(ctx["top_merchants"])
+
+    # No resolved user: nothing beyond the month is loaded
+    assert _enrich_context(db_session, {"month": "2025-08"}, None) == {
+        "month": "2025-08"
+    }
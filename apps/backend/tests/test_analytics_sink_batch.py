@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.services import analytics_sink as sink
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    written = []
+
+    def fake_write(records):
+        written.append([r["event"] for r in records])
+        return len(records)
+
+    monkeypatch.setattr(sink, "write_batch", fake_write)
+    sink._take(10**6)  # drop leftovers from other tests
+    yield written
+    sink._take(10**6)
+
+
+def test_enqueue_without_writer_falls_back(batches):
+    assert sink.enqueue({"event": "a"}) is False
+    assert batches == []
+
+
+def test_writer_flushes_on_size_and_shutdown(batches, monkeypatch):
+    monkeypatch.setattr(sink, "_BATCH_SIZE", 3)
+    record = sink.write_batch
+
+    # The clock is frozen in tests: wait on events, never on asyncio.sleep(t)
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        wrote = asyncio.Event()
+
+        def write(records):
+            n = record(records)
+            loop.call_soon_threadsafe(wrote.set)
+            return n
+
+        monkeypatch.setattr(sink, "write_batch", write)
+        task = asyncio.create_task(sink.batch_writer_loop(flush_interval_s=60))
+        await asyncio.sleep(0)
+        for i in range(4):
+            assert sink.enqueue({"event": f"e{i}"}) is True
+        # size threshold wakes the writer well before the 60s interval
+        await wrote.wait()
+        assert batches == [["e0", "e1", "e2"]]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return task
+
+    task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert batches == [["e0", "e1", "e2"], ["e3"]]
+    assert sink.enqueue({"event": "late"}) is False
+
+
+def test_full_queue_drops_instead_of_blocking(batches, monkeypatch):
+    import queue
+
+    monkeypatch.setattr(sink, "_queue", queue.Queue(maxsize=1))
+    monkeypatch.setattr(sink, "_running", True)
+    assert sink.enqueue({"event": "kept"}) is True
+    assert sink.enqueue({"event": "dropped"}) is True
+    assert sink.flush() == 1
+    assert batches == [["kept"]]
+
+
+def test_insert_sql_is_multi_row():
+    sql = sink._insert_sql(2, is_pg=False)
+    assert sql.count("(:event_") == 2 and ":ua_1" in sql
+    assert "CAST(:ip_0 AS inet)" in sink._insert_sql(1, is_pg=True)
+
+
+def test_invalid_ip_is_stored_as_null():
+    assert sink._params({"event": "a", "ip": "not-an-ip"})["ip"] is None
+    assert sink._params({"event": "a", "ip": " 203.0.113.7 "})["ip"] == "203.0.113.7"
+    assert sink._params({"event": "a", "ip": "2001:db8::1"})["ip"] == "2001:db8::1"
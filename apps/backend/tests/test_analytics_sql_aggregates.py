@@ -0,0 +1,111 @@
+"""
+SQL GROUP BY aggregation in analytics matches the legacy per-row Python sums.
+"""
+import random
+from collections import defaultdict
+from datetime import date
+
+import pytest
+
+from app.services import analytics
+from app.transactions import Transaction
+
+
+def _seed(db, n=400, seed=7):
+    rng = random.Random(seed)
+    merchants = ["Grocer", "Cafe", "ACME", "Netflix", "", None]
+    cats = ["Groceries", "Dining", "Salary", "", None]
+    rows = []
+    for _ in range(n):
+        d = date(2024, rng.randint(1, 12), rng.randint(1, 28))
+        amt = rng.choice([1, -1]) * round(rng.uniform(1, 500), 2)
+        rows.append(
+            Transaction(
+                date=d,
+                amount=amt,
+                description=f"row {rng.random()}",
+                merchant=rng.choice(merchants),
+                merchant_canonical=rng.choice(["grocer", "", None]),
+                category=rng.choice(cats),
+            )
+        )
+    db.add_all(rows)
+    db.commit()
+
+
+def _legacy(db, lookback, ref_month):
+    all_months = [m for (m,) in db.query(Transaction.month).distinct().all() if m]
+    months = analytics._months_window(all_months, ref_month, lookback)
+    series = defaultdict(lambda: {"in": 0.0, "out": 0.0, "net": 0.0})
+    by_month = defaultdict(list)
+    for t in db.query(Transaction).filter(Transaction.month.in_(months)).all():
+        amt = float(t.amount or 0.0)
+        if amt >= 0:
+            series[t.month]["in"] += amt
+        else:
+            series[t.month]["out"] += abs(amt)
+        by_month[t.month].append(
+            {
+                "date": t.date,
+                "amount": amt,
+                "merchant": t.merchant_canonical or t.merchant or "",
+                "category": t.category or "",
+            }
+        )
+    for m in series:
+        series[m]["net"] = series[m]["in"] - series[m]["out"]
+    return dict(series), dict(by_month)
+
+
+@pytest.mark.parametrize(
+    "lookback,ref", [(6, None), (3, "2024-05"), (24, "2024-12"), (2, "2031-01")]
+)
+def test_monthly_sums_match_legacy(db_session, lookback, ref):
+    _seed(db_session)
+    series, by_month = analytics._monthly_sums(db_session, lookback, ref)
+    exp_series, exp_rows = _legacy(db_session, lookback, ref)
+    assert sorted(series) == sorted(exp_series)
+    for m in series:
+        for k in ("in", "out", "net"):
+            assert series[m][k] == pytest.approx(exp_series[m][k])
+    assert by_month == exp_rows
+
+
+def test_category_and_merchant_spend(db_session):
+    _seed(db_session)
+    months = analytics._window(db_session, 6, None)
+    _, rows = _legacy(db_session, 6, None)
+
+    cat_exp = defaultdict(lambda: defaultdict(float))
+    for m, txns in rows.items():
+        for t in txns:
+            if t["amount"] < 0:
+                cat_exp[m][t["category"] or "Unknown"] += -t["amount"]
+    got = analytics._category_spend(db_session, months)
+    assert set(got) == set(cat_exp)
+    for m in got:
+        assert got[m] == pytest.approx(dict(cat_exp[m]))
+
+    last = months[-1]
+    merch_exp = defaultdict(float)
+    for t in rows[last]:
+        if t["amount"] < 0:
+            merch_exp[t["merchant"]] += -t["amount"]
+    assert analytics._merchant_spend(db_session, last) == pytest.approx(dict(merch_exp))
+
+
+def test_public_functions_on_aggregates(db_session):
+    _seed(db_session)
+    k = analytics.compute_kpis(db_session, lookback=6)
+    assert k["months"] == ["2024-07", "2024-08", "2024-09", "2024-10", "2024-11", "2024-12"]
+    assert 0 < k["kpis"]["merchant_concentration"] <= 1.0
+    assert analytics.forecast_cashflow(db_session, model="ema")["ok"] is True
+    assert analytics.find_anomalies(db_session)["month"] == "2024-12"
+    cats = {i["category"] for i in analytics.budget_suggest(db_session)["items"]}
+    assert "Unknown" in cats and "" not in cats
+
+
+def test_empty_db(db_session):
+    assert analytics.compute_kpis(db_session) == {"months": [], "series": {}, "kpis": {}}
+    assert analytics.find_anomalies(db_session) == {"month": None, "items": []}
+    assert analytics.budget_suggest(db_session) == {"items": []}
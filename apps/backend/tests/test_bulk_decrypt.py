@@ -0,0 +1,113 @@
+"""Bulk decryption of encrypted transaction columns: same plaintext as the
+per-row properties, one cipher per DEK, and an opt-in per-request memo."""
+
+import os
+from datetime import date
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core import crypto_state
+from app.core.bulk_decrypt import (
+    TXN_AAD,
+    decrypt_many,
+    decrypt_transactions,
+    load_plaintext,
+    plaintext_memo,
+)
+from app.orm_models import Transaction
+from app.services.crypto import aead_for
+
+KEYS = {"active": os.urandom(32), "rotating::v2": os.urandom(32)}
+
+
+@pytest.fixture(autouse=True)
+def _deks(monkeypatch):
+    crypto_state.purge_dek_cache(*KEYS)
+    for label, dek in KEYS.items():
+        monkeypatch.setitem(crypto_state._deks, label, dek)
+    yield
+    crypto_state.purge_dek_cache(*KEYS)
+
+
+def _enc(label, text):
+    if text is None:
+        return None, None
+    nonce = os.urandom(12)
+    return nonce, AESGCM(KEYS[label]).encrypt(nonce, text.encode(), TXN_AAD)
+
+
+def _txn(i, label="active", note=True):
+    t = Transaction(enc_label=None if label == "active" else label)
+    t.description_nonce, t.description_enc = _enc(label, f"desc {i}")
+    nonce, ct = _enc(label, f"STORE #{i}")
+    t.merchant_raw_nonce, t.merchant_raw_enc = nonce, memoryview(ct)  # bytea
+    t.note_nonce, t.note_enc = _enc(label, f"note {i}" if note else None)
+    return t
+
+
+def test_bulk_matches_row_properties():
+    rows = [_txn(i, label, note=i % 3 != 0) for i in range(60) for label in KEYS]
+    expected = [
+        {
+            "description": t.description_text,
+            "merchant_raw": t.merchant_raw_text,
+            "note": t.note_text,
+        }
+        for t in rows
+    ]
+    assert expected[0] == {
+        "description": "desc 0",
+        "merchant_raw": "STORE #0",
+        "note": None,
+    }
+    assert decrypt_transactions(rows, workers=1) == expected
+    assert decrypt_transactions(rows, workers=3, threshold=1) == expected
+    assert decrypt_transactions(rows, fields=("note",)) == [
+        {"note": e["note"]} for e in expected
+    ]
+
+    # One cipher per DEK, dropped along with the DEK cache
+    assert crypto_state.get_aead_for_label("active") is aead_for(KEYS["active"])
+    crypto_state.purge_dek_cache("rotating::v2")
+    assert aead_for.cache_info().currsize == 0
+
+
+def test_plaintext_memo_is_scoped_and_bounded():
+    t = _txn(1)
+    with plaintext_memo(max_entries=2) as memo:
+        for _ in range(3):
+            assert t.description_text == "desc 1"
+        assert (memo.hits, memo.misses) == (2, 1)
+        with plaintext_memo() as inner:  # nested blocks share the memo
+            assert inner is memo
+            assert decrypt_transactions([t, t])[1]["note"] == "note 1"
+        assert len(memo) == 2
+    # Outside the block nothing is memoized
+    with plaintext_memo() as fresh:
+        assert fresh is not memo and len(fresh) == 0
+
+
+def test_tampered_cell_raises():
+    t = _txn(2)
+    t.note_enc = t.note_enc[:-1] + bytes([t.note_enc[-1] ^ 1])
+    with pytest.raises(InvalidTag):
+        decrypt_many([(t.enc_label, t.note_nonce, t.note_enc)])
+    with plaintext_memo() as memo, pytest.raises(InvalidTag):
+        decrypt_transactions([t], workers=2, threshold=1)
+    assert len(memo) == 0
+
+
+def test_load_plaintext_by_id(db_session):
+    rows = [_txn(i, label) for i, label in enumerate(KEYS)]
+    for t in rows:
+        t.merchant_canonical, t.amount, t.date = "m", 1, date(2024, 1, 1)
+        t.merchant_raw_enc = bytes(t.merchant_raw_enc)
+    db_session.add_all(rows)
+    db_session.commit()
+    got = load_plaintext(db_session, [t.id for t in rows], fields=("merchant_raw",))
+    assert got == {
+        rows[0].id: {"merchant_raw": "STORE #0"},
+        rows[1].id: {"merchant_raw": "STORE #1"},
+    }
@@ -0,0 +1,144 @@
+"""CategorizeContext: batch suggestions match per-txn suggestions and cost a
+constant number of queries regardless of batch size."""
+
+import random
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.models.ml_feedback_stats import MlFeedbackMerchantCategoryStats
+from app.orm_models import CategoryRule, MerchantCategoryHint
+from app.services.categorize_suggest import (
+    CompiledCategoryRules,
+    suggest_categories_batch,
+    suggest_categories_for_txn,
+)
+
+MERCHANTS = ["spotify", "uber", "uber eats", "harris teeter", "cvs", "nohint"]
+
+
+def _seed(db):
+    rules = [
+        (r"UBER", "transportation.ride_hailing", 10),
+        (r"UBER EATS", "restaurants.delivery", 5),  # same start offset as UBER
+        (r"spotify|netflix", "subscriptions.streaming", 20),
+        (r"(te)\1ter", "groceries", 30),  # backreference forces per-rule path
+        (r"\bcvs\b", "health.pharmacy", 40),
+    ]
+    for pattern, slug, prio in rules:
+        db.add(
+            CategoryRule(
+                pattern=pattern, category_slug=slug, priority=prio, enabled=True
+            )
+        )
+    db.add(
+        CategoryRule(
+            pattern="harris", category_slug="disabled", priority=1, enabled=False
+        )
+    )
+    hints = [
+        ("spotify", "subscriptions.streaming", "user", 0.9),
+        ("uber", "transportation.ride_hailing", "rule", 0.5),
+        ("uber", "restaurants", "user_block", 0.0),
+        ("harris teeter", "groceries", "user", 0.99),
+        ("cvs", "shopping.misc", "ml", 0.4),
+    ]
+    for mc, slug, src, conf in hints:
+        db.add(
+            MerchantCategoryHint(
+                merchant_canonical=mc, category_slug=slug, source=src, confidence=conf
+            )
+        )
+    db.add(
+        MlFeedbackMerchantCategoryStats(
+            merchant_normalized="uber",
+            category="transportation.ride_hailing",
+            accept_count=4,
+            reject_count=1,
+            last_feedback_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+    )
+    db.add(
+        MlFeedbackMerchantCategoryStats(
+            merchant_normalized="cvs",
+            category="health.pharmacy",
+            accept_count=0,
+            reject_count=3,
+            last_feedback_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+    )
+    db.commit()
+
+
+def _txns(n, seed=2):
+    rng = random.Random(seed)
+    return [
+        {
+            "merchant": m.upper(),
+            "description": f"{m} #{rng.randint(1, 99)}",
+            "amount": -round(rng.uniform(5, 60), 2),
+            "merchant_canonical": m,
+            "cadence_days": rng.choice([None, 30]),
+        }
+        for m in (rng.choice(MERCHANTS) for _ in range(n))
+    ]
+
+
+def _count_queries(db, fn):
+    count = [0]
+
+    def _on_execute(*_a, **_k):
+        count[0] += 1
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)
+    return result, count[0]
+
+
+def test_batch_matches_single_txn(db, monkeypatch):
+    monkeypatch.setenv("ML_FEEDBACK_SCORES_ENABLED", "1")
+    _seed(db)
+    txns = _txns(40)
+    batched = suggest_categories_batch(txns, db=db)
+    singles = [suggest_categories_for_txn(t, db=db) for t in txns]
+    assert batched == singles
+
+    by_merchant = {t["merchant_canonical"]: r for t, r in zip(txns, batched)}
+    uber = {s["category_slug"] for s in by_merchant["uber eats"]}
+    assert {"transportation.ride_hailing", "restaurants.delivery"} <= uber
+    assert by_merchant["harris teeter"][0]["category_slug"] == "groceries"
+    assert all(s["category_slug"] != "restaurants" for s in by_merchant["uber"])
+    assert any("feedback_accepts" in s for s in by_merchant["uber"])
+
+
+def test_batch_query_count_is_constant(db, monkeypatch):
+    monkeypatch.setenv("ML_FEEDBACK_SCORES_ENABLED", "1")
+    _seed(db)
+    _, small = _count_queries(db, lambda: suggest_categories_batch(_txns(5), db=db))
+    _, large = _count_queries(db, lambda: suggest_categories_batch(_txns(200), db=db))
+    assert large == small
+    assert large <= 5
+
+
+def test_compiled_rules_match_re_search():
+    rows = [
+        CategoryRule(pattern=p, category_slug=f"c{i}", priority=i)
+        for i, p in enumerate(
+            [r"uber", r"uber eats", r"eats", r"\d{4}", r"^amzn", r"x(?=y)", r"mart$"]
+        )
+    ]
+    compiled = CompiledCategoryRules(rows)
+    assert compiled.combined is not None
+    texts = ["UBER EATS 1234", "amzn mktp", "walmart", "xy", "nothing", "eats uber"]
+    for text in texts:
+        expected = [
+            (r.pattern, r.category_slug, r.priority)
+            for r in rows
+            if re.search(r.pattern, text, flags=re.I)
+        ]
+        assert compiled.matches(text) == expected, text
@@ -0,0 +1,77 @@
+"""
+Tests for the batched/cached embedding pipeline in embed_provider.
+"""
+import asyncio
+
+import pytest
+
+from app.services import embed_cache, embed_provider
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    calls = []
+    state = {"inflight": 0, "peak": 0}
+
+    async def fake_batch(batch, input_type):
+        calls.append(list(batch))
+        state["inflight"] += 1
+        state["peak"] = max(state["peak"], state["inflight"])
+        await asyncio.sleep(0)  # time is frozen in tests; just yield
+        state["inflight"] -= 1
+        return [[float(len(t)), 1.0] for t in batch]
+
+    embed_cache.reset_cache()
+    monkeypatch.delenv("EMBED_CACHE_PATH", raising=False)
+    monkeypatch.setattr(embed_provider, "_embed_batch", fake_batch)
+    monkeypatch.setattr(embed_provider, "EMBED_BATCH_SIZE", 3)
+    monkeypatch.setattr(embed_provider, "EMBED_CONCURRENCY", 2)
+    yield calls, state
+    embed_cache.reset_cache()
+
+
+async def test_batches_dedups_and_bounds_concurrency(fake_provider):
+    calls, state = fake_provider
+    texts = [f"text-{i}" for i in range(10)] + ["text-0", "text-1"]
+    out = await embed_provider.embed_texts(texts)
+
+    assert len(out) == len(texts)
+    assert out[10] == out[0] and out[11] == out[1]
+    assert [len(c) for c in calls] == [3, 3, 3, 1]
+    assert sum(len(c) for c in calls) == 10
+    assert state["peak"] <= 2
+
+
+async def test_repeat_calls_hit_cache(fake_provider):
+    calls, _ = fake_provider
+    first = await embed_provider.embed_texts(["alpha", "beta"])
+    calls.clear()
+
+    again = await embed_provider.embed_texts(["beta", "alpha"])
+    assert calls == []
+    assert again == [first[1], first[0]]
+
+    # input_type is part of the key
+    await embed_provider.embed_texts(["alpha"], input_type="query")
+    assert calls == [["alpha"]]
+
+
+async def test_cache_disabled(fake_provider, monkeypatch):
+    calls, _ = fake_provider
+    monkeypatch.setenv("EMBED_CACHE_PATH", "off")
+    embed_cache.reset_cache()
+    await embed_provider.embed_texts(["x"])
+    await embed_provider.embed_texts(["x"])
+    assert calls == [["x"], ["x"]]
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "embed.sqlite")
+    c1 = embed_cache.EmbeddingCache(path)
+    sha = embed_cache.text_sha("hello")
+    c1.put_many("ollama", "m", "passage", {sha: [0.5, 0.25]})
+
+    c2 = embed_cache.EmbeddingCache(path)
+    assert c2.get_many("ollama", "m", "passage", [sha]) == {sha: [0.5, 0.25]}
+    assert c2.get_many("ollama", "other", "passage", [sha]) == {}
+    assert c2.stats()["hits"] == 1 and c2.stats()["misses"] == 1
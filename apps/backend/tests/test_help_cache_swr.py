@@ -0,0 +1,170 @@
+"""help_cache as a bounded LRU: single-flight loads, stale-while-revalidate
+and an optional Redis L2."""
+
+import threading
+
+import pytest
+
+from app.services import help_cache as hc
+
+
+@pytest.fixture(autouse=True)
+def _fresh(monkeypatch):
+    hc.clear()
+    hc.set_l2_client(None)
+    yield
+    hc.clear()
+    hc.set_l2_client(None)
+    hc._set_ttl_for_tests(300.0)
+
+
+def test_lru_bound_and_get_semantics(monkeypatch):
+    monkeypatch.setattr(hc, "_MAX_ENTRIES", 2)
+    hc.set_("a", {"v": 1})
+    hc.set_("b", {"v": 2})
+    assert hc.get("a") == {"v": 1}  # a becomes most recently used
+    hc.set_("c", {"v": 3})
+    assert hc.get("b") is None
+    st = hc.stats()
+    assert (st["size"], st["evictions"], st["hits"], st["misses"]) == (2, 1, 1, 1)
+
+
+def test_concurrent_misses_share_one_load():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"text": "slow"}
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(hc.get_or_load("k", loader))
+    )
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(hc.get_or_load("k", loader)))
+        for _ in range(4)
+    ]
+    for t in followers:
+        t.start()
+    while hc.stats()["coalesced"] < 4:
+        threading.Event().wait(0.005)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(cached for _, cached in results) == [False] + [True] * 4
+    assert all(v == {"text": "slow"} for v, _ in results)
+    assert hc.stats()["inflight"] == 0
+
+
+def test_loader_errors_propagate_and_are_not_cached():
+    def boom():
+        raise RuntimeError("llm down")
+
+    with pytest.raises(RuntimeError):
+        hc.get_or_load("k", boom)
+    assert hc.get_or_load("k", lambda: {"ok": True}) == ({"ok": True}, False)
+
+
+def test_stale_entry_served_while_refreshing(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(hc, "_now", lambda: now[0])
+    monkeypatch.setattr(hc, "_STALE_SEC", 30.0)
+    hc.set_("k", {"gen": 1}, ttl=10)
+    now[0] += 15  # expired, inside the stale window
+
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return {"gen": 2}
+
+    value, cached = hc.get_or_load("k", lambda: {"gen": -1}, refresh=refresh)
+    assert (value, cached) == ({"gen": 1}, True)
+    assert refreshed.wait(5)
+    for _ in range(200):
+        if hc.stats()["inflight"] == 0:
+            break
+        threading.Event().wait(0.005)
+    assert hc.get_or_load("k", lambda: {"gen": -1}) == ({"gen": 2}, True)
+    assert hc.stats()["stale_served"] == 1
+
+    now[0] += 400  # past ttl + stale window: pruned, then a plain miss
+    assert hc.prune() == 1
+    assert hc.get_or_load("k", lambda: {"gen": 3}) == ({"gen": 3}, False)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def scan_iter(self, match, count=None):
+        return [k for k in self.data if k.startswith(match.rstrip("*"))]
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+
+def test_redis_l2_shares_entries_between_workers():
+    r = _FakeRedis()
+    hc.set_l2_client(r)
+    hc.get_or_load("k", lambda: {"text": "from worker A"})
+    hc.clear()  # a second worker: empty L1, same Redis
+    value, cached = hc.get_or_load("k", lambda: {"text": "recomputed"})
+    assert (value, cached) == ({"text": "from worker A"}, True)
+    assert hc.stats()["l2_hits"] == 1
+    hc.clear(shared=True)
+    assert r.data == {}
+
+
+def test_describe_route_issues_one_rephrase_for_concurrent_misses(monkeypatch):
+    from app.routers import describe
+
+    monkeypatch.setenv("FORCE_HELP_LLM", "1")
+    monkeypatch.setattr(describe, "_policy", lambda: {"allow": True})
+    gate = threading.Event()
+    calls = []
+
+    def rephrase(panel_id, ctx, base):
+        calls.append(panel_id)
+        gate.wait(5)
+        return "[polished] " + base
+
+    monkeypatch.setattr(describe.agent_detect, "try_llm_rephrase_summary", rephrase)
+    req = describe.DescribeRequest(mode="explain", month="2025-08", data={"x": 1})
+    out = []
+
+    def call():
+        out.append(
+            describe.describe_panel(
+                user_id=1, panel_id="total_spend", req=req, rephrase_q=None, db=None
+            )
+        )
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while hc.stats()["coalesced"] < 4:
+        threading.Event().wait(0.005)
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == ["total_spend"]
+    assert {p["text"] for p in out} == {
+        "[polished] Total spend shows all outgoing amounts for 2025-08."
+    }
+    assert all(p["rephrased"] for p in out)
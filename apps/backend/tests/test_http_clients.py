@@ -0,0 +1,120 @@
+"""Shared provider HTTP pools: connections are reused across calls, limits
+come from env, and callers beyond the limit wait for a slot."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import http_clients
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    peers: set = set()
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        cls.peers.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        if self.path == "/slow":
+            threading.Event().wait(0.1)
+        with cls.lock:
+            cls.active -= 1
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *_a):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.peers = set()
+    _Handler.peak = 0
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pools():
+    asyncio.run(http_clients.aclose_all())
+    yield
+    asyncio.run(http_clients.aclose_all())
+
+
+def test_sync_pool_reuses_connection(server):
+    session = http_clients.get_session("llm")
+    for _ in range(5):
+        assert session.post(f"{server}/v1/chat", json={}).status_code == 200
+    assert http_clients.get_session("llm") is session
+    assert len(_Handler.peers) == 1
+    assert http_clients.pool_stats()["llm:sync"]["in_use"] == 0
+
+
+def test_async_pool_reuses_connection(server):
+    async def run():
+        first = http_clients.get_async_client("embed")
+        for _ in range(5):
+            r = await http_clients.get_async_client("embed").get(f"{server}/x")
+            assert r.status_code == 200
+        assert http_clients.get_async_client("embed") is first
+        await http_clients.aclose_all()
+
+    asyncio.run(run())
+    assert len(_Handler.peers) == 1
+
+
+def test_env_limits_and_slot_wait(server, monkeypatch):
+    monkeypatch.setenv("HTTP_POOL_FETCH_MAX_CONNECTIONS", "1")
+    cfg = http_clients.pool_config("fetch")
+    assert cfg.max_connections == 1 and cfg.follow_redirects
+
+    waits = []
+    monkeypatch.setattr(
+        http_clients, "_observe_wait", lambda pool, s: waits.append((pool, s))
+    )
+
+    async def run():
+        pool = http_clients.get_async_client("fetch")
+        await asyncio.gather(*(pool.get(f"{server}/slow") for _ in range(3)))
+        await http_clients.aclose_all()
+
+    asyncio.run(run())
+    assert [p for p, _ in waits] == ["fetch"] * 3
+    # Requests are serialized behind the single slot
+    assert _Handler.peak == 1
+
+
+def test_pool_from_finished_loop_is_closed_on_replace(server):
+    async def use():
+        pool = http_clients.get_async_client("fetch")
+        assert (await pool.get(f"{server}/x")).status_code == 200
+        return pool
+
+    old = asyncio.run(use())  # loop ends without closing the pool
+
+    async def run():
+        new = await use()
+        await asyncio.sleep(0)  # let the scheduled close run
+        assert new is not old and old.is_closed
+        await http_clients.aclose_all()
+
+    asyncio.run(run())
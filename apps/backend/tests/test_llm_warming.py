@@ -16,17 +16,23 @@ def _reset_fallback():
 
 
 class _TimeoutingSession:
+    """Stands in for the pooled ``get_session("llm")`` used by app.utils.llm."""
+
     def __init__(self, attempts_before_fail=2):
         self.calls = 0
         self.attempts_before_fail = attempts_before_fail
 
-    def post(self, *a, **k):  # mimic requests.post signature used in _post_chat
+    def post(self, *a, **k):  # mimic requests.Session.post used in _post_chat
         from requests import exceptions
 
         self.calls += 1
         # Always raise connect timeout (simulate cold model)
         raise exceptions.ConnectTimeout("simulated connect timeout")
 
+    def get(self, *a, **k):
+        # Model listing appears healthy (simulate warming not finished)
+        return types.SimpleNamespace(status_code=200, json=lambda: {"models": []})
+
 
 @pytest.mark.parametrize("retry_enabled", [0, 1])
 def test_warm_window_retry_path(monkeypatch, retry_enabled):
@@ -36,18 +42,9 @@ def test_warm_window_retry_path(monkeypatch, retry_enabled):
     # Reset process start timestamp to now so within warm window
     monkeypatch.setattr(llm_mod, "_PROCESS_START_TS", time.time())
 
-    # Patch requests.post used inside _post_chat
-    import requests
-
-    monkeypatch.setattr(requests, "post", _TimeoutingSession().post)
-    # Also patch model listing to appear healthy (simulate warming not finished)
-    monkeypatch.setattr(
-        requests,
-        "get",
-        lambda *a, **k: types.SimpleNamespace(
-            status_code=200, json=lambda: {"models": []}
-        ),
-    )
+    # Patch the pooled session used inside _post_chat and model listing
+    session = _TimeoutingSession()
+    monkeypatch.setattr(llm_mod, "get_session", lambda name: session)
 
     client = TestClient(app)
     r = client.post(
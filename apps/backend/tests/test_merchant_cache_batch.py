@@ -0,0 +1,102 @@
+"""Batched merchant-hint learning: same hints as per-row learn_merchant with a
+constant number of Redis round-trips."""
+
+import json
+
+from app.services import merchant_cache
+from app.services.merchant_cache import learn_merchant, learn_merchants
+
+SAMPLES = [
+    ("STARBUCKS #123", "coffee", -4.5),
+    ("Starbucks #456", "coffee", -5.0),
+    ("NETFLIX.COM", None, -15.99),
+    ("STARBUCKS #123", "coffee", -4.5),
+    ("ZELLE TO BOB", "zelle payment", -50.0),
+    ("Local Shop", None, -12.0),
+]
+
+
+class FakeRedis:
+    """Dict-backed Redis stand-in that counts network round-trips."""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(k) for k in keys]
+
+    def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self.data[key] = value
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def setex(self, key, ttl, value):
+        self.ops.append((key, value))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        for key, value in self.ops:
+            self.redis.data[key] = value
+
+
+def _stored(r):
+    return {
+        k: {
+            f: v
+            for f, v in json.loads(p).items()
+            if f not in ("first_seen", "last_seen")
+        }
+        for k, p in r.data.items()
+    }
+
+
+def test_batch_matches_sequential_learning():
+    seq, batch = FakeRedis(), FakeRedis()
+    for _ in range(2):  # cold cache, then warm cache
+        expected = {}
+        for raw, desc, amount in SAMPLES:
+            expected[raw] = learn_merchant(seq, None, raw, desc, amount)
+        seq_trips = seq.round_trips
+        batch.round_trips = 0
+        got = learn_merchants(batch, None, SAMPLES)
+
+        assert batch.round_trips == 2  # one MGET + one pipelined write
+        assert seq_trips > batch.round_trips
+        assert _stored(batch) == _stored(seq)
+        assert set(got) == set(expected)
+        for raw, hint in got.items():
+            assert hint.normalized_name == expected[raw].normalized_name
+            assert hint.category == expected[raw].category
+        seq.round_trips = 0
+
+    starbucks = got["STARBUCKS #123"]
+    assert starbucks.seen_count == 6
+    assert starbucks.raw_examples == ["STARBUCKS #123", "Starbucks #456"]
+
+
+def test_redis_errors_and_absent_redis_fall_back():
+    class Broken(FakeRedis):
+        def mget(self, keys):
+            raise ConnectionError("down")
+
+        def pipeline(self, transaction=True):
+            raise ConnectionError("down")
+
+    hints = learn_merchants(Broken(), None, SAMPLES)
+    assert hints["NETFLIX.COM"].category == "subscriptions"
+    assert merchant_cache.lookup_merchant_hints(None, ["x", "x"]) == {"x": None}
+    assert learn_merchants(None, None, []) == {}
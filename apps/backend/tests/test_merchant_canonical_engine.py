@@ -0,0 +1,131 @@
+"""Compiled, memoized merchant canonicalization matches the linear rule scans
+and canonical keys are persisted on ingest."""
+
+import random
+
+from app.services import charts_data, merchant_normalizer
+from app.services.charts_data import (
+    MERCHANT_BRAND_RULES,
+    canonical_and_label,
+    canonical_and_label_many,
+    normalize_merchant_base,
+)
+from app.services.ingest_csv import ingest_csv_for_user
+from app.services.merchant_normalizer import (
+    BRAND_RULES,
+    normalize_merchant_for_category,
+)
+from app.transactions import Transaction
+from app.utils.text import canonicalize_many, canonicalize_merchant
+
+CORPUS = [
+    "PLAYSTATION NETWORK 877-971-7563",
+    "PLAYSTATIO*STORE",
+    "HARRIS TEETER #0085 12960 HIGHLAND",
+    "NOW Withdrawal Zelle To BOB",
+    "AMAZON MKTPLACE PMTS TARGET",  # two brands: first rule wins
+    "target walmart amazon",
+    "SQ *COFFEE SHOP",
+    "PAYPAL *NETFLIX",
+    "PAYPAL TRANSFER",
+    "Venmo payment 1234567",
+    "APPLE CASH SENT",
+    "Local Bakery 4432",
+    "",
+    "1234",
+]
+
+
+def _linear_brand(raw):
+    base = normalize_merchant_base(raw)
+    for rule in MERCHANT_BRAND_RULES:
+        if any(p in base for p in rule.patterns):
+            return rule.key, rule.label
+    return None
+
+
+def _linear_normalizer_rule(raw):
+    return next((r.id for r in BRAND_RULES if r.pattern.search(raw)), None)
+
+
+def _fuzz(n=500, seed=9):
+    rng = random.Random(seed)
+    words = [
+        "amazon",
+        "target",
+        "starbucks",
+        "zelle",
+        "venmo",
+        "paypal",
+        "sq *",
+        "apple cash",
+        "netflix",
+        "harris teeter",
+        "walmart",
+        "#12",
+        "cafe",
+    ]
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(n)
+    ]
+
+
+def test_compiled_matchers_match_linear_scan():
+    for raw in CORPUS + _fuzz():
+        expected = _linear_brand(raw)
+        if expected is not None:
+            assert canonical_and_label(raw) == expected, raw
+        if raw:
+            assert normalize_merchant_for_category(
+                raw
+            ).rule_id == _linear_normalizer_rule(raw), raw
+
+    assert canonical_and_label("AMAZON MKTPLACE PMTS TARGET")[0] == "amazon"
+    assert normalize_merchant_for_category("PAYPAL *NETFLIX").rule_id is None
+
+
+def test_bulk_apis_and_memoization():
+    raws = CORPUS * 3
+    assert canonical_and_label_many(raws) == [canonical_and_label(r) for r in raws]
+    assert canonicalize_many(raws + [None]) == [
+        canonicalize_merchant(r) for r in raws
+    ] + [None]
+    info = canonical_and_label.cache_info()
+    canonical_and_label("HARRIS TEETER #0085 12960 HIGHLAND")
+    assert canonical_and_label.cache_info().hits == info.hits + 1
+
+    # Normalizer results are memoized but never shared between callers
+    a = normalize_merchant_for_category("Venmo payment 1234567")
+    a.display = "mutated"
+    assert normalize_merchant_for_category("Venmo payment 1234567").display == "Venmo"
+
+
+def test_reset_picks_up_new_brand_rules(monkeypatch):
+    rules = MERCHANT_BRAND_RULES + [
+        charts_data.MerchantBrandRule(key="costco", label="Costco", patterns=["costco"])
+    ]
+    monkeypatch.setattr(charts_data, "MERCHANT_BRAND_RULES", rules)
+    try:
+        assert canonical_and_label("COSTCO WHSE #1") == ("costco whse", "Costco Whse")
+        charts_data.reset_merchant_brand_rules()
+        assert canonical_and_label("COSTCO WHSE #1") == ("costco", "Costco")
+    finally:
+        monkeypatch.undo()
+        charts_data.reset_merchant_brand_rules()
+        merchant_normalizer.reset_brand_rules()
+    assert canonical_and_label("COSTCO WHSE #1") == ("costco whse", "Costco Whse")
+
+
+def test_ingest_persists_canonical_merchant(db_session, tmp_path):
+    path = tmp_path / "txns.csv"
+    path.write_text(
+        "date,description,merchant,amount,category\n"
+        "2025-11-12,latte,STARBUCKS STORE #123,-4.50,dining\n"
+        "2025-11-13,groceries,HARRIS TEETER #0085 12960 HIGHLAND,-40.00,groceries\n"
+    )
+    assert ingest_csv_for_user(db_session, 1, path) == 2
+    rows = {t.merchant: t.merchant_canonical for t in db_session.query(Transaction)}
+    assert rows == {
+        "STARBUCKS STORE #123": "starbucks",
+        "HARRIS TEETER #0085 12960 HIGHLAND": "harris teeter",
+    }
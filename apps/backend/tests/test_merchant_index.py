@@ -0,0 +1,179 @@
+"""Merchant label index: matches the per-merchant GROUP BY query and stays
+fresh across ORM writes, rollbacks and out-of-process inserts."""
+
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from app.orm_models import UserLabel
+from app.services.suggest import merchant_index
+from app.services.suggest.merchant_labeler import (
+    MAJORITY_P,
+    MIN_SUPPORT,
+    majority_for_merchant,
+    suggest_from_majority,
+)
+from app.services.suggest.metrics import (
+    ml_merchant_index_lookups_total,
+    ml_merchant_index_rebuilds_total,
+)
+from app.transactions import Transaction
+
+MERCHANTS = ["Starbucks", "STARBUCKS", "Walmart", "walmart", "Cafe 9", "Rare"]
+LABELS = ["Dining", "Groceries", "Shopping"]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index():
+    merchant_index.invalidate()
+    yield
+    merchant_index.invalidate()
+
+
+def _sql_majority(db, merchant):
+    """The per-merchant query majority_for_merchant used to run."""
+    rows = db.execute(
+        select(UserLabel.category, func.count())
+        .join(Transaction, Transaction.id == UserLabel.txn_id)
+        .where(func.lower(Transaction.merchant) == merchant.lower())
+        .group_by(UserLabel.category)
+    ).all()
+    if not rows:
+        return None
+    total = sum(c for _, c in rows)
+    cnt = max(c for _, c in rows)
+    if cnt >= MIN_SUPPORT and cnt / total >= MAJORITY_P:
+        return cnt, total, round(cnt / total, 3)
+    return None
+
+
+def _seed(db, n=200, seed=4):
+    rng = random.Random(seed)
+    txns = [
+        Transaction(
+            date=date(2025, 1, 1 + i % 28),
+            amount=-5.0,
+            description=f"t{i}",
+            merchant=rng.choice(MERCHANTS),
+        )
+        for i in range(n)
+    ]
+    db.add_all(txns)
+    db.flush()
+    for t in txns:
+        weights = [8, 1, 1] if t.merchant.lower() != "rare" else [1, 1, 1]
+        for _ in range(rng.randint(0, 2)):
+            db.add(UserLabel(txn_id=t.id, category=rng.choices(LABELS, weights)[0]))
+    db.commit()
+    return txns
+
+
+def _rebuilds():
+    return ml_merchant_index_rebuilds_total._value.get()
+
+
+def _assert_parity(db):
+    for m in MERCHANTS + ["nobody", "cafe 9"]:
+        maj = majority_for_merchant(db, m)
+        expected = _sql_majority(db, m)
+        got = (maj.support, maj.total, maj.p) if maj else None
+        assert got == expected, m
+
+
+def test_index_matches_group_by_query(db_session):
+    _seed(db_session)
+    _assert_parity(db_session)
+    assert majority_for_merchant(db_session, "") is None
+
+
+def test_orm_writes_update_index_incrementally(db_session):
+    db = db_session
+    txns = _seed(db)
+    _assert_parity(db)
+    built = _rebuilds()
+
+    cafe = next(t for t in txns if t.merchant == "Cafe 9")
+    db.add_all([UserLabel(txn_id=cafe.id, category="Coffee") for _ in range(200)])
+    db.commit()
+    assert majority_for_merchant(db, "CAFE 9").label == "Coffee"
+    _assert_parity(db)
+
+    # Rolled-back labels never reach the index
+    db.add_all([UserLabel(txn_id=cafe.id, category="Bogus") for _ in range(100)])
+    db.flush()
+    db.rollback()
+    assert majority_for_merchant(db, "cafe 9").label == "Coffee"
+
+    # Deletes and label edits
+    for lbl in db.query(UserLabel).filter(UserLabel.category == "Coffee").limit(150):
+        db.delete(lbl)
+    db.query(UserLabel).filter(UserLabel.category == "Coffee").first().category = "Tea"
+    db.commit()
+    _assert_parity(db)
+    assert _rebuilds() == built
+
+    # A merchant rename changes the join: index is rebuilt on next lookup
+    cafe.merchant = "Rare"
+    db.commit()
+    _assert_parity(db)
+    assert _rebuilds() == built + 1
+
+
+def test_external_writes_caught_by_fingerprint(db_session, monkeypatch):
+    db = db_session
+    txns = _seed(db)
+    _assert_parity(db)
+    rare = next(t for t in txns if t.merchant == "Rare")
+
+    # Core insert bypasses the ORM hooks (as another worker would)
+    db.execute(
+        insert(UserLabel.__table__),
+        [{"txn_id": rare.id, "category": "Travel"} for _ in range(200)],
+    )
+    db.commit()
+    monkeypatch.setattr(merchant_index, "RECHECK_SECONDS", 0.0)
+    assert majority_for_merchant(db, "rare").label == "Travel"
+    _assert_parity(db)
+
+
+def test_lookup_metrics_and_suggest(db_session):
+    db = db_session
+    _seed(db)
+    hits = ml_merchant_index_lookups_total.labels(result="hit")._value.get()
+    misses = ml_merchant_index_lookups_total.labels(result="miss")._value.get()
+
+    result = suggest_from_majority(db, {"merchant": "walmart"})
+    assert result is not None and result[0] == "Dining"
+    assert result[2]["source"] == "merchant_majority"
+    assert suggest_from_majority(db, {"merchant": "Unseen LLC"}) is None
+
+    assert ml_merchant_index_lookups_total.labels(result="hit")._value.get() == hits + 1
+    assert (
+        ml_merchant_index_lookups_total.labels(result="miss")._value.get() == misses + 1
+    )
+
+
+def test_bulk_updates_invalidate_only_on_merchant(db_session):
+    db = db_session
+    txns = _seed(db)
+    _assert_parity(db)
+    built = _rebuilds()
+    ids = [t.id for t in txns[:50]]
+
+    # Category-only bulk update (rule_matcher.bulk_set_category): index kept
+    db.execute(
+        update(Transaction).where(Transaction.id.in_(ids)).values(category="Dining")
+    )
+    db.commit()
+    _assert_parity(db)
+    assert _rebuilds() == built
+
+    db.execute(
+        update(Transaction).where(Transaction.id.in_(ids)).values(merchant="Rare")
+    )
+    db.commit()
+    _assert_parity(db)
+    assert _rebuilds() == built + 1
+
@@ -0,0 +1,127 @@
+"""Compiled (pandas-free) inference matches the sklearn pipeline."""
+import random
+import warnings
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+from sklearn.isotonic import IsotonicRegression  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+
+from app.ml.compiled import CompiledModel, compile_tables  # noqa: E402
+from app.ml.encode import build_preprocessor  # noqa: E402
+from app.ml.model import SuggestModel, compile_model, load_from_dir, serialize  # noqa: E402
+
+_LABELS = {
+    "Groceries": ["HARRIS TEETER", "WHOLE FOODS", "COSTCO"],
+    "Dining": ["STARBUCKS", "CHIPOTLE"],
+    "Transport": ["UBER", "SHELL GAS"],
+}
+
+
+def _rows(n, seed=0, unseen=False):
+    rng = random.Random(seed)
+    rows, labels = [], []
+    for _ in range(n):
+        label = rng.choice(list(_LABELS))
+        merchant = rng.choice(_LABELS[label])
+        if unseen and rng.random() < 0.3:
+            merchant = "NEW MERCHANT"
+        rows.append(
+            {
+                "norm_desc": f"{merchant.lower()} #{rng.randint(1, 999)} Café ref",
+                "merchant": merchant,
+                "channel": rng.choice(["pos", "online", None]),
+                "mcc": rng.choice(["5411", "5812", ""]),
+                "abs_amount": round(rng.uniform(1, 300), 2),
+                "hour_of_day": rng.randint(0, 23),
+                "dow": rng.randint(0, 6),
+                "is_weekend": rng.random() < 0.3,
+                "is_subscription": 0,
+                "feat_p2p_flag": 0,
+                "feat_p2p_large_outflow": 0,
+            }
+        )
+        labels.append(label)
+    return rows, np.array(labels)
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rows, y = _rows(300)
+    # Parity only needs a fitted model, not a converged one
+    pipe = Pipeline(
+        [("prep", build_preprocessor()), ("clf", LogisticRegression(max_iter=30))]
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        pipe.fit(pd.DataFrame(rows), y)
+    classes = list(pipe.classes_)
+    proba = pipe.predict_proba(pd.DataFrame(rows))
+    calibrators = {
+        cls: IsotonicRegression(out_of_bounds="clip").fit(proba[:, i], y == cls)
+        for i, cls in enumerate(classes[:2])  # last class left uncalibrated
+    }
+    return pipe, classes, calibrators
+
+
+def test_compiled_matches_sklearn_pipeline(fitted):
+    pipe, classes, calibrators = fitted
+    reference = SuggestModel(pipe, classes, calibrators)
+    compiled = compile_model(pipe, classes, calibrators)
+    assert compiled is not None
+    model = SuggestModel(pipe, classes, calibrators, compiled=compiled)
+
+    rows, _ = _rows(80, seed=7, unseen=True)
+    X_ref = pipe.named_steps["prep"].transform(pd.DataFrame(rows))
+    assert abs(compiled.transform(rows) - X_ref).max() < 1e-12
+
+    for got, want in zip(model.predict_many(rows), reference.predict_many(rows)):
+        assert got["label"] == want["label"]
+        assert got["probs"] == pytest.approx(want["probs"], abs=1e-9)
+    assert model.predict_one(rows[0]) == model.predict_many(rows[:1])[0]
+
+
+def test_compiled_matches_lightgbm_pipeline():
+    lgbm = pytest.importorskip("lightgbm")
+    rows, y = _rows(200, seed=11)
+    pipe = Pipeline(
+        [
+            ("prep", build_preprocessor()),
+            ("clf", lgbm.LGBMClassifier(n_estimators=20, min_child_samples=5, verbose=-1)),
+        ]
+    ).fit(pd.DataFrame(rows), y)
+    classes = list(pipe.classes_)
+    reference = SuggestModel(pipe, classes)
+    model = SuggestModel(pipe, classes, compiled=compile_model(pipe, classes))
+
+    rows, _ = _rows(40, seed=12, unseen=True)
+    for got, want in zip(model.predict_many(rows), reference.predict_many(rows)):
+        assert got["label"] == want["label"]
+        assert got["probs"] == pytest.approx(want["probs"], abs=1e-9)
+
+
+def test_unsupported_pipeline_keeps_sklearn_path():
+    from sklearn.preprocessing import StandardScaler
+
+    pipe = Pipeline([("scaler", StandardScaler()), ("clf", LogisticRegression())])
+    with pytest.raises(NotImplementedError):
+        compile_tables(pipe, ["a", "b"])
+    assert compile_model(pipe, ["a", "b"]) is None
+
+
+def test_serialized_artifact_loads_compiled(fitted, tmp_path):
+    pipe, classes, calibrators = fitted
+    for name, data in serialize(pipe, classes, calibrators).items():
+        (tmp_path / name).write_bytes(data)
+    assert (tmp_path / "compiled.joblib").exists()
+
+    model = load_from_dir(str(tmp_path))
+    assert isinstance(model.compiled, CompiledModel)
+    rows, _ = _rows(10, seed=3)
+    ref = SuggestModel(pipe, classes, calibrators).predict_many(rows)
+    assert [r["label"] for r in model.predict_many(rows)] == [r["label"] for r in ref]
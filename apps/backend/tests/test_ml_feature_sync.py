@@ -0,0 +1,139 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.ml import feature_sync
+from app.ml.models import MLFeature, MLFeatureWatermark
+from app.orm_models import Transaction
+
+
+def _ago(db, seconds: float) -> dt.datetime:
+    # Sync compares against the database clock (python time is frozen in tests)
+    return db.execute(select(func.now())).scalar_one() - dt.timedelta(seconds=seconds)
+
+
+def _txn(db, merchant, description, amount, seconds_ago):
+    t = Transaction(
+        date=dt.date(2025, 8, 4),
+        merchant=merchant,
+        description=description,
+        amount=amount,
+        month="2025-08",
+        updated_at=_ago(db, seconds_ago),
+    )
+    db.add(t)
+    db.commit()
+    return t.id
+
+
+def _features(db):
+    rows = db.execute(
+        select(
+            MLFeature.txn_id,
+            MLFeature.channel,
+            MLFeature.is_subscription,
+            MLFeature.feat_p2p_large_outflow,
+        )
+    )
+    return {r.txn_id: r for r in rows}
+
+
+def test_sync_processes_only_changed_rows(db_session):
+    a = _txn(db_session, "Netflix", "monthly plan", -15.49, 120)
+    b = _txn(db_session, "Zelle", "zelle to bob", -250.0, 110)
+    c = _txn(db_session, "Cafe", "latte", -4.5, 100)
+
+    first = feature_sync.sync_features()
+    assert (first["upserted"], first["deleted"]) == (3, 0)
+    assert first["lag_seconds"] >= 100
+    feats = _features(db_session)
+    assert set(feats) == {a, b, c}
+    assert feats[a].is_subscription and feats[b].feat_p2p_large_outflow
+
+    # Nothing changed: nothing re-extracted
+    assert feature_sync.sync_features()["upserted"] == 0
+
+    # Edit one row, soft-delete another
+    db_session.execute(
+        update(Transaction)
+        .where(Transaction.id == c)
+        .values(description="online latte order", updated_at=_ago(db_session, 60))
+    )
+    db_session.execute(
+        update(Transaction)
+        .where(Transaction.id == b)
+        .values(deleted_at=_ago(db_session, 50), updated_at=_ago(db_session, 50))
+    )
+    db_session.commit()
+    res = feature_sync.sync_features()
+    assert (res["upserted"], res["deleted"]) == (1, 1)
+    feats = _features(db_session)
+    assert set(feats) == {a, c}
+    assert feats[c].channel == "online"
+
+    wm = db_session.get(MLFeatureWatermark, feature_sync.WATERMARK)
+    assert wm.last_txn_id == b and wm.rows_processed == 5
+
+
+def test_recent_changes_wait_for_settle_window(db_session):
+    _txn(db_session, "Cafe", "latte", -4.5, 0)
+    assert feature_sync.sync_features(settle_s=30)["upserted"] == 0
+    assert feature_sync.sync_features(settle_s=0)["upserted"] == 1
+    count = db_session.execute(select(func.count()).select_from(MLFeature)).scalar()
+    assert count == 1
+    assert feature_sync.stats()["runs"] >= 2
+
+
+def test_interrupted_sync_resumes_within_the_same_second(db_session, monkeypatch):
+    # Server-default timestamps (CURRENT_TIMESTAMP text on SQLite), all in one commit
+    rows = [
+        Transaction(
+            date=dt.date(2025, 8, 4),
+            merchant=f"Shop {i}",
+            description="purchase",
+            amount=-10.0 - i,
+            month="2025-08",
+        )
+        for i in range(3)
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    ids = {t.id for t in rows}
+
+    real = feature_sync.upsert_features
+    calls = []
+
+    def interrupted(db, batch):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise RuntimeError("worker stopped")
+        return real(db, batch)
+
+    monkeypatch.setattr(feature_sync, "upsert_features", interrupted)
+    with pytest.raises(RuntimeError):
+        feature_sync.sync_features(batch_size=1, settle_s=0)
+    assert len(_features(db_session)) == 1
+
+    monkeypatch.setattr(feature_sync, "upsert_features", real)
+    res = feature_sync.sync_features(batch_size=1, settle_s=0)
+    assert res["upserted"] == 2
+    assert set(_features(db_session)) == ids
+    assert feature_sync.sync_features(settle_s=0)["upserted"] == 0
+
+
+def test_late_commit_behind_watermark_is_rescanned(db_session):
+    a = _txn(db_session, "Cafe", "latte", -4.5, 100)
+    assert feature_sync.sync_features(settle_s=0)["upserted"] == 1
+
+    # A long-running writer commits a row stamped before the watermark
+    late = _txn(db_session, "Zelle", "zelle to bob", -250.0, 130)
+    assert feature_sync.sync_features(settle_s=0, overlap_s=0)["upserted"] == 0
+    assert late not in _features(db_session)
+
+    res = feature_sync.sync_features(settle_s=0, overlap_s=60)
+    assert res["rescanned"] == 2
+    assert set(_features(db_session)) == {a, late}
+    wm = db_session.get(MLFeatureWatermark, feature_sync.WATERMARK)
+    assert wm.last_txn_id == a and wm.rows_processed == 1
+
@@ -0,0 +1,96 @@
+"""Resident online learner: mini-batched partial_fit, debounced snapshots,
+hot reload across workers."""
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+joblib = pytest.importorskip("joblib")
+
+from sklearn.linear_model import SGDClassifier  # noqa: E402
+
+from app.services.ml_online import OnlineLearner  # noqa: E402
+
+_CLASSES = np.array(["Coffee", "Groceries"])
+
+
+class _CountingSGD(SGDClassifier):
+    calls = 0
+
+    def partial_fit(self, X, y, classes=None, sample_weight=None):
+        type(self).calls += 1
+        return super().partial_fit(X, y, classes=classes, sample_weight=sample_weight)
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    clf = _CountingSGD(loss="log_loss", random_state=0)
+    clf.partial_fit(np.array([[1.0, 0.0], [0.0, 1.0]]), _CLASSES, classes=_CLASSES)
+    path = tmp_path / "latest.joblib"
+    joblib.dump((clf, list(_CLASSES)), path)
+    _CountingSGD.calls = 0
+    return path
+
+
+def _learner(path, **kw):
+    kw.setdefault("batch_size", 3)
+    kw.setdefault("flush_interval_s", 60)
+    kw.setdefault("snapshot_debounce_s", 60)
+    return OnlineLearner(path, classifier=lambda obj: obj[0], **kw)
+
+
+def _row(label):
+    x = np.array([[1.0, 0.0]]) if label == "Coffee" else np.array([[0.0, 1.0]])
+    return (lambda _model: x), [label]
+
+
+def test_feedback_is_batched_and_snapshot_is_debounced(model_path):
+    learner = _learner(model_path)
+    mtime = model_path.stat().st_mtime_ns
+
+    out = learner.submit(*_row("Coffee"))
+    assert out["updated"] and not out["applied"] and out["pending"] == 1
+    learner.submit(*_row("Groceries"))
+    assert _CountingSGD.calls == 0
+    out = learner.submit(*_row("Coffee"))
+    assert out["applied"] and out["pending"] == 0
+    assert _CountingSGD.calls == 1  # one partial_fit for the whole batch
+    assert model_path.stat().st_mtime_ns == mtime  # snapshot still debounced
+
+    assert learner.flush() == {"applied": 0, "saved": True, "version": 1}
+    assert model_path.stat().st_mtime_ns != mtime
+    assert learner.flush()["saved"] is False  # nothing new to write
+
+
+def test_unknown_label_is_rejected_synchronously(model_path):
+    out = _learner(model_path).submit(*_row("Rent"))
+    assert out["updated"] is False and out["reason"] == "label_not_in_model"
+    assert out["missing_labels"] == ["Rent"]
+
+
+def test_timers_apply_and_snapshot(model_path):
+    learner = _learner(model_path, flush_interval_s=0.05, snapshot_debounce_s=0.05)
+    learner.submit(*_row("Coffee"))
+    deadline = time.monotonic() + 5
+    while learner.version == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert learner.pending == 0 and learner.version == 1
+
+
+def test_other_worker_reloads_and_unsaved_updates_are_replayed(model_path):
+    a = _learner(model_path, batch_size=1)
+    b = _learner(model_path, batch_size=1)
+    assert a.model() is not None and b.model() is not None
+
+    a.submit(*_row("Coffee"))
+    b.submit(*_row("Groceries"))  # applied in b, not yet saved
+    a.flush()
+    _CountingSGD.calls = 0
+    b.model()  # sees a's snapshot: reloads it and replays b's unsaved batch
+    assert _CountingSGD.calls == 1
+    assert b.flush()["version"] == 2  # saved on top of a's version
+    assert _CountingSGD.calls == 1
+
+    fresh = _learner(model_path)
+    assert fresh.model() is not None and fresh.version == 2
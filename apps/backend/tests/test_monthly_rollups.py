@@ -0,0 +1,318 @@
+"""
+monthly_rollups: incremental maintenance matches a full rebuild, and chart /
+insight readers return the same numbers as aggregating raw transactions.
+"""
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import bindparam, delete, func, select
+
+from app.orm_models import MonthlyRollup
+from app.services import charts_data, insights_expanded, monthly_rollups
+from app.services.ingest_stream import TxnBatchWriter
+from app.services.rule_matcher import bulk_set_category
+from app.transactions import Transaction
+
+U1, U2 = 7, 8
+
+
+def _seed(db, n=300, seed=11):
+    rng = random.Random(seed)
+    merchants = ["Starbucks", "Employer Inc", "Zelle Transfer", "Grocer", None]
+    cats = ["Dining", "income", "Groceries", "", None, "Transfers"]
+    for i in range(n):
+        d = date(2025, rng.randint(1, 6), rng.randint(1, 28))
+        db.add(
+            Transaction(
+                user_id=rng.choice([U1, U2]),
+                date=d,
+                amount=rng.choice([1, -1, -1]) * round(rng.uniform(1, 300), 2),
+                description=f"row {i} {rng.choice(['refund', 'coffee', 'payroll', ''])}",
+                merchant=rng.choice(merchants),
+                category=rng.choice(cats),
+                pending=rng.random() < 0.15,
+            )
+        )
+    db.commit()
+
+
+def _snapshot(db):
+    R = MonthlyRollup
+    cols = (
+        R.user_id, R.month, R.pending, R.category, R.merchant, R.txn_count,
+        R.income, R.spend, R.income_net, R.spend_net, R.inflow, R.outflow,
+        R.outflow_count,
+    )
+    rows = db.execute(select(*cols)).all()
+    return sorted(
+        (tuple(round(v, 6) if isinstance(v, float) else v for v in r) for r in rows),
+        key=repr,
+    )
+
+
+def _assert_matches_rebuild(db):
+    db.commit()
+    incremental = _snapshot(db)
+    monthly_rollups.rebuild(db)
+    db.commit()
+    assert incremental == _snapshot(db)
+    assert incremental  # sanity: something was aggregated
+
+
+def test_incremental_paths_match_rebuild(db_session):
+    db = db_session
+    _seed(db)
+    _assert_matches_rebuild(db)
+
+    # ORM edit: category + move a row to another month
+    t = db.query(Transaction).filter(Transaction.user_id == U1).first()
+    t.category = "Shopping"
+    t.date = date(2025, 9, 3)
+    t.amount = -42.0
+    db.commit()
+    _assert_matches_rebuild(db)
+
+    # ORM delete + soft delete
+    db.delete(db.query(Transaction).filter(Transaction.user_id == U2).first())
+    db.query(Transaction).filter(Transaction.user_id == U1).offset(3).first().note = "x"
+    _assert_matches_rebuild(db)
+
+    # Core bulk delete (replace-mode ingest / reset paths)
+    db.execute(
+        delete(Transaction).where(
+            Transaction.user_id == U2, Transaction.month == "2025-02"
+        )
+    )
+    _assert_matches_rebuild(db)
+
+    # Bulk rule apply
+    ids = [i for (i,) in db.query(Transaction.id).filter(Transaction.user_id == U1)]
+    bulk_set_category(db, {i: "Bulk" for i in ids[:40]})
+    _assert_matches_rebuild(db)
+
+    # Streaming ingest (Core INSERT)
+    writer = TxnBatchWriter(db, U2, batch_size=2)
+    for k in range(5):
+        writer.add(
+            {
+                "date": date(2025, 7, k + 1),
+                "amount": -10.0 - k,
+                "description": f"stream {k}",
+                "merchant": "Cafe",
+            }
+        )
+    writer.flush()
+    _assert_matches_rebuild(db)
+
+
+def test_rollback_discards_pending_keys(db_session):
+    db = db_session
+    _seed(db, n=20)
+    before = _snapshot(db)
+    db.add(Transaction(user_id=U1, date=date(2025, 3, 3), amount=-1.0, description="tmp"))
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert _snapshot(db) == before
+
+
+def test_charts_read_rollups_same_as_raw(db_session):
+    db = db_session
+    _seed(db)
+    T = Transaction
+    scope = (T.user_id == U1, T.month == "2025-03", ~T.pending)
+
+    summary = charts_data.get_month_summary(db, U1, "2025-03")
+    amt_abs = func.abs(T.amount)
+    spend, income = db.execute(
+        select(
+            func.sum(charts_data.spend_case(amt_abs)),
+            func.sum(charts_data.income_case(amt_abs)),
+        ).where(*scope)
+    ).one()
+    assert summary["total_spend"] == pytest.approx(spend)
+    assert summary["total_income"] == pytest.approx(income)
+    assert sum(c["amount"] for c in summary["categories"]) == pytest.approx(spend, abs=0.05)
+
+    cats = charts_data.get_month_categories(db, U1, "2025-03")
+    raw = dict(
+        db.execute(
+            select(T.category, func.sum(-T.amount))
+            .where(*scope, T.amount < 0, T.category.is_not(None), T.category != "")
+            .group_by(T.category)
+        ).all()
+    )
+    assert {c["category"]: c["spend"] for c in cats} == pytest.approx(raw)
+
+    trends = charts_data.get_spending_trends(db, U1, months=3)["trends"]
+    assert [t["month"] for t in trends] == ["2025-04", "2025-05", "2025-06"]
+    raw_spend = db.execute(
+        select(func.sum(charts_data.spend_case())).where(
+            T.user_id == U1, T.month == "2025-05"
+        )
+    ).scalar()
+    assert trends[1]["spending"] == pytest.approx(abs(raw_spend))
+
+    series = charts_data.get_category_timeseries(db, U1, "Dining", months=2)
+    assert [p["month"] for p in series] == ["2025-05", "2025-06"]
+    raw_dining = db.execute(
+        select(func.sum(-T.amount)).where(
+            T.user_id == U1, T.month == "2025-06", T.category == "Dining", T.amount < 0
+        )
+    ).scalar()
+    assert series[1]["amount"] == pytest.approx(raw_dining)
+
+
+def test_month_merchants_from_rollups(db_session, monkeypatch):
+    import app.redis_client
+
+    monkeypatch.setattr(app.redis_client, "redis", lambda: None)
+    db = db_session
+    _seed(db)
+    out = charts_data.get_month_merchants(db, U2, "2025-04", limit=50)
+    rows = (
+        db.query(Transaction)
+        .filter(
+            Transaction.user_id == U2,
+            Transaction.month == "2025-04",
+            Transaction.amount < 0,
+            ~Transaction.pending,
+        )
+        .all()
+    )
+    expected = {}
+    for t in rows:
+        key, _ = charts_data.canonical_and_label(t.merchant or "unknown")
+        tot, cnt = expected.get(key, (0.0, 0))
+        expected[key] = (tot - t.amount, cnt + 1)
+    got = {m["merchant_canonical"]: (m["total"], m["count"]) for m in out["merchants"]}
+    assert set(got) == set(expected)
+    for k, (tot, cnt) in expected.items():
+        assert got[k][0] == pytest.approx(tot) and got[k][1] == cnt
+
+
+@pytest.mark.parametrize("status", ["posted", "pending", "all"])
+def test_insights_load_month_from_rollups(db_session, status):
+    db = db_session
+    _seed(db)
+    agg = insights_expanded.load_month(db, "2025-02", status=status, large_limit=5)
+    q = db.query(Transaction).filter(Transaction.month == "2025-02")
+    if status != "all":
+        q = q.filter(Transaction.pending.is_(status == "pending"))
+    txns = q.all()
+    assert agg.transaction_count == len(txns)
+    assert agg.income == pytest.approx(sum(t.amount for t in txns if t.amount >= 0))
+    assert agg.spend == pytest.approx(sum(-t.amount for t in txns if t.amount < 0))
+    unknown = [t for t in txns if t.category in (None, "", "Unknown") and t.amount < 0]
+    assert agg.unknown_spend_count == len(unknown)
+    top = sorted((t for t in txns if t.amount < 0), key=lambda t: t.amount)[:5]
+    assert [x["id"] for x in agg.large_transactions] == [t.id for t in top]
+
+
+def test_bulk_update_refreshes_rollups(db_session):
+    db = db_session
+    _seed(db)
+    _assert_matches_rebuild(db)
+
+    # Bulk categorize (agent tools), then read insights from rollups
+    ids = [
+        i
+        for (i,) in db.query(Transaction.id).filter(
+            Transaction.user_id == U1,
+            Transaction.month == "2025-03",
+            Transaction.amount < 0,
+            Transaction.pending.is_(False),
+        )
+    ]
+    db.query(Transaction).filter(Transaction.id.in_(ids)).update(
+        {Transaction.category: "Bulk Cat"}, synchronize_session=False
+    )
+    db.commit()
+    agg = insights_expanded.load_month(db, "2025-03", user_id=U1)
+    expected = db.query(func.sum(-Transaction.amount)).filter(Transaction.id.in_(ids))
+    assert agg.by_category["Bulk Cat"] == pytest.approx(expected.scalar())
+    _assert_matches_rebuild(db)
+
+    # Rows moved to a literal month / user
+    db.execute(
+        Transaction.__table__.update()
+        .where(Transaction.__table__.c.id.in_(ids[:3]))
+        .values(month="2025-11")
+    )
+    db.query(Transaction).filter(Transaction.id.in_(ids[:3])).update(
+        {Transaction.month: "2025-12", Transaction.user_id: U2},
+        synchronize_session=False,
+    )
+    _assert_matches_rebuild(db)
+
+    # SET from a SQL expression: falls back to a full rebuild
+    db.query(Transaction).filter(Transaction.user_id == U2).update(
+        {Transaction.category: func.upper(Transaction.merchant)},
+        synchronize_session=False,
+    )
+    db.query(Transaction).filter(Transaction.id.in_(ids[3:6])).update(
+        {Transaction.month: func.substr(Transaction.month, 1, 4) + "-10"},
+        synchronize_session=False,
+    )
+    _assert_matches_rebuild(db)
+
+
+def test_bulk_updates_are_scoped_to_affected_users(db_session, monkeypatch):
+    db = db_session
+    _seed(db)
+    _assert_matches_rebuild(db)
+    full = []
+    per_user = []
+    real_full = monthly_rollups.rebuild
+    real_user = monthly_rollups._rebuild_user
+    monkeypatch.setattr(monthly_rollups, "rebuild", lambda *a, **k: full.append(1))
+    monkeypatch.setattr(
+        monthly_rollups,
+        "_rebuild_user",
+        lambda db, user_id: per_user.append(user_id) or real_user(db, user_id),
+    )
+    u1 = [i for (i,) in db.query(Transaction.id).filter(Transaction.user_id == U1)]
+
+    # Per-id executemany: months are read by id, targets from the parameters
+    T = Transaction.__table__
+    db.execute(
+        T.update()
+        .where(T.c.id == bindparam("_id"))
+        .values(category=bindparam("_cat"), month=bindparam("_month")),
+        [{"_id": i, "_cat": "PK Bulk", "_month": f"2025-1{i % 2}"} for i in u1[:8]],
+    )
+    db.commit()
+
+    # Computed month: only the matched user is recomputed
+    db.query(Transaction).filter(Transaction.id.in_(u1[8:12])).update(
+        {Transaction.month: func.substr(Transaction.month, 1, 4) + "-11"},
+        synchronize_session=False,
+    )
+    db.commit()
+    assert full == [] and per_user == [U1]
+
+    monkeypatch.setattr(monthly_rollups, "rebuild", real_full)
+    _assert_matches_rebuild(db)
+
+
+def test_failed_sync_is_retried(db_session, monkeypatch):
+    db = db_session
+    _seed(db, n=40)
+    _assert_matches_rebuild(db)
+    real = monthly_rollups.refresh
+
+    def broken(db, keys):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(monthly_rollups, "refresh", broken)
+    db.query(Transaction).filter(Transaction.user_id == U1).first().amount = -999.0
+    db.commit()  # the write still commits
+    monkeypatch.setattr(monthly_rollups, "refresh", real)
+
+    incremental = _snapshot(db)
+    monthly_rollups.sync(db)  # next reader retries the failed keys
+    db.commit()
+    assert _snapshot(db) != incremental
+    _assert_matches_rebuild(db)
+
@@ -0,0 +1,114 @@
+"""
+Tests for the in-process vector index behind the SQLite RAG path.
+"""
+import random
+import struct
+
+import pytest
+from sqlalchemy import text
+
+from app.services import rag_index, rag_store
+
+
+def _insert_doc(db, url, vendor="acme"):
+    return db.execute(
+        text(
+            "INSERT INTO rag_documents (source, url, vendor, content_hash, status) "
+            "VALUES ('url', :u, :v, 'h', 'ok') RETURNING id"
+        ),
+        {"u": url, "v": vendor},
+    ).fetchone()[0]
+
+
+def _insert_chunk(db, doc_id, idx, content, vec):
+    db.execute(
+        text(
+            "INSERT INTO rag_chunks (doc_id, chunk_idx, content, meta_json, embedding) "
+            "VALUES (:d, :i, :c, '{}', :b)"
+        ),
+        {"d": doc_id, "i": idx, "c": content, "b": struct.pack(f"{len(vec)}f", *vec)},
+    )
+
+
+@pytest.fixture
+def seeded(db, monkeypatch):
+    rag_index.invalidate()
+    rng = random.Random(7)
+    doc_id = _insert_doc(db, "https://example.com/a")
+    vecs = [[rng.uniform(-1, 1) for _ in range(8)] for _ in range(40)]
+    for i, v in enumerate(vecs):
+        _insert_chunk(db, doc_id, i, f"chunk {i}", v)
+    db.commit()
+    query = [rng.uniform(-1, 1) for _ in range(8)]
+
+    async def fake_embed(texts, input_type="passage"):
+        return [query for _ in texts]
+
+    monkeypatch.setattr(rag_store, "embed_texts", fake_embed)
+    yield vecs, query
+    rag_index.invalidate()
+
+
+async def test_semantic_search_matches_bruteforce(db, seeded):
+    vecs, query = seeded
+    hits = await rag_store.semantic_search(db, "anything", k=5)
+
+    expected = sorted(
+        range(len(vecs)), key=lambda i: rag_store._cos(query, vecs[i]), reverse=True
+    )[:5]
+    assert [h["chunk_idx"] for h in hits] == expected
+    for h in hits:
+        assert h["score"] == pytest.approx(
+            rag_store._cos(query, vecs[h["chunk_idx"]]), abs=1e-5
+        )
+        assert h["url"] == "https://example.com/a"
+        assert h["meta"] == {}
+
+
+async def test_index_is_reused_and_rebuilt_on_change(db, seeded):
+    vecs, query = seeded
+    await rag_store.semantic_search(db, "q", k=3)
+    builds = rag_index.stats()["builds"]
+    await rag_store.semantic_search(db, "q", k=3)
+    assert rag_index.stats()["builds"] == builds
+
+    # A new chunk identical to the query must become the top hit without
+    # an explicit invalidate (fingerprint changes).
+    doc_id = _insert_doc(db, "https://example.com/b")
+    _insert_chunk(db, doc_id, 0, "exact", query)
+    db.commit()
+    hits = await rag_store.semantic_search(db, "q", k=1)
+    assert rag_index.stats()["builds"] == builds + 1
+    assert hits[0]["content"] == "exact"
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-6)
+
+
+def test_index_skips_minority_dimension(db, seeded):
+    doc_id = _insert_doc(db, "https://example.com/odd")
+    _insert_chunk(db, doc_id, 0, "odd", [1.0, 0.0, 0.0])
+    db.commit()
+    idx = rag_index.build_index(db)
+    assert idx.dim == 8
+    assert idx.size == 40
+
+
+def test_empty_index_returns_no_hits(db):
+    rag_index.invalidate()
+    assert rag_index.search(db, [0.1, 0.2], k=5) == []
+
+
+async def test_ingest_files_stores_sqlite_embeddings(db, monkeypatch):
+    rag_index.invalidate()
+    monkeypatch.setattr(rag_store, "_pdf_bytes_to_text", lambda b: "hello world")
+    monkeypatch.setattr(rag_store, "chunk_text", lambda t: ["hello", "world"])
+
+    async def fake_embed(texts, input_type="passage"):
+        return [[1.0, 0.0] if t == "hello" else [0.0, 1.0] for t in texts]
+
+    monkeypatch.setattr(rag_store, "embed_texts", fake_embed)
+    await rag_store.ingest_files(db, [{"filename": "doc.pdf", "bytes": b"%PDF"}])
+
+    top = rag_index.search(db, [0.0, 2.0], k=1)
+    assert len(top) == 1
+    assert top[0][1] == pytest.approx(1.0)
+    rag_index.invalidate()
@@ -0,0 +1,80 @@
+from datetime import date
+
+import numpy as np
+
+from app.orm_models import RecurringSeries
+from app.services import analytics
+from app.services.recurring import merchant_stats, scan_recurring
+from app.transactions import Transaction
+
+
+def _txn(merchant, d, amount, category=None):
+    return Transaction(
+        date=d,
+        merchant=merchant,
+        amount=amount,
+        category=category,
+        month=f"{d.year:04d}-{d.month:02d}",
+    )
+
+
+def _seed(db):
+    db.add_all(
+        [
+            _txn("Spotify", date(2025, 5, 5), -12),
+            _txn("Spotify", date(2025, 6, 5), -12),
+            _txn("Spotify", date(2025, 7, 6), -12),
+            _txn("Spotify", date(2025, 8, 5), -12),
+            _txn("Grocer", date(2025, 6, 1), -20),
+            _txn("Grocer", date(2025, 6, 3), -90),
+            _txn("Grocer", date(2025, 7, 20), -45),
+            _txn("Savings", date(2025, 6, 1), -100, category="Transfer"),
+            _txn("Savings", date(2025, 7, 1), -100, category="Transfer"),
+        ]
+    )
+    db.commit()
+
+
+def test_merchant_stats_vectorized_values(db_session):
+    _seed(db_session)
+    st = merchant_stats(db_session, Transaction.merchant, Transaction.amount < 0)
+    by = {m: i for i, m in enumerate(st.merchant)}
+    s = by["Spotify"]
+    assert st.count[s] == 4
+    assert st.mean_abs[s] == 12 and st.std_abs[s] == 0
+    assert st.median_gap[s] == 31  # gaps 31, 31, 30
+    assert st.dom_peak[s] == 0.75
+    assert st.first_seen[s] == np.datetime64("2025-05-05")
+    g = by["Grocer"]
+    assert st.median_gap[g] == (2 + 47) / 2
+    assert np.isclose(st.std_abs[g], np.std([20, 90, 45]))
+
+
+def test_scan_recurring_bulk_upserts(db_session):
+    _seed(db_session)
+    assert scan_recurring(db_session) == 1  # Grocer too noisy, transfers skipped
+    s = db_session.query(RecurringSeries).one()
+    assert (s.merchant, s.cadence, s.next_due) == ("Spotify", "monthly", date(2025, 9, 4))
+
+    db_session.add(_txn("Spotify", date(2025, 9, 5), -12))
+    db_session.commit()
+    assert scan_recurring(db_session) == 1
+    db_session.expire_all()
+    s = db_session.query(RecurringSeries).one()
+    assert (s.first_seen, s.last_seen) == (date(2025, 5, 5), date(2025, 9, 5))
+
+
+def test_detect_recurring_uses_engine(db_session):
+    _seed(db_session)
+    items = analytics.detect_recurring(db_session, lookback=6)["items"]
+    # Savings has only two charges in the window
+    assert [i["merchant"] for i in items] == ["spotify", "grocer"]
+    top = items[0]
+    assert top == {
+        "merchant": "spotify",  # merchant_canonical
+        "count": 4,
+        "avg_amount": 12.0,
+        "median_gap_days": 31,
+        "strength": 0.88,
+    }
+    assert isinstance(top["median_gap_days"], int)
@@ -93,3 +93,85 @@ def test_report_excel_include_transactions_toggle(client, db_session):
         == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
     assert r2.content[:2] == b"PK"
+
+
+def test_report_excel_stream_matches_buffered_sheets(client, db_session):
+    from io import BytesIO
+
+    openpyxl = __import__("pytest").importorskip("openpyxl")
+    month = "2024-05"
+    _add_sample_month(db_session, month)
+
+    buffered = client.get(f"/report/excel?month={month}")
+    streamed = client.get(f"/report/excel?month={month}&stream=true")
+    assert streamed.status_code == 200
+    assert streamed.content[:2] == b"PK"
+
+    def sheets(body):
+        wb = openpyxl.load_workbook(BytesIO(body))
+        return {ws.title: [[c.value for c in row] for row in ws.iter_rows()] for ws in wb}
+
+    assert sheets(streamed.content) == sheets(buffered.content)
+
+
+def test_report_excel_stream_empty_month_matches_buffered(client, db_session):
+    from io import BytesIO
+
+    openpyxl = __import__("pytest").importorskip("openpyxl")
+    month = "2019-01"  # no transactions
+
+    buffered = client.get(f"/report/excel?month={month}")
+    streamed = client.get(f"/report/excel?month={month}&stream=true")
+    assert streamed.status_code == 200
+
+    def titles(body):
+        return openpyxl.load_workbook(BytesIO(body)).sheetnames
+
+    assert "Transactions" not in titles(streamed.content)
+    assert titles(streamed.content) == titles(buffered.content)
+
+
+def test_report_excel_stream_falls_back_without_openpyxl(client, db_session, monkeypatch):
+    import app.routers.report as report_router
+
+    month = "2024-05"
+    _add_sample_month(db_session, month)
+    monkeypatch.setattr(report_router, "OPENPYXL_AVAILABLE", False)
+
+    r = client.get(f"/report/excel?month={month}&stream=true")
+    assert r.status_code == 200
+    assert r.content[:2] == b"PK"
+
+
+def test_report_transactions_csv_and_ndjson(client, db_session):
+    import csv
+    import json
+
+    from sqlalchemy import update
+
+    from app.orm_models import User
+
+    month = "2024-06"
+    _add_sample_month(db_session, month)
+    # The export is scoped to the requesting (client fixture) user
+    owner = db_session.query(User).filter(User.email == "admin@test.local").one()
+    db_session.execute(
+        update(Transaction).where(Transaction.month == month).values(user_id=owner.id)
+    )
+    db_session.commit()
+
+    r = client.get(f"/report/transactions?month={month}")
+    assert r.status_code == 200
+    assert r.headers.get("content-type", "").startswith("text/csv")
+    rows = list(csv.DictReader(r.text.splitlines()))
+    assert [row["description"] for row in rows] == [
+        f"Groceries {month}",
+        f"Paycheck {month}",
+    ]
+    assert rows[0]["amount"] == "-50.25"
+
+    r = client.get(f"/report/transactions?month={month}&format=ndjson")
+    assert r.status_code == 200
+    assert r.headers.get("content-type") == "application/x-ndjson"
+    docs = [json.loads(line) for line in r.text.splitlines()]
+    assert [d["category_slug"] for d in docs] == ["Groceries", "Income"]
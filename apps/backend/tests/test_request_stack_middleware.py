@@ -0,0 +1,92 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import asgi_stack
+from app.middleware.asgi_stack import BodyLimitMiddleware, RequestStackMiddleware
+from app.utils.request_ctx import get_request_id
+
+
+def _app(max_body_bytes=None, **kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int, request: Request):
+        request.state.llm_path = "primary"
+        return {"id": item_id, "rid": get_request_id()}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    @app.post("/ingest")
+    def ingest():
+        return {"ok": True}
+
+    if max_body_bytes is not None:
+        app.add_middleware(BodyLimitMiddleware, max_body_bytes=max_body_bytes)
+    app.add_middleware(RequestStackMiddleware, router=app.router, **kwargs)
+    return app
+
+
+def test_headers_request_id_and_llm_path():
+    client = TestClient(_app())
+    r = client.get("/items/7", headers={"X-Request-ID": "rid-123"})
+    assert r.status_code == 200
+    assert r.json() == {"id": 7, "rid": "rid-123"}
+    assert r.headers["X-Request-ID"] == "rid-123"
+    assert r.headers["X-LLM-Path"] == "primary"
+    assert r.headers["X-Content-Type-Options"] == "nosniff"
+    assert r.headers["X-Frame-Options"] == "DENY"
+
+    r = client.get("/stream")
+    assert r.text == "abc"
+    assert r.headers["X-LLM-Path"] == "unknown"
+    assert r.headers["X-Request-ID"]
+
+
+def test_body_limit_rejects_large_ingest_only():
+    client = TestClient(_app(max_body_bytes=10))
+    assert client.post("/ingest", content=b"x" * 11).status_code == 413
+    assert client.post("/ingest", content=b"x" * 5).status_code == 200
+
+
+def test_body_limit_413_carries_cors_headers():
+    from app.main import ALLOW_ORIGINS, MAX_UPLOAD_MB, app
+
+    origin = ALLOW_ORIGINS[0]
+    big = b"x" * (MAX_UPLOAD_MB * 1024 * 1024 + 1)
+    r = TestClient(app).post("/ingest", content=big, headers={"Origin": origin})
+    assert r.status_code == 413
+    assert r.headers["access-control-allow-origin"] == origin
+    assert r.headers["X-Request-ID"]
+
+
+def test_route_template_and_latency_metrics():
+    app = _app()
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nope")
+
+    if asgi_stack._LATENCY is None:
+        return
+    from prometheus_client import REGISTRY
+
+    def count(route: str, status: str) -> float:
+        return (
+            REGISTRY.get_sample_value(
+                "http_route_latency_seconds_count",
+                {"method": "GET", "route": route, "status": status},
+            )
+            or 0.0
+        )
+
+    assert count("/items/{item_id}", "200") >= 2
+    assert count("unmatched", "404") >= 1
+    assert (
+        REGISTRY.get_sample_value(
+            "http_route_in_flight", {"method": "GET", "route": "/items/{item_id}"}
+        )
+        == 0.0
+    )
@@ -0,0 +1,106 @@
+"""
+Compiled rule matcher: parity with the per-rule scan, caching and bulk apply.
+"""
+
+import datetime as dt
+import random
+from types import SimpleNamespace
+
+from app.orm_models import Rule, Transaction
+from app.services import rule_matcher
+from app.services.explain_service import _rule_matches_txn
+from app.services.rules_apply import apply_all_active_rules
+from app.services.rules_engine import apply_rules
+
+
+def test_aho_corasick_finds_overlapping_needles():
+    ac = rule_matcher.AhoCorasick(["he", "she", "his", "hers", "star", "starbucks"])
+    assert ac.find("ushers") == {0, 1, 3}
+    assert ac.find("starbucks #12") == {4, 5}
+    assert ac.find("nothing") == set()
+
+
+def test_compiled_matches_reference_scan():
+    rng = random.Random(3)
+    words = ["star", "bucks", "amzn", "mkt", "uber", "eats", "shell", "oil", "a", ""]
+    rules = [
+        SimpleNamespace(
+            id=i,
+            category=f"cat{i}",
+            merchant=rng.choice(words + [None]),
+            description=rng.choice(words + [None, None]),
+            pattern=rng.choice(words + [None, None, None]),
+        )
+        for i in range(60)
+    ]
+    compiled = rule_matcher.CompiledRules(
+        (r.id, r.category, r.merchant, r.description, r.pattern) for r in rules
+    )
+    for _ in range(300):
+        txn = SimpleNamespace(
+            merchant=(
+                " ".join(rng.sample(words, 2)).upper() if rng.random() > 0.1 else None
+            ),
+            description=" ".join(rng.sample(words, 3)) if rng.random() > 0.1 else None,
+        )
+        expected = next((r for r in rules if _rule_matches_txn(r, txn)), None)
+        got = compiled.match(txn.merchant, txn.description)
+        assert (got.rule_id if got else None) == (expected.id if expected else None)
+
+
+def test_rules_engine_apply_rules():
+    rules = [
+        {"target": "merchant", "pattern": "Uber", "category": "Transport"},
+        {"target": "description", "pattern": "eats", "category": "Dining"},
+    ]
+    assert apply_rules({"merchant": "UBER *TRIP"}, rules) == "Transport"
+    assert (
+        apply_rules({"merchant": "Other", "description": "Uber Eats"}, rules)
+        == "Dining"
+    )
+    assert apply_rules({"merchant": "Other"}, rules) is None
+
+
+def test_apply_all_uses_cache_and_sees_rule_crud(db_session):
+    db = db_session
+    db.add_all(
+        [
+            Transaction(
+                date=dt.date(2030, 1, 3),
+                merchant="Starbucks",
+                description="Latte",
+                amount=-5.0,
+            ),
+            Transaction(
+                date=dt.date(2030, 1, 4),
+                merchant="Shell Oil",
+                description="fuel",
+                amount=-40.0,
+            ),
+            Transaction(
+                date=dt.date(2030, 1, 5),
+                merchant="Grocer",
+                description="food",
+                amount=-9.0,
+                category="Groceries",
+            ),
+        ]
+    )
+    db.add(Rule(merchant="starbucks", category="Coffee", active=True))
+    db.commit()
+
+    applied, skipped, details = apply_all_active_rules(db, "2030-01")
+    assert (applied, skipped) == (1, 1)
+    assert details[0]["category"] == "Coffee"
+
+    first = rule_matcher.get_active_rules(db)
+    assert rule_matcher.get_active_rules(db) is first
+
+    db.add(Rule(pattern="shell", category="Fuel", active=True))
+    db.commit()
+    assert rule_matcher.get_active_rules(db) is not first
+
+    applied, skipped, _ = apply_all_active_rules(db, "2030-01")
+    assert (applied, skipped) == (1, 0)
+    cats = {t.merchant: t.category for t in db.query(Transaction).all()}
+    assert cats == {"Starbucks": "Coffee", "Shell Oil": "Fuel", "Grocer": "Groceries"}
@@ -0,0 +1,69 @@
+import json
+
+from app.utils import state_store
+from app.utils.state_store import PersistentList
+
+
+def _lines(path):
+    return [json.loads(x) for x in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_lazy_load_and_delta_appends(tmp_path):
+    log = tmp_path / "txns.log.jsonl"
+    a = PersistentList(log)
+    a.append({"id": 1, "category": None})
+    a.append({"id": 2, "category": None})
+    assert a.flush() == 2
+
+    b = PersistentList(log)
+    assert not b.loaded
+    b.append({"id": 3})  # before first read: lands after the log
+    assert [t["id"] for t in b] == [1, 2, 3]
+    b[0]["category"] = "Coffee"
+    b.replace(b[0])
+    assert b.flush() == 2
+    assert _lines(log)[-2:] == [{"a": {"id": 3}}, {"u": {"id": 1, "category": "Coffee"}}]
+
+    assert PersistentList(log)[0]["category"] == "Coffee"
+
+
+def test_clear_and_positional_edits(tmp_path):
+    log = tmp_path / "rules.log.jsonl"
+    a = PersistentList(log)
+    a.extend([{"id": i} for i in range(3)])
+    a.flush()
+    a.clear()
+    a.append({"id": 9})
+    a.flush()
+    assert list(PersistentList(log)) == [{"id": 9}]
+
+    a.insert(0, {"id": 8})
+    a.flush()  # positional edit -> snapshot
+    assert _lines(log) == [{"a": {"id": 8}}, {"a": {"id": 9}}]
+
+
+def test_compaction_and_max_resident(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "COMPACT_MIN_OPS", 10)
+    log = tmp_path / "txns.log.jsonl"
+    a = PersistentList(log, max_resident=5)
+    list(a)  # load (empty)
+    for i in range(20):
+        a.append({"id": i})
+    a.flush()
+    assert len(a) <= 5 * 1.1 and a[-1] == {"id": 19}
+    assert len(_lines(log)) == len(a)  # compacted: one add per resident entry
+
+
+def test_legacy_json_import_and_persist_switch(tmp_path):
+    legacy = tmp_path / "txns.json"
+    legacy.write_text(json.dumps([{"id": 1}, {"id": 2}]), encoding="utf-8")
+    log = tmp_path / "txns.log.jsonl"
+    a = PersistentList(log, legacy_json=legacy)
+    assert len(a) == 2
+    a.flush()
+    assert _lines(log) == [{"a": {"id": 1}}, {"a": {"id": 2}}]
+
+    off = PersistentList(tmp_path / "off.log.jsonl", should_persist=lambda: False)
+    off.append({"id": 1})
+    assert off.flush() == 0
+    assert not (tmp_path / "off.log.jsonl").exists()
@@ -0,0 +1,211 @@
+"""suggest_batch: batched inference matches the
+single-row suggest_auto / predict_one paths."""
+import random
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app import config
+from app.ml import runtime
+from app.ml.model import SuggestModel
+from app.services.suggest import serve
+from app.transactions import Transaction
+
+_WORDS = [
+    "amazon", "AMAZON.com", "Ubereats", "lyft", "whole foods", "target", "rent",
+    "parent", "coffee", "drug", "drugstore", "pharmacyx", "gym", "fitness",
+    "groceries", "grocery", "gas", "gasoline", "dinner", "lunch", "x", "-",
+    "lyftarget", "walmartarget",  # overlapping keywords
+]
+
+
+def _random_txns(n, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "merchant": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 3))),
+            "description": "".join(
+                rng.choice(_WORDS) + rng.choice([" ", "", ":"])
+                for _ in range(rng.randint(0, 4))
+            ),
+            "amount": rng.choice([None, 0, -3.5, 12.25, -250.0]),
+        }
+        for i in range(n)
+    ]
+
+
+def test_predict_many_matches_predict_one():
+    pd = pytest.importorskip("pandas")
+    from sklearn.compose import ColumnTransformer
+    from sklearn.isotonic import IsotonicRegression
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"abs_amount": rng.uniform(1, 300, 200), "dow": rng.integers(0, 7, 200)})
+    y = np.where(df.abs_amount > 150, "Rent", np.where(df.dow >= 5, "Dining", "Groceries"))
+    pipe = Pipeline(
+        [
+            ("pre", ColumnTransformer([("num", "passthrough", ["abs_amount", "dow"])])),
+            ("clf", LogisticRegression(max_iter=500)),
+        ]
+    ).fit(df, y)
+    classes = list(pipe.classes_)
+    proba = pipe.predict_proba(df)
+    calibrators = {
+        cls: IsotonicRegression(out_of_bounds="clip").fit(proba[:, i], y == cls)
+        for i, cls in enumerate(classes[:2])
+    }
+    model = SuggestModel(pipe, classes, calibrators)
+
+    rows = df.head(40).to_dict("records")
+    for one, many in zip((model.predict_one(r) for r in rows), model.predict_many(rows)):
+        assert many["label"] == one["label"]
+        assert many["confidence"] == pytest.approx(one["confidence"])
+        assert many["probs"] == pytest.approx(one["probs"])
+    assert model.predict_many([]) == []
+
+
+class _CountingModel:
+    """Deterministic fake runtime model that counts predict calls."""
+
+    def __init__(self):
+        self.one_calls = 0
+        self.many_calls = 0
+
+    def _predict(self, row):
+        if row["abs_amount"] >= 100:
+            probs = {"Rent": 0.8, "Shopping": 0.15, "Dining": 0.05}
+        else:
+            probs = {"Dining": 0.4, "Groceries": 0.35, "Shopping": 0.25}
+        label = max(probs, key=probs.get)
+        return {"label": label, "confidence": probs[label], "probs": probs}
+
+    def predict_one(self, row):
+        self.one_calls += 1
+        return self._predict(row)
+
+    def predict_many(self, rows):
+        self.many_calls += 1
+        return [self._predict(r) for r in rows]
+
+
+@pytest.fixture
+def fake_runtime(monkeypatch):
+    model = _CountingModel()
+    meta = {"run_id": "run_batch1234", "val_f1_macro": 0.8, "class_count": 4}
+    monkeypatch.setattr(runtime, "_load_latest", lambda: (model, meta))
+    monkeypatch.setattr(config, "SUGGEST_ENABLE_SHADOW", True, raising=False)
+    return model
+
+
+def test_suggest_batch_matches_suggest_auto(fake_runtime):
+    txns = [{**t, "amount": t["amount"] or 0.0} for t in _random_txns(60, seed=5)]
+    batched = serve.suggest_batch(txns)
+    singles = [serve.suggest_auto(t) for t in txns]
+
+    assert batched == singles
+    assert fake_runtime.many_calls == 1
+    assert fake_runtime.one_calls == len(txns)
+    assert {r[3] for r in batched} >= {"model"}
+    assert serve.suggest_batch([]) == []
+
+
+def test_batch_endpoint_scores_month_unknowns(client, db_session, fake_runtime):
+    from app.orm_models import User
+
+    db = db_session
+    owner = db.query(User).filter(User.email == "admin@test.local").one()
+    other = User(email="other@test.local", password_hash="x")
+    db.add(other)
+    db.flush()
+    foreign = Transaction(
+        user_id=other.id,
+        date=date(2025, 3, 9),
+        amount=-9.0,
+        description="someone else",
+        category=None,
+    )
+    db.add(foreign)
+    for i, cat in enumerate([None, "", "Unknown", "Dining", None]):
+        db.add(
+            Transaction(
+                user_id=owner.id,
+                date=date(2025, 3, i + 1),
+                amount=-(20.0 + 100 * (i % 2)),
+                description=f"coffee shop {i}",
+                merchant="Cafe",
+                category=cat,
+            )
+        )
+    db.add(
+        Transaction(
+            user_id=owner.id,
+            date=date(2025, 4, 1),
+            amount=-5.0,
+            description="x",
+            category=None,
+        )
+    )
+    db.commit()
+    foreign_id = foreign.id
+    unknown_ids = [
+        t.id
+        for t in db.query(Transaction).order_by(Transaction.id)
+        if t.month == "2025-03"
+        and t.user_id == owner.id
+        and t.category in (None, "", "Unknown")
+    ]
+    db.close()  # release the connection before the app shuts down
+
+    r = client.post("/ml/suggestions/batch", json={"month": "2025-03", "top_k": 2})
+    assert r.status_code == 200, r.text
+    items = r.json()["items"]
+    assert [int(it["txn_id"]) for it in items] == unknown_ids
+    assert all(it["event_id"] and 1 <= len(it["candidates"]) <= 2 for it in items)
+    assert fake_runtime.many_calls == 1
+
+    # Other users' and unknown ids are skipped
+    r = client.post(
+        "/ml/suggestions/batch",
+        json={"txn_ids": [unknown_ids[1], foreign_id, "999999"]},
+    )
+    assert r.status_code == 200
+    assert [int(it["txn_id"]) for it in r.json()["items"]] == [unknown_ids[1]]
+
+    assert client.post("/ml/suggestions/batch", json={}).status_code == 400
+    assert client.post("/ml/suggestions/batch", json={"txn_ids": ["x"]}).status_code == 400
+
+
+def test_single_endpoint_skips_unreadable_txns(
+    client, db_session, fake_runtime, monkeypatch
+):
+    from app import db as app_db
+    from app.routers import suggestions as suggestions_router
+
+    # The router binds SessionLocal at import; point it at the test engine
+    monkeypatch.setattr(suggestions_router, "SessionLocal", app_db.SessionLocal)
+
+    db = db_session
+    txns = [
+        Transaction(date=date(2025, 3, i + 1), amount=-20.0, description=f"cafe {i}")
+        for i in range(2)
+    ]
+    db.add_all(txns)
+    db.commit()
+    bad, good = (t.id for t in txns)
+    db.close()
+
+    real = suggestions_router._txn_dict
+
+    def flaky(txn):
+        if txn.id == bad:
+            raise ValueError("undecryptable row")
+        return real(txn)
+
+    monkeypatch.setattr(suggestions_router, "_txn_dict", flaky)
+    r = client.post("/ml/suggestions", json={"txn_ids": [bad, good]})
+    assert r.status_code == 200, r.text
+    assert [int(it["txn_id"]) for it in r.json()["items"]] == [good]
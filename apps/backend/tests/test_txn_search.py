@@ -0,0 +1,77 @@
+import datetime as dt
+
+from sqlalchemy import delete, func, or_, select, update
+
+from app.orm_models import Transaction
+from app.services import txn_search
+from app.services.txn_search import text_match
+
+
+def _add(db, merchant, description, category=None):
+    t = Transaction(
+        date=dt.date(2025, 8, 3),
+        merchant=merchant,
+        merchant_canonical=merchant.lower(),
+        description=description,
+        category=category,
+        amount=-4.5,
+        month="2025-08",
+    )
+    db.add(t)
+    return t
+
+
+def _ids(db, clause):
+    return set(db.scalars(select(Transaction.id).where(clause)))
+
+
+def _seed(db):
+    _add(db, "STARBUCKS #123", "latte", "Dining")
+    _add(db, "Whole Foods", "weekly groceries", "Groceries")
+    _add(db, "Shell Gas", "fuel", "Transport")
+    _add(db, 'Joe "Bar"', "100% juice", None)
+    db.commit()
+
+
+def test_fts_matches_ilike(db_session):
+    _seed(db_session)
+    cols = [Transaction.merchant, Transaction.description]
+    for terms in (["starbucks"], ["GROCER", "shell"], ['"bar"'], ["nothing"]):
+        clause = text_match(db_session, cols, terms)
+        assert "transactions_fts" in str(clause)
+        ilike = or_(*[c.ilike(f"%{t}%") for t in terms for c in cols])
+        assert _ids(db_session, clause) == _ids(db_session, ilike), terms
+
+
+def test_short_or_wildcard_terms_fall_back_to_ilike(db_session):
+    _seed(db_session)
+    cols = [Transaction.description]
+    for terms in (["la"], ["100%"]):
+        clause = text_match(db_session, cols, terms)
+        assert "transactions_fts" not in str(clause)
+        assert len(_ids(db_session, clause)) == 1
+    # unindexed column
+    clause = text_match(db_session, [Transaction.note], ["abc"])
+    assert "transactions_fts" not in str(clause)
+
+
+def test_triggers_keep_index_in_sync(db_session):
+    _seed(db_session)
+    cols = [Transaction.merchant_canonical]
+    db_session.execute(
+        update(Transaction)
+        .where(Transaction.merchant == "Shell Gas")
+        .values(merchant_canonical="chevron")
+    )
+    db_session.execute(delete(Transaction).where(Transaction.category == "Dining"))
+    db_session.commit()
+    assert not _ids(db_session, text_match(db_session, cols, ["shell"]))
+    assert not _ids(db_session, text_match(db_session, cols, ["starbucks"]))
+    assert len(_ids(db_session, text_match(db_session, cols, ["chevron"]))) == 1
+
+    assert txn_search.rebuild(db_session) == "fts5_rebuilt"
+    db_session.commit()
+    indexed = db_session.execute(
+        select(func.count()).select_from(txn_search.table(txn_search.FTS_TABLE))
+    ).scalar_one()
+    assert indexed == 3